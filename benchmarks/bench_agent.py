@@ -0,0 +1,180 @@
+"""
+Agent 吞吐压测。
+
+在后台启动本地 OpenAI 兼容替身服务（benchmarks/fake_openai.py），通过 DASHSCOPE_BASE_URL 让
+build_agent 的模型客户端把请求发往替身服务，对比两种运行方式：
+
+- sync：每个会话重新构建 Agent 和模型客户端，并用 agent.invoke 串行运行（原有方式）；
+- async：Agent 只构建一次，模型客户端来自模型池，由 AgentRunner 用 ainvoke 并发运行 --concurrency 个会话。
+
+每个会话固定为「模型 → 并行工具 → 模型」两轮，统计每秒会话数、p50/p95/p99 延迟和进程内存。
+默认不启用响应缓存；加 --cache 时两种方式都共用一个 ResponseCacheMiddleware，并报告命中率和节省的 token 数。
+结果保存为 JSON（默认 benchmarks/results/<时间>-<git sha>-agent.json）。
+
+运行方式（在仓库根目录）：
+    python -m benchmarks.bench_agent --conversations 200 --concurrency 50 --latency 50
+"""
+import argparse
+import asyncio
+import json
+import os
+import platform
+import sys
+import time
+from datetime import datetime
+
+from benchmarks.bench_mcp import RESULTS_DIR, ROOT, git_sha, percentile
+from benchmarks.fake_openai import FakeOpenAI
+from benchmarks.mock_amap import MockAmapServer
+
+sys.path.insert(0, os.path.join(ROOT, "src"))
+
+QUESTION = "what is the weather outside?"
+
+
+def rss_bytes() -> int:
+  try:
+    with open("/proc/self/status", "r", encoding="utf-8") as f:
+      for line in f:
+        if line.startswith("VmRSS:"):
+          return int(line.split()[1]) * 1024
+  except OSError:
+    pass
+  return 0
+
+
+def summarize(mode: str, latencies, errors: int, elapsed: float, requests: int) -> dict:
+  latencies = sorted(latencies)
+  return {
+    "mode": mode,
+    "conversations": len(latencies),
+    "errors": errors,
+    "seconds": round(elapsed, 4),
+    "conversations_per_sec": round(len(latencies) / elapsed, 2) if elapsed else 0.0,
+    "model_requests": requests,
+    "p50_ms": round(percentile(latencies, 0.5) * 1000, 3),
+    "p95_ms": round(percentile(latencies, 0.95) * 1000, 3),
+    "p99_ms": round(percentile(latencies, 0.99) * 1000, 3),
+    "rss_bytes": rss_bytes(),
+  }
+
+
+def make_middleware(cache: bool) -> list:
+  from build_agent.middleware import ResponseCacheMiddleware
+
+  return [ResponseCacheMiddleware(cache_tools=["get_weather_for_location"])] if cache else []
+
+
+def with_cache_stats(result: dict, middleware: list) -> dict:
+  if middleware:
+    result["cache"] = middleware[0].stats()
+  return result
+
+
+def bench_sync(fake: FakeOpenAI, conversations: int, cache: bool = False) -> dict:
+  from build_agent.agent import create_weather_agent
+  from build_agent.build_tools import Context
+  from build_agent.llm_chat import qwen_model
+
+  middleware = make_middleware(cache)
+  requests = fake.requests
+  latencies, errors = [], 0
+  start = time.perf_counter()
+  for i in range(conversations):
+    began = time.perf_counter()
+    try:
+      agent = create_weather_agent(model=qwen_model(), response_format=None, middleware=middleware)
+      agent.invoke({"messages": [{"role": "user", "content": QUESTION}]},
+                   config={"configurable": {"thread_id": str(i)}}, context=Context(user_id="2"))
+    except Exception:
+      errors += 1
+    latencies.append(time.perf_counter() - began)
+  result = summarize("sync", latencies, errors, time.perf_counter() - start, fake.requests - requests)
+  return with_cache_stats(result, middleware)
+
+
+async def bench_async(fake: FakeOpenAI, conversations: int, concurrency: int, cache: bool = False) -> dict:
+  from build_agent.agent import create_weather_agent
+  from build_agent.build_tools import Context
+  from build_agent.runner import AgentRunner
+
+  middleware = make_middleware(cache)
+  runner = AgentRunner(create_weather_agent(response_format=None, middleware=middleware),
+                       max_concurrency=concurrency)
+  context = Context(user_id="2")
+  requests = fake.requests
+
+  async def timed(i: int):
+    began = time.perf_counter()
+    try:
+      await runner.ainvoke(QUESTION, thread_id=str(i), context=context)
+      ok = True
+    except Exception:
+      ok = False
+    return time.perf_counter() - began, ok
+
+  # 预热：完成首次调用的导入和连接建立
+  await timed(-1)
+  requests = fake.requests
+  start = time.perf_counter()
+  outcomes = await asyncio.gather(*(timed(i) for i in range(conversations)))
+  elapsed = time.perf_counter() - start
+  result = summarize(f"async(c={concurrency})", [o[0] for o in outcomes], sum(not o[1] for o in outcomes),
+                     elapsed, fake.requests - requests)
+  return with_cache_stats(result, middleware)
+
+
+def main():
+  parser = argparse.ArgumentParser(description="Agent 吞吐压测（使用本地 OpenAI 兼容替身服务）")
+  parser.add_argument("--modes", default="sync,async", help="逗号分隔：sync,async")
+  parser.add_argument("--conversations", type=int, default=200, help="async 模式的会话数")
+  parser.add_argument("--sync-conversations", type=int, default=20, help="sync 模式的会话数（串行，耗时较长）")
+  parser.add_argument("--concurrency", type=int, default=50, help="async 模式同时运行的会话数")
+  parser.add_argument("--latency", type=float, default=50, help="替身服务每次模型调用的延迟（毫秒）")
+  parser.add_argument("--tool-calls", type=int, default=2, help="每轮模型输出的工具调用数")
+  parser.add_argument("--cache", action="store_true", help="启用模型响应和工具结果缓存")
+  parser.add_argument("--output", default=None, help="结果 JSON 路径，默认 benchmarks/results/<时间>-<git sha>-agent.json")
+  args = parser.parse_args()
+  modes = [m.strip() for m in args.modes.split(",") if m.strip()]
+
+  fake = FakeOpenAI(latency=args.latency / 1000, tool_calls=args.tool_calls)
+  results = []
+  with MockAmapServer(fake) as server:
+    os.environ["DASHSCOPE_BASE_URL"] = f"{server.base_url}/v1"
+    os.environ["DASHSCOPE_API_KEY"] = "benchmark"
+    if "sync" in modes:
+      results.append(bench_sync(fake, args.sync_conversations, args.cache))
+    if "async" in modes:
+      results.append(asyncio.run(bench_async(fake, args.conversations, args.concurrency, args.cache)))
+
+  header = f"{'mode':<16}{'convs':>7}{'errors':>8}{'convs/s':>10}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'rss MB':>9}"
+  print(header)
+  print("-" * len(header))
+  for r in results:
+    print(f"{r['mode']:<16}{r['conversations']:>7}{r['errors']:>8}{r['conversations_per_sec']:>10}"
+          f"{r['p50_ms']:>10}{r['p95_ms']:>10}{r['p99_ms']:>10}{r['rss_bytes'] / 1024 / 1024:>9.1f}")
+  for r in results:
+    if "cache" in r:
+      cache = r["cache"]
+      print(f"{r['mode']}: 模型缓存命中率 {cache['model']['hit_rate']:.1%}，工具缓存命中率 {cache['tool']['hit_rate']:.1%}，"
+            f"节省 token {cache['tokens_saved']}，模型请求 {r['model_requests']} 次")
+
+  report = {
+    "git_sha": git_sha(),
+    "timestamp": datetime.now().isoformat(timespec="seconds"),
+    "python": platform.python_version(),
+    "platform": platform.platform(),
+    "params": {k: v for k, v in vars(args).items() if k != "output"},
+    "results": results,
+  }
+  output = args.output
+  if output is None:
+    os.makedirs(RESULTS_DIR, exist_ok=True)
+    output = os.path.join(RESULTS_DIR, f"{datetime.now():%Y%m%d-%H%M%S}-{report['git_sha']}-agent.json")
+  with open(output, "w", encoding="utf-8") as f:
+    json.dump(report, f, ensure_ascii=False, indent=2)
+  print(f"结果已保存到 {output}")
+
+
+if __name__ == "__main__":
+  main()
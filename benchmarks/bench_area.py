@@ -0,0 +1,123 @@
+"""
+区域搜索压测。
+
+在后台启动本地高德替身服务（benchmarks/mock_amap.py），用 GdSDK.search_area 搜索边长为 --sizes 公里的
+正方形区域，以及长度相同的直线路线走廊（两侧 --buffer 米），统计子区域数、上游请求数、返回 POI 数和耗时，
+观察子区域数和耗时如何随区域面积增长。客户端限流按 --qps 设置，与线上配置一致时耗时主要受 QPS 约束。
+
+结果保存为 JSON（默认 benchmarks/results/<时间>-<git sha>-area.json）。
+
+运行方式（在仓库根目录）：
+    python -m benchmarks.bench_area --sizes 2,5,10,20,40 --tile-radius 2000 --qps 30
+"""
+import argparse
+import asyncio
+import json
+import logging
+import math
+import os
+import platform
+import sys
+import time
+from datetime import datetime
+
+from benchmarks.bench_mcp import RESULTS_DIR, ROOT, git_sha
+from benchmarks.mock_amap import MockAmap, MockAmapServer
+
+sys.path.insert(0, os.path.join(ROOT, "src"))
+
+CENTER = (116.397128, 39.916527)
+
+
+def square(side_km: float) -> str:
+  lng, lat = CENTER
+  d_lat = side_km * 1000 / 2 / 110540
+  d_lng = side_km * 1000 / 2 / (111320 * math.cos(math.radians(lat)))
+  return f"{lng - d_lng:.6f},{lat - d_lat:.6f};{lng + d_lng:.6f},{lat - d_lat:.6f};" \
+         f"{lng + d_lng:.6f},{lat + d_lat:.6f};{lng - d_lng:.6f},{lat + d_lat:.6f}"
+
+
+def route(length_km: float) -> str:
+  lng, lat = CENTER
+  d_lng = length_km * 1000 / 2 / (111320 * math.cos(math.radians(lat)))
+  return f"{lng - d_lng:.6f},{lat:.6f};{lng + d_lng:.6f},{lat:.6f}"
+
+
+async def run(args) -> dict:
+  from build_mcp.services.gd_sdk import GdSDK
+
+  mock = MockAmap(latency=args.latency / 1000, pois=args.pois, seed=args.seed)
+  results = []
+  with MockAmapServer(mock) as server:
+    for shape in ("polygon", "path"):
+      for size in [float(s) for s in args.sizes.split(",") if s.strip()]:
+        sdk = GdSDK({
+          "base_url": server.base_url,
+          "api_key": "benchmark",
+          "max_retries": 0,
+          "batch_concurrency": args.concurrency,
+          "max_area_tiles": 100000,
+          "rate_limit": {"enabled": args.qps > 0, "qps": args.qps},
+          "cache": {"enabled": False},
+        }, logger=logging.getLogger("bench_area"))
+        requests = mock.requests
+        spec = {"polygon": square(size)} if shape == "polygon" else {"path": route(size), "buffer": args.buffer}
+        start = time.perf_counter()
+        async with sdk:
+          result = await sdk.search_area(keywords="餐厅", tile_radius=args.tile_radius, **spec)
+        elapsed = time.perf_counter() - start
+        item = {
+          "shape": shape,
+          "size_km": size,
+          "area_km2": round(size * size if shape == "polygon" else size * args.buffer * 2 / 1000, 2),
+          "tiles": result["tiles"],
+          "failed_tiles": result["failed_tiles"],
+          "upstream_requests": mock.requests - requests,
+          "pois": len(result["pois"]),
+          "seconds": round(elapsed, 3),
+        }
+        print(f"[{shape} {size:g}km] {item['tiles']} 个子区域  {item['seconds']}s", file=sys.stderr)
+        results.append(item)
+
+  return {
+    "git_sha": git_sha(),
+    "timestamp": datetime.now().isoformat(timespec="seconds"),
+    "python": platform.python_version(),
+    "platform": platform.platform(),
+    "params": {k: v for k, v in vars(args).items() if k != "output"},
+    "results": results,
+  }
+
+
+def main():
+  parser = argparse.ArgumentParser(description="区域搜索压测（使用本地高德替身服务）")
+  parser.add_argument("--sizes", default="2,5,10,20,40", help="逗号分隔的正方形边长 / 路线长度（公里）")
+  parser.add_argument("--tile-radius", type=int, default=2000, help="子区域半径（米）")
+  parser.add_argument("--buffer", type=int, default=500, help="路线两侧的搜索宽度（米）")
+  parser.add_argument("--concurrency", type=int, default=8, help="同时查询的子区域数")
+  parser.add_argument("--qps", type=float, default=30, help="客户端限流 QPS，0 表示不限流")
+  parser.add_argument("--latency", type=float, default=20, help="替身服务延迟（毫秒）")
+  parser.add_argument("--pois", type=int, default=60, help="替身服务每个网格生成的 POI 数")
+  parser.add_argument("--seed", type=int, default=0)
+  parser.add_argument("--output", default=None, help="结果 JSON 路径，默认 benchmarks/results/<时间>-<git sha>-area.json")
+  args = parser.parse_args()
+
+  report = asyncio.run(run(args))
+  header = f"{'shape':<9}{'size km':>9}{'km²':>9}{'tiles':>7}{'failed':>8}{'requests':>10}{'pois':>7}{'seconds':>9}"
+  print(header)
+  print("-" * len(header))
+  for r in report["results"]:
+    print(f"{r['shape']:<9}{r['size_km']:>9g}{r['area_km2']:>9g}{r['tiles']:>7}{r['failed_tiles']:>8}"
+          f"{r['upstream_requests']:>10}{r['pois']:>7}{r['seconds']:>9}")
+
+  output = args.output
+  if output is None:
+    os.makedirs(RESULTS_DIR, exist_ok=True)
+    output = os.path.join(RESULTS_DIR, f"{datetime.now():%Y%m%d-%H%M%S}-{report['git_sha']}-area.json")
+  with open(output, "w", encoding="utf-8") as f:
+    json.dump(report, f, ensure_ascii=False, indent=2)
+  print(f"结果已保存到 {output}")
+
+
+if __name__ == "__main__":
+  main()
@@ -0,0 +1,180 @@
+"""
+Agent 调用高德工具的开销对比。
+
+在后台启动本地高德替身服务（benchmarks/mock_amap.py），对同一组 locate_ip / search_nearby 调用比较：
+
+- spawn：每次调用启动一个 stdio MCP 子进程（原先按需连接 MCP 服务的做法）；
+- stdio：一个常驻的 stdio MCP 会话；
+- http：RemoteMCPTools 会话池连接 streamable-http 服务；
+- local：LocalMCPTools 进程内桥接，直接调用工具函数。
+
+每种方式统计 LangChain 工具单次调用的 p50/p95/p99 延迟和吞吐。替身服务延迟默认为 0，
+结果主要反映工具调用本身的开销；每次调用使用不同的 IP / 坐标，不会命中 SDK 缓存。
+
+运行方式（在仓库根目录）：
+    python -m benchmarks.bench_bridge --requests 200
+"""
+import argparse
+import asyncio
+import json
+import os
+import platform
+import sys
+import time
+from datetime import datetime
+
+from langchain_core.messages import ToolCall
+from mcp import ClientSession, StdioServerParameters
+from mcp.client.stdio import stdio_client
+
+from benchmarks.bench_mcp import RESULTS_DIR, ROOT, Workloads, free_port, git_sha, http_server, percentile, server_env
+from benchmarks.mock_amap import MockAmap, MockAmapServer
+
+sys.path.insert(0, os.path.join(ROOT, "src"))
+
+MODES = ("spawn", "stdio", "http", "local")
+
+
+def stdio_params(base_url: str) -> StdioServerParameters:
+  return StdioServerParameters(command=sys.executable, args=["-m", "build_mcp", "stdio"],
+                               env=server_env(base_url), cwd=ROOT)
+
+
+def session_caller(session: ClientSession):
+  async def call(name: str, arguments: dict) -> bool:
+    result = await session.call_tool(name, arguments)
+    return not result.isError and bool((result.structuredContent or {}).get("success", True))
+  return call
+
+
+def tool_caller(tools: list):
+  tools = {tool.name: tool for tool in tools}
+
+  async def call(name: str, arguments: dict) -> bool:
+    message = await tools[name].ainvoke(ToolCall(name=name, args=arguments, id="bench", type="tool_call"))
+    return message.status == "success" and bool((message.artifact or {}).get("success", True))
+  return call
+
+
+async def spawn_call(base_url: str, name: str, arguments: dict) -> bool:
+  async with stdio_client(stdio_params(base_url)) as (read, write):
+    async with ClientSession(read, write) as session:
+      await session.initialize()
+      return await session_caller(session)(name, arguments)
+
+
+async def drive(call, args) -> dict:
+  """
+  按 --concurrency 并发执行 --requests 次调用，返回延迟统计。call 返回 False 或抛出异常时计为错误。
+  """
+  workloads = Workloads(args.seed)
+  calls = [workloads.call(i) for i in range(args.requests)]
+  semaphore = asyncio.Semaphore(args.concurrency)
+  latencies = []
+  errors = 0
+
+  async def one(name, arguments):
+    nonlocal errors
+    async with semaphore:
+      start = time.perf_counter()
+      try:
+        if not await call(name, arguments):
+          errors += 1
+      except Exception:
+        errors += 1
+      latencies.append(time.perf_counter() - start)
+
+  start = time.perf_counter()
+  await asyncio.gather(*(one(name, arguments) for name, arguments in calls))
+  elapsed = time.perf_counter() - start
+  latencies.sort()
+  return {
+    "calls": len(calls),
+    "errors": errors,
+    "calls_per_sec": round(len(calls) / elapsed, 2),
+    "p50_ms": round(percentile(latencies, 0.5) * 1000, 3),
+    "p95_ms": round(percentile(latencies, 0.95) * 1000, 3),
+    "p99_ms": round(percentile(latencies, 0.99) * 1000, 3),
+  }
+
+
+async def bench_mode(mode: str, base_url: str, args) -> dict:
+  if mode == "spawn":
+    # 每次调用都启动子进程，调用次数按比例减少
+    spawn_args = argparse.Namespace(**{**vars(args), "requests": max(1, args.requests // 10)})
+    return await drive(lambda name, arguments: spawn_call(base_url, name, arguments), spawn_args)
+
+  if mode == "stdio":
+    async with stdio_client(stdio_params(base_url)) as (read, write):
+      async with ClientSession(read, write) as session:
+        await session.initialize()
+        return await drive(session_caller(session), args)
+
+  if mode == "http":
+    from build_agent.mcp_tools import RemoteMCPTools
+
+    async with http_server(base_url, free_port()) as url:
+      async with RemoteMCPTools(url, pool_size=args.pool_size) as remote:
+        result = await drive(tool_caller(await remote.aget_tools()), args)
+        result["pool"] = remote.stats()
+        return result
+
+  # local：进程内桥接，服务模块在导入时读取 BASE_URL
+  os.environ.update(server_env(base_url))
+  from build_agent.mcp_tools import LocalMCPTools
+  from build_mcp.services import server
+
+  try:
+    return await drive(tool_caller(LocalMCPTools().get_tools()), args)
+  finally:
+    await server.close_sdk()
+
+
+async def run(args) -> dict:
+  mock = MockAmap(latency=args.latency / 1000, seed=args.seed)
+  results = []
+  with MockAmapServer(mock) as amap:
+    for mode in [m.strip() for m in args.modes.split(",") if m.strip()]:
+      result = {"mode": mode, **await bench_mode(mode, amap.base_url, args)}
+      print(f"[{mode}] {result['calls_per_sec']} calls/s  p50 {result['p50_ms']} ms", file=sys.stderr)
+      results.append(result)
+  return {
+    "git_sha": git_sha(),
+    "timestamp": datetime.now().isoformat(timespec="seconds"),
+    "python": platform.python_version(),
+    "platform": platform.platform(),
+    "params": {k: v for k, v in vars(args).items() if k != "output"},
+    "results": results,
+  }
+
+
+def main():
+  parser = argparse.ArgumentParser(description="Agent 调用高德工具的开销对比（使用本地高德替身服务）")
+  parser.add_argument("--modes", default=",".join(MODES), help="逗号分隔：spawn,stdio,http,local")
+  parser.add_argument("--requests", type=int, default=200, help="每种方式的调用次数（spawn 为其 1/10）")
+  parser.add_argument("--concurrency", type=int, default=1, help="并发调用数，默认串行调用以测量单次调用开销")
+  parser.add_argument("--pool-size", type=int, default=4, help="http 方式的会话池大小")
+  parser.add_argument("--latency", type=float, default=0, help="替身服务延迟（毫秒）")
+  parser.add_argument("--seed", type=int, default=0)
+  parser.add_argument("--output", default=None, help="结果 JSON 路径，默认 benchmarks/results/<时间>-<git sha>-bridge.json")
+  args = parser.parse_args()
+
+  report = asyncio.run(run(args))
+  header = f"{'mode':<8}{'calls':>7}{'errors':>8}{'calls/s':>10}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}"
+  print(header)
+  print("-" * len(header))
+  for r in report["results"]:
+    print(f"{r['mode']:<8}{r['calls']:>7}{r['errors']:>8}{r['calls_per_sec']:>10}"
+          f"{r['p50_ms']:>10}{r['p95_ms']:>10}{r['p99_ms']:>10}")
+
+  output = args.output
+  if output is None:
+    os.makedirs(RESULTS_DIR, exist_ok=True)
+    output = os.path.join(RESULTS_DIR, f"{datetime.now():%Y%m%d-%H%M%S}-{report['git_sha']}-bridge.json")
+  with open(output, "w", encoding="utf-8") as f:
+    json.dump(report, f, ensure_ascii=False, indent=2)
+  print(f"结果已保存到 {output}")
+
+
+if __name__ == "__main__":
+  main()
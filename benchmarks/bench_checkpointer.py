@@ -0,0 +1,187 @@
+"""
+Agent 会话存储浸泡测试（soak test）。
+
+用本地 OpenAI 兼容替身服务（benchmarks/fake_openai.py，进程内 ASGI 调用）驱动 Agent，
+模拟长期运行的服务：同时有 --threads 个活跃会话，每轮对话随机选择一个活跃会话（并发 --concurrency），
+会话完成 --turns 轮后结束并由新会话替换，共运行 --conversations 轮。
+每完成 --sample-every 轮记录一次进程 RSS 和存储占用，对比不同的 checkpointer：
+
+- memory：InMemorySaver（原有实现，所有检查点一直保留）；
+- bounded：BoundedSaver（压缩旧检查点，超过 --max-threads 个会话时按 LRU 淘汰）；
+- sqlite：BoundedSaver + SQLite 持久化（被淘汰的会话可以从磁盘恢复）。
+
+每种 checkpointer 在独立子进程中运行，避免相互影响内存统计。
+结果保存为 JSON（默认 benchmarks/results/<时间>-<git sha>-checkpointer.json）。
+
+运行方式（在仓库根目录）：
+    python -m benchmarks.bench_checkpointer --threads 5000 --conversations 20000 --max-threads 1000
+"""
+import argparse
+import asyncio
+import gc
+import json
+import os
+import platform
+import random
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+from benchmarks.bench_agent import rss_bytes
+from benchmarks.bench_mcp import RESULTS_DIR, ROOT, git_sha
+
+sys.path.insert(0, os.path.join(ROOT, "src"))
+
+SAVERS = ("memory", "bounded", "sqlite")
+
+
+def make_saver(name: str, args, directory: str):
+  from langgraph.checkpoint.memory import InMemorySaver
+
+  from build_agent.checkpointer import BoundedSaver
+
+  if name == "memory":
+    return InMemorySaver()
+  path = os.path.join(directory, "checkpoints.db") if name == "sqlite" else None
+  return BoundedSaver(max_threads=args.max_threads, path=path)
+
+
+def saver_bytes(saver) -> int:
+  if hasattr(saver, "stats"):
+    return saver.stats()["bytes"]
+  blobs = sum(len(v[1]) for v in saver.blobs.values())
+  checkpoints = sum(
+    len(c[0][1]) + len(c[1][1])
+    for namespaces in saver.storage.values() for items in namespaces.values() for c in items.values()
+  )
+  writes = sum(len(w[2][1]) for items in saver.writes.values() for w in items.values())
+  return blobs + checkpoints + writes
+
+
+async def soak(name: str, args) -> dict:
+  import httpx
+  from langchain.agents import create_agent
+  from langchain.tools import tool
+  from langchain_openai import ChatOpenAI
+
+  from benchmarks.fake_openai import FakeOpenAI
+  from build_agent.runner import AgentRunner
+
+  @tool
+  async def get_weather(city: str) -> str:
+    """Get weather for a given city."""
+    return f"{city} 晴"
+
+  fake = FakeOpenAI(latency=0, tool_calls=1)
+  model = ChatOpenAI(api_key="benchmark", base_url="http://fake/v1", model="qwen-max", max_retries=0,
+                     http_async_client=httpx.AsyncClient(transport=httpx.ASGITransport(app=fake.app())))
+  with tempfile.TemporaryDirectory() as directory:
+    saver = make_saver(name, args, directory)
+    runner = AgentRunner(create_agent(model=model, tools=[get_weather], checkpointer=saver),
+                         max_concurrency=args.concurrency)
+    rng = random.Random(args.seed)
+    # 活跃会话：[会话 ID, 已完成轮数]
+    active = [[str(i), 0] for i in range(args.threads)]
+    next_id = args.threads
+    samples = []
+    done = 0
+    start = time.perf_counter()
+    while done < args.conversations:
+      batch = min(args.sample_every, args.conversations - done)
+      conversations = []
+      for _ in range(batch):
+        session = active[rng.randrange(len(active))]
+        conversations.append((session[0], "北京天气怎么样？"))
+        session[1] += 1
+        if session[1] >= args.turns:
+          session[:] = [str(next_id), 0]
+          next_id += 1
+      results = await runner.run_many(conversations)
+      errors = [r for r in results if isinstance(r, Exception)]
+      if errors:
+        raise errors[0]
+      done += batch
+      gc.collect()
+      samples.append({
+        "conversations": done,
+        "seconds": round(time.perf_counter() - start, 3),
+        "rss_bytes": rss_bytes(),
+        "saver_bytes": saver_bytes(saver),
+      })
+      print(f"[{name}] {done:>7} 轮  RSS {samples[-1]['rss_bytes'] / 1024 / 1024:8.1f} MB  "
+            f"存储 {samples[-1]['saver_bytes'] / 1024 / 1024:8.1f} MB", file=sys.stderr)
+    elapsed = time.perf_counter() - start
+    stats = saver.stats() if hasattr(saver, "stats") else {"threads": len(saver.storage)}
+    if hasattr(saver, "close"):
+      saver.close()
+  # 后一半样本的 RSS 增长，用于判断内存是否平稳
+  tail = samples[len(samples) // 2:]
+  return {
+    "saver": name,
+    "conversations": done,
+    "seconds": round(elapsed, 3),
+    "conversations_per_sec": round(done / elapsed, 2),
+    "rss_start_mb": round(samples[0]["rss_bytes"] / 1024 / 1024, 1),
+    "rss_end_mb": round(samples[-1]["rss_bytes"] / 1024 / 1024, 1),
+    "rss_tail_growth_mb": round((tail[-1]["rss_bytes"] - tail[0]["rss_bytes"]) / 1024 / 1024, 1),
+    "saver_end_mb": round(samples[-1]["saver_bytes"] / 1024 / 1024, 2),
+    "stats": stats,
+    "samples": samples,
+  }
+
+
+def main():
+  parser = argparse.ArgumentParser(description="Agent 会话存储浸泡测试")
+  parser.add_argument("--savers", default=",".join(SAVERS), help="逗号分隔：memory,bounded,sqlite")
+  parser.add_argument("--threads", type=int, default=5000, help="同时活跃的会话数")
+  parser.add_argument("--turns", type=int, default=5, help="每个会话的对话轮数")
+  parser.add_argument("--conversations", type=int, default=20000, help="对话总轮数")
+  parser.add_argument("--concurrency", type=int, default=100, help="同时运行的会话数")
+  parser.add_argument("--max-threads", type=int, default=1000, help="BoundedSaver 内存中保留的会话数")
+  parser.add_argument("--sample-every", type=int, default=1000, help="每隔多少轮采样一次内存")
+  parser.add_argument("--seed", type=int, default=0)
+  parser.add_argument("--run", default=None, help=argparse.SUPPRESS)
+  parser.add_argument("--output", default=None, help="结果 JSON 路径，默认 benchmarks/results/<时间>-<git sha>-checkpointer.json")
+  args = parser.parse_args()
+
+  if args.run:
+    print(json.dumps(asyncio.run(soak(args.run, args)), ensure_ascii=False))
+    return
+
+  results = []
+  child_args = [f"--threads={args.threads}", f"--turns={args.turns}", f"--conversations={args.conversations}",
+                f"--concurrency={args.concurrency}", f"--max-threads={args.max_threads}",
+                f"--sample-every={args.sample_every}", f"--seed={args.seed}"]
+  for name in [s.strip() for s in args.savers.split(",") if s.strip()]:
+    proc = subprocess.run([sys.executable, "-m", "benchmarks.bench_checkpointer", *child_args, "--run", name],
+                          cwd=ROOT, stdout=subprocess.PIPE, text=True, check=True)
+    results.append(json.loads(proc.stdout.strip().splitlines()[-1]))
+
+  header = f"{'saver':<10}{'convs':>8}{'convs/s':>10}{'threads':>9}{'RSS start':>11}{'RSS end':>10}{'tail +MB':>10}{'store MB':>10}"
+  print(header)
+  print("-" * len(header))
+  for r in results:
+    print(f"{r['saver']:<10}{r['conversations']:>8}{r['conversations_per_sec']:>10}{r['stats']['threads']:>9}"
+          f"{r['rss_start_mb']:>11}{r['rss_end_mb']:>10}{r['rss_tail_growth_mb']:>10}{r['saver_end_mb']:>10}")
+
+  report = {
+    "git_sha": git_sha(),
+    "timestamp": datetime.now().isoformat(timespec="seconds"),
+    "python": platform.python_version(),
+    "platform": platform.platform(),
+    "params": {k: v for k, v in vars(args).items() if k not in ("output", "run")},
+    "results": results,
+  }
+  output = args.output
+  if output is None:
+    os.makedirs(RESULTS_DIR, exist_ok=True)
+    output = os.path.join(RESULTS_DIR, f"{datetime.now():%Y%m%d-%H%M%S}-{report['git_sha']}-checkpointer.json")
+  with open(output, "w", encoding="utf-8") as f:
+    json.dump(report, f, ensure_ascii=False, indent=2)
+  print(f"结果已保存到 {output}")
+
+
+if __name__ == "__main__":
+  main()
@@ -0,0 +1,317 @@
+"""
+MCP 服务离线压测。
+
+在后台启动本地高德替身服务（benchmarks/mock_amap.py），通过 BASE_URL 环境变量让 MCP 服务
+把请求发往替身服务，然后分别经 stdio 和 streamable-http 传输驱动 MCP 服务，统计以下负载的
+吞吐、p50/p95/p99 延迟和服务进程内存：
+
+- single：逐个串行调用 locate_ip / search_nearby；
+- concurrent：按 --concurrency 并发调用 locate_ip / search_nearby；
+- batch：调用 locate_ips，每次 --batch-size 个 IP。
+
+结果保存为 JSON（默认 benchmarks/results/<时间>-<git sha>.json），便于在不同提交之间对比。
+
+运行方式（在仓库根目录）：
+    python -m benchmarks.bench_mcp --transport both --requests 200 --concurrency 16
+"""
+import argparse
+import asyncio
+import json
+import os
+import platform
+import random
+import socket
+import subprocess
+import sys
+import time
+from contextlib import asynccontextmanager
+from datetime import datetime
+
+import httpx
+from mcp import ClientSession, StdioServerParameters
+from mcp.client.stdio import stdio_client
+from mcp.client.streamable_http import streamablehttp_client
+
+from benchmarks.mock_amap import MockAmap, MockAmapServer
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+RESULTS_DIR = os.path.join(ROOT, "benchmarks", "results")
+LOCATIONS = [
+  (116.397128, 39.916527),
+  (121.473701, 31.230416),
+  (113.264385, 23.129112),
+  (114.057868, 22.543099),
+  (120.155070, 30.274084),
+]
+
+
+def percentile(values, q: float) -> float:
+  """
+  线性插值计算分位数，values 需已排序。
+  """
+  if not values:
+    return 0.0
+  pos = (len(values) - 1) * q
+  lower = int(pos)
+  upper = min(lower + 1, len(values) - 1)
+  return values[lower] + (values[upper] - values[lower]) * (pos - lower)
+
+
+def git_sha() -> str:
+  try:
+    return subprocess.check_output(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT, text=True).strip()
+  except (OSError, subprocess.CalledProcessError):
+    return "unknown"
+
+
+def free_port() -> int:
+  with socket.socket() as s:
+    s.bind(("127.0.0.1", 0))
+    return s.getsockname()[1]
+
+
+def server_env(base_url: str, extra: dict = None) -> dict:
+  env = dict(os.environ)
+  env.update({
+    "BASE_URL": base_url,
+    "API_KEY": "benchmark",
+    "PYTHONPATH": os.pathsep.join(filter(None, [os.path.join(ROOT, "src"), env.get("PYTHONPATH")])),
+  })
+  env.update(extra or {})
+  return env
+
+
+class Workloads:
+  """
+  生成确定性的调用参数，每次调用使用不同的 IP / 坐标，避免结果全部命中缓存。
+  """
+
+  def __init__(self, seed: int = 0):
+    self.random = random.Random(seed)
+
+  def ip(self) -> str:
+    return ".".join(str(self.random.randint(1, 254)) for _ in range(4))
+
+  def location(self) -> str:
+    lng, lat = self.random.choice(LOCATIONS)
+    return f"{lng + self.random.uniform(-0.2, 0.2):.6f},{lat + self.random.uniform(-0.2, 0.2):.6f}"
+
+  def call(self, i: int):
+    if i % 2 == 0:
+      return "locate_ip", {"ip": self.ip()}
+    return "search_nearby", {"location": self.location(), "keywords": "餐厅", "radius": 1000, "page_size": 20}
+
+
+async def timed_call(session: ClientSession, name: str, arguments: dict):
+  start = time.perf_counter()
+  try:
+    result = await session.call_tool(name, arguments)
+    ok = not result.isError and bool((result.structuredContent or {}).get("success", True))
+  except Exception:
+    ok = False
+  return time.perf_counter() - start, ok
+
+
+async def read_rss(session: ClientSession) -> int:
+  """
+  从 metrics://prometheus 资源读取服务进程的常驻内存。
+  """
+  try:
+    result = await session.read_resource("metrics://prometheus")
+  except Exception:
+    return 0
+  for content in result.contents:
+    for line in getattr(content, "text", "").splitlines():
+      if line.startswith("process_resident_memory_bytes"):
+        return int(float(line.split()[-1]))
+  return 0
+
+
+def summarize(transport: str, workload: str, latencies, errors: int, items: int, elapsed: float,
+              rss_before: int, rss_after: int) -> dict:
+  latencies = sorted(latencies)
+  return {
+    "transport": transport,
+    "workload": workload,
+    "calls": len(latencies),
+    "items": items,
+    "errors": errors,
+    "seconds": round(elapsed, 4),
+    "calls_per_sec": round(len(latencies) / elapsed, 2) if elapsed else 0.0,
+    "items_per_sec": round(items / elapsed, 2) if elapsed else 0.0,
+    "p50_ms": round(percentile(latencies, 0.5) * 1000, 3),
+    "p95_ms": round(percentile(latencies, 0.95) * 1000, 3),
+    "p99_ms": round(percentile(latencies, 0.99) * 1000, 3),
+    "rss_before_bytes": rss_before,
+    "rss_after_bytes": rss_after,
+  }
+
+
+async def run_workloads(session: ClientSession, transport: str, args) -> list:
+  workloads = Workloads(args.seed)
+  results = []
+
+  # 预热：建立连接、完成首次调用的导入和初始化
+  for i in range(min(4, args.requests)):
+    await timed_call(session, *workloads.call(i))
+
+  if "single" in args.workloads:
+    rss_before = await read_rss(session)
+    latencies, errors = [], 0
+    start = time.perf_counter()
+    for i in range(args.requests):
+      latency, ok = await timed_call(session, *workloads.call(i))
+      latencies.append(latency)
+      errors += not ok
+    elapsed = time.perf_counter() - start
+    results.append(summarize(transport, "single", latencies, errors, args.requests, elapsed,
+                             rss_before, await read_rss(session)))
+
+  if "concurrent" in args.workloads:
+    rss_before = await read_rss(session)
+    semaphore = asyncio.Semaphore(args.concurrency)
+    calls = [workloads.call(i) for i in range(args.requests)]
+
+    async def bounded(name, arguments):
+      async with semaphore:
+        return await timed_call(session, name, arguments)
+
+    start = time.perf_counter()
+    outcomes = await asyncio.gather(*(bounded(name, arguments) for name, arguments in calls))
+    elapsed = time.perf_counter() - start
+    results.append(summarize(transport, "concurrent", [o[0] for o in outcomes], sum(not o[1] for o in outcomes),
+                             args.requests, elapsed, rss_before, await read_rss(session)))
+
+  if "batch" in args.workloads:
+    rss_before = await read_rss(session)
+    batches = max(1, args.requests // args.batch_size)
+    latencies, errors = [], 0
+    start = time.perf_counter()
+    for _ in range(batches):
+      latency, ok = await timed_call(session, "locate_ips", {"ips": [workloads.ip() for _ in range(args.batch_size)]})
+      latencies.append(latency)
+      errors += not ok
+    elapsed = time.perf_counter() - start
+    results.append(summarize(transport, "batch", latencies, errors, batches * args.batch_size, elapsed,
+                             rss_before, await read_rss(session)))
+
+  return results
+
+
+async def bench_stdio(base_url: str, args) -> list:
+  params = StdioServerParameters(command=sys.executable, args=["-m", "build_mcp", "stdio"],
+                                 env=server_env(base_url), cwd=ROOT)
+  async with stdio_client(params) as (read, write):
+    async with ClientSession(read, write) as session:
+      await session.initialize()
+      return await run_workloads(session, "stdio", args)
+
+
+@asynccontextmanager
+async def http_server(base_url: str, port: int):
+  process = subprocess.Popen(
+    [sys.executable, "-m", "build_mcp", "streamable-http", "--host", "127.0.0.1", "--port", str(port)],
+    env=server_env(base_url),
+    cwd=ROOT,
+    stdout=subprocess.DEVNULL,
+    stderr=subprocess.DEVNULL,
+  )
+  try:
+    async with httpx.AsyncClient() as client:
+      for _ in range(200):
+        if process.poll() is not None:
+          raise RuntimeError(f"streamable-http 服务启动失败，退出码 {process.returncode}")
+        try:
+          await client.get(f"http://127.0.0.1:{port}/metrics")
+          break
+        except httpx.TransportError:
+          await asyncio.sleep(0.05)
+      else:
+        raise RuntimeError("等待 streamable-http 服务启动超时")
+    yield f"http://127.0.0.1:{port}/mcp"
+  finally:
+    process.terminate()
+    try:
+      process.wait(timeout=10)
+    except subprocess.TimeoutExpired:
+      process.kill()
+
+
+async def bench_http(base_url: str, args) -> list:
+  async with http_server(base_url, args.port or free_port()) as url:
+    async with streamablehttp_client(url) as (read, write, _):
+      async with ClientSession(read, write) as session:
+        await session.initialize()
+        return await run_workloads(session, "streamable-http", args)
+
+
+def print_table(results: list) -> None:
+  header = f"{'transport':<16}{'workload':<12}{'calls':>7}{'errors':>8}{'calls/s':>10}{'items/s':>10}" \
+           f"{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'rss MB':>9}"
+  print(header)
+  print("-" * len(header))
+  for r in results:
+    print(f"{r['transport']:<16}{r['workload']:<12}{r['calls']:>7}{r['errors']:>8}{r['calls_per_sec']:>10}"
+          f"{r['items_per_sec']:>10}{r['p50_ms']:>10}{r['p95_ms']:>10}{r['p99_ms']:>10}"
+          f"{r['rss_after_bytes'] / 1024 / 1024:>9.1f}")
+
+
+async def run(args) -> dict:
+  mock = MockAmap(
+    latency=args.latency / 1000,
+    jitter=args.jitter / 1000,
+    error_rate=args.error_rate,
+    burst_interval=args.burst_interval,
+    burst_duration=args.burst_duration,
+    seed=args.seed,
+  )
+  results = []
+  with MockAmapServer(mock) as server:
+    if args.transport in ("stdio", "both"):
+      results += await bench_stdio(server.base_url, args)
+    if args.transport in ("streamable-http", "both"):
+      results += await bench_http(server.base_url, args)
+
+  return {
+    "git_sha": git_sha(),
+    "timestamp": datetime.now().isoformat(timespec="seconds"),
+    "python": platform.python_version(),
+    "platform": platform.platform(),
+    "params": {k: v for k, v in vars(args).items() if k != "output"},
+    "upstream": {"requests": mock.requests, "status_counts": {str(k): v for k, v in mock.status_counts.items()}},
+    "results": results,
+  }
+
+
+def main():
+  parser = argparse.ArgumentParser(description="MCP 服务离线压测（使用本地高德替身服务）")
+  parser.add_argument("--transport", default="both", choices=["stdio", "streamable-http", "both"])
+  parser.add_argument("--workloads", default="single,concurrent,batch", help="逗号分隔：single,concurrent,batch")
+  parser.add_argument("--requests", type=int, default=200, help="每种负载的调用次数")
+  parser.add_argument("--concurrency", type=int, default=16, help="concurrent 负载的并发数")
+  parser.add_argument("--batch-size", type=int, default=50, help="batch 负载每次调用的 IP 数量")
+  parser.add_argument("--latency", type=float, default=20, help="替身服务基础延迟（毫秒）")
+  parser.add_argument("--jitter", type=float, default=10, help="替身服务随机附加延迟上限（毫秒）")
+  parser.add_argument("--error-rate", type=float, default=0.0, help="替身服务返回 HTTP 500 的概率")
+  parser.add_argument("--burst-interval", type=float, default=0.0, help="替身服务 429 突发周期（秒）")
+  parser.add_argument("--burst-duration", type=float, default=0.0, help="每个周期内返回 429 的时长（秒）")
+  parser.add_argument("--port", type=int, default=0, help="streamable-http 服务端口，默认随机")
+  parser.add_argument("--seed", type=int, default=0)
+  parser.add_argument("--output", default=None, help="结果 JSON 路径，默认 benchmarks/results/<时间>-<git sha>.json")
+  args = parser.parse_args()
+  args.workloads = [w.strip() for w in args.workloads.split(",") if w.strip()]
+
+  report = asyncio.run(run(args))
+  print_table(report["results"])
+
+  output = args.output
+  if output is None:
+    os.makedirs(RESULTS_DIR, exist_ok=True)
+    output = os.path.join(RESULTS_DIR, f"{datetime.now():%Y%m%d-%H%M%S}-{report['git_sha']}.json")
+  with open(output, "w", encoding="utf-8") as f:
+    json.dump(report, f, ensure_ascii=False, indent=2)
+  print(f"结果已保存到 {output}")
+
+
+if __name__ == "__main__":
+  main()
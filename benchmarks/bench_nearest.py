@@ -0,0 +1,138 @@
+"""
+最近 k 个 POI 搜索压测。
+
+在后台启动本地高德替身服务（benchmarks/mock_amap.py），对不同 POI 密度（--densities，每个网格生成的 POI 数）
+和随机中心点比较两种找「最近 k 个」的方式：
+
+- guess：模拟模型猜测半径调用 search_nearby（每页 20 条），结果不足 k 个时再扩大半径调用一次
+  （--radii 依次尝试），每次重试都多一轮模型调用；
+- nearest：一次调用 GdSDK.search_nearest，在服务内扩大半径。
+
+统计平均上游请求数、工具调用次数（即模型轮数）、返回给模型的 POI 数，以及最终结果与真实最近 k 个是否一致。
+
+结果保存为 JSON（默认 benchmarks/results/<时间>-<git sha>-nearest.json）。
+
+运行方式（在仓库根目录）：
+    python -m benchmarks.bench_nearest --k 5 --densities 1,3,10,40,200 --queries 50
+"""
+import argparse
+import asyncio
+import json
+import logging
+import os
+import platform
+import random
+import sys
+from datetime import datetime
+
+from benchmarks.bench_mcp import RESULTS_DIR, ROOT, git_sha
+from benchmarks.mock_amap import MockAmap, MockAmapServer
+
+sys.path.insert(0, os.path.join(ROOT, "src"))
+
+
+def make_sdk(base_url: str):
+  from build_mcp.services.gd_sdk import GdSDK
+
+  return GdSDK({
+    "base_url": base_url,
+    "api_key": "benchmark",
+    "max_retries": 0,
+    "rate_limit": {"enabled": False},
+    "cache": {"enabled": False},
+    "spatial_cache": {"enabled": False},
+  }, logger=logging.getLogger("bench_nearest"))
+
+
+async def guess(sdk, location: str, k: int, radii) -> dict:
+  calls = 0
+  pois = []
+  for radius in radii:
+    calls += 1
+    result = await sdk.search_nearby(location, keywords="药店", radius=radius, page_size=20)
+    pois = (result or {}).get("pois") or []
+    if len(pois) >= k:
+      break
+  return {"calls": calls, "returned": len(pois), "ids": [poi["id"] for poi in pois[:k]]}
+
+
+async def nearest(sdk, location: str, k: int) -> dict:
+  result = await sdk.search_nearest(location, k=k, keywords="药店")
+  return {"calls": 1, "returned": len(result["pois"]), "ids": [poi["id"] for poi in result["pois"]]}
+
+
+async def run(args) -> dict:
+  from build_mcp.common.geo import haversine, parse_location
+
+  rng = random.Random(args.seed)
+  radii = [int(r) for r in args.radii.split(",") if r.strip()]
+  results = []
+  for density in [int(d) for d in args.densities.split(",") if d.strip()]:
+    mock = MockAmap(pois=density, seed=args.seed)
+    with MockAmapServer(mock) as server:
+      async with make_sdk(server.base_url) as sdk:
+        centers = [f"{116.3 + rng.random() * 0.2:.6f},{39.85 + rng.random() * 0.1:.6f}" for _ in range(args.queries)]
+        truth = []
+        for location in centers:
+          everything = await sdk.search_nearby_all(location, keywords="药店", radius=50000)
+          ranked = sorted((haversine(*parse_location(location), *parse_location(poi["location"])), poi["id"])
+                          for poi in everything["pois"])
+          truth.append([poi_id for _, poi_id in ranked[:args.k]])
+        for strategy in ("guess", "nearest"):
+          start = mock.requests
+          calls = returned = correct = 0
+          for location, expected in zip(centers, truth):
+            item = await (guess(sdk, location, args.k, radii) if strategy == "guess" else nearest(sdk, location, args.k))
+            calls += item["calls"]
+            returned += item["returned"]
+            correct += item["ids"] == expected
+          n = len(centers)
+          results.append({
+            "density": density,
+            "strategy": strategy,
+            "upstream_per_query": round((mock.requests - start) / n, 2),
+            "turns_per_query": round(calls / n, 2),
+            "pois_per_query": round(returned / n, 2),
+            "exact": round(correct / n, 4),
+          })
+          print(f"[{density} {strategy}] 上游 {results[-1]['upstream_per_query']} 次/查询", file=sys.stderr)
+
+  return {
+    "git_sha": git_sha(),
+    "timestamp": datetime.now().isoformat(timespec="seconds"),
+    "python": platform.python_version(),
+    "platform": platform.platform(),
+    "params": {k: v for k, v in vars(args).items() if k != "output"},
+    "results": results,
+  }
+
+
+def main():
+  parser = argparse.ArgumentParser(description="最近 k 个 POI 搜索压测（使用本地高德替身服务）")
+  parser.add_argument("--k", type=int, default=5, help="要找的 POI 数量")
+  parser.add_argument("--densities", default="1,3,10,40,200", help="逗号分隔的替身服务每个网格生成的 POI 数")
+  parser.add_argument("--radii", default="1000,5000,20000,50000", help="guess 方式依次尝试的半径（米）")
+  parser.add_argument("--queries", type=int, default=50, help="每种密度的查询次数")
+  parser.add_argument("--seed", type=int, default=0)
+  parser.add_argument("--output", default=None, help="结果 JSON 路径，默认 benchmarks/results/<时间>-<git sha>-nearest.json")
+  args = parser.parse_args()
+
+  report = asyncio.run(run(args))
+  header = f"{'density':>8}  {'strategy':<9}{'upstream':>10}{'turns':>8}{'pois':>8}{'exact':>8}"
+  print(header)
+  print("-" * len(header))
+  for r in report["results"]:
+    print(f"{r['density']:>8}  {r['strategy']:<9}{r['upstream_per_query']:>10}{r['turns_per_query']:>8}"
+          f"{r['pois_per_query']:>8}{r['exact']:>8}")
+
+  output = args.output
+  if output is None:
+    os.makedirs(RESULTS_DIR, exist_ok=True)
+    output = os.path.join(RESULTS_DIR, f"{datetime.now():%Y%m%d-%H%M%S}-{report['git_sha']}-nearest.json")
+  with open(output, "w", encoding="utf-8") as f:
+    json.dump(report, f, ensure_ascii=False, indent=2)
+  print(f"结果已保存到 {output}")
+
+
+if __name__ == "__main__":
+  main()
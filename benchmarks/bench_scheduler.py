@@ -0,0 +1,138 @@
+"""
+请求调度器压测：批量任务运行时交互式调用的延迟。
+
+在后台启动本地高德替身服务（benchmarks/mock_amap.py），用同一个 GdSDK 同时执行：
+
+- 批量任务：search_nearby_batch 批量周边搜索 --bulk 个坐标（并发 --bulk-concurrency）；
+- 交互式调用：每隔 --interval 秒发起一次 search_nearby，共 --probes 次。
+
+比较三种情况下交互式调用的 p50/p95/p99 延迟和批量任务的耗时：baseline（没有批量任务）、
+off（未启用调度器，批量请求在限流器中先预约配额）、on（启用调度器）。
+
+结果保存为 JSON（默认 benchmarks/results/<时间>-<git sha>-scheduler.json）。
+
+运行方式（在仓库根目录）：
+    python -m benchmarks.bench_scheduler --bulk 600 --qps 50 --probes 40
+"""
+import argparse
+import asyncio
+import json
+import logging
+import os
+import platform
+import sys
+import time
+from datetime import datetime
+
+from benchmarks.bench_mcp import RESULTS_DIR, ROOT, git_sha, percentile
+from benchmarks.mock_amap import MockAmap, MockAmapServer
+
+sys.path.insert(0, os.path.join(ROOT, "src"))
+
+MODES = ("baseline", "off", "on")
+
+
+def make_sdk(base_url: str, args, scheduler: bool):
+  from build_mcp.services.gd_sdk import GdSDK
+
+  return GdSDK({
+    "base_url": base_url,
+    "api_key": "benchmark",
+    "max_retries": 0,
+    "batch_concurrency": args.bulk_concurrency,
+    "rate_limit": {"enabled": True, "qps": args.qps},
+    "cache": {"enabled": False},
+    "spatial_cache": {"enabled": False},
+    "scheduler": {"enabled": scheduler, "max_concurrency": args.max_concurrency,
+                  "interactive_reserved": args.reserved},
+  }, logger=logging.getLogger("bench_scheduler"))
+
+
+async def bench_mode(mode: str, base_url: str, args) -> dict:
+  queries = [{"location": f"{116.2 + (i % 40) * 0.01:.6f},{39.8 + (i // 40) * 0.01:.6f}", "keywords": "餐厅"}
+             for i in range(args.bulk)]
+  async with make_sdk(base_url, args, scheduler=mode == "on") as sdk:
+    bulk = None
+    bulk_seconds = None
+    start = time.perf_counter()
+    if mode != "baseline":
+      bulk = asyncio.ensure_future(sdk.search_nearby_batch(queries))
+      await asyncio.sleep(args.interval)
+
+    latencies = []
+    errors = 0
+    for i in range(args.probes):
+      probe = time.perf_counter()
+      if await sdk.search_nearby(f"116.{300000 + i:06d},39.900000", keywords="咖啡") is None:
+        errors += 1
+      latencies.append(time.perf_counter() - probe)
+      await asyncio.sleep(args.interval)
+
+    if bulk is not None:
+      results = await bulk
+      bulk_seconds = round(time.perf_counter() - start, 3)
+      errors += sum(1 for result in results if not result["success"])
+    latencies.sort()
+    return {
+      "probes": len(latencies),
+      "errors": errors,
+      "p50_ms": round(percentile(latencies, 0.5) * 1000, 3),
+      "p95_ms": round(percentile(latencies, 0.95) * 1000, 3),
+      "p99_ms": round(percentile(latencies, 0.99) * 1000, 3),
+      "bulk_seconds": bulk_seconds,
+      "scheduler": sdk.scheduler_stats(),
+    }
+
+
+async def run(args) -> dict:
+  mock = MockAmap(latency=args.latency / 1000, pois=10, seed=args.seed)
+  results = []
+  with MockAmapServer(mock) as server:
+    for mode in [m.strip() for m in args.modes.split(",") if m.strip()]:
+      result = {"mode": mode, **await bench_mode(mode, server.base_url, args)}
+      print(f"[{mode}] p99 {result['p99_ms']} ms", file=sys.stderr)
+      results.append(result)
+  return {
+    "git_sha": git_sha(),
+    "timestamp": datetime.now().isoformat(timespec="seconds"),
+    "python": platform.python_version(),
+    "platform": platform.platform(),
+    "params": {k: v for k, v in vars(args).items() if k != "output"},
+    "results": results,
+  }
+
+
+def main():
+  parser = argparse.ArgumentParser(description="请求调度器压测（使用本地高德替身服务）")
+  parser.add_argument("--modes", default=",".join(MODES), help="逗号分隔：baseline,off,on")
+  parser.add_argument("--bulk", type=int, default=600, help="批量周边搜索的坐标数")
+  parser.add_argument("--bulk-concurrency", type=int, default=64, help="批量任务的并发数")
+  parser.add_argument("--probes", type=int, default=40, help="交互式调用次数")
+  parser.add_argument("--interval", type=float, default=0.1, help="交互式调用间隔（秒）")
+  parser.add_argument("--qps", type=float, default=50, help="客户端限流 QPS")
+  parser.add_argument("--max-concurrency", type=int, default=16, help="调度器并发上限")
+  parser.add_argument("--reserved", type=int, default=4, help="为交互式调用保留的并发名额")
+  parser.add_argument("--latency", type=float, default=20, help="替身服务延迟（毫秒）")
+  parser.add_argument("--seed", type=int, default=0)
+  parser.add_argument("--output", default=None, help="结果 JSON 路径，默认 benchmarks/results/<时间>-<git sha>-scheduler.json")
+  args = parser.parse_args()
+
+  report = asyncio.run(run(args))
+  header = f"{'mode':<10}{'probes':>8}{'errors':>8}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'bulk s':>9}"
+  print(header)
+  print("-" * len(header))
+  for r in report["results"]:
+    print(f"{r['mode']:<10}{r['probes']:>8}{r['errors']:>8}{r['p50_ms']:>10}{r['p95_ms']:>10}{r['p99_ms']:>10}"
+          f"{r['bulk_seconds'] if r['bulk_seconds'] is not None else '-':>9}")
+
+  output = args.output
+  if output is None:
+    os.makedirs(RESULTS_DIR, exist_ok=True)
+    output = os.path.join(RESULTS_DIR, f"{datetime.now():%Y%m%d-%H%M%S}-{report['git_sha']}-scheduler.json")
+  with open(output, "w", encoding="utf-8") as f:
+    json.dump(report, f, ensure_ascii=False, indent=2)
+  print(f"结果已保存到 {output}")
+
+
+if __name__ == "__main__":
+  main()
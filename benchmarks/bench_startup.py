@@ -0,0 +1,141 @@
+"""
+MCP 服务启动耗时压测。
+
+stdio 模式下每个会话都会启动一个新的服务进程，启动耗时直接体现为用户等待第一次响应的时间。
+本脚本统计：
+
+- import：python -X importtime 报告的 build_mcp.services.server 累计导入耗时，以及
+  新进程中 import build_mcp.services.server 的总耗时（含解释器启动）；
+- first_response：从启动 `uv run build_mcp`（未安装 uv 时为 python -m build_mcp）开始，
+  到 initialize 完成、list_tools 返回、第一次 locate_ip 调用返回的耗时。
+  上游为本地高德替身服务（benchmarks/mock_amap.py）。
+
+每项重复 --runs 次取中位数，结果保存为 JSON（默认 benchmarks/results/<时间>-<git sha>-startup.json）。
+
+运行方式（在仓库根目录）：
+    python -m benchmarks.bench_startup --runs 10
+"""
+import argparse
+import asyncio
+import json
+import os
+import platform
+import shutil
+import statistics
+import subprocess
+import sys
+import time
+from datetime import datetime
+
+from mcp import ClientSession, StdioServerParameters
+from mcp.client.stdio import stdio_client
+
+from benchmarks.bench_mcp import RESULTS_DIR, ROOT, Workloads, git_sha, server_env
+from benchmarks.mock_amap import MockAmap, MockAmapServer
+
+MODULE = "build_mcp.services.server"
+
+
+def launcher_command(launcher: str):
+  """
+  返回启动 MCP 服务的命令和参数，launcher 为 auto 时优先使用 uv。
+  """
+  if launcher == "uv" or (launcher == "auto" and shutil.which("uv")):
+    return "uv", ["run", "build_mcp", "stdio"]
+  return sys.executable, ["-m", "build_mcp", "stdio"]
+
+
+def import_time(env: dict) -> dict:
+  """
+  在新进程中导入服务模块，返回 importtime 报告的累计耗时和进程总耗时（秒）。
+  """
+  start = time.perf_counter()
+  result = subprocess.run([sys.executable, "-X", "importtime", "-c", f"import {MODULE}"],
+                          env=env, cwd=ROOT, capture_output=True, text=True, check=True)
+  wall = time.perf_counter() - start
+  cumulative = 0
+  for line in result.stderr.splitlines():
+    parts = line.split("|")
+    if len(parts) == 3 and parts[2].strip() == MODULE:
+      cumulative = int(parts[1])
+  return {"import": cumulative / 1e6, "process": wall}
+
+
+async def first_response(command: str, args: list, env: dict, ip: str) -> dict:
+  """
+  启动一个 stdio 服务进程，返回 initialize、list_tools 和第一次工具调用完成时距启动的耗时（秒）。
+  """
+  params = StdioServerParameters(command=command, args=args, env=env, cwd=ROOT)
+  start = time.perf_counter()
+  async with stdio_client(params) as (read, write):
+    async with ClientSession(read, write) as session:
+      await session.initialize()
+      initialized = time.perf_counter() - start
+      await session.list_tools()
+      listed = time.perf_counter() - start
+      result = await session.call_tool("locate_ip", {"ip": ip})
+      called = time.perf_counter() - start
+  if result.isError:
+    raise RuntimeError(f"locate_ip 调用失败：{result.content}")
+  return {"initialize": initialized, "list_tools": listed, "first_call": called}
+
+
+def median_ms(samples: list, key: str) -> float:
+  return round(statistics.median(sample[key] for sample in samples) * 1000, 3)
+
+
+async def run(args) -> dict:
+  command, command_args = launcher_command(args.launcher)
+  mock = MockAmap(latency=args.latency / 1000, seed=args.seed)
+  workloads = Workloads(args.seed)
+  with MockAmapServer(mock) as server:
+    env = server_env(server.base_url)
+    imports = [import_time(env) for _ in range(args.runs)]
+    # 每次使用不同的 IP，避免持久化缓存命中
+    responses = [await first_response(command, command_args, env, workloads.ip()) for _ in range(args.runs)]
+
+  results = {
+    "import_ms": median_ms(imports, "import"),
+    "import_process_ms": median_ms(imports, "process"),
+    "initialize_ms": median_ms(responses, "initialize"),
+    "list_tools_ms": median_ms(responses, "list_tools"),
+    "first_call_ms": median_ms(responses, "first_call"),
+  }
+  return {
+    "git_sha": git_sha(),
+    "timestamp": datetime.now().isoformat(timespec="seconds"),
+    "python": platform.python_version(),
+    "platform": platform.platform(),
+    "command": " ".join([command] + command_args),
+    "params": {k: v for k, v in vars(args).items() if k != "output"},
+    "results": results,
+    "samples": {"import": imports, "first_response": responses},
+  }
+
+
+def main():
+  parser = argparse.ArgumentParser(description="MCP 服务启动耗时压测（导入耗时和首次响应耗时）")
+  parser.add_argument("--runs", type=int, default=10, help="重复次数，结果取中位数")
+  parser.add_argument("--launcher", default="auto", choices=["auto", "uv", "python"],
+                      help="启动方式：uv run build_mcp 或 python -m build_mcp，auto 时优先使用 uv")
+  parser.add_argument("--latency", type=float, default=20, help="替身服务基础延迟（毫秒）")
+  parser.add_argument("--seed", type=int, default=0)
+  parser.add_argument("--output", default=None, help="结果 JSON 路径，默认 benchmarks/results/<时间>-<git sha>-startup.json")
+  args = parser.parse_args()
+
+  report = asyncio.run(run(args))
+  print(f"启动命令：{report['command']}")
+  for name, value in report["results"].items():
+    print(f"{name:<20}{value:>10} ms")
+
+  output = args.output
+  if output is None:
+    os.makedirs(RESULTS_DIR, exist_ok=True)
+    output = os.path.join(RESULTS_DIR, f"{datetime.now():%Y%m%d-%H%M%S}-{report['git_sha']}-startup.json")
+  with open(output, "w", encoding="utf-8") as f:
+    json.dump(report, f, ensure_ascii=False, indent=2)
+  print(f"结果已保存到 {output}")
+
+
+if __name__ == "__main__":
+  main()
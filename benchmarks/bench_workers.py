@@ -0,0 +1,189 @@
+"""
+多 worker streamable-http 扩展性压测。
+
+启动本地高德替身服务，依次以 --workers 1、2、4 ... 启动 MCP 服务（python -m build_mcp streamable-http），
+使用多个压测进程持续调用 locate_ip / search_nearby，统计各 worker 数下的吞吐、延迟和扩展效率
+（吞吐 / (worker 数 x 单 worker 吞吐)）。结果保存为 JSON，便于在不同提交之间对比。
+
+运行方式（在仓库根目录，建议在多核机器上运行）：
+    python -m benchmarks.bench_workers --workers 1,2,4 --duration 10 --clients 4 --concurrency 16
+"""
+import argparse
+import asyncio
+import json
+import os
+import platform
+import subprocess
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+
+import httpx
+import yaml
+from mcp import ClientSession
+from mcp.client.streamable_http import streamablehttp_client
+
+from benchmarks.bench_mcp import RESULTS_DIR, ROOT, Workloads, free_port, git_sha, percentile, server_env, timed_call
+
+
+def wait_ready(url: str, process: subprocess.Popen, timeout: float = 30) -> None:
+  deadline = time.monotonic() + timeout
+  while time.monotonic() < deadline:
+    if process.poll() is not None:
+      raise RuntimeError(f"进程启动失败，退出码 {process.returncode}")
+    try:
+      if httpx.get(url, timeout=1).status_code == 200:
+        return
+    except httpx.TransportError:
+      pass
+    time.sleep(0.1)
+  raise RuntimeError(f"等待 {url} 就绪超时")
+
+
+def stop(process: subprocess.Popen) -> None:
+  process.terminate()
+  try:
+    process.wait(timeout=30)
+  except subprocess.TimeoutExpired:
+    process.kill()
+
+
+async def _client_loop(url: str, duration: float, concurrency: int, seed: int):
+  workloads = Workloads(seed)
+  latencies, errors = [], 0
+  async with streamablehttp_client(url) as (read, write, _):
+    async with ClientSession(read, write) as session:
+      await session.initialize()
+      deadline = time.perf_counter() + duration
+      counter = iter(range(10 ** 9))
+
+      async def worker():
+        nonlocal errors
+        while time.perf_counter() < deadline:
+          latency, ok = await timed_call(session, *workloads.call(next(counter)))
+          latencies.append(latency)
+          errors += not ok
+
+      await asyncio.gather(*(worker() for _ in range(concurrency)))
+  return latencies, errors
+
+
+def run_client(url: str, duration: float, concurrency: int, seed: int):
+  """
+  压测进程入口：在单独的进程中运行，避免客户端自身成为瓶颈。
+  """
+  return asyncio.run(_client_loop(url, duration, concurrency, seed))
+
+
+def write_config(path: str) -> str:
+  """
+  生成压测用配置：关闭客户端限流（替身服务没有配额），缓存只放在进程内，
+  避免限流和跨轮次的持久化缓存影响扩展性测量。
+  """
+  with open(os.path.join(ROOT, "src", "build_mcp", "config.yaml"), "r", encoding="utf-8") as f:
+    config = yaml.safe_load(f)
+  config["rate_limit"] = {"enabled": False}
+  config["cache"] = {**(config.get("cache") or {}), "backend": "memory"}
+  with open(path, "w", encoding="utf-8") as f:
+    yaml.safe_dump(config, f, allow_unicode=True)
+  return path
+
+
+def bench_workers(base_url: str, workers: int, args) -> dict:
+  port = free_port()
+  process = subprocess.Popen(
+    [sys.executable, "-m", "build_mcp", "streamable-http", "--host", "127.0.0.1", "--port", str(port),
+     "--workers", str(workers), "--max-concurrency", str(args.max_concurrency)],
+    env=server_env(base_url, {"MCP_CONFIG": args.config}),
+    cwd=ROOT,
+    stdout=subprocess.DEVNULL,
+    stderr=subprocess.DEVNULL,
+  )
+  try:
+    wait_ready(f"http://127.0.0.1:{port}/readyz", process)
+    url = f"http://127.0.0.1:{port}/mcp"
+    with ProcessPoolExecutor(max_workers=args.clients) as pool:
+      start = time.perf_counter()
+      futures = [pool.submit(run_client, url, args.duration, args.concurrency, args.seed + i) for i in range(args.clients)]
+      outcomes = [f.result() for f in futures]
+      elapsed = time.perf_counter() - start
+  finally:
+    stop(process)
+
+  latencies = sorted(latency for outcome in outcomes for latency in outcome[0])
+  errors = sum(outcome[1] for outcome in outcomes)
+  return {
+    "workers": workers,
+    "calls": len(latencies),
+    "errors": errors,
+    "seconds": round(elapsed, 4),
+    "calls_per_sec": round(len(latencies) / args.duration, 2),
+    "p50_ms": round(percentile(latencies, 0.5) * 1000, 3),
+    "p95_ms": round(percentile(latencies, 0.95) * 1000, 3),
+    "p99_ms": round(percentile(latencies, 0.99) * 1000, 3),
+  }
+
+
+def main():
+  parser = argparse.ArgumentParser(description="多 worker streamable-http 扩展性压测（使用本地高德替身服务）")
+  parser.add_argument("--workers", default=None, help="逗号分隔的 worker 数，默认 1,2,4... 直到 CPU 核数")
+  parser.add_argument("--duration", type=float, default=10, help="每轮压测持续秒数")
+  parser.add_argument("--clients", type=int, default=4, help="压测进程数")
+  parser.add_argument("--concurrency", type=int, default=16, help="每个压测进程的并发数")
+  parser.add_argument("--max-concurrency", type=int, default=0, help="服务端每个 worker 的工具并发上限")
+  parser.add_argument("--latency", type=float, default=20, help="替身服务基础延迟（毫秒）")
+  parser.add_argument("--seed", type=int, default=0)
+  parser.add_argument("--output", default=None, help="结果 JSON 路径，默认 benchmarks/results/<时间>-<git sha>-workers.json")
+  args = parser.parse_args()
+
+  if args.workers:
+    worker_counts = [int(w) for w in args.workers.split(",")]
+  else:
+    cpus = os.cpu_count() or 1
+    worker_counts = [1]
+    while worker_counts[-1] * 2 <= cpus:
+      worker_counts.append(worker_counts[-1] * 2)
+
+  os.makedirs(RESULTS_DIR, exist_ok=True)
+  args.config = write_config(os.path.join(RESULTS_DIR, "bench_workers_config.yaml"))
+  mock_port = free_port()
+  mock = subprocess.Popen(
+    [sys.executable, "-m", "benchmarks.mock_amap", "--port", str(mock_port), "--latency", str(args.latency)],
+    cwd=ROOT,
+    stdout=subprocess.DEVNULL,
+    stderr=subprocess.DEVNULL,
+  )
+  try:
+    base_url = f"http://127.0.0.1:{mock_port}"
+    wait_ready(f"{base_url}/_stats", mock)
+    results = []
+    for workers in worker_counts:
+      result = bench_workers(base_url, workers, args)
+      baseline = results[0]["calls_per_sec"] / results[0]["workers"] if results else result["calls_per_sec"] / workers
+      result["efficiency"] = round(result["calls_per_sec"] / (workers * baseline), 3) if baseline else 0.0
+      results.append(result)
+      print(f"workers={workers:<3} calls/s={result['calls_per_sec']:<10} p50={result['p50_ms']}ms "
+            f"p99={result['p99_ms']}ms errors={result['errors']} efficiency={result['efficiency']}")
+  finally:
+    stop(mock)
+
+  report = {
+    "git_sha": git_sha(),
+    "timestamp": datetime.now().isoformat(timespec="seconds"),
+    "python": platform.python_version(),
+    "platform": platform.platform(),
+    "cpu_count": os.cpu_count(),
+    "params": {k: v for k, v in vars(args).items() if k not in ("output", "config")},
+    "results": results,
+  }
+  output = args.output
+  if output is None:
+    output = os.path.join(RESULTS_DIR, f"{datetime.now():%Y%m%d-%H%M%S}-{report['git_sha']}-workers.json")
+  with open(output, "w", encoding="utf-8") as f:
+    json.dump(report, f, ensure_ascii=False, indent=2)
+  print(f"结果已保存到 {output}")
+
+
+if __name__ == "__main__":
+  main()
@@ -0,0 +1,164 @@
+"""
+本地 OpenAI 兼容接口替身服务，用于离线测试和压测 Agent。
+
+提供 /v1/chat/completions（支持 stream），按固定脚本应答：
+- 最后一条用户消息之后还没有工具结果时，一次性调用请求中的前 tool_calls 个工具（参数按 JSON Schema 生成）；
+- 已有工具结果时返回文本答复。
+这样每个会话固定为「模型 → 并行工具 → 模型」两轮，便于测量吞吐。
+
+启动方式：
+    python -m benchmarks.fake_openai --port 18081 --latency 50
+"""
+import argparse
+import asyncio
+import json
+import random
+import time
+import uuid
+
+import uvicorn
+from starlette.applications import Starlette
+from starlette.requests import Request
+from starlette.responses import JSONResponse, StreamingResponse
+from starlette.routing import Route
+
+_SAMPLE_VALUES = {"string": "Beijing", "integer": 1, "number": 1.0, "boolean": True, "array": [], "object": {}}
+
+
+def _sample_arguments(parameters: dict) -> dict:
+  properties = (parameters or {}).get("properties") or {}
+  required = (parameters or {}).get("required") or list(properties)
+  return {name: _SAMPLE_VALUES.get(properties.get(name, {}).get("type"), "Beijing") for name in required}
+
+
+def _tokens(text: str) -> int:
+  # 粗略估算 token 数，约 4 个字符一个 token
+  return max(1, len(text) // 4)
+
+
+class FakeOpenAI:
+  """
+  OpenAI 兼容接口替身。
+
+  Args:
+      latency (float): 每次模型调用的基础延迟（秒）。
+      jitter (float): 随机附加延迟上限（秒）。
+      tool_calls (int): 每轮最多同时调用的工具数。
+      seed (int): 随机种子。
+  """
+
+  def __init__(self, latency: float = 0.05, jitter: float = 0.0, tool_calls: int = 2, seed: int = 0):
+    self.latency = latency
+    self.jitter = jitter
+    self.tool_calls = tool_calls
+    self.random = random.Random(seed)
+    self.requests = 0
+    self.streamed = 0
+    self.prompt_tokens = 0
+    self.completion_tokens = 0
+
+  def _reply(self, body: dict) -> dict:
+    messages = body.get("messages") or []
+    tools = body.get("tools") or []
+    last_user = max((i for i, m in enumerate(messages) if m.get("role") == "user"), default=-1)
+    tool_results = [m for m in messages[last_user + 1:] if m.get("role") == "tool"]
+    if tools and not tool_results:
+      return {
+        "role": "assistant",
+        "content": None,
+        "tool_calls": [
+          {
+            "id": f"call_{uuid.uuid4().hex[:12]}",
+            "type": "function",
+            "function": {
+              "name": tool["function"]["name"],
+              "arguments": json.dumps(_sample_arguments(tool["function"].get("parameters")), ensure_ascii=False),
+            },
+          }
+          for tool in tools[:self.tool_calls]
+        ],
+      }
+    summary = "；".join(str(m.get("content")) for m in tool_results) or "你好"
+    return {"role": "assistant", "content": f"结果：{summary}"}
+
+  def _usage(self, body: dict, message: dict) -> dict:
+    prompt = _tokens(json.dumps(body.get("messages") or [], ensure_ascii=False))
+    completion = _tokens(json.dumps(message, ensure_ascii=False))
+    self.prompt_tokens += prompt
+    self.completion_tokens += completion
+    return {"prompt_tokens": prompt, "completion_tokens": completion, "total_tokens": prompt + completion}
+
+  async def chat_completions(self, request: Request):
+    body = await request.json()
+    self.requests += 1
+    await asyncio.sleep(self.latency + self.random.random() * self.jitter)
+    message = self._reply(body)
+    usage = self._usage(body, message)
+    completion_id = f"chatcmpl-{uuid.uuid4().hex[:12]}"
+    created = int(time.time())
+    model = body.get("model", "fake")
+    finish_reason = "tool_calls" if message.get("tool_calls") else "stop"
+    if not body.get("stream"):
+      return JSONResponse({
+        "id": completion_id,
+        "object": "chat.completion",
+        "created": created,
+        "model": model,
+        "choices": [{"index": 0, "message": message, "finish_reason": finish_reason}],
+        "usage": usage,
+      })
+
+    self.streamed += 1
+    include_usage = (body.get("stream_options") or {}).get("include_usage", False)
+
+    def chunk(delta: dict, reason=None, **extra) -> str:
+      data = {"id": completion_id, "object": "chat.completion.chunk", "created": created, "model": model,
+              "choices": [{"index": 0, "delta": delta, "finish_reason": reason}] if delta is not None else [], **extra}
+      return f"data: {json.dumps(data, ensure_ascii=False)}\n\n"
+
+    async def events():
+      yield chunk({"role": "assistant", "content": ""})
+      if message.get("tool_calls"):
+        for index, call in enumerate(message["tool_calls"]):
+          yield chunk({"tool_calls": [{"index": index, **call}]})
+      else:
+        content = message["content"]
+        for i in range(0, len(content), 8):
+          yield chunk({"content": content[i:i + 8]})
+      yield chunk({}, finish_reason)
+      if include_usage:
+        yield chunk(None, usage=usage)
+      yield "data: [DONE]\n\n"
+
+    return StreamingResponse(events(), media_type="text/event-stream")
+
+  async def stats(self, request: Request):
+    return JSONResponse({
+      "requests": self.requests,
+      "streamed": self.streamed,
+      "prompt_tokens": self.prompt_tokens,
+      "completion_tokens": self.completion_tokens,
+    })
+
+  def app(self) -> Starlette:
+    return Starlette(routes=[
+      Route("/v1/chat/completions", self.chat_completions, methods=["POST"]),
+      Route("/_stats", self.stats, methods=["GET"]),
+    ])
+
+
+def main():
+  parser = argparse.ArgumentParser(description="本地 OpenAI 兼容接口替身服务")
+  parser.add_argument("--host", default="127.0.0.1")
+  parser.add_argument("--port", type=int, default=18081)
+  parser.add_argument("--latency", type=float, default=50, help="每次模型调用的基础延迟（毫秒）")
+  parser.add_argument("--jitter", type=float, default=0, help="随机附加延迟上限（毫秒）")
+  parser.add_argument("--tool-calls", type=int, default=2, help="每轮最多同时调用的工具数")
+  args = parser.parse_args()
+
+  fake = FakeOpenAI(latency=args.latency / 1000, jitter=args.jitter / 1000, tool_calls=args.tool_calls)
+  uvicorn.run(fake.app(), host=args.host, port=args.port, log_level="warning")
+
+
+if __name__ == "__main__":
+  main()
@@ -0,0 +1,214 @@
+"""
+本地高德接口替身服务，用于离线测试和压测。
+
+提供 /v3/ip 和 /v5/place/around 两个接口，返回格式与高德一致的确定性数据，
+并支持配置响应延迟、随机错误率和周期性的 429 限流突发。
+
+启动方式：
+    python -m benchmarks.mock_amap --port 18080 --latency 20 --error-rate 0.01 --burst-interval 10 --burst-duration 1
+"""
+import argparse
+import asyncio
+import hashlib
+import math
+import random
+import threading
+import time
+
+import uvicorn
+from starlette.applications import Starlette
+from starlette.requests import Request
+from starlette.responses import JSONResponse
+from starlette.routing import Route
+
+CITIES = [
+  ("北京市", "北京市", "110000", 116.397128, 39.916527),
+  ("上海市", "上海市", "310000", 121.473701, 31.230416),
+  ("广东省", "广州市", "440100", 113.264385, 23.129112),
+  ("广东省", "深圳市", "440300", 114.057868, 22.543099),
+  ("浙江省", "杭州市", "330100", 120.155070, 30.274084),
+  ("四川省", "成都市", "510100", 104.066541, 30.572269),
+  ("陕西省", "西安市", "610100", 108.939621, 34.343147),
+]
+
+
+def _digest(*parts) -> int:
+  return int.from_bytes(hashlib.md5("|".join(map(str, parts)).encode("utf-8")).digest()[:8], "big")
+
+
+class MockAmap:
+  """
+  高德接口替身。
+
+  Args:
+      latency (float): 基础响应延迟（秒）。
+      jitter (float): 随机附加延迟上限（秒）。
+      error_rate (float): 返回 HTTP 500 的概率（0~1）。
+      burst_interval (float): 限流突发的周期（秒），0 表示不限流。
+      burst_duration (float): 每个周期内返回 429 的时长（秒）。
+      pois (int): 每次周边搜索在最大半径内生成的 POI 数量。
+      seed (int): 随机种子。
+      page_count (bool): 为 True 时 count 只表示当前页的数量（高德 v5 的行为），否则为结果总数。
+  """
+
+  def __init__(self, latency: float = 0.0, jitter: float = 0.0, error_rate: float = 0.0,
+               burst_interval: float = 0.0, burst_duration: float = 0.0, pois: int = 60, seed: int = 0,
+               page_count: bool = False):
+    self.latency = latency
+    self.jitter = jitter
+    self.error_rate = error_rate
+    self.burst_interval = burst_interval
+    self.burst_duration = burst_duration
+    self.pois = pois
+    self.page_count = page_count
+    self.random = random.Random(seed)
+    self.started = time.monotonic()
+    self.requests = 0
+    self.status_counts = {}
+
+  async def _delay_or_error(self):
+    self.requests += 1
+    delay = self.latency + (self.random.random() * self.jitter if self.jitter else 0)
+    if delay:
+      await asyncio.sleep(delay)
+    if self.burst_interval and (time.monotonic() - self.started) % self.burst_interval < self.burst_duration:
+      return self._count(JSONResponse({"status": "0", "info": "TOO_MANY_REQUESTS"}, status_code=429))
+    if self.error_rate and self.random.random() < self.error_rate:
+      return self._count(JSONResponse({"status": "0", "info": "SERVER_ERROR"}, status_code=500))
+    return None
+
+  def _count(self, response: JSONResponse) -> JSONResponse:
+    self.status_counts[response.status_code] = self.status_counts.get(response.status_code, 0) + 1
+    return response
+
+  async def ip(self, request: Request):
+    error = await self._delay_or_error()
+    if error is not None:
+      return error
+    ip = request.query_params.get("ip") or request.client.host
+    province, city, adcode, lng, lat = CITIES[_digest(ip) % len(CITIES)]
+    return self._count(JSONResponse({
+      "status": "1",
+      "info": "OK",
+      "infocode": "10000",
+      "province": province,
+      "city": city,
+      "adcode": adcode,
+      "rectangle": f"{lng - 0.3:.6f},{lat - 0.2:.6f};{lng + 0.3:.6f},{lat + 0.2:.6f}",
+    }))
+
+  async def around(self, request: Request):
+    error = await self._delay_or_error()
+    if error is not None:
+      return error
+    params = request.query_params
+    try:
+      lng, lat = (float(v) for v in params["location"].split(","))
+    except (KeyError, ValueError):
+      return self._count(JSONResponse({"status": "0", "info": "INVALID_PARAMS", "infocode": "20000"}))
+    keywords = params.get("keywords", "")
+    types = params.get("types", "")
+    radius = int(params.get("radius") or 5000)
+    page_num = int(params.get("page_num") or 1)
+    page_size = int(params.get("page_size") or 10)
+
+    pois = self._pois(lng, lat, keywords, types, radius)
+    page = pois[(page_num - 1) * page_size:page_num * page_size]
+    return self._count(JSONResponse({
+      "status": "1",
+      "info": "OK",
+      "infocode": "10000",
+      "count": str(len(page) if self.page_count else len(pois)),
+      "pois": page,
+    }))
+
+  def _pois(self, lng: float, lat: float, keywords: str, types: str, radius: int):
+    # 以 0.01 度网格为单位生成确定性 POI，相近坐标的查询返回一致的结果
+    result = []
+    cell_lng, cell_lat = round(lng, 2), round(lat, 2)
+    for i in range(self.pois):
+      h = _digest(cell_lng, cell_lat, keywords, types, i)
+      angle = (h % 3600) / 3600 * 2 * math.pi
+      distance = ((h >> 12) % 50000) / 50000 * 3000
+      poi_lng = cell_lng + distance * math.cos(angle) / (111320 * math.cos(math.radians(cell_lat)))
+      poi_lat = cell_lat + distance * math.sin(angle) / 110540
+      d = math.hypot((poi_lng - lng) * 111320 * math.cos(math.radians(lat)), (poi_lat - lat) * 110540)
+      if d > radius:
+        continue
+      result.append({
+        "id": f"B{h % 10 ** 10:010d}",
+        "name": f"{keywords or 'POI'}{i}",
+        "location": f"{poi_lng:.6f},{poi_lat:.6f}",
+        "type": types or "餐饮服务;中餐厅;中餐厅",
+        "typecode": types or "050100",
+        "pname": "北京市",
+        "cityname": "北京市",
+        "adname": "东城区",
+        "address": f"测试路{i}号",
+        "distance": str(int(d)),
+      })
+    result.sort(key=lambda poi: int(poi["distance"]))
+    return result
+
+  async def stats(self, request: Request):
+    return JSONResponse({"requests": self.requests, "status_counts": self.status_counts})
+
+  def app(self) -> Starlette:
+    return Starlette(routes=[
+      Route("/v3/ip", self.ip),
+      Route("/v5/place/around", self.around),
+      Route("/_stats", self.stats),
+    ])
+
+
+class MockAmapServer:
+  """
+  在后台线程中运行替身服务，便于在压测脚本中启动和停止。
+  """
+
+  def __init__(self, mock: MockAmap, host: str = "127.0.0.1", port: int = 0):
+    self.mock = mock
+    self.server = uvicorn.Server(uvicorn.Config(mock.app(), host=host, port=port, log_level="warning", lifespan="off"))
+    self.thread = threading.Thread(target=self.server.run, daemon=True)
+
+  @property
+  def base_url(self) -> str:
+    host, port = self.server.servers[0].sockets[0].getsockname()[:2]
+    return f"http://{host}:{port}"
+
+  def __enter__(self) -> "MockAmapServer":
+    self.thread.start()
+    while not self.server.started:
+      time.sleep(0.01)
+    return self
+
+  def __exit__(self, *exc):
+    self.server.should_exit = True
+    self.thread.join(timeout=5)
+
+
+def main():
+  parser = argparse.ArgumentParser(description="本地高德接口替身服务")
+  parser.add_argument("--host", default="127.0.0.1")
+  parser.add_argument("--port", type=int, default=18080)
+  parser.add_argument("--latency", type=float, default=20, help="基础响应延迟（毫秒）")
+  parser.add_argument("--jitter", type=float, default=0, help="随机附加延迟上限（毫秒）")
+  parser.add_argument("--error-rate", type=float, default=0, help="返回 HTTP 500 的概率（0~1）")
+  parser.add_argument("--burst-interval", type=float, default=0, help="429 限流突发的周期（秒），0 表示不限流")
+  parser.add_argument("--burst-duration", type=float, default=0, help="每个周期内返回 429 的时长（秒）")
+  parser.add_argument("--pois", type=int, default=60, help="每次周边搜索生成的 POI 数量")
+  args = parser.parse_args()
+
+  mock = MockAmap(
+    latency=args.latency / 1000,
+    jitter=args.jitter / 1000,
+    error_rate=args.error_rate,
+    burst_interval=args.burst_interval,
+    burst_duration=args.burst_duration,
+    pois=args.pois,
+  )
+  uvicorn.run(mock.app(), host=args.host, port=args.port, log_level="warning")
+
+
+if __name__ == "__main__":
+  main()
@@ -4,10 +4,12 @@ from langchain.agents.structured_output import ToolStrategy
 from build_agent.build_tools import Context, get_user_location, get_weather_for_location
 import os
 from dotenv import load_dotenv
-from langgraph.checkpoint.memory import InMemorySaver
 from langchain.chat_models import init_chat_model
 from langchain_openai import ChatOpenAI
-from build_agent.llm_chat import qwen_model
+from build_agent.checkpointer import BoundedSaver
+from build_agent.llm_chat import pooled_model
+from build_agent.middleware import ResponseCacheMiddleware, TokenBudgetMiddleware
+from build_agent.runner import AgentRunner
 
 # 加载环境变量
 load_dotenv()
@@ -17,35 +19,60 @@ class ResponseFormat(BaseModel):
     weather_conditions: str | None = None
 
 
-# Add memory
-def build_agent():
-    checkpointer = InMemorySaver()
-
-    # 初始化模型
-    model = qwen_model()
-
-    # PROMPT
-    SYSTEM_PROMPT = """You are an expert weather forecaster, who speaks in puns.
-    
-    You have access to two tools:
-    
-    - get_weather_for_location: use this to get the weather for a specific location
-    - get_user_location: use this to get the user's location
-    
-    If a user asks you for the weather, make sure you know the location. If you can tell from the question that they mean wherever they are, use the get_user_location tool to find their location.
+# PROMPT
+SYSTEM_PROMPT = """You are an expert weather forecaster, who speaks in puns.
+
+You have access to two tools:
+
+- get_weather_for_location: use this to get the weather for a specific location
+- get_user_location: use this to get the user's location
+
+If a user asks you for the weather, make sure you know the location. If you can tell from the question that they mean wherever they are, use the get_user_location tool to find their location.
+"""
+
+
+def default_middleware() -> list:
+    """
+    天气 Agent 的默认中间件：缓存模型响应和 get_weather_for_location 的结果，
+    设置环境变量 AGENT_TOKEN_BUDGET 时按 user_id 限制每天的 token 用量。
     """
+    middleware = []
+    budget = int(os.getenv("AGENT_TOKEN_BUDGET") or 0)
+    if budget:
+        middleware.append(TokenBudgetMiddleware(budget=budget))
+    # get_user_location 的结果取决于运行时上下文中的 user_id，不能缓存
+    middleware.append(ResponseCacheMiddleware(cache_tools=["get_weather_for_location"]))
+    return middleware
 
-    tools = [get_user_location, get_weather_for_location]
 
-    agent = create_agent(
-        model=model,
+def create_weather_agent(model=None, checkpointer=None, response_format=ResponseFormat, middleware=None):
+    """
+    创建天气 Agent。Agent 可以被多个会话复用，会话之间通过 thread_id 区分。
+
+    Args:
+        model (ChatOpenAI, optional): 模型客户端，默认从模型池获取 qwen-max。
+        checkpointer (optional): 会话历史存储，默认 BoundedSaver（有界内存存储，
+            设置环境变量 AGENT_CHECKPOINT_DB 时同时持久化到该 SQLite 文件）。
+        response_format (optional): 结构化输出格式，默认 ResponseFormat，为 None 时直接返回文本。
+        middleware (list, optional): 中间件列表，默认 default_middleware()。
+    Returns:
+        Agent: create_agent 创建的 Agent。
+    """
+    return create_agent(
+        model=model or pooled_model(),
         system_prompt=SYSTEM_PROMPT,
-        tools=tools,
+        tools=[get_user_location, get_weather_for_location],
         context_schema=Context,  #
-        response_format=ResponseFormat,
-        checkpointer=checkpointer
+        response_format=response_format,
+        middleware=default_middleware() if middleware is None else middleware,
+        checkpointer=checkpointer or BoundedSaver(path=os.getenv("AGENT_CHECKPOINT_DB"))
     )
 
+
+# Add memory
+def build_agent():
+    agent = create_weather_agent()
+
     # `thread_id` is a unique identifier for a given conversation.
     config = {"configurable": {"thread_id": "1"}}
 
@@ -63,5 +90,15 @@ def build_agent():
     # )
 
 
+async def run_agents():
+    """
+    异步示例：同一个 Agent 并发服务多个会话。
+    """
+    runner = AgentRunner(create_weather_agent())
+    conversations = [(str(i), "what is the weather outside?") for i in range(4)]
+    for response in await runner.run_many(conversations, context=Context(user_id="2")):
+        print(response)
+
+
 if __name__ == '__main__':
     build_agent()
\ No newline at end of file
@@ -15,4 +15,18 @@ class Context:
 def get_user_location(runtime: ToolRuntime[Context]) -> str:
     """Retrieve user information based on user ID."""
     user_id = runtime.context.user_id
-    return "Florida" if user_id == "1" else "SF"
\ No newline at end of file
+    return "Florida" if user_id == "1" else "SF"
+
+
+def amap_tools(url: str = None, names=None) -> list:
+    """
+    高德地图工具（IP 定位、周边搜索等）。
+
+    未指定 url 时通过进程内桥接直接调用 build_mcp 服务的工具函数，不启动 MCP 子进程；
+    指定 url 时连接远程 streamable-http MCP 服务，会话池化复用。
+    """
+    from build_agent.mcp_tools import LocalMCPTools, RemoteMCPTools
+
+    if url:
+        return RemoteMCPTools(url, names=names).get_tools()
+    return LocalMCPTools(names=names).get_tools()
@@ -0,0 +1,522 @@
+import asyncio
+import logging
+import os
+import random
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, AsyncIterator, Dict, Iterator, List, Optional, Sequence, Tuple
+
+from langchain_core.runnables import RunnableConfig
+from langgraph.checkpoint.base import (
+    WRITES_IDX_MAP,
+    BaseCheckpointSaver,
+    ChannelVersions,
+    Checkpoint,
+    CheckpointMetadata,
+    CheckpointTuple,
+    get_checkpoint_id,
+    get_checkpoint_metadata,
+)
+
+# 每条记录的固定开销估算（字节），用于容量统计
+_RECORD_OVERHEAD = 128
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS threads (
+    thread_id TEXT PRIMARY KEY,
+    data BLOB NOT NULL,
+    updated_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS threads_updated_at ON threads (updated_at);
+"""
+
+
+def _typed_size(typed: Tuple[str, bytes]) -> int:
+    return len(typed[0]) + len(typed[1]) + _RECORD_OVERHEAD
+
+
+class _Thread:
+    """
+    单个会话的检查点数据。
+
+    checkpoints: {checkpoint_ns: {checkpoint_id: (checkpoint, metadata, parent_id, channel_versions)}}
+    blobs: {(checkpoint_ns, channel, version): 序列化后的通道值}
+    writes: {(checkpoint_ns, checkpoint_id): {(task_id, idx): (task_id, channel, 序列化后的值, task_path)}}
+    """
+
+    __slots__ = ("checkpoints", "blobs", "writes", "size", "touched")
+
+    def __init__(self):
+        self.checkpoints: Dict[str, Dict[str, tuple]] = {}
+        self.blobs: Dict[tuple, Tuple[str, bytes]] = {}
+        self.writes: Dict[tuple, Dict[tuple, tuple]] = {}
+        self.size = 0
+        self.touched = 0.0
+
+
+class SQLiteThreadStore:
+    """
+    基于 SQLite（WAL 模式）的会话存储，每个会话保存为一行（压缩后的检查点快照）。
+
+    - 进程重启后会话历史仍然有效，同一台机器上的多个进程可以共享；
+    - ttl 秒内未更新的会话会被定期清理；
+    - 数据库异常只记录日志，不影响正在进行的对话（该会话退化为仅保存在内存中）。
+
+    Args:
+        path (str): 数据库文件路径，目录不存在时自动创建。
+        ttl (float, optional): 会话在磁盘上的保留时间（秒），为空时永久保留。
+        logger (logging.Logger, optional): 日志记录器。
+    """
+
+    # 每写入多少次清理一次过期会话
+    PURGE_INTERVAL = 256
+
+    def __init__(self, path: str, ttl: Optional[float] = None, logger=None):
+        self.path = os.path.expanduser(path)
+        self.ttl = ttl
+        self.logger = logger or logging.getLogger(__name__)
+        self._lock = threading.Lock()
+        self._conn: Optional[sqlite3.Connection] = None
+        self._writes = 0
+        self.errors = 0
+
+    def _connect(self) -> sqlite3.Connection:
+        if self._conn is None:
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            conn = sqlite3.connect(self.path, timeout=5, isolation_level=None, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.executescript(_SCHEMA)
+            self._conn = conn
+            self._purge(conn)
+        return self._conn
+
+    def _error(self, action: str, e: Exception) -> None:
+        self.errors += 1
+        self.logger.warning("SQLite 会话存储%s失败：%s", action, e)
+
+    def _purge(self, conn: sqlite3.Connection) -> None:
+        if self.ttl:
+            conn.execute("DELETE FROM threads WHERE updated_at < ?", (time.time() - self.ttl,))
+
+    def load(self, thread_id: str) -> Optional[bytes]:
+        try:
+            with self._lock:
+                conn = self._connect()
+                row = conn.execute("SELECT data, updated_at FROM threads WHERE thread_id = ?", (thread_id,)).fetchone()
+            if row is None or (self.ttl and row[1] < time.time() - self.ttl):
+                return None
+            return row[0]
+        except sqlite3.Error as e:
+            self._error("读取", e)
+            return None
+
+    def save(self, thread_id: str, data: bytes) -> None:
+        try:
+            with self._lock:
+                conn = self._connect()
+                conn.execute(
+                    "INSERT OR REPLACE INTO threads (thread_id, data, updated_at) VALUES (?, ?, ?)",
+                    (thread_id, data, time.time()),
+                )
+                self._writes += 1
+                if self._writes % self.PURGE_INTERVAL == 0:
+                    self._purge(conn)
+        except sqlite3.Error as e:
+            self._error("写入", e)
+
+    def delete(self, thread_id: str) -> None:
+        try:
+            with self._lock:
+                self._connect().execute("DELETE FROM threads WHERE thread_id = ?", (thread_id,))
+        except sqlite3.Error as e:
+            self._error("删除", e)
+
+    def __len__(self) -> int:
+        try:
+            with self._lock:
+                return self._connect().execute("SELECT COUNT(*) FROM threads").fetchone()[0]
+        except sqlite3.Error as e:
+            self._error("统计", e)
+            return 0
+
+    def close(self) -> None:
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+
+class BoundedSaver(BaseCheckpointSaver[str]):
+    """
+    有界的会话检查点存储，用于替代 InMemorySaver 长期运行。
+
+    - 压缩：每个会话（每个 checkpoint_ns）只保留最近 max_checkpoints 个检查点，
+      更早的检查点、对应的待写入数据和不再被引用的通道值会被删除（不再支持回溯到这些检查点）；
+    - 单会话上限：会话占用超过 max_thread_bytes 时只保留最新的检查点，
+      最新状态本身超过上限时计入 oversized，消息历史需要由中间件裁剪；
+    - 淘汰：会话数超过 max_threads 或总占用超过 max_bytes 时按最近使用时间（LRU）淘汰，
+      ttl 秒内未使用的会话也会被淘汰；max_threads 应大于同时运行的会话数，否则运行中的会话也会被淘汰；
+    - 持久化：配置 path 后，每一步的检查点同时写入 SQLite，被淘汰或重启后再次访问时从磁盘恢复；
+      未配置时被淘汰的会话直接丢弃。
+
+    Args:
+        max_threads (int): 内存中最多保存的会话数，默认 10000。
+        max_bytes (int): 内存中所有会话的总占用上限（按序列化后的大小计算），默认 256MB。
+        max_checkpoints (int): 每个会话保留的检查点数，默认 2。
+        max_thread_bytes (int): 单个会话的占用上限，默认 4MB。
+        ttl (float, optional): 会话空闲多少秒后从内存中淘汰，为空时不按时间淘汰。
+        path (str, optional): SQLite 数据库路径，为空时只保存在内存中。
+        store_ttl (float, optional): 会话在磁盘上的保留时间（秒），为空时永久保留。
+        serde (optional): 序列化器，默认使用 LangGraph 的 JsonPlusSerializer。
+    Example:
+        agent = create_weather_agent(checkpointer=BoundedSaver(max_threads=5000, ttl=3600))
+    """
+
+    def __init__(self, max_threads: int = 10000, max_bytes: int = 256 * 1024 * 1024, max_checkpoints: int = 2,
+                 max_thread_bytes: int = 4 * 1024 * 1024, ttl: Optional[float] = None, path: Optional[str] = None,
+                 store_ttl: Optional[float] = None, serde=None):
+        super().__init__(serde=serde)
+        self.max_threads = max_threads
+        self.max_bytes = max_bytes
+        self.max_checkpoints = max(1, max_checkpoints)
+        self.max_thread_bytes = max_thread_bytes
+        self.ttl = ttl
+        self.store = SQLiteThreadStore(path, ttl=store_ttl) if path else None
+        self._threads: "OrderedDict[str, _Thread]" = OrderedDict()
+        self._lock = threading.RLock()
+        self.size = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.compacted = 0
+        self.oversized = 0
+        self.restored = 0
+
+    # ------------------------------------------------------------------
+    # 内存管理
+    # ------------------------------------------------------------------
+
+    def _thread(self, thread_id: str, create: bool = False) -> Optional[_Thread]:
+        """
+        获取会话并标记为最近使用，内存中不存在时尝试从磁盘恢复。
+        """
+        thread = self._threads.get(thread_id)
+        if thread is None:
+            thread = self._restore(thread_id)
+            if thread is None:
+                if not create:
+                    return None
+                thread = _Thread()
+            self._threads[thread_id] = thread
+            self.size += thread.size
+            thread.touched = time.monotonic()
+            self._evict()
+        else:
+            self._threads.move_to_end(thread_id)
+            thread.touched = time.monotonic()
+        return thread
+
+    def _resize(self, thread: _Thread, delta: int) -> None:
+        thread.size += delta
+        self.size += delta
+
+    def _evict(self) -> None:
+        """
+        淘汰空闲超时的会话，再按 LRU 淘汰超出数量或容量上限的会话，最近使用的会话总是保留。
+        """
+        if self.ttl:
+            expire_before = time.monotonic() - self.ttl
+            while len(self._threads) > 1:
+                thread_id, thread = next(iter(self._threads.items()))
+                if thread.touched >= expire_before:
+                    break
+                self._drop(thread_id)
+                self.expirations += 1
+        while len(self._threads) > 1 and (len(self._threads) > self.max_threads or self.size > self.max_bytes):
+            self._drop(next(iter(self._threads)))
+            self.evictions += 1
+
+    def _drop(self, thread_id: str) -> None:
+        thread = self._threads.pop(thread_id, None)
+        if thread is not None:
+            self.size -= thread.size
+
+    def _compact(self, thread: _Thread, checkpoint_ns: str) -> None:
+        """
+        只保留最近的检查点，删除其余检查点的待写入数据和不再被引用的通道值。
+        """
+        keep = 1 if thread.size > self.max_thread_bytes else self.max_checkpoints
+        checkpoints = thread.checkpoints.get(checkpoint_ns)
+        if checkpoints is None or len(checkpoints) <= keep:
+            if thread.size > self.max_thread_bytes:
+                self.oversized += 1
+            return
+        for checkpoint_id in sorted(checkpoints)[:-keep]:
+            checkpoint, metadata, _, _ = checkpoints.pop(checkpoint_id)
+            self._resize(thread, -_typed_size(checkpoint) - _typed_size(metadata))
+            for _, _, value, _ in (thread.writes.pop((checkpoint_ns, checkpoint_id), None) or {}).values():
+                self._resize(thread, -_typed_size(value))
+        referenced = {
+            (checkpoint_ns, channel, version)
+            for _, _, _, versions in checkpoints.values()
+            for channel, version in versions.items()
+        }
+        for key in [k for k in thread.blobs if k[0] == checkpoint_ns and k not in referenced]:
+            self._resize(thread, -_typed_size(thread.blobs.pop(key)))
+        self.compacted += 1
+        if thread.size > self.max_thread_bytes:
+            self.oversized += 1
+
+    # ------------------------------------------------------------------
+    # 持久化
+    # ------------------------------------------------------------------
+
+    def _snapshot(self, thread: _Thread) -> bytes:
+        data = {
+            "checkpoints": [
+                [ns, checkpoint_id, list(checkpoint), list(metadata), parent, versions]
+                for ns, checkpoints in thread.checkpoints.items()
+                for checkpoint_id, (checkpoint, metadata, parent, versions) in checkpoints.items()
+            ],
+            "blobs": [[ns, channel, version, list(value)] for (ns, channel, version), value in thread.blobs.items()],
+            "writes": [
+                [ns, checkpoint_id, task_id, idx, channel, list(value), path]
+                for (ns, checkpoint_id), writes in thread.writes.items()
+                for (task_id, idx), (_, channel, value, path) in writes.items()
+            ],
+        }
+        return self.serde.dumps_typed(data)[1]
+
+    def _restore(self, thread_id: str) -> Optional[_Thread]:
+        if self.store is None:
+            return None
+        raw = self.store.load(thread_id)
+        if raw is None:
+            return None
+        try:
+            data = self.serde.loads_typed(("msgpack", raw))
+        except Exception as e:
+            self.store._error("解析", e)
+            return None
+        thread = _Thread()
+        for ns, checkpoint_id, checkpoint, metadata, parent, versions in data["checkpoints"]:
+            checkpoint, metadata = tuple(checkpoint), tuple(metadata)
+            thread.checkpoints.setdefault(ns, {})[checkpoint_id] = (checkpoint, metadata, parent, versions)
+            thread.size += _typed_size(checkpoint) + _typed_size(metadata)
+        for ns, channel, version, value in data["blobs"]:
+            thread.blobs[(ns, channel, version)] = value = tuple(value)
+            thread.size += _typed_size(value)
+        for ns, checkpoint_id, task_id, idx, channel, value, path in data["writes"]:
+            value = tuple(value)
+            thread.writes.setdefault((ns, checkpoint_id), {})[(task_id, idx)] = (task_id, channel, value, path)
+            thread.size += _typed_size(value)
+        self.restored += 1
+        return thread
+
+    # ------------------------------------------------------------------
+    # 读写（同步实现，异步接口在此基础上把磁盘读写放到线程池中执行）
+    # ------------------------------------------------------------------
+
+    def _tuple(self, thread_id: str, checkpoint_ns: str, thread: _Thread, checkpoint_id: str,
+               config: Optional[RunnableConfig] = None) -> CheckpointTuple:
+        checkpoint, metadata, parent, versions = thread.checkpoints[checkpoint_ns][checkpoint_id]
+        checkpoint_: Checkpoint = self.serde.loads_typed(checkpoint)
+        channel_values = {}
+        for channel, version in versions.items():
+            value = thread.blobs.get((checkpoint_ns, channel, version))
+            if value is not None and value[0] != "empty":
+                channel_values[channel] = self.serde.loads_typed(value)
+        writes = (thread.writes.get((checkpoint_ns, checkpoint_id)) or {}).values()
+        return CheckpointTuple(
+            config=config or {
+                "configurable": {"thread_id": thread_id, "checkpoint_ns": checkpoint_ns, "checkpoint_id": checkpoint_id}
+            },
+            checkpoint={**checkpoint_, "channel_values": channel_values},
+            metadata=self.serde.loads_typed(metadata),
+            pending_writes=[(task_id, channel, self.serde.loads_typed(value)) for task_id, channel, value, _ in writes],
+            parent_config=(
+                {"configurable": {"thread_id": thread_id, "checkpoint_ns": checkpoint_ns, "checkpoint_id": parent}}
+                if parent else None
+            ),
+        )
+
+    def get_tuple(self, config: RunnableConfig) -> Optional[CheckpointTuple]:
+        thread_id: str = config["configurable"]["thread_id"]
+        checkpoint_ns: str = config["configurable"].get("checkpoint_ns", "")
+        with self._lock:
+            thread = self._thread(thread_id)
+            checkpoints = thread.checkpoints.get(checkpoint_ns) if thread else None
+            if not checkpoints:
+                return None
+            if checkpoint_id := get_checkpoint_id(config):
+                if checkpoint_id not in checkpoints:
+                    return None
+                return self._tuple(thread_id, checkpoint_ns, thread, checkpoint_id, config)
+            return self._tuple(thread_id, checkpoint_ns, thread, max(checkpoints))
+
+    def list(self, config: Optional[RunnableConfig], *, filter: Optional[Dict[str, Any]] = None,
+             before: Optional[RunnableConfig] = None, limit: Optional[int] = None) -> Iterator[CheckpointTuple]:
+        """
+        列出检查点。未指定 thread_id 时只列出内存中的会话。
+        """
+        config_checkpoint_ns = config["configurable"].get("checkpoint_ns") if config else None
+        config_checkpoint_id = get_checkpoint_id(config) if config else None
+        before_checkpoint_id = get_checkpoint_id(before) if before else None
+        results: List[CheckpointTuple] = []
+        with self._lock:
+            if config:
+                thread_ids = [config["configurable"]["thread_id"]]
+            else:
+                thread_ids = list(self._threads)
+            for thread_id in thread_ids:
+                thread = self._thread(thread_id) if config else self._threads[thread_id]
+                if thread is None:
+                    continue
+                for checkpoint_ns, checkpoints in thread.checkpoints.items():
+                    if config_checkpoint_ns is not None and checkpoint_ns != config_checkpoint_ns:
+                        continue
+                    for checkpoint_id in sorted(checkpoints, reverse=True):
+                        if config_checkpoint_id and checkpoint_id != config_checkpoint_id:
+                            continue
+                        if before_checkpoint_id and checkpoint_id >= before_checkpoint_id:
+                            continue
+                        if filter:
+                            metadata = self.serde.loads_typed(checkpoints[checkpoint_id][1])
+                            if not all(metadata.get(k) == v for k, v in filter.items()):
+                                continue
+                        if limit is not None and len(results) >= limit:
+                            return iter(results)
+                        results.append(self._tuple(thread_id, checkpoint_ns, thread, checkpoint_id))
+        return iter(results)
+
+    def _put(self, config: RunnableConfig, checkpoint: Checkpoint, metadata: CheckpointMetadata,
+             new_versions: ChannelVersions) -> Tuple[RunnableConfig, Optional[bytes]]:
+        c = checkpoint.copy()
+        thread_id = config["configurable"]["thread_id"]
+        checkpoint_ns = config["configurable"]["checkpoint_ns"]
+        values: Dict[str, Any] = c.pop("channel_values")  # type: ignore[misc]
+        with self._lock:
+            thread = self._thread(thread_id, create=True)
+            for channel, version in new_versions.items():
+                value = self.serde.dumps_typed(values[channel]) if channel in values else ("empty", b"")
+                previous = thread.blobs.get((checkpoint_ns, channel, version))
+                thread.blobs[(checkpoint_ns, channel, version)] = value
+                self._resize(thread, _typed_size(value) - (_typed_size(previous) if previous else 0))
+            record = (
+                self.serde.dumps_typed(c),
+                self.serde.dumps_typed(get_checkpoint_metadata(config, metadata)),
+                config["configurable"].get("checkpoint_id"),
+                dict(checkpoint["channel_versions"]),
+            )
+            checkpoints = thread.checkpoints.setdefault(checkpoint_ns, {})
+            previous = checkpoints.get(checkpoint["id"])
+            if previous:
+                self._resize(thread, -_typed_size(previous[0]) - _typed_size(previous[1]))
+            checkpoints[checkpoint["id"]] = record
+            self._resize(thread, _typed_size(record[0]) + _typed_size(record[1]))
+            self._compact(thread, checkpoint_ns)
+            snapshot = self._snapshot(thread) if self.store is not None else None
+            self._evict()
+        return {
+            "configurable": {"thread_id": thread_id, "checkpoint_ns": checkpoint_ns, "checkpoint_id": checkpoint["id"]}
+        }, snapshot
+
+    def put(self, config: RunnableConfig, checkpoint: Checkpoint, metadata: CheckpointMetadata,
+            new_versions: ChannelVersions) -> RunnableConfig:
+        config, snapshot = self._put(config, checkpoint, metadata, new_versions)
+        if snapshot is not None:
+            self.store.save(config["configurable"]["thread_id"], snapshot)
+        return config
+
+    def put_writes(self, config: RunnableConfig, writes: Sequence[Tuple[str, Any]], task_id: str,
+                   task_path: str = "") -> None:
+        """
+        保存待写入数据。只保存在内存中，磁盘上的快照在下一次 put 时更新。
+        """
+        thread_id = config["configurable"]["thread_id"]
+        checkpoint_ns = config["configurable"].get("checkpoint_ns", "")
+        checkpoint_id = config["configurable"]["checkpoint_id"]
+        with self._lock:
+            thread = self._thread(thread_id, create=True)
+            outer = thread.writes.setdefault((checkpoint_ns, checkpoint_id), {})
+            for idx, (channel, value) in enumerate(writes):
+                inner_key = (task_id, WRITES_IDX_MAP.get(channel, idx))
+                if inner_key[1] >= 0 and inner_key in outer:
+                    continue
+                typed = self.serde.dumps_typed(value)
+                previous = outer.get(inner_key)
+                outer[inner_key] = (task_id, channel, typed, task_path)
+                self._resize(thread, _typed_size(typed) - (_typed_size(previous[2]) if previous else 0))
+
+    def delete_thread(self, thread_id: str) -> None:
+        with self._lock:
+            self._drop(thread_id)
+        if self.store is not None:
+            self.store.delete(thread_id)
+
+    async def aget_tuple(self, config: RunnableConfig) -> Optional[CheckpointTuple]:
+        if self.store is not None and config["configurable"]["thread_id"] not in self._threads:
+            return await asyncio.to_thread(self.get_tuple, config)
+        return self.get_tuple(config)
+
+    async def alist(self, config: Optional[RunnableConfig], *, filter: Optional[Dict[str, Any]] = None,
+                    before: Optional[RunnableConfig] = None, limit: Optional[int] = None) -> AsyncIterator[CheckpointTuple]:
+        if self.store is not None and config and config["configurable"]["thread_id"] not in self._threads:
+            items = await asyncio.to_thread(lambda: list(self.list(config, filter=filter, before=before, limit=limit)))
+        else:
+            items = self.list(config, filter=filter, before=before, limit=limit)
+        for item in items:
+            yield item
+
+    async def aput(self, config: RunnableConfig, checkpoint: Checkpoint, metadata: CheckpointMetadata,
+                   new_versions: ChannelVersions) -> RunnableConfig:
+        if self.store is None:
+            return self._put(config, checkpoint, metadata, new_versions)[0]
+        return await asyncio.to_thread(self.put, config, checkpoint, metadata, new_versions)
+
+    async def aput_writes(self, config: RunnableConfig, writes: Sequence[Tuple[str, Any]], task_id: str,
+                          task_path: str = "") -> None:
+        self.put_writes(config, writes, task_id, task_path)
+
+    async def adelete_thread(self, thread_id: str) -> None:
+        if self.store is None:
+            return self.delete_thread(thread_id)
+        await asyncio.to_thread(self.delete_thread, thread_id)
+
+    def get_next_version(self, current: Optional[str], channel: None) -> str:
+        if current is None:
+            current_v = 0
+        elif isinstance(current, int):
+            current_v = current
+        else:
+            current_v = int(current.split(".")[0])
+        return f"{current_v + 1:032}.{random.random():016}"
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        返回内存中的会话数、占用字节数以及淘汰、压缩和恢复次数。
+        """
+        with self._lock:
+            result = {
+                "threads": len(self._threads),
+                "bytes": self.size,
+                "max_threads": self.max_threads,
+                "max_bytes": self.max_bytes,
+                "evictions": self.evictions,
+                "expirations": self.expirations,
+                "compacted": self.compacted,
+                "oversized": self.oversized,
+                "restored": self.restored,
+            }
+        if self.store is not None:
+            result["stored_threads"] = len(self.store)
+            result["store_errors"] = self.store.errors
+        return result
+
+    def close(self) -> None:
+        if self.store is not None:
+            self.store.close()
@@ -1,15 +1,71 @@
 from langchain_openai import ChatOpenAI
 import os
+import threading
 from dotenv import load_dotenv
 # 加载环境变量
 load_dotenv()
 
+# DASHSCOPE_BASE_URL 可指向其他 OpenAI 兼容服务（例如压测用的本地替身服务）
+DEFAULT_BASE_URL = "https://dashscope.aliyuncs.com/compatible-mode/v1"
+
+
 def qwen_model(model="qwen-max"):
     model = ChatOpenAI(
         api_key=os.getenv("DASHSCOPE_API_KEY"),  # 阿里云颁发的 key
-        base_url="https://dashscope.aliyuncs.com/compatible-mode/v1",
+        base_url=os.getenv("DASHSCOPE_BASE_URL") or DEFAULT_BASE_URL,
         model=model,  # qwen-plus / qwen-turbo 均可
         temperature=0.5,
         max_retries=2
     )
     return model
+
+
+class ModelPool:
+    """
+    按模型名复用模型客户端。
+
+    ChatOpenAI 本身不保存会话状态，同一个实例可以被多个会话并发使用，
+    复用实例也就复用了底层的 HTTP 连接池，避免每次构建 Agent 或每次模型调用都重新创建客户端。
+
+    Args:
+        factory (Callable[[str], ChatOpenAI]): 根据模型名创建客户端的函数，默认 qwen_model。
+    """
+
+    def __init__(self, factory=qwen_model):
+        self.factory = factory
+        self._models = {}
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._models)
+
+    def get(self, model="qwen-max") -> ChatOpenAI:
+        """
+        获取指定模型的客户端，第一次使用时创建。
+
+        Args:
+            model (str): 模型名，默认为 "qwen-max"。
+        Returns:
+            ChatOpenAI: 进程内共享的模型客户端。
+        """
+        client = self._models.get(model)
+        if client is None:
+            with self._lock:
+                client = self._models.get(model)
+                if client is None:
+                    client = self._models[model] = self.factory(model)
+        return client
+
+    def clear(self):
+        with self._lock:
+            self._models.clear()
+
+
+model_pool = ModelPool()
+
+
+def pooled_model(model="qwen-max") -> ChatOpenAI:
+    """
+    从进程内的模型池获取客户端，用法与 qwen_model 相同。
+    """
+    return model_pool.get(model)
@@ -0,0 +1,364 @@
+import asyncio
+import concurrent.futures
+import threading
+from datetime import timedelta
+from typing import Any, Awaitable, Callable, Dict, Iterable, List, Optional
+
+import pydantic_core
+from langchain_core.tools import BaseTool, StructuredTool, ToolException
+
+
+class _LoopRunner:
+    """
+    把所有调用调度到同一个事件循环中执行。
+
+    GdSDK 的 HTTP 客户端、限流器和 MCP 会话都绑定在创建它们的事件循环上，不能跨事件循环使用。
+    第一次异步调用所在的事件循环成为工具的运行循环，之后来自其他事件循环或线程的调用都转发到该循环；
+    第一次调用是同步调用时，在后台线程中启动一个专用的事件循环。
+    运行循环已停止（但未关闭）时转发的调用无法执行，直接报错；转发的调用最多等待 timeout 秒。
+
+    Args:
+        timeout (float, optional): 转发到运行循环的调用等待结果的最长秒数，默认 300，为空时不限制。
+    """
+
+    def __init__(self, timeout: Optional[float] = 300):
+        self.timeout = timeout
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._thread: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+
+    def _owner(self, loop: Optional[asyncio.AbstractEventLoop]) -> asyncio.AbstractEventLoop:
+        with self._lock:
+            if self._loop is None or self._loop.is_closed():
+                if loop is None:
+                    loop = asyncio.new_event_loop()
+                    self._thread = threading.Thread(target=loop.run_forever, name="mcp-tools-loop", daemon=True)
+                    self._thread.start()
+                self._loop = loop
+            return self._loop
+
+    def _submit(self, factory: Callable[[], Awaitable[Any]], owner: asyncio.AbstractEventLoop):
+        if not owner.is_running():
+            raise RuntimeError("工具所在的事件循环已停止，无法执行工具调用")
+        return asyncio.run_coroutine_threadsafe(factory(), owner)
+
+    async def arun(self, factory: Callable[[], Awaitable[Any]]) -> Any:
+        loop = asyncio.get_running_loop()
+        owner = self._owner(loop)
+        if owner is loop:
+            return await factory()
+        future = self._submit(factory, owner)
+        try:
+            return await asyncio.wait_for(asyncio.wrap_future(future), self.timeout)
+        except asyncio.TimeoutError:
+            future.cancel()
+            raise TimeoutError(f"工具调用超过 {self.timeout} 秒未返回") from None
+
+    def run(self, factory: Callable[[], Awaitable[Any]]) -> Any:
+        owner = self._owner(None)
+        try:
+            running = asyncio.get_running_loop()
+        except RuntimeError:
+            running = None
+        if running is owner:
+            raise RuntimeError("不能在工具所在的事件循环中同步调用工具，请使用 ainvoke")
+        future = self._submit(factory, owner)
+        try:
+            return future.result(self.timeout)
+        except concurrent.futures.TimeoutError:
+            future.cancel()
+            raise TimeoutError(f"工具调用超过 {self.timeout} 秒未返回") from None
+
+    def close(self) -> None:
+        """
+        停止后台事件循环（只停止本类创建的循环）。
+        """
+        with self._lock:
+            loop, thread = self._loop, self._thread
+            self._loop = self._thread = None
+        if thread is not None:
+            loop.call_soon_threadsafe(loop.stop)
+            thread.join(timeout=5)
+            loop.close()
+
+
+def _structured_tool(name: str, description: str, schema: dict, runner: _LoopRunner,
+                     call: Callable[[dict], Awaitable[Any]]) -> BaseTool:
+    async def acall(**kwargs):
+        return await runner.arun(lambda: call(kwargs))
+
+    def scall(**kwargs):
+        return runner.run(lambda: call(kwargs))
+
+    return StructuredTool(
+        name=name,
+        description=description or "",
+        args_schema=schema,
+        func=scall,
+        coroutine=acall,
+        response_format="content_and_artifact",
+        handle_tool_error=True,
+    )
+
+
+class LocalMCPTools:
+    """
+    进程内 MCP 工具桥：把 build_mcp 服务中注册的 FastMCP 工具直接包装为 LangChain 工具。
+
+    - 工具调用是一次函数调用：参数由 FastMCP 按工具签名校验后直接调用工具函数，
+      没有子进程和 JSON-RPC 编解码，埋点、并发上限和截止时间与 MCP 调用一致；
+    - 所有工具共用服务进程内的同一个 GdSDK（缓存、限流、连接池）；
+    - 返回内容为工具结果的 JSON 文本，ToolMessage.artifact 中保存结果的 dict。
+
+    Args:
+        server (FastMCP, optional): FastMCP 服务，默认 build_mcp.services.server.mcp。
+        names (Iterable[str], optional): 只包装这些工具，默认全部。
+        timeout (float, optional): 跨事件循环或线程调用时等待结果的最长秒数，默认 300。
+    Example:
+        tools = LocalMCPTools(names=["locate_ip", "search_nearby"]).get_tools()
+        agent = create_agent(model, tools)
+    """
+
+    def __init__(self, server=None, names: Optional[Iterable[str]] = None, timeout: Optional[float] = 300):
+        if server is None:
+            from build_mcp.services.server import mcp as server
+        self.server = server
+        self.names = list(names) if names is not None else None
+        self._runner = _LoopRunner(timeout)
+
+    def _tools(self) -> list:
+        # FastMCP 没有公开按名称取得工具对象的接口，直接使用其工具管理器
+        tools = self.server._tool_manager.list_tools()
+        if self.names is None:
+            return tools
+        by_name = {tool.name: tool for tool in tools}
+        missing = [name for name in self.names if name not in by_name]
+        if missing:
+            raise ValueError(f"MCP 服务中没有这些工具：{', '.join(missing)}")
+        return [by_name[name] for name in self.names]
+
+    async def call(self, name: str, arguments: Optional[Dict[str, Any]] = None) -> Any:
+        """
+        直接调用工具，返回工具函数的原始结果（通常为 ApiResponse）。
+        """
+        tool = self.server._tool_manager.get_tool(name)
+        if tool is None:
+            raise ToolException(f"未知工具：{name}")
+        return await self._runner.arun(lambda: tool.run(arguments or {}))
+
+    def get_tools(self) -> List[BaseTool]:
+        """
+        返回 LangChain 工具列表。
+        """
+        result = []
+        for tool in self._tools():
+            result.append(_structured_tool(tool.name, tool.description, tool.parameters, self._runner,
+                                           self._caller(tool)))
+        return result
+
+    @staticmethod
+    def _caller(tool) -> Callable[[dict], Awaitable[Any]]:
+        async def call(arguments: dict):
+            try:
+                result = await tool.run(arguments)
+            except Exception as e:
+                raise ToolException(str(e)) from e
+            artifact = result.model_dump(mode="json") if hasattr(result, "model_dump") else result
+            return pydantic_core.to_json(artifact, fallback=str).decode(), artifact
+        return call
+
+    def close(self) -> None:
+        self._runner.close()
+
+
+class _PooledSession:
+    """
+    一个持久的 streamable-http MCP 会话。
+
+    MCP 客户端的上下文管理器必须在同一个任务中进入和退出，因此由一个后台任务持有会话，
+    直到 close 或连接出错。
+    """
+
+    def __init__(self, url: str, headers: Optional[Dict[str, str]], timeout: float):
+        self.url = url
+        self.headers = headers
+        self.timeout = timeout
+        self.session = None
+        self.inflight = 0
+        self.calls = 0
+        self.error: Optional[BaseException] = None
+        self._ready = asyncio.Event()
+        self._closing = asyncio.Event()
+        self._task: Optional[asyncio.Task] = None
+
+    @property
+    def alive(self) -> bool:
+        return self.session is not None and self._task is not None and not self._task.done()
+
+    async def start(self) -> "_PooledSession":
+        self._task = asyncio.create_task(self._run())
+        await self._ready.wait()
+        if self.session is None:
+            raise ToolException(f"连接 MCP 服务 {self.url} 失败：{self.error}")
+        return self
+
+    async def _run(self) -> None:
+        from mcp.client.session import ClientSession
+        from mcp.client.streamable_http import streamablehttp_client
+
+        try:
+            async with streamablehttp_client(self.url, headers=self.headers, timeout=self.timeout) as (read, write, _):
+                async with ClientSession(read, write) as session:
+                    await session.initialize()
+                    self.session = session
+                    self._ready.set()
+                    await self._closing.wait()
+        except Exception as e:
+            self.error = e
+        finally:
+            self.session = None
+            self._ready.set()
+
+    async def close(self) -> None:
+        self._closing.set()
+        if self._task is not None:
+            await self._task
+
+
+class RemoteMCPTools:
+    """
+    远程 MCP 服务（streamable-http）的 LangChain 工具，会话池化并长期复用。
+
+    - 最多保持 pool_size 个已完成握手的会话，每次调用选择进行中请求最少的会话，
+      只有所有会话都在忙时才新建会话；同一个会话可以并发发送多个请求；
+    - 会话断开（例如服务重启）后自动丢弃，调用失败时换新会话重试一次；
+    - 工具列表只在第一次使用时获取一次。
+
+    Args:
+        url (str): MCP 服务地址，例如 http://127.0.0.1:8000/mcp。
+        pool_size (int): 最多保持的会话数，默认 4。
+        headers (dict, optional): 附加的 HTTP 请求头。
+        timeout (float): 单次请求超时（秒），默认 30。
+        names (Iterable[str], optional): 只包装这些工具，默认全部。
+    Example:
+        async with RemoteMCPTools("http://127.0.0.1:8000/mcp") as remote:
+            agent = create_agent(model, await remote.aget_tools())
+    """
+
+    def __init__(self, url: str, pool_size: int = 4, headers: Optional[Dict[str, str]] = None,
+                 timeout: float = 30, names: Optional[Iterable[str]] = None):
+        self.url = url
+        self.pool_size = max(1, pool_size)
+        self.headers = headers
+        self.timeout = timeout
+        self.names = list(names) if names is not None else None
+        # 一次调用可能包含建立会话和失败后的一次重试
+        self._runner = _LoopRunner(timeout * 3)
+        self._sessions: List[_PooledSession] = []
+        self._lock: Optional[asyncio.Lock] = None
+        self._tools: Optional[list] = None
+        self.opened = 0
+        self.retries = 0
+
+    async def _session(self) -> _PooledSession:
+        if self._lock is None:
+            self._lock = asyncio.Lock()
+        async with self._lock:
+            self._sessions = [s for s in self._sessions if s.alive]
+            idle = min(self._sessions, key=lambda s: s.inflight, default=None)
+            if idle is not None and (idle.inflight == 0 or len(self._sessions) >= self.pool_size):
+                return idle
+            session = await _PooledSession(self.url, self.headers, self.timeout).start()
+            self._sessions.append(session)
+            self.opened += 1
+            return session
+
+    async def _call(self, name: str, arguments: Optional[Dict[str, Any]]):
+        for attempt in range(2):
+            session = await self._session()
+            session.inflight += 1
+            try:
+                result = await session.session.call_tool(name, arguments or {},
+                                                          read_timeout_seconds=timedelta(seconds=self.timeout))
+                session.calls += 1
+                return result
+            except Exception:
+                # 会话已断开时换新会话重试一次，其他错误直接抛出
+                if attempt or session.alive:
+                    raise
+                self.retries += 1
+            finally:
+                session.inflight -= 1
+
+    async def call(self, name: str, arguments: Optional[Dict[str, Any]] = None):
+        """
+        调用远程工具，返回 MCP 的 CallToolResult。
+        """
+        return await self._runner.arun(lambda: self._call(name, arguments))
+
+    async def _list_tools(self) -> list:
+        if self._tools is None:
+            session = await self._session()
+            tools = (await session.session.list_tools()).tools
+            if self.names is not None:
+                by_name = {tool.name: tool for tool in tools}
+                missing = [name for name in self.names if name not in by_name]
+                if missing:
+                    raise ValueError(f"MCP 服务中没有这些工具：{', '.join(missing)}")
+                tools = [by_name[name] for name in self.names]
+            self._tools = tools
+        return self._tools
+
+    def _caller(self, name: str) -> Callable[[dict], Awaitable[Any]]:
+        async def call(arguments: dict):
+            result = await self._call(name, arguments)
+            text = "\n".join(getattr(c, "text", "") for c in result.content if getattr(c, "type", None) == "text")
+            if result.isError:
+                raise ToolException(text)
+            return text, result.structuredContent
+        return call
+
+    def _build(self, tools: list) -> List[BaseTool]:
+        return [
+            _structured_tool(tool.name, tool.description, tool.inputSchema, self._runner, self._caller(tool.name))
+            for tool in tools
+        ]
+
+    async def aget_tools(self) -> List[BaseTool]:
+        """
+        返回 LangChain 工具列表（第一次调用时连接服务并获取工具列表）。
+        """
+        return self._build(await self._runner.arun(self._list_tools))
+
+    def get_tools(self) -> List[BaseTool]:
+        return self._build(self._runner.run(self._list_tools))
+
+    async def _close(self) -> None:
+        sessions, self._sessions = self._sessions, []
+        await asyncio.gather(*(s.close() for s in sessions), return_exceptions=True)
+
+    async def aclose(self) -> None:
+        await self._runner.arun(self._close)
+        self._runner.close()
+
+    def close(self) -> None:
+        self._runner.run(self._close)
+        self._runner.close()
+
+    async def __aenter__(self) -> "RemoteMCPTools":
+        return self
+
+    async def __aexit__(self, *exc_info) -> None:
+        await self.aclose()
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        返回会话数、各会话进行中和已完成的调用数，以及新建会话和重试次数。
+        """
+        return {
+            "sessions": len([s for s in self._sessions if s.alive]),
+            "inflight": [s.inflight for s in self._sessions],
+            "calls": [s.calls for s in self._sessions],
+            "opened": self.opened,
+            "retries": self.retries,
+        }
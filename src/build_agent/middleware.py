@@ -0,0 +1,359 @@
+import hashlib
+import json
+import re
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, Iterable, Optional
+
+from langchain.agents.middleware import AgentMiddleware, ModelRequest
+from langchain.agents.middleware.types import ModelResponse
+from langchain_core.messages import AIMessage, BaseMessage, ToolMessage
+from langchain_core.utils.function_calling import convert_to_openai_tool
+from langgraph.prebuilt.tool_node import ToolCallRequest
+
+from build_mcp.common.cache import TTLCache
+
+_SPACES = re.compile(r"\s+")
+_TRAILING_PUNCTUATION = "?？!！。.,，;；~～ "
+
+
+def normalize_text(text: str) -> str:
+    """
+    归一化用户输入，使仅有大小写、空白或句末标点差异的问题得到相同的缓存键。
+    """
+    return _SPACES.sub(" ", text).strip().casefold().rstrip(_TRAILING_PUNCTUATION)
+
+
+def _content(message: BaseMessage, normalize: Callable[[str], str]) -> Any:
+    content = message.content
+    if isinstance(content, str):
+        return normalize(content) if message.type == "human" else content
+    return content
+
+
+def _usage_tokens(messages: Iterable[BaseMessage]) -> int:
+    return sum(
+        (getattr(m, "usage_metadata", None) or {}).get("total_tokens", 0)
+        for m in messages if isinstance(m, AIMessage)
+    )
+
+
+def _replay(messages: Iterable[BaseMessage]) -> list:
+    """
+    复制缓存的消息用于本次应答：重新生成消息 ID 和工具调用 ID（避免与会话中已有的消息合并），
+    清空 usage_metadata（缓存命中不消耗 token）。
+    """
+    ids: Dict[str, str] = {}
+    result = []
+    for message in messages:
+        if isinstance(message, AIMessage):
+            tool_calls = []
+            for call in message.tool_calls:
+                ids[call["id"]] = f"call_{uuid.uuid4().hex[:24]}"
+                tool_calls.append({**call, "id": ids[call["id"]]})
+            additional_kwargs = {k: v for k, v in message.additional_kwargs.items() if k != "tool_calls"}
+            message = message.model_copy(update={
+                "id": f"cache-{uuid.uuid4().hex}",
+                "tool_calls": tool_calls,
+                "additional_kwargs": additional_kwargs,
+                "usage_metadata": None,
+                "response_metadata": {**message.response_metadata, "cache_hit": True},
+            })
+        elif isinstance(message, ToolMessage):
+            message = message.model_copy(update={
+                "id": None,
+                "tool_call_id": ids.get(message.tool_call_id, message.tool_call_id),
+            })
+        result.append(message)
+    return result
+
+
+class ResponseCacheMiddleware(AgentMiddleware):
+    """
+    模型响应和工具结果缓存中间件。
+
+    - 模型响应：按「模型名 + 模型参数 + 系统提示词 + 归一化后的消息 + 工具定义 + 输出格式」的哈希缓存，
+      相同或仅有大小写、空白、句末标点差异的问题直接返回缓存的响应，不再请求模型；
+      缓存键包含完整的消息历史，因此只会在上下文完全相同时命中；
+    - 工具结果：只缓存 cache_tools 中列出的确定性工具（结果只取决于参数），按「工具名 + 参数」缓存；
+      依赖运行时上下文（例如 user_id）的工具不应加入；
+    - 记录命中率和节省的 token 数（按缓存响应原本消耗的 token 计算）。
+
+    放在选择模型和工具的中间件之后（列表中更靠后），缓存键才能反映最终使用的模型和工具。
+
+    Args:
+        model_ttl (float): 模型响应的缓存时间（秒），默认 300，0 表示不缓存模型响应。
+        tool_ttl (float): 工具结果的缓存时间（秒），默认 600。
+        cache_tools (Iterable[str]): 可以缓存结果的工具名。
+        max_entries (int): 每类缓存（包括工具定义）的最大条目数，默认 1024。
+        max_bytes (int): 每类缓存的最大占用字节数，默认 16MB。
+        normalize (Callable[[str], str]): 用户消息的归一化函数，默认 normalize_text。
+    Example:
+        create_agent(model, tools, middleware=[ResponseCacheMiddleware(cache_tools=["get_weather_for_location"])])
+    """
+
+    def __init__(self, model_ttl: float = 300, tool_ttl: float = 600, cache_tools: Iterable[str] = (),
+                 max_entries: int = 1024, max_bytes: int = 16 * 1024 * 1024,
+                 normalize: Callable[[str], str] = normalize_text):
+        super().__init__()
+        self.model_ttl = model_ttl
+        self.tool_ttl = tool_ttl
+        self.cache_tools = frozenset(cache_tools)
+        self.normalize = normalize
+        self.max_entries = max_entries
+        self._models = TTLCache(max_entries=max_entries, max_bytes=max_bytes, default_ttl=model_ttl)
+        self._tools = TTLCache(max_entries=max_entries, max_bytes=max_bytes, default_ttl=tool_ttl)
+        # 同步工具在线程池中并发执行，缓存读写需要加锁
+        self._lock = threading.Lock()
+        # id(tool) -> (tool, 发送给模型的工具定义)，避免每次调用重新生成 JSON Schema；按最近使用淘汰
+        self._tool_specs: "OrderedDict[int, tuple]" = OrderedDict()
+        self.tokens_saved = 0
+
+    def _tool_spec(self, tool: Any) -> Any:
+        if isinstance(tool, dict):
+            return tool
+        with self._lock:
+            cached = self._tool_specs.get(id(tool))
+            if cached is not None and cached[0] is tool:
+                self._tool_specs.move_to_end(id(tool))
+                return cached[1]
+        spec = convert_to_openai_tool(tool)
+        with self._lock:
+            self._tool_specs[id(tool)] = (tool, spec)
+            self._tool_specs.move_to_end(id(tool))
+            while len(self._tool_specs) > self.max_entries:
+                self._tool_specs.popitem(last=False)
+        return spec
+
+    def _model_key(self, request: ModelRequest) -> str:
+        model = request.model
+        payload = {
+            "model": getattr(model, "model_name", None) or getattr(model, "model", None) or type(model).__name__,
+            "settings": request.model_settings,
+            "system": request.system_prompt,
+            "messages": [
+                [m.type, _content(m, self.normalize), [[c["name"], c["args"]] for c in getattr(m, "tool_calls", [])]]
+                for m in request.messages
+            ],
+            "tools": [self._tool_spec(t) for t in request.tools],
+            "tool_choice": request.tool_choice,
+            "response_format": repr(request.response_format),
+        }
+        raw = json.dumps(payload, ensure_ascii=False, sort_keys=True, default=str)
+        return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+    def _tool_key(self, request: ToolCallRequest) -> Optional[str]:
+        name = request.tool_call["name"]
+        if name not in self.cache_tools:
+            return None
+        return name + "|" + json.dumps(request.tool_call["args"], ensure_ascii=False, sort_keys=True, default=str)
+
+    def _cached_model(self, key: str) -> Optional[ModelResponse]:
+        with self._lock:
+            cached = self._models.get(key)
+            if cached is None:
+                return None
+            self.tokens_saved += _usage_tokens(cached.result)
+        return ModelResponse(result=_replay(cached.result), structured_response=cached.structured_response)
+
+    def _store_model(self, key: str, response: ModelResponse) -> None:
+        if all(isinstance(m, (AIMessage, ToolMessage)) for m in response.result):
+            with self._lock:
+                self._models.set(key, response)
+
+    def _cached_tool(self, key: str, request: ToolCallRequest) -> Optional[ToolMessage]:
+        with self._lock:
+            cached = self._tools.get(key)
+        if cached is None:
+            return None
+        return cached.model_copy(update={"id": None, "tool_call_id": request.tool_call["id"]})
+
+    def _store_tool(self, key: str, result: Any) -> None:
+        if isinstance(result, ToolMessage) and result.status != "error":
+            with self._lock:
+                self._tools.set(key, result)
+
+    def wrap_model_call(
+        self,
+        request: ModelRequest,
+        handler: Callable[[ModelRequest], ModelResponse]
+    ) -> ModelResponse:
+        if not self.model_ttl:
+            return handler(request)
+        key = self._model_key(request)
+        cached = self._cached_model(key)
+        if cached is not None:
+            return cached
+        response = handler(request)
+        self._store_model(key, response)
+        return response
+
+    async def awrap_model_call(
+        self,
+        request: ModelRequest,
+        handler: Callable[[ModelRequest], Awaitable[ModelResponse]]
+    ) -> ModelResponse:
+        if not self.model_ttl:
+            return await handler(request)
+        key = self._model_key(request)
+        cached = self._cached_model(key)
+        if cached is not None:
+            return cached
+        response = await handler(request)
+        self._store_model(key, response)
+        return response
+
+    def wrap_tool_call(self, request: ToolCallRequest, handler: Callable[[ToolCallRequest], Any]) -> Any:
+        key = self._tool_key(request)
+        if key is None:
+            return handler(request)
+        cached = self._cached_tool(key, request)
+        if cached is not None:
+            return cached
+        result = handler(request)
+        self._store_tool(key, result)
+        return result
+
+    async def awrap_tool_call(self, request: ToolCallRequest, handler: Callable[[ToolCallRequest], Awaitable[Any]]) -> Any:
+        key = self._tool_key(request)
+        if key is None:
+            return await handler(request)
+        cached = self._cached_tool(key, request)
+        if cached is not None:
+            return cached
+        result = await handler(request)
+        self._store_tool(key, result)
+        return result
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        返回模型响应和工具结果缓存的命中情况，以及节省的 token 数。
+        """
+        result = {}
+        with self._lock:
+            for name, cache in (("model", self._models), ("tool", self._tools)):
+                lookups = cache.hits + cache.misses
+                result[name] = {
+                    "entries": len(cache),
+                    "hits": cache.hits,
+                    "misses": cache.misses,
+                    "hit_rate": round(cache.hits / lookups, 4) if lookups else 0.0,
+                }
+            result["tokens_saved"] = self.tokens_saved
+        return result
+
+
+def _user_key(runtime) -> str:
+    context = getattr(runtime, "context", None)
+    return str(getattr(context, "user_id", None) or "default")
+
+
+class TokenBudgetMiddleware(AgentMiddleware):
+    """
+    按用户统计 token 用量并限制预算的中间件。
+
+    - 每次模型调用后按响应的 usage_metadata 累加用量，缓存命中的响应不计入；
+    - 用量达到预算后不再请求模型，直接返回 message 作为答复，窗口结束后用量清零，
+      窗口已结束的用户记录被移除，长时间运行时内存不会随用户数增长；
+    - 用户由 key 函数从运行时上下文中识别，默认取 context.user_id。
+
+    Args:
+        budget (int): 每个用户在一个窗口内的 token 预算，0 表示不限制。
+        window (float): 预算窗口（秒），默认 86400（一天）。
+        budgets (dict, optional): 按用户单独设置的预算，覆盖 budget。
+        key (Callable, optional): 从 runtime 计算用户标识的函数。
+        message (str): 超出预算时返回的答复。
+    """
+
+    def __init__(self, budget: int = 0, window: float = 86400, budgets: Optional[Dict[str, int]] = None,
+                 key: Callable[[Any], str] = _user_key, message: str = "本周期的 token 预算已用完，请稍后再试。"):
+        super().__init__()
+        self.budget = budget
+        self.window = window
+        self.budgets = dict(budgets or {})
+        self.key = key
+        self.message = message
+        self._lock = threading.Lock()
+        # user -> [窗口开始时间, 已用 token, 模型调用次数]，按窗口开始时间排序，窗口结束的用户被移除
+        self._usage: Dict[str, list] = {}
+        self.rejected = 0
+
+    def _limit(self, user: str) -> int:
+        return self.budgets.get(user, self.budget)
+
+    def _expire(self, now: float) -> None:
+        # 新窗口总是插入到末尾，窗口已结束的用户都在最前面
+        while self._usage:
+            user, entry = next(iter(self._usage.items()))
+            if now - entry[0] < self.window:
+                break
+            del self._usage[user]
+
+    def _entry(self, user: str, now: float) -> list:
+        self._expire(now)
+        entry = self._usage.get(user)
+        if entry is None:
+            entry = self._usage[user] = [now, 0, 0]
+        return entry
+
+    def _check(self, request: ModelRequest) -> Optional[ModelResponse]:
+        user = self.key(request.runtime)
+        limit = self._limit(user)
+        with self._lock:
+            entry = self._entry(user, time.monotonic())
+            if not limit or entry[1] < limit:
+                return None
+            self.rejected += 1
+        return ModelResponse(result=[AIMessage(content=self.message, response_metadata={"budget_exceeded": True})])
+
+    def _record(self, request: ModelRequest, response: ModelResponse) -> None:
+        user = self.key(request.runtime)
+        with self._lock:
+            entry = self._entry(user, time.monotonic())
+            entry[1] += _usage_tokens(response.result)
+            entry[2] += 1
+
+    def wrap_model_call(
+        self,
+        request: ModelRequest,
+        handler: Callable[[ModelRequest], ModelResponse]
+    ) -> ModelResponse:
+        rejected = self._check(request)
+        if rejected is not None:
+            return rejected
+        response = handler(request)
+        self._record(request, response)
+        return response
+
+    async def awrap_model_call(
+        self,
+        request: ModelRequest,
+        handler: Callable[[ModelRequest], Awaitable[ModelResponse]]
+    ) -> ModelResponse:
+        rejected = self._check(request)
+        if rejected is not None:
+            return rejected
+        response = await handler(request)
+        self._record(request, response)
+        return response
+
+    def usage(self, user: str) -> Dict[str, Any]:
+        """
+        返回用户在当前窗口内的 token 用量和剩余预算（不限制时 remaining 为 None）。
+        """
+        limit = self._limit(user)
+        with self._lock:
+            entry = self._entry(user, time.monotonic())
+            used, calls = entry[1], entry[2]
+        return {"used": used, "calls": calls, "budget": limit, "remaining": max(0, limit - used) if limit else None}
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        返回所有用户的用量和因超出预算被拒绝的调用次数。
+        """
+        with self._lock:
+            self._expire(time.monotonic())
+            users = list(self._usage)
+        return {"users": {user: self.usage(user) for user in users}, "rejected": self.rejected}
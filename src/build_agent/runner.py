@@ -0,0 +1,114 @@
+import asyncio
+import uuid
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, Iterable, List, Optional, Tuple
+
+
+class AgentRunner:
+    """
+    异步 Agent 运行器，在一个进程内并发服务多个会话。
+
+    - Agent 只构建一次，模型客户端来自 ModelPool，会话之间通过 thread_id 区分（由 checkpointer 保存各自的历史）；
+    - 使用 ainvoke / astream，等待模型和工具时不阻塞事件循环；
+    - 同一轮模型输出的多个工具调用由 create_agent 拆分为并行分支同时执行，
+      异步工具在事件循环中并发，同步工具在线程池中执行；
+    - max_concurrency 限制同时运行的会话数，超出的会话排队等待。
+
+    Args:
+        agent: create_agent 返回的 Agent。
+        max_concurrency (int): 同时运行的会话数上限，默认 64，0 表示不限制。
+        recursion_limit (int, optional): 单个会话的最大步数，默认使用 LangGraph 的设置。
+    Example:
+        runner = AgentRunner(create_weather_agent())
+        result = await runner.ainvoke("what is the weather outside?", thread_id="1", context=Context(user_id="2"))
+    """
+
+    def __init__(self, agent, max_concurrency: int = 64, recursion_limit: Optional[int] = None):
+        self.agent = agent
+        self.recursion_limit = recursion_limit
+        self._slots = asyncio.Semaphore(max_concurrency) if max_concurrency else None
+        self.active = 0
+        self.completed = 0
+        self.failed = 0
+
+    def _config(self, thread_id: Optional[str]) -> dict:
+        config = {"configurable": {"thread_id": thread_id or uuid.uuid4().hex}}
+        if self.recursion_limit:
+            config["recursion_limit"] = self.recursion_limit
+        return config
+
+    @staticmethod
+    def _input(message) -> dict:
+        if isinstance(message, str):
+            return {"messages": [{"role": "user", "content": message}]}
+        return message
+
+    @asynccontextmanager
+    async def _slot(self):
+        if self._slots is not None:
+            await self._slots.acquire()
+        self.active += 1
+        try:
+            yield
+        except BaseException:
+            self.failed += 1
+            raise
+        else:
+            self.completed += 1
+        finally:
+            self.active -= 1
+            if self._slots is not None:
+                self._slots.release()
+
+    async def ainvoke(self, message, thread_id: str = None, context: Any = None) -> dict:
+        """
+        运行一轮对话。
+
+        Args:
+            message (str | dict): 用户消息，或 {"messages": [...]} 格式的完整输入。
+            thread_id (str, optional): 会话 ID，为空时生成一个新会话。
+            context (Any, optional): 运行时上下文，对应 create_agent 的 context_schema。
+        Returns:
+            dict: Agent 的最终状态，包含 messages 等字段。
+        """
+        async with self._slot():
+            return await self.agent.ainvoke(self._input(message), config=self._config(thread_id), context=context)
+
+    async def astream(self, message, thread_id: str = None, context: Any = None,
+                      stream_mode: str = "updates") -> AsyncIterator[Any]:
+        """
+        流式运行一轮对话，逐步返回各节点的输出。
+
+        Args:
+            message (str | dict): 用户消息，或 {"messages": [...]} 格式的完整输入。
+            thread_id (str, optional): 会话 ID，为空时生成一个新会话。
+            context (Any, optional): 运行时上下文。
+            stream_mode (str): LangGraph 的流式模式，如 "updates"、"messages"、"values"。
+        Yields:
+            Any: 流式输出的数据块。
+        """
+        async with self._slot():
+            async for chunk in self.agent.astream(self._input(message), config=self._config(thread_id),
+                                                  context=context, stream_mode=stream_mode):
+                yield chunk
+
+    async def run_many(self, conversations: Iterable[Tuple[str, Any]], context: Any = None) -> List[Any]:
+        """
+        并发运行多个会话，结果顺序与输入一致，单个会话的异常作为结果返回，不影响其他会话。
+
+        Args:
+            conversations (Iterable[tuple[str, str | dict]]): (thread_id, message) 列表。
+            context (Any, optional): 所有会话共用的运行时上下文。
+        Returns:
+            list: 每个会话的最终状态或异常。
+        """
+        return await asyncio.gather(
+            *(self.ainvoke(message, thread_id, context) for thread_id, message in conversations),
+            return_exceptions=True,
+        )
+
+    def stats(self) -> dict:
+        """
+        返回进行中、已完成和失败的会话数。
+        """
+        return {"active": self.active, "completed": self.completed, "failed": self.failed}
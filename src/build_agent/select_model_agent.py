@@ -1,8 +1,9 @@
 from dataclasses import dataclass
-from typing import Callable
+from typing import Awaitable, Callable
 from langchain_openai import ChatOpenAI
 from langchain.tools import tool, ToolRuntime
-from llm_chat import qwen_model
+from build_agent.llm_chat import pooled_model
+from build_agent.middleware import ResponseCacheMiddleware, TokenBudgetMiddleware
 from langchain.agents.middleware import AgentMiddleware, ModelRequest
 from langchain.agents.middleware.types import ModelResponse
 from langchain.agents import create_agent
@@ -45,34 +46,44 @@ class ExpertiseBasedToolMiddleware(AgentMiddleware):
     中间件实现了能力分级：
         先从运行时上下文读取用户的技术水平标识。
         如果是专家用户，分配更强的模型（gpt-5）和高级工具（advanced_search、data_analysis）。如果是初学者，使用轻量模型（gpt-5-nano）和基础工具（simple_search、basic_calculator）
+        模型客户端从模型池获取，每次模型调用不再重新创建。同时实现同步和异步版本，支持 invoke 和 ainvoke / astream。
     '''
-    def wrap_model_call(
-        self,
-        request: ModelRequest,
-        handler: Callable[[ModelRequest], ModelResponse]
-    ) -> ModelResponse:
-
+    def _select(self, request: ModelRequest) -> None:
         # Check: Is this user a beginner or expert?
         user_level = request.runtime.context.user_expertise
 
         if user_level == "expert":
             # Experts get powerful AI and advanced tools
             # model = ChatOpenAI(model="gpt-5")
-            model = qwen_model(model="qwen-max")
+            model = pooled_model(model="qwen-max")
             tools = [advanced_search, data_analysis]
         else:
             # Beginners get simpler AI and basic tools
             # model = ChatOpenAI(model="gpt-5-nano")
-            model = qwen_model(model="qwen-plus")
+            model = pooled_model(model="qwen-plus")
             tools = [simple_search, basic_calculator]
 
         # Update what the AI sees
         request.model = model
         request.tools = tools
 
+    def wrap_model_call(
+        self,
+        request: ModelRequest,
+        handler: Callable[[ModelRequest], ModelResponse]
+    ) -> ModelResponse:
+        self._select(request)
         # Send it forward to the AI
         return handler(request)
 
+    async def awrap_model_call(
+        self,
+        request: ModelRequest,
+        handler: Callable[[ModelRequest], Awaitable[ModelResponse]]
+    ) -> ModelResponse:
+        self._select(request)
+        return await handler(request)
+
 
 # Now use your custom middleware (just like the built-in ones!)
 # 代码组织更规范。每个中间件都是独立模块，功能边界清晰，不会出现逻辑耦合的问题。
@@ -85,9 +96,9 @@ class ExpertiseBasedToolMiddleware(AgentMiddleware):
 # PIIMiddleware 处理个人敏感信息，邮箱地址会被脱敏处理，电话号码直接阻断，确保隐私数据不会泄露给模型。
 # SummarizationMiddleware 解决长对话的上下文管理问题。Token 数超过阈值后自动生成摘要，保持上下文简洁的同时不丢失关键信息。
 # HumanInTheLoopMiddleware 在关键操作前加入人工审核。比如发送邮件这种操作，必须经过人类批准才能执行
-# Token 统计和预算控制、响应缓存机制、错误处理和重试逻辑、自定义日志记录等
+# Token 统计和预算控制（TokenBudgetMiddleware）、响应缓存机制（ResponseCacheMiddleware）、错误处理和重试逻辑、自定义日志记录等
 def agent_func():
-    model = qwen_model(model="qwen-max")
+    model = pooled_model(model="qwen-max")
     agent = create_agent(
         model=model,
         tools=[simple_search, advanced_search, basic_calculator, data_analysis],
@@ -101,7 +112,7 @@ def agent_func():
             # When conversation gets long, make a short summary
             # (like creating a highlight reel of a long movie)
             SummarizationMiddleware(
-                model=qwen_model(model="qwen-max"),
+                model=pooled_model(model="qwen-max"),
                 max_tokens_before_summary=1000
             ),
 
@@ -115,6 +126,10 @@ def agent_func():
             #     }
             # ),
             ExpertiseBasedToolMiddleware(),  # 自定义中间件
+            # 按用户限制 token 用量；Context 没有 user_id 时所有调用共用一个预算
+            TokenBudgetMiddleware(budget=200000),
+            # 放在 ExpertiseBasedToolMiddleware 之后，缓存键包含最终选择的模型和工具
+            ResponseCacheMiddleware(cache_tools=["simple_search", "advanced_search"]),
         ],  # Your custom middleware here!
         context_schema=Context
      )
@@ -2,7 +2,6 @@ import argparse
 import asyncio
 
 from build_mcp.common.logger import get_logger
-from build_mcp.services.server import mcp
 
 
 def main():
@@ -17,12 +16,46 @@ def main():
         choices=['stdio', 'sse', 'streamable-http'],
         help='Transport type (stdio, sse, or streamable-http)'
     )
+    parser.add_argument('--host', default=None, help='Bind host for sse / streamable-http')
+    parser.add_argument('--port', type=int, default=None, help='Bind port for sse / streamable-http')
+    parser.add_argument('--workers', type=int, default=None,
+                        help='Worker processes sharing the listening socket (streamable-http only, stateless sessions)')
+    parser.add_argument('--max-concurrency', type=int, default=None,
+                        help='Max concurrent tool executions per process, 0 for unlimited')
+    parser.add_argument('--graceful-timeout', type=float, default=None,
+                        help='Seconds to wait for in-flight requests on shutdown (streamable-http)')
+    parser.add_argument('--drain-delay', type=float, default=None,
+                        help='Seconds to keep serving after SIGTERM while /readyz reports 503 (streamable-http)')
     args = parser.parse_args()
 
+    # 解析完参数再导入服务模块，--help 和参数错误无需等待 MCP 相关依赖加载
+    from build_mcp.services.server import mcp, set_max_concurrency
+
+    if args.host:
+        mcp.settings.host = args.host
+    if args.port:
+        mcp.settings.port = args.port
+
     logger.info(f"  Starting MCP server with transport type: %s", args.transport)
 
+    if args.workers and args.workers > 1 and args.transport != 'streamable-http':
+        parser.error('--workers requires the streamable-http transport')
+    if args.max_concurrency is not None:
+        set_max_concurrency(args.max_concurrency)
+
     try:
-        mcp.run(transport=args.transport)
+        if args.transport == 'streamable-http':
+            from build_mcp.services.serving import serve_http
+            serve_http(
+                host=args.host,
+                port=args.port,
+                workers=args.workers,
+                max_concurrency=args.max_concurrency,
+                graceful_timeout=args.graceful_timeout,
+                drain_delay=args.drain_delay,
+            )
+        else:
+            mcp.run(transport=args.transport)
     except (KeyboardInterrupt, asyncio.CancelledError):
         logger.info("  MCP Server received shutdown signal. Cleaning up...")
     except Exception as e:
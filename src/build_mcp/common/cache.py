@@ -0,0 +1,255 @@
+import asyncio
+import contextvars
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+from typing import Any, Awaitable, Callable, Dict, Hashable, List, Optional, Tuple
+
+import pydantic_core
+
+from build_mcp.common.latency import current_deadline, follow_deadline
+from build_mcp.common.scheduler import INTERACTIVE, current_priority, follow_priority
+
+
+def estimate_size(value: Any) -> int:
+  """
+  粗略估算缓存值占用的字节数（按 JSON 序列化后的长度计算，使用 pydantic-core 的序列化器）。
+
+  Args:
+      value (Any): 缓存值，通常为接口返回的 dict。
+
+  Returns:
+      int: 估算的字节数。
+  """
+  try:
+    return len(pydantic_core.to_json(value))
+  except (TypeError, ValueError, pydantic_core.PydanticSerializationError):
+    return len(repr(value))
+
+
+class TTLCache:
+  """
+  带过期时间的 LRU 内存缓存。
+
+  - 每个条目可以单独指定 TTL，过期后读取视为未命中；
+  - 超过条目数上限或内存上限时，按最近最少使用顺序淘汰；
+  - 记录命中、未命中、淘汰、过期次数。
+
+  Args:
+      max_entries (int): 最大条目数，默认 1024。
+      max_bytes (int): 最大占用字节数（估算值），默认 16MB。
+      default_ttl (float): 默认过期时间（秒），默认 300。
+  """
+
+  def __init__(self, max_entries: int = 1024, max_bytes: int = 16 * 1024 * 1024, default_ttl: float = 300):
+    self.max_entries = max_entries
+    self.max_bytes = max_bytes
+    self.default_ttl = default_ttl
+    # key -> (expire_at, size, value)
+    self._data: "OrderedDict[Hashable, tuple]" = OrderedDict()
+    self._bytes = 0
+    self.hits = 0
+    self.misses = 0
+    self.evictions = 0
+    self.expirations = 0
+
+  def __len__(self):
+    return len(self._data)
+
+  def __contains__(self, key):
+    entry = self._data.get(key)
+    return entry is not None and entry[0] > time.monotonic()
+
+  def get(self, key: Hashable) -> Optional[Any]:
+    """
+    读取缓存，命中时将条目移动到队尾。
+
+    Args:
+        key (Hashable): 缓存键。
+
+    Returns:
+        Any | None: 缓存值，未命中或已过期时返回 None。
+    """
+    entry = self._data.get(key)
+    if entry is None:
+      self.misses += 1
+      return None
+
+    expire_at, size, value = entry
+    if expire_at <= time.monotonic():
+      self._remove(key)
+      self.expirations += 1
+      self.misses += 1
+      return None
+
+    self._data.move_to_end(key)
+    self.hits += 1
+    return value
+
+  def peek(self, key: Hashable) -> Optional[Any]:
+    """
+    读取缓存但不更新 LRU 顺序和命中统计。
+    """
+    entry = self._data.get(key)
+    if entry is None or entry[0] <= time.monotonic():
+      return None
+    return entry[2]
+
+  def set(self, key: Hashable, value: Any, ttl: Optional[float] = None) -> None:
+    """
+    写入缓存，必要时淘汰最久未使用的条目。
+
+    Args:
+        key (Hashable): 缓存键。
+        value (Any): 缓存值。
+        ttl (float, optional): 过期时间（秒），为空时使用 default_ttl。
+    """
+    ttl = self.default_ttl if ttl is None else ttl
+    if ttl <= 0:
+      return
+
+    size = estimate_size(value)
+    if size > self.max_bytes:
+      # 单个值超过内存上限，不缓存
+      return
+
+    if key in self._data:
+      self._remove(key)
+
+    self._data[key] = (time.monotonic() + ttl, size, value)
+    self._bytes += size
+
+    while len(self._data) > self.max_entries or self._bytes > self.max_bytes:
+      oldest = next(iter(self._data))
+      self._remove(oldest)
+      self.evictions += 1
+
+  def delete(self, key: Hashable) -> None:
+    if key in self._data:
+      self._remove(key)
+
+  def clear(self) -> None:
+    self._data.clear()
+    self._bytes = 0
+
+  def _remove(self, key: Hashable) -> None:
+    _, size, _ = self._data.pop(key)
+    self._bytes -= size
+
+  def stats(self) -> Dict[str, Any]:
+    """
+    返回缓存统计信息。
+
+    Returns:
+        dict: 包含 hits、misses、evictions、expirations、entries、bytes、hit_rate。
+    """
+    total = self.hits + self.misses
+    return {
+      "hits": self.hits,
+      "misses": self.misses,
+      "evictions": self.evictions,
+      "expirations": self.expirations,
+      "entries": len(self._data),
+      "bytes": self._bytes,
+      "hit_rate": round(self.hits / total, 4) if total else 0.0,
+    }
+
+
+class _Flight:
+  """
+  进行中的共享请求，以及按各等待方汇总的截止时间和优先级。
+  """
+  __slots__ = ("task", "deadline", "priority")
+
+  def __init__(self):
+    self.task: Optional[asyncio.Future] = None
+    # 各等待方中最晚的截止时间，任一等待方不限时则为 None
+    self.deadline: Optional[float] = -float("inf")
+    self.priority: Optional[str] = None
+
+  def join(self) -> None:
+    at = current_deadline()
+    self.deadline = None if at is None or self.deadline is None else max(self.deadline, at)
+    name = current_priority()
+    if self.priority is None or name == INTERACTIVE:
+      self.priority = name
+
+  def start(self, fn: Callable[[], Awaitable[Any]]) -> asyncio.Future:
+    follow_deadline(lambda: self.deadline)
+    follow_priority(lambda: self.priority)
+    return asyncio.ensure_future(fn())
+
+
+class SingleFlight:
+  """
+  合并并发的相同请求：同一个 key 同时只有一个真实请求在执行，其余调用方等待并共享结果。
+
+  真实请求在空的上下文中执行，不继承第一个调用方的过期标记、追踪 span 等状态；
+  截止时间取各等待方中最晚的，任一等待方是交互式请求时按交互式优先级调度，随等待方的加入更新。
+  """
+
+  def __init__(self):
+    self._inflight: Dict[Hashable, _Flight] = {}
+    self.coalesced = 0
+
+  def __len__(self):
+    return len(self._inflight)
+
+  def __contains__(self, key):
+    return key in self._inflight
+
+  async def do(self, key: Hashable, fn: Callable[[], Awaitable[Any]]) -> Any:
+    """
+    执行或加入一个进行中的请求。
+
+    Args:
+        key (Hashable): 请求键。
+        fn (Callable): 无参的协程工厂，只有第一个调用方会真正执行。
+
+    Returns:
+        Any: fn 的返回值；fn 抛出的异常会传递给所有等待方。
+    """
+    flight = self._inflight.get(key)
+    if flight is not None:
+      self.coalesced += 1
+      flight.join()
+    else:
+      # 真实请求放在独立任务中执行，任一调用方被取消都不会影响其他等待方
+      flight = _Flight()
+      flight.join()
+      flight.task = contextvars.Context().run(flight.start, fn)
+      self._inflight[key] = flight
+      flight.task.add_done_callback(lambda _: self._inflight.pop(key, None))
+    return await asyncio.shield(flight.task)
+
+
+# 当前调用链中各层 collect_stale 的收集列表
+_stale_ages: contextvars.ContextVar[Tuple[List[float], ...]] = contextvars.ContextVar("stale_ages", default=())
+
+
+@contextmanager
+def collect_stale():
+  """
+  收集当前调用链中返回过期缓存结果的记录，嵌套时外层同样能收到。
+  asyncio.gather 等创建的子任务共享同一个列表。
+
+  Yields:
+      list[float]: 每次返回过期结果时追加该结果的年龄（秒）。
+  """
+  ages: List[float] = []
+  token = _stale_ages.set(_stale_ages.get() + (ages,))
+  try:
+    yield ages
+  finally:
+    _stale_ages.reset(token)
+
+
+def mark_stale(age: float) -> None:
+  """
+  记录本次返回的是过期缓存结果。
+
+  Args:
+      age (float): 结果写入缓存至今的秒数。
+  """
+  for ages in _stale_ages.get():
+    ages.append(age)
@@ -0,0 +1,89 @@
+import time
+from typing import Any, Dict, Optional
+
+
+class CircuitBreaker:
+  """
+  熔断器。
+
+  - closed：正常放行，连续失败 failure_threshold 次后进入 open；
+  - open：直接拒绝请求（快速失败），reset_timeout 秒后进入 half_open；
+  - half_open：只放行一个探测请求，成功则恢复 closed，失败则重新 open。
+    探测请求超过 reset_timeout 仍未报告结果（例如被取消）时，允许发出新的探测请求。
+
+  Args:
+      failure_threshold (int): 连续失败多少次后熔断，默认 5。
+      reset_timeout (float): 熔断后多少秒开始探测，默认 30。
+  """
+
+  CLOSED = "closed"
+  OPEN = "open"
+  HALF_OPEN = "half_open"
+
+  def __init__(self, failure_threshold: int = 5, reset_timeout: float = 30.0):
+    self.failure_threshold = max(1, failure_threshold)
+    self.reset_timeout = reset_timeout
+    self.state = self.CLOSED
+    self.failures = 0
+    self.opened_at = 0.0
+    self._probe_started: Optional[float] = None
+    self.opened = 0
+    self.rejected = 0
+
+  def allow(self, now: Optional[float] = None) -> bool:
+    """
+    判断是否放行一次请求，放行后调用方需要通过 record_success / record_failure 报告结果。
+    """
+    if self.state == self.CLOSED:
+      return True
+    now = time.monotonic() if now is None else now
+    if self.state == self.OPEN:
+      if now - self.opened_at < self.reset_timeout:
+        self.rejected += 1
+        return False
+      self.state = self.HALF_OPEN
+      self._probe_started = None
+    if self._probe_started is not None and now - self._probe_started < self.reset_timeout:
+      self.rejected += 1
+      return False
+    self._probe_started = now
+    return True
+
+  def record_success(self) -> None:
+    self.state = self.CLOSED
+    self.failures = 0
+    self._probe_started = None
+
+  def record_failure(self, now: Optional[float] = None) -> bool:
+    """
+    记录一次失败。
+
+    Returns:
+        bool: 本次失败是否使熔断器进入 open 状态。
+    """
+    self._probe_started = None
+    self.failures += 1
+    if self.state == self.HALF_OPEN or (self.state == self.CLOSED and self.failures >= self.failure_threshold):
+      self.state = self.OPEN
+      self.opened_at = time.monotonic() if now is None else now
+      self.opened += 1
+      return True
+    return False
+
+  def retry_after(self, now: Optional[float] = None) -> float:
+    """
+    返回距离下一次探测的秒数，非 open 状态时为 0。
+    """
+    if self.state != self.OPEN:
+      return 0.0
+    now = time.monotonic() if now is None else now
+    return max(0.0, self.reset_timeout - (now - self.opened_at))
+
+  def stats(self) -> Dict[str, Any]:
+    return {
+      "state": self.state,
+      "failures": self.failures,
+      "opened": self.opened,
+      "rejected": self.rejected,
+      "retry_after": round(self.retry_after(), 3),
+    }
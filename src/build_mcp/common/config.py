@@ -1,14 +1,27 @@
+import copy
+import functools
 import os
 
 import yaml
 
+# 环境变量 MCP_CONFIG 可指定其他配置文件（绝对路径或相对于包目录的路径）
+CONFIG_ENV = "MCP_CONFIG"
 
-def load_config(config_file="config.yaml") -> dict:
+
+@functools.lru_cache(maxsize=None)
+def _read_config(config_path: str) -> dict:
+    with open(config_path, "r", encoding="utf-8") as f:
+        return yaml.safe_load(f) or {}
+
+
+def load_config(config_file=None) -> dict:
     """
     加载配置文件。
 
+    同一个文件只解析一次，之后返回缓存结果的副本，调用方修改返回值不会影响其他模块。
+
     Args:
-        config_file (str): 配置文件的名称，默认为 "config.yaml"。
+        config_file (str, optional): 配置文件的名称，默认读取环境变量 MCP_CONFIG，未设置时为 "config.yaml"。
     Returns:
         dict: 返回配置文件的内容。
     Example:
@@ -17,8 +30,5 @@ def load_config(config_file="config.yaml") -> dict:
     """
     # 找到根目录（config.yaml 就放根目录）
     base_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
-    config_path = os.path.join(base_dir, config_file)
-
-    with open(config_path, "r", encoding="utf-8") as f:
-        config = yaml.safe_load(f)
-    return config
\ No newline at end of file
+    config_path = os.path.join(base_dir, config_file or os.getenv(CONFIG_ENV) or "config.yaml")
+    return copy.deepcopy(_read_config(config_path))
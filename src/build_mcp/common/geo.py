@@ -0,0 +1,396 @@
+import math
+from typing import List, Optional, Sequence, Tuple
+
+# 地球平均半径（米）
+EARTH_RADIUS = 6371008.8
+
+_BASE32 = "0123456789bcdefghjkmnpqrstuvwxyz"
+_BASE32_INDEX = {c: i for i, c in enumerate(_BASE32)}
+
+
+# numpy 在首次批量计算时才导入，避免拖慢服务启动；为 None 表示未安装
+_UNLOADED = object()
+np = _UNLOADED
+
+
+def _numpy():
+  global np
+  if np is _UNLOADED:
+    try:
+      import numpy as np
+    except ImportError:  # numpy 为可选依赖，缺失时退化为纯 Python 实现
+      np = None
+  return np
+
+
+def parse_location(location: str) -> Tuple[float, float]:
+  """
+  解析 "lng,lat" 格式的经纬度字符串。
+
+  Args:
+      location (str): 经纬度字符串，如 "116.397128,39.916527"。
+
+  Returns:
+      tuple: (lng, lat)。
+
+  Raises:
+      ValueError: 格式不正确或超出范围时抛出。
+  """
+  try:
+    lng_str, lat_str = location.split(",")
+    lng, lat = float(lng_str), float(lat_str)
+  except (AttributeError, ValueError):
+    raise ValueError(f"经纬度格式错误，应为 'lng,lat'：{location}")
+  if not (-180 <= lng <= 180 and -90 <= lat <= 90):
+    raise ValueError(f"经纬度超出范围：{location}")
+  return lng, lat
+
+
+def format_location(lng: float, lat: float) -> str:
+  """
+  将经纬度格式化为高德接口使用的 "lng,lat" 字符串（保留 6 位小数）。
+  """
+  return f"{lng:.6f},{lat:.6f}"
+
+
+def haversine(lng1: float, lat1: float, lng2: float, lat2: float) -> float:
+  """
+  计算两点之间的球面距离（米）。
+  """
+  phi1, phi2 = math.radians(lat1), math.radians(lat2)
+  d_phi = phi2 - phi1
+  d_lambda = math.radians(lng2 - lng1)
+  a = math.sin(d_phi / 2) ** 2 + math.cos(phi1) * math.cos(phi2) * math.sin(d_lambda / 2) ** 2
+  return 2 * EARTH_RADIUS * math.asin(min(1.0, math.sqrt(a)))
+
+
+def haversine_many(lng: float, lat: float, lngs: Sequence[float], lats: Sequence[float]) -> List[float]:
+  """
+  批量计算一个点到多个点的球面距离（米）。安装了 numpy 时使用向量化计算。
+
+  Args:
+      lng (float): 中心点经度。
+      lat (float): 中心点纬度。
+      lngs (Sequence[float]): 目标点经度序列。
+      lats (Sequence[float]): 目标点纬度序列。
+
+  Returns:
+      list[float]: 与目标点一一对应的距离。
+  """
+  np = _numpy()
+  if np is None:
+    return [haversine(lng, lat, x, y) for x, y in zip(lngs, lats)]
+
+  lngs = np.radians(np.asarray(lngs, dtype=np.float64))
+  lats = np.radians(np.asarray(lats, dtype=np.float64))
+  phi = math.radians(lat)
+  a = np.sin((lats - phi) / 2) ** 2 + math.cos(phi) * np.cos(lats) * np.sin((lngs - math.radians(lng)) / 2) ** 2
+  return (2 * EARTH_RADIUS * np.arcsin(np.minimum(1.0, np.sqrt(a)))).tolist()
+
+
+def geohash_encode(lng: float, lat: float, precision: int = 6) -> str:
+  """
+  计算经纬度的 geohash 编码。
+
+  Args:
+      lng (float): 经度。
+      lat (float): 纬度。
+      precision (int): 编码长度，默认 6（约 1.2km x 0.6km）。
+
+  Returns:
+      str: geohash 字符串。
+  """
+  lat_range = [-90.0, 90.0]
+  lng_range = [-180.0, 180.0]
+  chars = []
+  bits = 0
+  bit_count = 0
+  even = True
+  while len(chars) < precision:
+    rng, value = (lng_range, lng) if even else (lat_range, lat)
+    mid = (rng[0] + rng[1]) / 2
+    if value >= mid:
+      bits = (bits << 1) | 1
+      rng[0] = mid
+    else:
+      bits <<= 1
+      rng[1] = mid
+    even = not even
+    bit_count += 1
+    if bit_count == 5:
+      chars.append(_BASE32[bits])
+      bits = 0
+      bit_count = 0
+  return "".join(chars)
+
+
+def geohash_bounds(geohash: str) -> Tuple[float, float, float, float]:
+  """
+  返回 geohash 单元的边界 (min_lng, min_lat, max_lng, max_lat)。
+  """
+  lat_range = [-90.0, 90.0]
+  lng_range = [-180.0, 180.0]
+  even = True
+  for c in geohash:
+    bits = _BASE32_INDEX[c]
+    for shift in range(4, -1, -1):
+      rng = lng_range if even else lat_range
+      mid = (rng[0] + rng[1]) / 2
+      if (bits >> shift) & 1:
+        rng[0] = mid
+      else:
+        rng[1] = mid
+      even = not even
+  return lng_range[0], lat_range[0], lng_range[1], lat_range[1]
+
+
+def geohash_neighbors(geohash: str) -> List[str]:
+  """
+  返回 geohash 单元自身及周围 8 个相邻单元。
+  """
+  min_lng, min_lat, max_lng, max_lat = geohash_bounds(geohash)
+  d_lng = max_lng - min_lng
+  d_lat = max_lat - min_lat
+  center_lng = (min_lng + max_lng) / 2
+  center_lat = (min_lat + max_lat) / 2
+  cells = []
+  for dy in (-1, 0, 1):
+    for dx in (-1, 0, 1):
+      lat = center_lat + dy * d_lat
+      if not -90 <= lat <= 90:
+        continue
+      lng = (center_lng + dx * d_lng + 180) % 360 - 180
+      cell = geohash_encode(lng, lat, len(geohash))
+      if cell not in cells:
+        cells.append(cell)
+  return cells
+
+
+# 向量化计算时每块的「点数 x 线段数」上限，控制临时数组的内存
+_CHUNK = 1 << 20
+
+Segment = Tuple[float, float, float, float]
+
+
+def parse_path(text: str) -> List[List[Tuple[float, float]]]:
+  """
+  解析高德格式的坐标串："lng,lat;lng,lat;..."，多个部分（多个多边形、洞或多段路线）用 "|" 分隔。
+
+  Args:
+      text (str): 坐标串，如 "116.39,39.90;116.42,39.90;116.42,39.93"。
+
+  Returns:
+      list[list[tuple]]: 每个部分的 (lng, lat) 列表。
+
+  Raises:
+      ValueError: 格式不正确时抛出。
+  """
+  parts = []
+  for part in (text or "").split("|"):
+    points = [parse_location(point.strip()) for point in part.strip().strip(";").split(";") if point.strip()]
+    if points:
+      parts.append(points)
+  if not parts:
+    raise ValueError(f"坐标串为空：{text}")
+  return parts
+
+
+def segments(parts: Sequence[Sequence[Tuple[float, float]]], closed: bool) -> List[Segment]:
+  """
+  把折线或多边形的各部分拆成线段 (x1, y1, x2, y2) 列表，closed 为 True 时首尾相连。
+  """
+  result = []
+  for points in parts:
+    pairs = list(zip(points, points[1:]))
+    if closed and len(points) > 2 and points[0] != points[-1]:
+      pairs.append((points[-1], points[0]))
+    result.extend((x1, y1, x2, y2) for (x1, y1), (x2, y2) in pairs)
+  return result
+
+
+def _chunks(count: int, width: int):
+  step = max(1, _CHUNK // max(1, width))
+  for start in range(0, count, step):
+    yield start, min(count, start + step)
+
+
+def points_in_polygon(xs: Sequence[float], ys: Sequence[float], edges: Sequence[Segment]) -> List[bool]:
+  """
+  批量判断点是否在多边形内（奇偶规则，多个部分和洞都按边界穿越次数计算）。安装了 numpy 时使用向量化计算。
+
+  Args:
+      xs (Sequence[float]): 点的 x 坐标。
+      ys (Sequence[float]): 点的 y 坐标。
+      edges (Sequence[Segment]): 多边形的边，见 segments(parts, closed=True)。
+
+  Returns:
+      list[bool]: 与输入点一一对应的判断结果。
+  """
+  np = _numpy()
+  if np is None:
+    result = []
+    for x, y in zip(xs, ys):
+      inside = False
+      for x1, y1, x2, y2 in edges:
+        if (y1 > y) != (y2 > y) and x < x1 + (y - y1) * (x2 - x1) / (y2 - y1):
+          inside = not inside
+      result.append(inside)
+    return result
+
+  px = np.asarray(xs, dtype=np.float64)
+  py = np.asarray(ys, dtype=np.float64)
+  if not len(edges):
+    return [False] * len(px)
+  x1, y1, x2, y2 = (np.asarray(c, dtype=np.float64) for c in zip(*edges))
+  inside = np.zeros(len(px), dtype=bool)
+  for start, end in _chunks(len(px), len(x1)):
+    x = px[start:end, None]
+    y = py[start:end, None]
+    crosses = (y1 > y) != (y2 > y)
+    # 水平边不会穿越，除零产生的 inf/nan 被 crosses 屏蔽
+    with np.errstate(divide="ignore", invalid="ignore"):
+      hits = crosses & (x < x1 + (y - y1) * (x2 - x1) / (y2 - y1))
+    inside[start:end] = np.count_nonzero(hits, axis=1) % 2 == 1
+  return inside.tolist()
+
+
+def distance_to_segments(xs: Sequence[float], ys: Sequence[float], lines: Sequence[Segment]) -> List[float]:
+  """
+  批量计算点到一组线段的最短平面距离。安装了 numpy 时使用向量化计算。
+
+  Args:
+      xs (Sequence[float]): 点的 x 坐标。
+      ys (Sequence[float]): 点的 y 坐标。
+      lines (Sequence[Segment]): 线段列表。
+
+  Returns:
+      list[float]: 与输入点一一对应的距离，线段为空时为 inf。
+  """
+  np = _numpy()
+  if np is None:
+    result = []
+    for x, y in zip(xs, ys):
+      best = math.inf
+      for x1, y1, x2, y2 in lines:
+        dx, dy = x2 - x1, y2 - y1
+        length2 = dx * dx + dy * dy
+        t = min(1.0, max(0.0, ((x - x1) * dx + (y - y1) * dy) / length2)) if length2 else 0.0
+        best = min(best, math.hypot(x - x1 - t * dx, y - y1 - t * dy))
+      result.append(best)
+    return result
+
+  px = np.asarray(xs, dtype=np.float64)
+  py = np.asarray(ys, dtype=np.float64)
+  if not len(lines):
+    return [math.inf] * len(px)
+  x1, y1, x2, y2 = (np.asarray(c, dtype=np.float64) for c in zip(*lines))
+  dx, dy = x2 - x1, y2 - y1
+  length2 = dx * dx + dy * dy
+  safe = np.where(length2 > 0, length2, 1.0)
+  result = np.empty(len(px), dtype=np.float64)
+  for start, end in _chunks(len(px), len(x1)):
+    x = px[start:end, None]
+    y = py[start:end, None]
+    t = np.where(length2 > 0, np.clip(((x - x1) * dx + (y - y1) * dy) / safe, 0.0, 1.0), 0.0)
+    result[start:end] = np.hypot(x - x1 - t * dx, y - y1 - t * dy).min(axis=1)
+  return result.tolist()
+
+
+def hex_centers(min_x: float, min_y: float, max_x: float, max_y: float, radius: float) -> List[Tuple[float, float]]:
+  """
+  返回六边形网格中所有可能覆盖矩形内某点的圆心：外接圆半径为 radius 的正六边形铺满平面，
+  平面上任一点到最近圆心的距离都不超过 radius，这是等半径圆覆盖平面最省的排列。
+  网格以原点为锚点，同一区域得到的圆心稳定不变。
+  """
+  dx = math.sqrt(3) * radius
+  dy = 1.5 * radius
+  centers = []
+  for j in range(math.floor((min_y - radius) / dy), math.ceil((max_y + radius) / dy) + 1):
+    offset = dx / 2 if j % 2 else 0.0
+    for i in range(math.floor((min_x - radius - offset) / dx), math.ceil((max_x + radius - offset) / dx) + 1):
+      centers.append((i * dx + offset, j * dy))
+  return centers
+
+
+# 区域拆分时子区域半径与网格半径之比：投影变形在几百公里范围内约为百分之一到几，留出 5% 的重叠
+TILE_OVERLAP = 1.05
+
+
+class Area:
+  """
+  搜索区域：多边形（polygon），或路线（path）两侧 buffer 米以内的走廊。
+
+  坐标在区域中心附近按等距圆柱投影换算为平面米制坐标，适用于城市和省级范围（几百公里以内）的区域。
+
+  Args:
+      polygon (str, optional): 多边形坐标串，格式见 parse_path，可包含多个部分和洞。
+      path (str, optional): 路线坐标串。
+      buffer (float): 走廊半宽（米），path 不为空时必须大于 0。
+  """
+
+  def __init__(self, polygon: Optional[str] = None, path: Optional[str] = None, buffer: float = 0):
+    if bool(polygon) == bool(path):
+      raise ValueError("polygon 和 path 必须且只能指定一个")
+    if path and buffer <= 0:
+      raise ValueError("按路线搜索时 buffer 必须大于 0")
+    self.is_polygon = bool(polygon)
+    self.buffer = 0.0 if self.is_polygon else float(buffer)
+    parts = parse_path(polygon or path)
+    if self.is_polygon and any(len(points) < 3 for points in parts):
+      raise ValueError("多边形至少需要 3 个顶点")
+
+    lngs = [lng for points in parts for lng, _ in points]
+    lats = [lat for points in parts for _, lat in points]
+    self.origin = ((min(lngs) + max(lngs)) / 2, (min(lats) + max(lats)) / 2)
+    self._ky = math.pi / 180 * EARTH_RADIUS
+    self._kx = self._ky * math.cos(math.radians(self.origin[1]))
+    self.segments = segments([self.project(points) for points in parts], closed=self.is_polygon)
+    xs = [c for s in self.segments for c in (s[0], s[2])] or [0.0]
+    ys = [c for s in self.segments for c in (s[1], s[3])] or [0.0]
+    self.bounds = (min(xs) - self.buffer, min(ys) - self.buffer, max(xs) + self.buffer, max(ys) + self.buffer)
+
+  def project(self, points: Sequence[Tuple[float, float]]) -> List[Tuple[float, float]]:
+    lng0, lat0 = self.origin
+    return [((lng - lng0) * self._kx, (lat - lat0) * self._ky) for lng, lat in points]
+
+  def unproject(self, x: float, y: float) -> Tuple[float, float]:
+    return self.origin[0] + x / self._kx, self.origin[1] + y / self._ky
+
+  def tiles(self, radius: float) -> List[Tuple[float, float]]:
+    """
+    返回覆盖区域的最少一组半径为 radius 的圆的圆心 (lng, lat)。
+
+    网格按 radius / TILE_OVERLAP 铺设，相邻的圆留出余量，吸收平面投影与球面距离的偏差，
+    避免六边形顶点处出现未覆盖的缝隙。区域内任一点到最近的网格圆心不超过网格半径；该圆心若在多边形外，
+    它到边界的距离也不超过网格半径，因此保留在多边形内或距边界网格半径以内的圆心即可完整覆盖。
+    走廊同理，保留距路线 buffer + 网格半径以内的圆心。
+    """
+    spacing = radius / TILE_OVERLAP
+    centers = hex_centers(*self.bounds, spacing)
+    xs = [x for x, _ in centers]
+    ys = [y for _, y in centers]
+    distances = distance_to_segments(xs, ys, self.segments)
+    if self.is_polygon:
+      inside = points_in_polygon(xs, ys, self.segments)
+      keep = [i or d <= spacing for i, d in zip(inside, distances)]
+    else:
+      keep = [d <= self.buffer + spacing for d in distances]
+    return [self.unproject(x, y) for (x, y), k in zip(centers, keep) if k]
+
+  def contains(self, lngs: Sequence[float], lats: Sequence[float]) -> List[bool]:
+    """
+    批量判断点是否在区域内。
+    """
+    points = self.project(list(zip(lngs, lats)))
+    xs = [x for x, _ in points]
+    ys = [y for _, y in points]
+    if self.is_polygon:
+      return points_in_polygon(xs, ys, self.segments)
+    return [d <= self.buffer for d in distance_to_segments(xs, ys, self.segments)]
+
+  def distances(self, lngs: Sequence[float], lats: Sequence[float]) -> List[float]:
+    """
+    批量计算点到路线（或多边形边界）的距离（米）。
+    """
+    points = self.project(list(zip(lngs, lats)))
+    return distance_to_segments([x for x, _ in points], [y for _, y in points], self.segments)
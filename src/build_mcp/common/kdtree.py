@@ -0,0 +1,247 @@
+import heapq
+import math
+from array import array
+from typing import Callable, List, Optional, Tuple
+
+from build_mcp.common import geo
+from build_mcp.common.geo import EARTH_RADIUS
+
+# 叶子节点最多包含的点数，叶子内逐点比较
+LEAF_SIZE = 16
+
+
+def _unit_vector(lng: float, lat: float) -> Tuple[float, float, float]:
+  phi, lam = math.radians(lat), math.radians(lng)
+  return math.cos(phi) * math.cos(lam), math.cos(phi) * math.sin(lam), math.sin(phi)
+
+
+def chord(distance: float) -> float:
+  """
+  球面距离（米）对应的单位球弦长。
+  """
+  return 2 * math.sin(min(math.pi, distance / EARTH_RADIUS) / 2)
+
+
+def arc(chord_length: float) -> float:
+  """
+  单位球弦长对应的球面距离（米）。
+  """
+  return 2 * EARTH_RADIUS * math.asin(min(1.0, chord_length / 2))
+
+
+class _Run:
+  """
+  对一段连续编号 [start, end) 的点建立的静态 KD 树。
+  """
+  __slots__ = ("start", "end", "order", "splits")
+
+  def __init__(self, start: int, end: int, xyz):
+    self.start = start
+    self.end = end
+    n = end - start
+    np = geo._numpy()
+    if np is not None:
+      coords = [np.frombuffer(axis, dtype=np.float64) for axis in xyz]
+      order = np.arange(start, end, dtype=np.int64)
+    else:
+      coords = xyz
+      order = list(range(start, end))
+    splits = array("d", bytes(8 * n))
+    stack = [(0, n, 0)]
+    while stack:
+      lo, hi, depth = stack.pop()
+      if hi - lo <= LEAF_SIZE:
+        continue
+      axis = coords[depth % 3]
+      segment = order[lo:hi]
+      if np is not None:
+        order[lo:hi] = segment[np.argsort(axis[segment], kind="stable")]
+      else:
+        order[lo:hi] = sorted(segment, key=axis.__getitem__)
+      mid = (lo + hi) // 2
+      # 子节点排序会移动 mid 处的点，划分值单独保存；各节点的中点互不相同
+      splits[mid] = axis[order[mid]]
+      stack.append((lo, mid, depth + 1))
+      stack.append((mid, hi, depth + 1))
+    self.order = array("l", order.tolist() if np is not None else order)
+    self.splits = splits
+
+  def __len__(self):
+    return self.end - self.start
+
+
+class KDTree:
+  """
+  增量的经纬度 KD 树，数据保存在紧凑的 array 中。
+
+  - 点转换为单位球上的三维坐标，弦长与球面距离单调对应，半径和最近邻查询不受经度收缩和跨越 180 度经线的影响；
+  - 每棵树为隐式结构：只保存按中位数递归划分后的编号数组和各节点的划分值，没有节点对象；
+  - 增量插入采用对数方法：点按插入顺序分成若干段，每段一棵静态树，段长大致按 2 的幂递减，
+    新段与前一段等长时合并重建（类似二进制进位），查询依次查各段，摊还后插入和查询都是 O(log² n)；
+  - 安装了 numpy 时用其排序建树。
+
+  点以插入顺序编号（从 0 开始），调用方用编号关联自己的数据。
+  """
+
+  # 尾部未建索引的点超过该数量时建成新段
+  TAIL_SIZE = 64
+
+  def __init__(self):
+    self._xyz = (array("d"), array("d"), array("d"))
+    self._runs: List[_Run] = []
+    # 有点被移动、需要重建的段
+    self._stale = set()
+    self.rebuilds = 0
+
+  def __len__(self):
+    return len(self._xyz[0])
+
+  def add(self, lng: float, lat: float) -> int:
+    """
+    添加一个点，返回其编号。
+    """
+    for axis, value in zip(self._xyz, _unit_vector(lng, lat)):
+      axis.append(value)
+    return len(self) - 1
+
+  def move(self, index: int, lng: float, lat: float) -> None:
+    """
+    修改已有点的坐标；所在段在下次查询前重建。
+    """
+    for axis, value in zip(self._xyz, _unit_vector(lng, lat)):
+      axis[index] = value
+    for position, run in enumerate(self._runs):
+      if run.start <= index < run.end:
+        self._stale.add(position)
+
+  @property
+  def _indexed(self) -> int:
+    return self._runs[-1].end if self._runs else 0
+
+  def _build(self, start: int, end: int) -> _Run:
+    self.rebuilds += 1
+    return _Run(start, end, self._xyz)
+
+  def _refresh(self) -> None:
+    for position in self._stale:
+      run = self._runs[position]
+      self._runs[position] = self._build(run.start, run.end)
+    self._stale.clear()
+    if len(self) - self._indexed >= self.TAIL_SIZE:
+      self._runs.append(self._build(self._indexed, len(self)))
+      while len(self._runs) >= 2 and len(self._runs[-2]) <= len(self._runs[-1]) * 2:
+        right = self._runs.pop()
+        left = self._runs.pop()
+        self._runs.append(self._build(left.start, right.end))
+
+  def rebuild(self) -> None:
+    """
+    把全部点合并为一棵树。
+    """
+    self._runs = [self._build(0, len(self))] if len(self) else []
+    self._stale.clear()
+
+  def _distance2(self, index: int, q: Tuple[float, float, float]) -> float:
+    x, y, z = self._xyz
+    dx, dy, dz = x[index] - q[0], y[index] - q[1], z[index] - q[2]
+    return dx * dx + dy * dy + dz * dz
+
+  def within(self, lng: float, lat: float, radius: float,
+             accept: Optional[Callable[[int], bool]] = None) -> List[Tuple[float, int]]:
+    """
+    半径查询。
+
+    Args:
+        lng (float): 中心点经度。
+        lat (float): 中心点纬度。
+        radius (float): 半径（米）。
+        accept (Callable, optional): 过滤函数，参数为点编号。
+
+    Returns:
+        list[tuple]: (球面距离, 编号) 列表，按距离升序。
+    """
+    self._refresh()
+    q = _unit_vector(lng, lat)
+    limit = chord(radius)
+    limit2 = limit * limit
+    found = []
+
+    def check(index: int) -> None:
+      d2 = self._distance2(index, q)
+      if d2 <= limit2 and (accept is None or accept(index)):
+        found.append((d2, index))
+
+    for run in self._runs:
+      order, splits = run.order, run.splits
+      stack = [(0, len(run), 0)]
+      while stack:
+        lo, hi, depth = stack.pop()
+        if hi - lo <= LEAF_SIZE:
+          for i in range(lo, hi):
+            check(order[i])
+          continue
+        mid = (lo + hi) // 2
+        diff = q[depth % 3] - splits[mid]
+        if diff - limit <= 0:
+          stack.append((lo, mid, depth + 1))
+        if diff + limit >= 0:
+          stack.append((mid, hi, depth + 1))
+    for index in range(self._indexed, len(self)):
+      check(index)
+    found.sort()
+    return [(arc(math.sqrt(d2)), index) for d2, index in found]
+
+  def nearest(self, lng: float, lat: float, k: int, max_radius: Optional[float] = None,
+              accept: Optional[Callable[[int], bool]] = None) -> List[Tuple[float, int]]:
+    """
+    k 最近邻查询（最优优先遍历，先访问离查询点更近的一侧）。
+
+    Args:
+        lng (float): 中心点经度。
+        lat (float): 中心点纬度。
+        k (int): 返回的点数。
+        max_radius (float, optional): 最大距离（米），默认不限制。
+        accept (Callable, optional): 过滤函数，参数为点编号。
+
+    Returns:
+        list[tuple]: 最多 k 个 (球面距离, 编号)，按距离升序。
+    """
+    if k <= 0:
+      return []
+    self._refresh()
+    q = _unit_vector(lng, lat)
+    limit = chord(max_radius) if max_radius is not None else 2.0
+    # 最大堆保存当前最近的 k 个点：(-距离平方, 编号)
+    best: List[Tuple[float, int]] = []
+
+    def bound() -> float:
+      return -best[0][0] if len(best) >= k else limit * limit
+
+    def check(index: int) -> None:
+      d2 = self._distance2(index, q)
+      if d2 <= bound() and (accept is None or accept(index)):
+        if len(best) >= k:
+          heapq.heapreplace(best, (-d2, index))
+        else:
+          heapq.heappush(best, (-d2, index))
+
+    for index in range(self._indexed, len(self)):
+      check(index)
+    # 所有段共用一个优先队列：(到划分面的最小距离平方, 段序号, lo, hi, depth)
+    queue = [(0.0, r, 0, len(run), 0) for r, run in enumerate(self._runs)]
+    heapq.heapify(queue)
+    while queue:
+      gap2, r, lo, hi, depth = heapq.heappop(queue)
+      if gap2 > bound():
+        break
+      run = self._runs[r]
+      if hi - lo <= LEAF_SIZE:
+        for i in range(lo, hi):
+          check(run.order[i])
+        continue
+      mid = (lo + hi) // 2
+      diff = q[depth % 3] - run.splits[mid]
+      near, far = ((mid, hi), (lo, mid)) if diff >= 0 else ((lo, mid), (mid, hi))
+      heapq.heappush(queue, (gap2, r, near[0], near[1], depth + 1))
+      heapq.heappush(queue, (max(gap2, diff * diff), r, far[0], far[1], depth + 1))
+    return [(arc(math.sqrt(-d2)), index) for d2, index in sorted(best, reverse=True)]
@@ -0,0 +1,105 @@
+import contextvars
+import time
+from collections import deque
+from contextlib import contextmanager
+from typing import Callable, Deque, Dict, Optional, Union
+
+# 当前调用链的截止时间（time.monotonic()），由工具层设置，SDK 的重试、排队和单次请求都不会超过它；
+# 也可以是每次读取时重新计算截止时间的函数，见 follow_deadline
+_deadline: contextvars.ContextVar[Union[None, float, Callable[[], Optional[float]]]] = contextvars.ContextVar(
+  "deadline", default=None)
+
+
+@contextmanager
+def deadline(seconds: Optional[float]):
+  """
+  为当前调用链设置总耗时上限，嵌套时取更早的截止时间。
+
+  Args:
+      seconds (float, optional): 耗时上限（秒），为空或 0 时不限制。
+  """
+  if not seconds:
+    yield
+    return
+  at = time.monotonic() + seconds
+  current = current_deadline()
+  token = _deadline.set(at if current is None else min(at, current))
+  try:
+    yield
+  finally:
+    _deadline.reset(token)
+
+
+def follow_deadline(source: Callable[[], Optional[float]]) -> None:
+  """
+  在当前上下文中以 source() 的返回值作为截止时间（time.monotonic()，None 表示不限制），每次读取时重新计算。
+  用于多个调用方共享的任务，截止时间随等待方的加入而变化。
+  """
+  _deadline.set(source)
+
+
+def current_deadline() -> Optional[float]:
+  """
+  返回当前调用链的截止时间（time.monotonic()），未设置时返回 None。
+  """
+  at = _deadline.get()
+  return at() if callable(at) else at
+
+
+def remaining_time() -> Optional[float]:
+  """
+  返回距截止时间的剩余秒数（可能为负数），未设置截止时间时返回 None。
+  """
+  at = current_deadline()
+  return None if at is None else at - time.monotonic()
+
+
+class LatencyTracker:
+  """
+  按接口记录最近的请求耗时，用于计算对冲请求的触发时间和自适应超时。
+
+  只保留最近 window 个样本，分位数按样本精确计算，样本数不足 min_samples 时返回 None。
+
+  Args:
+      window (int): 每个接口保留的样本数，默认 256。
+      min_samples (int): 计算分位数所需的最少样本数，默认 20。
+  """
+
+  def __init__(self, window: int = 256, min_samples: int = 20):
+    self.window = window
+    self.min_samples = min_samples
+    self._samples: Dict[str, Deque[float]] = {}
+    # 排序结果按接口缓存，新样本写入时失效
+    self._sorted: Dict[str, list] = {}
+
+  def observe(self, endpoint: str, seconds: float) -> None:
+    samples = self._samples.get(endpoint)
+    if samples is None:
+      samples = self._samples[endpoint] = deque(maxlen=self.window)
+    samples.append(seconds)
+    self._sorted.pop(endpoint, None)
+
+  def quantile(self, endpoint: str, q: float) -> Optional[float]:
+    """
+    返回接口最近耗时的 q 分位数（秒），样本不足时返回 None。
+    """
+    samples = self._samples.get(endpoint)
+    if samples is None or len(samples) < self.min_samples:
+      return None
+    ordered = self._sorted.get(endpoint)
+    if ordered is None:
+      ordered = self._sorted[endpoint] = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+  def stats(self) -> Dict[str, Dict[str, float]]:
+    """
+    返回各接口的样本数和 p50/p95/p99 耗时（秒）。
+    """
+    result = {}
+    for endpoint, samples in self._samples.items():
+      item = {"samples": len(samples)}
+      for name, q in (("p50", 0.5), ("p95", 0.95), ("p99", 0.99)):
+        value = self.quantile(endpoint, q)
+        item[name] = round(value, 4) if value is not None else None
+      result[endpoint] = item
+    return result
@@ -1,16 +1,117 @@
+import atexit
+import json
 import logging
 import os
-from logging.handlers import RotatingFileHandler
+import queue
+import random
+from collections.abc import Mapping
+from logging.handlers import QueueHandler, QueueListener, RotatingFileHandler
 
 from build_mcp.common.config import load_config
 
-config = load_config("config.yaml")
+# 标记请求/响应内容等大体积日志，这类日志会按配置截断和采样
+# 用法：logger.info("Search nearby result: %s", result, extra=PAYLOAD)
+PAYLOAD = {"payload": True}
+
+_listeners = []
+
+
+class _Truncated:
+  """
+  延迟截断的日志参数，只有日志真正输出时才会转换为字符串。
+  """
+  __slots__ = ("value", "limit")
+
+  def __init__(self, value, limit: int):
+    self.value = value
+    self.limit = limit
+
+  def __str__(self):
+    text = str(self.value)
+    if len(text) <= self.limit:
+      return text
+    return f"{text[:self.limit]}...(共 {len(text)} 字符)"
+
+  __repr__ = __str__
+
+
+class PayloadFilter(logging.Filter):
+  """
+  对带有 PAYLOAD 标记的日志按比例采样，并截断过长的参数；WARNING 及以上级别的日志只截断，不参与采样。
+
+  Args:
+      max_payload (int): 参数转换为字符串后的最大长度，0 表示不截断。
+      sample_rate (float): 采样率（0~1），1 表示全部输出。
+  """
+
+  def __init__(self, max_payload: int = 2000, sample_rate: float = 1.0):
+    super().__init__()
+    self.max_payload = max_payload
+    self.sample_rate = sample_rate
+
+  def filter(self, record: logging.LogRecord) -> bool:
+    if not getattr(record, "payload", False):
+      return True
+    if self.sample_rate < 1 and record.levelno < logging.WARNING and random.random() >= self.sample_rate:
+      return False
+    if self.max_payload and record.args:
+      # logger.info("%(x)s", {...}) 的 args 是字典，只截断其中的值，保持容器类型不变
+      if isinstance(record.args, Mapping):
+        record.args = {key: self._truncate(arg) for key, arg in record.args.items()}
+      else:
+        record.args = tuple(self._truncate(arg) for arg in record.args)
+    return True
+
+  def _truncate(self, arg):
+    return arg if isinstance(arg, (int, float)) else _Truncated(arg, self.max_payload)
+
+
+class JsonFormatter(logging.Formatter):
+  """
+  输出 JSON Lines 格式的日志。
+  """
+
+  def format(self, record: logging.LogRecord) -> str:
+    data = {
+      "time": self.formatTime(record),
+      "name": record.name,
+      "level": record.levelname,
+      "message": record.getMessage(),
+    }
+    if record.exc_info:
+      data["exc_info"] = self.formatException(record.exc_info)
+    elif record.exc_text:
+      data["exc_info"] = record.exc_text
+    return json.dumps(data, ensure_ascii=False)
+
+
+class _AsyncQueueHandler(QueueHandler):
+  """
+  进程内队列不需要序列化，直接把原始日志记录交给后台线程，消息拼接也在后台线程完成。
+  因此日志参数在写出之前不应再被修改。
+  """
+
+  def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+    return record
+
+
+def _stop_listeners():
+  for listener in _listeners:
+    listener.stop()
+  _listeners.clear()
+
+
+atexit.register(_stop_listeners)
 
 
 def get_logger(name: str = "default", max_bytes=5 * 1024 * 1024, backup_count=3) -> logging.Logger:
   """
   获取一个带文件和控制台输出的 logger。
 
+  配置项 log_async 为 true 时，日志通过 QueueHandler 放入队列，由后台线程的
+  QueueListener 负责格式化和写文件，调用方不再被文件 I/O 阻塞；log_format 为 json
+  时输出 JSON Lines；带 PAYLOAD 标记的日志按 log_max_payload 截断、按 log_sample_rate 采样。
+
   Args:
       name (str): logger 名称，默认为 "default"。
       max_bytes (int): 单个日志文件最大大小，默认为 5MB。
@@ -19,8 +120,9 @@ def get_logger(name: str = "default", max_bytes=5 * 1024 * 1024, backup_count=3)
       logging.Logger: 配置好的 logger 实例。
   Example:
       logger = get_logger("my_logger")
-      logger.info("This is an info message.")
+      logger.info("This is an info message: %s", "hello")
   """
+  config = load_config()
   log_level = config.get("log_level", "INFO")
   log_dir = config.get("log_dir", "./logs")
   if isinstance(log_level, str):
@@ -34,15 +136,31 @@ def get_logger(name: str = "default", max_bytes=5 * 1024 * 1024, backup_count=3)
   logger.propagate = False
 
   if not logger.hasHandlers():
+    if config.get("log_format", "text") == "json":
+      console_formatter = file_formatter = JsonFormatter()
+    else:
+      console_formatter = logging.Formatter('[%(asctime)s] %(levelname)s - %(message)s')
+      file_formatter = logging.Formatter('%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+
     console_handler = logging.StreamHandler()
-    console_formatter = logging.Formatter('[%(asctime)s] %(levelname)s - %(message)s')
     console_handler.setFormatter(console_formatter)
 
     file_handler = RotatingFileHandler(log_file, maxBytes=max_bytes, backupCount=backup_count, encoding='utf-8')
-    file_formatter = logging.Formatter('%(asctime)s - %(name)s - %(levelname)s - %(message)s')
     file_handler.setFormatter(file_formatter)
-    logger.addHandler(file_handler)
-    logger.addHandler(console_handler)
 
-  logger.info(f"Logger 初始化完成，写入文件：{log_file}")
-  return logger
\ No newline at end of file
+    logger.addFilter(PayloadFilter(
+      max_payload=config.get("log_max_payload", 2000),
+      sample_rate=config.get("log_sample_rate", 1.0),
+    ))
+    if config.get("log_async", False):
+      log_queue = queue.SimpleQueue()
+      listener = QueueListener(log_queue, file_handler, console_handler, respect_handler_level=True)
+      listener.start()
+      _listeners.append(listener)
+      logger.addHandler(_AsyncQueueHandler(log_queue))
+    else:
+      logger.addHandler(file_handler)
+      logger.addHandler(console_handler)
+
+  logger.info("Logger 初始化完成，写入文件：%s", log_file)
+  return logger
@@ -0,0 +1,381 @@
+import contextvars
+import math
+import os
+import threading
+import time
+from bisect import bisect_left
+from collections import deque
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+def _format_labels(names: Sequence[str], values: Sequence[str], extra: str = "") -> str:
+  pairs = [f'{n}="{_escape(v)}"' for n, v in zip(names, values)]
+  if extra:
+    pairs.append(extra)
+  return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _escape(value: Any) -> str:
+  return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_value(value: float) -> str:
+  if value == math.inf:
+    return "+Inf"
+  if float(value).is_integer():
+    return str(int(value))
+  return repr(float(value))
+
+
+class _Metric:
+  """
+  指标基类，支持按标签拆分，接口与 prometheus_client 类似：
+  metric.labels(endpoint="ip").inc()。
+  """
+  type = ""
+
+  def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+    self.name = name
+    self.documentation = documentation
+    self.labelnames = tuple(labelnames)
+    self._children: Dict[Tuple[str, ...], Any] = {}
+    self._lock = threading.Lock()
+
+  def labels(self, *values, **kwargs):
+    if kwargs:
+      values = tuple(kwargs[name] for name in self.labelnames)
+    key = tuple(str(v) for v in values)
+    child = self._children.get(key)
+    if child is None:
+      with self._lock:
+        child = self._children.setdefault(key, self._new_child())
+    return child
+
+  def _new_child(self):
+    raise NotImplementedError
+
+  def _default(self):
+    return self.labels(*())
+
+  def samples(self) -> Iterable[Tuple[str, str, float]]:
+    raise NotImplementedError
+
+  def total(self) -> float:
+    """
+    所有标签组合的值之和（直方图为观测次数之和）。
+    """
+    return sum(getattr(child, "value", getattr(child, "count", 0)) for child in list(self._children.values()))
+
+
+class _Value:
+  __slots__ = ("value",)
+
+  def __init__(self):
+    self.value = 0.0
+
+  def inc(self, amount: float = 1) -> None:
+    self.value += amount
+
+  def dec(self, amount: float = 1) -> None:
+    self.value -= amount
+
+  def set(self, value: float) -> None:
+    self.value = value
+
+
+class Counter(_Metric):
+  type = "counter"
+
+  def _new_child(self):
+    return _Value()
+
+  def inc(self, amount: float = 1) -> None:
+    self._default().inc(amount)
+
+  def samples(self):
+    for key, child in self._children.items():
+      yield self.name + "_total", _format_labels(self.labelnames, key), child.value
+
+
+class Gauge(_Metric):
+  type = "gauge"
+
+  def _new_child(self):
+    return _Value()
+
+  def inc(self, amount: float = 1) -> None:
+    self._default().inc(amount)
+
+  def dec(self, amount: float = 1) -> None:
+    self._default().dec(amount)
+
+  def set(self, value: float) -> None:
+    self._default().set(value)
+
+  def samples(self):
+    for key, child in self._children.items():
+      yield self.name, _format_labels(self.labelnames, key), child.value
+
+
+class _HistogramValue:
+  __slots__ = ("buckets", "counts", "sum", "count")
+
+  def __init__(self, buckets: Sequence[float]):
+    self.buckets = buckets
+    self.counts = [0] * (len(buckets) + 1)
+    self.sum = 0.0
+    self.count = 0
+
+  def observe(self, value: float) -> None:
+    self.counts[bisect_left(self.buckets, value)] += 1
+    self.sum += value
+    self.count += 1
+
+  def quantile(self, q: float) -> float:
+    """
+    按桶线性插值估算分位数。
+    """
+    if not self.count:
+      return 0.0
+    target = q * self.count
+    cumulative = 0
+    lower = 0.0
+    for bound, count in zip(self.buckets, self.counts):
+      if cumulative + count >= target:
+        return lower + (bound - lower) * ((target - cumulative) / count if count else 0)
+      cumulative += count
+      lower = bound
+    return self.buckets[-1] if self.buckets else 0.0
+
+
+class Histogram(_Metric):
+  type = "histogram"
+
+  def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = (),
+               buckets: Sequence[float] = DEFAULT_BUCKETS):
+    super().__init__(name, documentation, labelnames)
+    self.buckets = tuple(sorted(buckets))
+
+  def _new_child(self):
+    return _HistogramValue(self.buckets)
+
+  def observe(self, value: float) -> None:
+    self._default().observe(value)
+
+  @contextmanager
+  def time(self, *label_values):
+    start = time.perf_counter()
+    try:
+      yield
+    finally:
+      self.labels(*label_values).observe(time.perf_counter() - start)
+
+  def samples(self):
+    for key, child in self._children.items():
+      cumulative = 0
+      for bound, count in zip(self.buckets + (math.inf,), child.counts):
+        cumulative += count
+        le = f'le="{_format_value(bound)}"'
+        yield self.name + "_bucket", _format_labels(self.labelnames, key, le), cumulative
+      yield self.name + "_sum", _format_labels(self.labelnames, key), child.sum
+      yield self.name + "_count", _format_labels(self.labelnames, key), child.count
+
+
+class MetricsRegistry:
+  """
+  进程内指标注册表，可输出 Prometheus 文本格式或 JSON 快照。
+
+  除了直接注册的指标外，还可以注册 collector 回调，在输出时动态采集
+  （例如缓存、连接池等已有统计信息）。
+  """
+
+  def __init__(self):
+    self._metrics: Dict[str, _Metric] = {}
+    self._collectors: List[Callable[[], Iterable[Tuple[str, str, str, Dict[str, Any], float]]]] = []
+    self._lock = threading.Lock()
+
+  def _register(self, metric: _Metric) -> _Metric:
+    with self._lock:
+      existing = self._metrics.get(metric.name)
+      if existing is not None:
+        return existing
+      self._metrics[metric.name] = metric
+      return metric
+
+  def counter(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> Counter:
+    return self._register(Counter(name, documentation, labelnames))
+
+  def gauge(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> Gauge:
+    return self._register(Gauge(name, documentation, labelnames))
+
+  def histogram(self, name: str, documentation: str, labelnames: Sequence[str] = (),
+                buckets: Sequence[float] = DEFAULT_BUCKETS) -> Histogram:
+    return self._register(Histogram(name, documentation, labelnames, buckets))
+
+  def get(self, name: str) -> Optional[_Metric]:
+    return self._metrics.get(name)
+
+  def register_collector(self, collector: Callable[[], Iterable[Tuple[str, str, str, Dict[str, Any], float]]]) -> None:
+    """
+    注册动态采集回调，回调返回 (name, type, help, labels, value) 的序列。
+    """
+    self._collectors.append(collector)
+
+  def render_prometheus(self) -> str:
+    """
+    输出 Prometheus 文本格式（0.0.4）。
+    """
+    lines = []
+    for metric in list(self._metrics.values()):
+      name = metric.name + "_total" if metric.type == "counter" else metric.name
+      lines.append(f"# HELP {name} {metric.documentation}")
+      lines.append(f"# TYPE {name} {metric.type}")
+      for sample_name, labels, value in metric.samples():
+        lines.append(f"{sample_name}{labels} {_format_value(value)}")
+
+    seen = set()
+    for collector in self._collectors:
+      for name, metric_type, documentation, labels, value in collector():
+        if name not in seen:
+          seen.add(name)
+          lines.append(f"# HELP {name} {documentation}")
+          lines.append(f"# TYPE {name} {metric_type}")
+        lines.append(f"{name}{_format_labels(list(labels), list(labels.values()))} {_format_value(value)}")
+    return "\n".join(lines) + "\n"
+
+  def snapshot(self) -> Dict[str, Any]:
+    """
+    返回 JSON 友好的指标快照，直方图额外给出 p50/p95/p99 估算值。
+    """
+    result = {}
+    for metric in list(self._metrics.values()):
+      items = []
+      for key, child in metric._children.items():
+        item = {"labels": dict(zip(metric.labelnames, key))}
+        if isinstance(child, _HistogramValue):
+          item.update(count=child.count, sum=round(child.sum, 6),
+                      p50=round(child.quantile(0.5), 6), p95=round(child.quantile(0.95), 6),
+                      p99=round(child.quantile(0.99), 6))
+        else:
+          item["value"] = child.value
+        items.append(item)
+      result[metric.name] = items
+    return result
+
+
+REGISTRY = MetricsRegistry()
+
+
+# ---------------------------------------------------------------------------
+# 轻量级链路追踪
+# ---------------------------------------------------------------------------
+
+class Span:
+  """
+  一次操作的追踪记录，通过 parent_id 将工具调用与其上游请求关联起来。
+  """
+  __slots__ = ("trace_id", "span_id", "parent_id", "name", "start", "end", "attributes", "status")
+
+  def __init__(self, name: str, trace_id: str, parent_id: Optional[str], attributes: Dict[str, Any]):
+    self.name = name
+    self.trace_id = trace_id
+    self.span_id = os.urandom(8).hex()
+    self.parent_id = parent_id
+    self.start = time.time()
+    self.end = None
+    self.attributes = attributes
+    self.status = "ok"
+
+  def set_attribute(self, key: str, value: Any) -> None:
+    self.attributes[key] = value
+
+  def to_dict(self) -> Dict[str, Any]:
+    return {
+      "trace_id": self.trace_id,
+      "span_id": self.span_id,
+      "parent_id": self.parent_id,
+      "name": self.name,
+      "start": self.start,
+      "duration_ms": round((self.end - self.start) * 1000, 3) if self.end else None,
+      "status": self.status,
+      "attributes": self.attributes,
+    }
+
+
+def _otel_tracer():
+  # 只在启用 use_otel 时导入 OpenTelemetry，避免拖慢服务启动
+  try:
+    from opentelemetry import trace as otel_trace
+  except ImportError:  # OpenTelemetry 为可选依赖
+    return None
+  return otel_trace.get_tracer("build_mcp")
+
+
+class Tracer:
+  """
+  基于 contextvars 的轻量级追踪器，保存最近完成的 span。
+  启用 use_otel 且安装了 opentelemetry-api 时，同时创建 OpenTelemetry span。
+
+  Args:
+      max_spans (int): 保留最近完成的 span 数量，默认 512。
+      use_otel (bool): 是否同时上报 OpenTelemetry span，默认 False。
+  """
+
+  def __init__(self, max_spans: int = 512, use_otel: bool = False):
+    self.enabled = True
+    self.finished = deque(maxlen=max_spans)
+    self._current: contextvars.ContextVar[Optional[Span]] = contextvars.ContextVar("current_span", default=None)
+    self._otel = None
+    self.configure(use_otel=use_otel)
+
+  def configure(self, enabled: bool = None, max_spans: int = None, use_otel: bool = None) -> None:
+    if enabled is not None:
+      self.enabled = enabled
+    if max_spans is not None:
+      self.finished = deque(self.finished, maxlen=max_spans)
+    if use_otel is not None:
+      self._otel = _otel_tracer() if use_otel else None
+
+  def current(self) -> Optional[Span]:
+    return self._current.get()
+
+  @contextmanager
+  def span(self, name: str, **attributes):
+    """
+    开启一个 span，嵌套调用时自动成为当前 span 的子 span。
+    """
+    if not self.enabled:
+      yield None
+      return
+
+    parent = self._current.get()
+    span = Span(name, parent.trace_id if parent else os.urandom(16).hex(), parent.span_id if parent else None, attributes)
+    token = self._current.set(span)
+    otel_cm = self._otel.start_as_current_span(name, attributes=attributes) if self._otel is not None else None
+    otel_span = otel_cm.__enter__() if otel_cm is not None else None
+    try:
+      yield span
+    except BaseException as e:
+      span.status = f"error: {type(e).__name__}"
+      raise
+    finally:
+      span.end = time.time()
+      self._current.reset(token)
+      if otel_cm is not None:
+        for key, value in span.attributes.items():
+          otel_span.set_attribute(key, value if isinstance(value, (str, bool, int, float)) else str(value))
+        otel_cm.__exit__(None, None, None)
+      self.finished.append(span)
+
+  def recent(self, limit: int = 100) -> List[Dict[str, Any]]:
+    """
+    返回最近完成的 span（按完成时间倒序）。
+    """
+    spans = list(self.finished)[-limit:]
+    return [span.to_dict() for span in reversed(spans)]
+
+
+TRACER = Tracer()
@@ -0,0 +1,225 @@
+import asyncio
+import time
+from typing import Dict, List, Optional, Sequence, Tuple
+
+# 令牌以千分之一为单位用整数保存，扣除和比较都是精确的整数运算；
+# 补充的令牌按从创建起累计的时间换算后取整，舍入误差不会逐次累积
+_UNIT = 1000
+
+
+class TokenBucket:
+  """
+  预约式令牌桶。
+
+  每次 reserve 立即扣除一个令牌（允许为负数）并返回需要等待的时间，
+  因此请求按调用顺序依次获得配额，天然是先到先得的公平队列。
+
+  Args:
+      rate (float): 每秒补充的令牌数，即 QPS 上限。
+      burst (float, optional): 桶容量，默认等于 rate。
+  """
+
+  def __init__(self, rate: float, burst: Optional[float] = None):
+    self.rate = float(rate)
+    self.burst = float(burst if burst is not None else max(1.0, rate))
+    self._capacity = round(self.burst * _UNIT)
+    self._units = self._capacity
+    self._earned = 0
+    self.updated = time.monotonic()
+    self._origin = self.updated
+
+  @property
+  def tokens(self) -> float:
+    """
+    当前令牌数，可能为负数。
+    """
+    return self._units / _UNIT
+
+  def _refill(self, now: float) -> None:
+    earned = round((now - self._origin) * self.rate * _UNIT)
+    if earned > self._earned:
+      self._units = min(self._capacity, self._units + earned - self._earned)
+      self._earned = earned
+      self.updated = now
+
+  def _wait(self, missing: int, now: float) -> float:
+    # 按累计补充量达到目标的时刻计算，而不是按取整后的余量，等待时间之间的先后顺序与预约顺序一致
+    if missing <= 0:
+      return 0.0
+    return max(0.0, self._origin + (self._earned + missing) / (self.rate * _UNIT) - now)
+
+  def delay(self, now: Optional[float] = None) -> float:
+    """
+    预估现在申请一个令牌需要等待的时间（秒），不扣除令牌。
+    """
+    now = time.monotonic() if now is None else now
+    self._refill(now)
+    return self._wait(_UNIT - self._units, now)
+
+  def reserve(self, now: Optional[float] = None) -> float:
+    """
+    预约一个令牌，返回需要等待的时间（秒）。
+    """
+    now = time.monotonic() if now is None else now
+    self._refill(now)
+    self._units -= _UNIT
+    return self._wait(-self._units, now)
+
+  def try_acquire(self, now: Optional[float] = None) -> bool:
+    """
+    非阻塞地获取一个令牌，令牌不足时返回 False。
+    """
+    self._refill(time.monotonic() if now is None else now)
+    if self._units >= _UNIT:
+      self._units -= _UNIT
+      return True
+    return False
+
+  def penalize(self, seconds: float, now: Optional[float] = None) -> None:
+    """
+    上游返回限流时调用，清空令牌并额外暂停 seconds 秒的配额。
+    """
+    self._refill(time.monotonic() if now is None else now)
+    self._units = min(self._units, 0) - round(seconds * self.rate * _UNIT)
+
+
+class RateLimiter:
+  """
+  按 (API Key, 接口) 维度的客户端限流器。
+
+  - 每个 Key 的每个接口各有一个令牌桶，QPS 可以按接口配置；
+  - 配置多个 Key 时，每次选择等待时间最短的 Key，提高总吞吐上限；
+  - 调用方在限流器中按先后顺序等待，而不是请求失败后盲目重试；
+  - 记录排队深度和等待时间。
+
+  Args:
+      keys (Sequence[str]): API Key 列表。
+      qps (float, optional): 每个 Key 每个接口的默认 QPS，为空或 0 时不限流。
+      burst (float, optional): 令牌桶容量，默认等于 QPS。
+      endpoints (dict, optional): 按接口名覆盖的 QPS，如 {"ip": 30, "around": 30}。
+  """
+
+  def __init__(self, keys: Sequence[str], qps: Optional[float] = None, burst: Optional[float] = None,
+               endpoints: Optional[Dict[str, float]] = None):
+    self.keys: List[str] = list(keys) or [""]
+    self.qps = qps
+    self.burst = burst
+    self.endpoint_qps = dict(endpoints or {})
+    self._buckets: Dict[Tuple[str, str], Optional[TokenBucket]] = {}
+    self._next = 0
+    self._stats: Dict[str, Dict[str, float]] = {}
+    # 每个接口最后一个排队请求的完成标记，后面的请求等到它放行后才返回
+    self._tails: Dict[str, asyncio.Future] = {}
+
+  def _bucket(self, key: str, endpoint: str) -> Optional[TokenBucket]:
+    bucket_key = (key, endpoint)
+    if bucket_key not in self._buckets:
+      rate = self.endpoint_qps.get(endpoint, self.qps)
+      self._buckets[bucket_key] = TokenBucket(rate, self.burst) if rate else None
+    return self._buckets[bucket_key]
+
+  def _endpoint_stats(self, endpoint: str) -> Dict[str, float]:
+    if endpoint not in self._stats:
+      self._stats[endpoint] = {"acquired": 0, "waited": 0, "waiting": 0, "wait_seconds": 0.0, "max_wait": 0.0}
+    return self._stats[endpoint]
+
+  def _candidates(self) -> List[str]:
+    # 轮换起始位置，等待时间相同时让请求均匀分布到各个 Key
+    start = self._next
+    self._next = (self._next + 1) % len(self.keys)
+    return self.keys[start:] + self.keys[:start]
+
+  def _choose(self, endpoint: str, now: float) -> Tuple[str, Optional[TokenBucket]]:
+    best_key, best_bucket, best_delay = None, None, None
+    for key in self._candidates():
+      bucket = self._bucket(key, endpoint)
+      delay = bucket.delay(now) if bucket is not None else 0.0
+      if best_delay is None or delay < best_delay:
+        best_key, best_bucket, best_delay = key, bucket, delay
+        if delay == 0:
+          break
+    return best_key, best_bucket
+
+  def wait_time(self, endpoint: str, now: Optional[float] = None) -> float:
+    """
+    预估现在申请配额需要等待的时间（秒），取各个 Key 中最短的，不扣除令牌。
+    """
+    now = time.monotonic() if now is None else now
+    delays = [bucket.delay(now) for bucket in (self._bucket(key, endpoint) for key in self.keys) if bucket is not None]
+    return min(delays) if len(delays) == len(self.keys) else 0.0
+
+  def is_limited(self, endpoint: str) -> bool:
+    """
+    该接口是否启用了限流。
+    """
+    return bool(self.endpoint_qps.get(endpoint, self.qps))
+
+  async def acquire(self, endpoint: str) -> str:
+    """
+    为一次请求申请配额，必要时排队等待。
+
+    Args:
+        endpoint (str): 接口名，如 "ip"、"around"。
+
+    Returns:
+        str: 本次请求应使用的 API Key。
+    """
+    now = time.monotonic()
+    key, bucket = self._choose(endpoint, now)
+    stats = self._endpoint_stats(endpoint)
+    stats["acquired"] += 1
+    delay = bucket.reserve(now) if bucket is not None else 0.0
+    if delay > 0:
+      stats["waited"] += 1
+      stats["waiting"] += 1
+      stats["wait_seconds"] += delay
+      stats["max_wait"] = max(stats["max_wait"], delay)
+      # 不同 Key 的到期时间可能只差几微秒，各自计时的 sleep 会因调度抖动乱序，
+      # 到期后再等前一个排队请求放行，保证按申请顺序返回
+      previous = self._tails.get(endpoint)
+      done = asyncio.get_running_loop().create_future()
+      self._tails[endpoint] = done
+      try:
+        await asyncio.sleep(delay)
+        if previous is not None:
+          await asyncio.shield(previous)
+      finally:
+        stats["waiting"] -= 1
+        done.set_result(None)
+        if self._tails.get(endpoint) is done:
+          del self._tails[endpoint]
+    return key
+
+  def try_acquire(self, endpoint: str) -> Optional[str]:
+    """
+    非阻塞地申请配额，没有可用配额时返回 None。
+    """
+    now = time.monotonic()
+    for key in self._candidates():
+      bucket = self._bucket(key, endpoint)
+      if bucket is None or bucket.try_acquire(now):
+        self._endpoint_stats(endpoint)["acquired"] += 1
+        return key
+    return None
+
+  def penalize(self, key: str, endpoint: str, seconds: float = 1.0) -> None:
+    """
+    上游返回限流时，暂停该 Key 在该接口上的配额。
+    """
+    bucket = self._bucket(key, endpoint)
+    if bucket is not None:
+      bucket.penalize(seconds)
+
+  def stats(self) -> Dict[str, Dict[str, float]]:
+    """
+    返回各接口的限流统计：acquired（申请次数）、waited（需要排队的次数）、
+    waiting（当前排队深度）、wait_seconds（累计等待秒数）、max_wait、avg_wait。
+    """
+    result = {}
+    for endpoint, stats in self._stats.items():
+      item = dict(stats)
+      item["wait_seconds"] = round(item["wait_seconds"], 4)
+      item["max_wait"] = round(item["max_wait"], 4)
+      item["avg_wait"] = round(stats["wait_seconds"] / stats["acquired"], 4) if stats["acquired"] else 0.0
+      result[endpoint] = item
+    return result
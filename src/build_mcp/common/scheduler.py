@@ -0,0 +1,216 @@
+import asyncio
+import contextvars
+import time
+from collections import deque
+from contextlib import contextmanager
+from typing import Callable, Deque, Dict, List, Optional, Union
+
+from build_mcp.common.latency import LatencyTracker
+from build_mcp.common.rate_limit import RateLimiter
+
+INTERACTIVE = "interactive"
+BULK = "bulk"
+
+# 当前调用链的优先级，默认为交互式；批量接口和区域搜索在 priority(BULK) 中执行。
+# 也可以是每次读取时重新计算优先级的函数，见 follow_priority
+_priority: contextvars.ContextVar[Union[str, Callable[[], str]]] = contextvars.ContextVar(
+  "priority", default=INTERACTIVE)
+
+
+@contextmanager
+def priority(name: str):
+  """
+  为当前调用链设置请求优先级，在其中创建的任务继承该优先级。
+
+  Args:
+      name (str): 优先级类别，如 INTERACTIVE、BULK。
+  """
+  token = _priority.set(name)
+  try:
+    yield
+  finally:
+    _priority.reset(token)
+
+
+def follow_priority(source: Callable[[], str]) -> None:
+  """
+  在当前上下文中以 source() 的返回值作为优先级类别，每次读取时重新计算。
+  用于多个调用方共享的任务，优先级随等待方的加入而变化。
+  """
+  _priority.set(source)
+
+
+def current_priority() -> str:
+  """
+  返回当前调用链的优先级类别。
+  """
+  name = _priority.get()
+  return name() if callable(name) else name
+
+
+class _Waiter:
+  __slots__ = ("endpoint", "future", "enqueued")
+
+  def __init__(self, endpoint: str, future: asyncio.Future):
+    self.endpoint = endpoint
+    self.future = future
+    self.enqueued = time.monotonic()
+
+
+class RequestScheduler:
+  """
+  按优先级类别调度上游请求，决定请求获得并发名额和限流配额的先后顺序。
+
+  - 每个类别一个先进先出队列，类别之间按权重做加权公平排队（WFQ）：每次放行类别中虚拟时间最小的一个，
+    放行后其虚拟时间增加 1/权重；空闲类别重新排队时虚拟时间不早于当前最小值，不能攒下配额；
+  - 以单次请求为粒度抢占：批量任务的每个请求（包括重试）都重新排队，进行中的请求不会被打断，
+    但交互式请求到达后排在其后续请求之前；
+  - 同时进行的请求数不超过 max_concurrency，其中 reserved 个名额只给交互式请求使用，批量任务占满其余名额时
+    交互式请求仍然可以立即发出；
+  - 限流配额由调度器在放行时非阻塞地领取，没有配额时等到下一个令牌再按优先级重新选择，
+    不会像直接预约令牌那样让交互式请求排在所有已预约的批量请求之后；
+  - 记录各类别的排队等待时间分位数。
+
+  Args:
+      rate_limiter (RateLimiter): 客户端限流器。
+      max_concurrency (int): 同时进行的上游请求数上限，默认 16。
+      reserved (int): 为交互式请求保留的并发名额，默认 4。
+      weights (dict, optional): 各类别的权重，默认 {"interactive": 8, "bulk": 1}，未列出的类别权重为 1。
+      window (int): 每个类别保留的排队等待时间样本数，默认 1024。
+  """
+
+  def __init__(self, rate_limiter: RateLimiter, max_concurrency: int = 16, reserved: int = 4,
+               weights: Optional[Dict[str, float]] = None, window: int = 1024):
+    self.rate_limiter = rate_limiter
+    self.max_concurrency = max(1, max_concurrency)
+    self.reserved = min(max(0, reserved), self.max_concurrency - 1)
+    self.weights = {INTERACTIVE: 8.0, BULK: 1.0, **(weights or {})}
+    self._queues: Dict[str, Deque[_Waiter]] = {}
+    self._vtime: Dict[str, float] = {}
+    self._inflight: Dict[str, int] = {}
+    self._granted: Dict[str, int] = {}
+    self._max_wait: Dict[str, float] = {}
+    self._waits = LatencyTracker(window=window, min_samples=1)
+    self._timer: Optional[asyncio.TimerHandle] = None
+    self._timer_at = 0.0
+
+  def _limit(self, name: str) -> int:
+    return self.max_concurrency if name == INTERACTIVE else self.max_concurrency - self.reserved
+
+  def _available(self, name: str) -> bool:
+    total = sum(self._inflight.values())
+    if total >= self.max_concurrency:
+      return False
+    return name == INTERACTIVE or total - self._inflight.get(INTERACTIVE, 0) < self._limit(name)
+
+  async def acquire(self, endpoint: str, name: Optional[str] = None) -> str:
+    """
+    排队等待并发名额和限流配额，返回本次请求应使用的 API Key。请求结束后必须调用 release。
+
+    Args:
+        endpoint (str): 接口名，如 "ip"、"around"。
+        name (str, optional): 优先级类别，默认使用当前调用链的优先级。
+
+    Returns:
+        str: API Key。
+    """
+    name = name or current_priority()
+    queue = self._queues.get(name)
+    if queue is None:
+      queue = self._queues[name] = deque()
+    if not queue:
+      # 类别从空闲转为排队时，虚拟时间追上其他排队类别，避免空闲期间攒下的配额一次性用完
+      active = [self._vtime.get(other, 0.0) for other, q in self._queues.items() if q and other != name]
+      self._vtime[name] = max(self._vtime.get(name, 0.0), min(active, default=0.0))
+    waiter = _Waiter(endpoint, asyncio.get_running_loop().create_future())
+    queue.append(waiter)
+    self._dispatch()
+    try:
+      return await waiter.future
+    except asyncio.CancelledError:
+      if waiter.future.done() and not waiter.future.cancelled():
+        # 已被放行但调用方放弃（例如超过截止时间），归还并发名额
+        self.release(name)
+      elif waiter in queue:
+        queue.remove(waiter)
+      raise
+
+  def release(self, name: Optional[str] = None) -> None:
+    """
+    请求结束（成功、失败或取消）后归还并发名额。
+    """
+    name = name or current_priority()
+    self._inflight[name] = max(0, self._inflight.get(name, 0) - 1)
+    self._dispatch()
+
+  def _dispatch(self) -> None:
+    """
+    按虚拟时间依次放行可以发出的请求；队首请求等待限流配额时设置定时器，到时重新选择。
+    """
+    retry_at = None
+    while True:
+      now = time.monotonic()
+      granted = False
+      candidates = sorted((name for name, queue in self._queues.items() if queue),
+                          key=lambda name: (self._vtime.get(name, 0.0), -self.weights.get(name, 1.0)))
+      for name in candidates:
+        queue = self._queues[name]
+        while queue and queue[0].future.done():
+          queue.popleft()
+        if not queue or not self._available(name):
+          continue
+        waiter = queue[0]
+        key = self.rate_limiter.try_acquire(waiter.endpoint)
+        if key is None:
+          wait = self.rate_limiter.wait_time(waiter.endpoint, now)
+          retry_at = now + wait if retry_at is None else min(retry_at, now + wait)
+          continue
+        queue.popleft()
+        self._vtime[name] = self._vtime.get(name, 0.0) + 1.0 / self.weights.get(name, 1.0)
+        self._inflight[name] = self._inflight.get(name, 0) + 1
+        self._granted[name] = self._granted.get(name, 0) + 1
+        waited = now - waiter.enqueued
+        self._waits.observe(name, waited)
+        self._max_wait[name] = max(self._max_wait.get(name, 0.0), waited)
+        waiter.future.set_result(key)
+        granted = True
+        break
+      if not granted:
+        break
+    if retry_at is not None and (self._timer is None or retry_at < self._timer_at):
+      if self._timer is not None:
+        self._timer.cancel()
+      self._timer_at = retry_at
+      self._timer = asyncio.get_running_loop().call_at(
+        asyncio.get_running_loop().time() + max(0.0, retry_at - time.monotonic()), self._on_timer)
+
+  def _on_timer(self) -> None:
+    self._timer = None
+    self._dispatch()
+
+  def queued(self, name: Optional[str] = None) -> int:
+    """
+    返回排队中的请求数，name 为空时返回所有类别的总数。
+    """
+    queues: List[Deque[_Waiter]] = list(self._queues.values()) if name is None else [self._queues.get(name, deque())]
+    return sum(1 for queue in queues for waiter in queue if not waiter.future.done())
+
+  def stats(self) -> Dict[str, Dict[str, float]]:
+    """
+    返回各类别的排队数、进行中的请求数、放行次数和排队等待时间分位数（秒）。
+    """
+    waits = self._waits.stats()
+    result = {}
+    for name in sorted(set(self._queues) | set(self._inflight)):
+      item = {
+        "weight": self.weights.get(name, 1.0),
+        "concurrency_limit": self._limit(name),
+        "queued": self.queued(name),
+        "inflight": self._inflight.get(name, 0),
+        "granted": self._granted.get(name, 0),
+        "max_wait": round(self._max_wait.get(name, 0.0), 4),
+      }
+      for q in ("p50", "p95", "p99"):
+        item[f"wait_{q}"] = (waits.get(name) or {}).get(q)
+      result[name] = item
+    return result
@@ -0,0 +1,387 @@
+import asyncio
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Dict, Hashable, Optional, Tuple
+
+import pydantic_core
+
+from build_mcp.common.cache import TTLCache
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS cache (
+  key TEXT PRIMARY KEY,
+  value BLOB NOT NULL,
+  size INTEGER NOT NULL,
+  expire_at REAL NOT NULL,
+  accessed_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS cache_expire_at ON cache (expire_at);
+CREATE INDEX IF NOT EXISTS cache_accessed_at ON cache (accessed_at);
+"""
+
+
+class SQLiteCache:
+  """
+  基于 SQLite（WAL 模式）的持久化缓存，接口与 TTLCache 一致。
+
+  - 数据保存在本机文件中，进程重启后仍然有效，同一台机器上的多个服务进程
+    （例如 stdio 模式下每个会话启动的进程）共享同一份缓存；
+  - WAL 模式下读写互不阻塞，写冲突由 busy_timeout 等待，多进程并发访问是安全的；
+  - 每个条目单独设置过期时间，超过条目数或字节上限时按最近访问时间淘汰；
+  - 数据库异常只记录日志并视为未命中，不影响正常请求；
+  - 同步方法会阻塞调用线程（其他进程持有写锁时最多等待 timeout 秒），在事件循环中应使用
+    aget_with_ttl 和 set_nowait，磁盘读写在单独的后台线程中按提交顺序执行；
+  - 条目数和字节数在连接和每次清理时统计一次，之间按本进程的写入累加，查看统计信息不扫描数据表。
+
+  Args:
+      path (str): 数据库文件路径，目录不存在时自动创建。
+      max_entries (int): 最大条目数，默认 100000。
+      max_bytes (int): 最大占用字节数（按序列化后的大小计算），默认 256MB。
+      default_ttl (float): 默认过期时间（秒），默认 300。
+      namespace (str, optional): 键前缀，用于隔离不同上游地址的数据。
+      logger (logging.Logger, optional): 日志记录器。
+      timeout (float): 等待其他进程释放写锁的最长秒数，默认 5。
+  """
+
+  # 每写入多少次检查一次容量上限
+  PURGE_INTERVAL = 64
+  # 命中时最多每隔多少秒刷新一次访问时间，减少写入
+  TOUCH_INTERVAL = 60
+
+  def __init__(self, path: str, max_entries: int = 100000, max_bytes: int = 256 * 1024 * 1024,
+               default_ttl: float = 300, namespace: str = "", logger=None, timeout: float = 5):
+    self.path = os.path.expanduser(path)
+    self.max_entries = max_entries
+    self.max_bytes = max_bytes
+    self.default_ttl = default_ttl
+    self.namespace = namespace
+    self.logger = logger or logging.getLogger(__name__)
+    self.timeout = timeout
+    self._lock = threading.Lock()
+    self._conn: Optional[sqlite3.Connection] = None
+    # 磁盘读写线程，单线程保证写入按提交顺序执行
+    self._executor: Optional[ThreadPoolExecutor] = None
+    self._closed = False
+    self._entries = 0
+    self._bytes = 0
+    self._writes = 0
+    self.hits = 0
+    self.misses = 0
+    self.evictions = 0
+    self.expirations = 0
+    self.errors = 0
+
+  def _connect(self) -> sqlite3.Connection:
+    if self._conn is None:
+      directory = os.path.dirname(self.path)
+      if directory:
+        os.makedirs(directory, exist_ok=True)
+      conn = sqlite3.connect(self.path, timeout=self.timeout, isolation_level=None, check_same_thread=False)
+      conn.execute("PRAGMA journal_mode=WAL")
+      conn.execute("PRAGMA synchronous=NORMAL")
+      conn.executescript(_SCHEMA)
+      self._conn = conn
+      self._count(conn)
+    return self._conn
+
+  def _count(self, conn: sqlite3.Connection) -> None:
+    self._entries, self._bytes = conn.execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM cache").fetchone()
+
+  def _submit(self, fn, *args) -> Optional[Future]:
+    if self._closed:
+      return None
+    if self._executor is None:
+      self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="sqlite-cache")
+    return self._executor.submit(fn, *args)
+
+  def _key(self, key: Hashable) -> str:
+    return self.namespace + "|" + json.dumps(key, ensure_ascii=False, separators=(",", ":"), default=str)
+
+  def _error(self, action: str, e: Exception) -> None:
+    self.errors += 1
+    self.logger.warning("SQLite 缓存%s失败：%s", action, e)
+
+  def get_with_ttl(self, key: Hashable) -> Optional[Tuple[Any, float]]:
+    """
+    读取缓存值及其剩余有效期（秒），未命中或已过期时返回 None。
+    """
+    now = time.time()
+    db_key = self._key(key)
+    try:
+      with self._lock:
+        conn = self._connect()
+        row = conn.execute("SELECT value, expire_at, accessed_at FROM cache WHERE key = ?", (db_key,)).fetchone()
+        if row is None:
+          self.misses += 1
+          return None
+        value, expire_at, accessed_at = row
+        if expire_at <= now:
+          conn.execute("DELETE FROM cache WHERE key = ? AND expire_at <= ?", (db_key, now))
+          self.expirations += 1
+          self.misses += 1
+          return None
+        if now - accessed_at > self.TOUCH_INTERVAL:
+          conn.execute("UPDATE cache SET accessed_at = ? WHERE key = ?", (now, db_key))
+        self.hits += 1
+      return pydantic_core.from_json(value), expire_at - now
+    except (sqlite3.Error, ValueError) as e:
+      self._error("读取", e)
+      return None
+
+  def get(self, key: Hashable) -> Optional[Any]:
+    """
+    读取缓存。
+
+    Args:
+        key (Hashable): 缓存键，需可以 JSON 序列化。
+
+    Returns:
+        Any | None: 缓存值，未命中或已过期时返回 None。
+    """
+    entry = self.get_with_ttl(key)
+    return entry[0] if entry is not None else None
+
+  async def aget_with_ttl(self, key: Hashable) -> Optional[Tuple[Any, float]]:
+    """
+    在后台线程中执行 get_with_ttl，不阻塞事件循环。
+    """
+    future = self._submit(self.get_with_ttl, key)
+    return await asyncio.wrap_future(future) if future is not None else None
+
+  def peek(self, key: Hashable) -> Optional[Any]:
+    """
+    读取缓存但不更新访问时间和命中统计。
+    """
+    try:
+      with self._lock:
+        row = self._connect().execute(
+          "SELECT value FROM cache WHERE key = ? AND expire_at > ?", (self._key(key), time.time())
+        ).fetchone()
+      return pydantic_core.from_json(row[0]) if row is not None else None
+    except (sqlite3.Error, ValueError) as e:
+      self._error("读取", e)
+      return None
+
+  def __contains__(self, key):
+    return self.peek(key) is not None
+
+  def __len__(self):
+    try:
+      with self._lock:
+        self._connect()
+    except sqlite3.Error as e:
+      self._error("统计", e)
+    return self._totals()[0]
+
+  def set_nowait(self, key: Hashable, value: Any, ttl: Optional[float] = None) -> None:
+    """
+    在后台线程中写入缓存，立即返回；value 在写入完成前不应被修改。
+    """
+    self._submit(self.set, key, value, ttl)
+
+  def flush(self) -> None:
+    """
+    等待已提交的后台写入完成。
+    """
+    future = self._submit(lambda: None)
+    if future is not None:
+      future.result()
+
+  def set(self, key: Hashable, value: Any, ttl: Optional[float] = None) -> None:
+    """
+    写入缓存，每写入 PURGE_INTERVAL 次清理一次过期和超限的条目。
+
+    Args:
+        key (Hashable): 缓存键，需可以 JSON 序列化。
+        value (Any): 缓存值，需可以 JSON 序列化。
+        ttl (float, optional): 过期时间（秒），为空时使用 default_ttl。
+    """
+    ttl = self.default_ttl if ttl is None else ttl
+    if ttl <= 0:
+      return
+    try:
+      data = pydantic_core.to_json(value)
+    except (TypeError, ValueError, pydantic_core.PydanticSerializationError):
+      return
+    if len(data) > self.max_bytes:
+      return
+
+    now = time.time()
+    try:
+      with self._lock:
+        self._connect().execute(
+          "INSERT OR REPLACE INTO cache (key, value, size, expire_at, accessed_at) VALUES (?, ?, ?, ?, ?)",
+          (self._key(key), data, len(data), now + ttl, now),
+        )
+        # 覆盖已有条目时会多计，下次清理时校正
+        self._entries += 1
+        self._bytes += len(data)
+        self._writes += 1
+        if self._writes % self.PURGE_INTERVAL == 0:
+          self._purge(now)
+    except sqlite3.Error as e:
+      self._error("写入", e)
+
+  def _purge(self, now: float) -> None:
+    conn = self._connect()
+    self.expirations += conn.execute("DELETE FROM cache WHERE expire_at <= ?", (now,)).rowcount
+    self._count(conn)
+    count, total = self._entries, self._bytes
+    if count <= self.max_entries and total <= self.max_bytes:
+      return
+
+    # 按访问时间从旧到新淘汰，直到条目数和字节数都回到上限的 90% 以内
+    target_count = int(self.max_entries * 0.9)
+    target_bytes = int(self.max_bytes * 0.9)
+    evict = []
+    for key, size in conn.execute("SELECT key, size FROM cache ORDER BY accessed_at"):
+      if count <= target_count and total <= target_bytes:
+        break
+      evict.append((key,))
+      count -= 1
+      total -= size
+    conn.executemany("DELETE FROM cache WHERE key = ?", evict)
+    self.evictions += len(evict)
+    self._entries, self._bytes = count, total
+
+  def purge(self) -> None:
+    """
+    立即清理过期条目，并在超出上限时淘汰最久未访问的条目。
+    """
+    try:
+      with self._lock:
+        self._purge(time.time())
+    except sqlite3.Error as e:
+      self._error("清理", e)
+
+  def delete(self, key: Hashable) -> None:
+    try:
+      with self._lock:
+        deleted = self._connect().execute("DELETE FROM cache WHERE key = ?", (self._key(key),)).rowcount
+        self._entries -= deleted
+    except sqlite3.Error as e:
+      self._error("删除", e)
+
+  def clear(self) -> None:
+    """
+    删除当前命名空间下的全部条目。
+    """
+    try:
+      with self._lock:
+        conn = self._connect()
+        conn.execute("DELETE FROM cache WHERE substr(key, 1, ?) = ?", (len(self.namespace) + 1, self.namespace + "|"))
+        self._count(conn)
+    except sqlite3.Error as e:
+      self._error("清空", e)
+
+  def _totals(self) -> Tuple[int, int]:
+    return self._entries, self._bytes
+
+  def close(self) -> None:
+    """
+    等待后台写入完成后关闭数据库连接。
+    """
+    self._closed = True
+    if self._executor is not None:
+      self._executor.shutdown(wait=True)
+      self._executor = None
+    with self._lock:
+      if self._conn is not None:
+        self._conn.close()
+        self._conn = None
+
+  def stats(self) -> Dict[str, Any]:
+    """
+    返回缓存统计信息，entries 和 bytes 为整个数据库文件（所有进程共享）的近似数据量，
+    在连接和每次清理时统计，之间按本进程的写入累加。
+    """
+    entries, size = self._totals()
+    total = self.hits + self.misses
+    return {
+      "path": self.path,
+      "hits": self.hits,
+      "misses": self.misses,
+      "evictions": self.evictions,
+      "expirations": self.expirations,
+      "errors": self.errors,
+      "entries": entries,
+      "bytes": size,
+      "hit_rate": round(self.hits / total, 4) if total else 0.0,
+    }
+
+
+class TieredCache:
+  """
+  两级缓存：进程内 TTLCache 作为 L1，SQLiteCache 作为 L2。
+
+  读取先查 L1，未命中再查 L2，L2 命中的结果按剩余有效期回填 L1；写入同时写两级。
+  接口与 TTLCache 一致，可以直接替换；在事件循环中用 aget 读取，L2 的读写都在后台线程中执行，
+  set 写入 L1 后立即返回，peek 只查 L1。
+
+  Args:
+      l1 (TTLCache): 进程内缓存。
+      l2 (SQLiteCache): 持久化缓存。
+  """
+
+  def __init__(self, l1: TTLCache, l2: SQLiteCache):
+    self.l1 = l1
+    self.l2 = l2
+
+  def __len__(self):
+    return len(self.l1)
+
+  def __contains__(self, key):
+    return key in self.l1
+
+  def _promote(self, key: Hashable, entry: Optional[Tuple[Any, float]]) -> Optional[Any]:
+    if entry is None:
+      return None
+    value, ttl = entry
+    self.l1.set(key, value, ttl=ttl)
+    return value
+
+  def get(self, key: Hashable) -> Optional[Any]:
+    value = self.l1.get(key)
+    if value is not None:
+      return value
+    return self._promote(key, self.l2.get_with_ttl(key))
+
+  async def aget(self, key: Hashable) -> Optional[Any]:
+    """
+    读取缓存，L1 未命中时在后台线程中查询 L2，不阻塞事件循环。
+    """
+    value = self.l1.get(key)
+    if value is not None:
+      return value
+    return self._promote(key, await self.l2.aget_with_ttl(key))
+
+  def peek(self, key: Hashable) -> Optional[Any]:
+    return self.l1.peek(key)
+
+  def set(self, key: Hashable, value: Any, ttl: Optional[float] = None) -> None:
+    self.l1.set(key, value, ttl=ttl)
+    self.l2.set_nowait(key, value, ttl=ttl)
+
+  def delete(self, key: Hashable) -> None:
+    self.l1.delete(key)
+    self.l2.delete(key)
+
+  def clear(self) -> None:
+    self.l1.clear()
+    self.l2.clear()
+
+  def close(self) -> None:
+    self.l2.close()
+
+  def stats(self) -> Dict[str, Any]:
+    """
+    返回 L1 统计信息，L2 统计信息放在 disk 字段中。
+    """
+    stats = self.l1.stats()
+    stats["disk"] = self.l2.stats()
+    return stats
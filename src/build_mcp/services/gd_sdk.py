@@ -1,15 +1,68 @@
 import asyncio
+import contextvars
+import importlib.util
 import logging
-from typing import Any
+import math
+import time
+from collections import deque
+from contextlib import aclosing
+from typing import Any, AsyncIterator, Awaitable, Callable, List, Optional, Sequence, Tuple
 
 import httpx
 
+from build_mcp.common.cache import SingleFlight, TTLCache, collect_stale, mark_stale
+from build_mcp.common.circuit_breaker import CircuitBreaker
+from build_mcp.common.geo import Area, format_location, haversine_many, parse_location
+from build_mcp.common.latency import LatencyTracker, remaining_time
+from build_mcp.common.sqlite_cache import SQLiteCache, TieredCache
+from build_mcp.common.logger import PAYLOAD
+from build_mcp.common.metrics import REGISTRY, TRACER
+from build_mcp.common.rate_limit import RateLimiter
+from build_mcp.common.scheduler import BULK, RequestScheduler, current_priority, priority
+from build_mcp.services.ip_db import IpDatabase
+from build_mcp.services.poi_store import PoiStore
+from build_mcp.services.spatial_cache import SpatialCache
+
+UPSTREAM_LATENCY = REGISTRY.histogram("amap_upstream_request_seconds", "高德接口单次请求耗时（秒）", ["endpoint"])
+UPSTREAM_RESPONSES = REGISTRY.counter("amap_upstream_responses", "高德接口响应次数（按状态码，网络异常为 error）", ["endpoint", "status"])
+UPSTREAM_RETRIES = REGISTRY.counter("amap_upstream_retries", "高德接口重试次数", ["endpoint"])
+UPSTREAM_INFLIGHT = REGISTRY.gauge("amap_upstream_inflight", "进行中的高德接口请求数", ["endpoint"])
+UPSTREAM_HEDGES = REGISTRY.counter(
+  "amap_upstream_hedges", "对冲请求次数（sent 已发出，won 先于原请求返回，skipped 没有限流配额未发出）", ["endpoint", "result"])
+UPSTREAM_TIMEOUTS = REGISTRY.counter("amap_upstream_timeouts", "单次请求超过自适应超时的次数", ["endpoint"])
+UPSTREAM_DEADLINE = REGISTRY.counter("amap_upstream_deadline_exceeded", "超过工具调用截止时间而放弃的请求数", ["endpoint"])
+CIRCUIT_OPENED = REGISTRY.counter("amap_circuit_opened", "熔断器打开次数", ["endpoint"])
+CIRCUIT_REJECTED = REGISTRY.counter("amap_circuit_rejected", "熔断期间快速失败的请求数", ["endpoint"])
+CACHE_REQUESTS = REGISTRY.counter("amap_cache_requests", "各级缓存的查询次数", ["cache", "result"])
+SCHEDULER_QUEUE_WAIT = REGISTRY.histogram("amap_scheduler_queue_wait_seconds", "请求在调度器中等待并发名额和限流配额的时间（秒）", ["priority"])
+POI_STORE_REFRESHES = REGISTRY.counter("amap_poi_store_refreshes", "本地 POI 库只刷新过期单元的次数", ["result"])
+
+# 刷新本地 POI 库过期单元时发出的周边搜索不再查询本地 POI 库
+_POI_STORE_BYPASS = contextvars.ContextVar("poi_store_bypass", default=False)
+
 
 class GdSDK:
   """
   GdSDK API 异步 SDK 封装。
   支持自动重试，指数退避策略。
   异步HTTP请求，支持自动重试和指数退避
+  支持按接口设置 TTL 的 LRU 结果缓存，并发的相同请求只会发起一次上游调用
+  可选 SQLite 持久化缓存后端，进程重启后保留，同一台机器上的多个服务进程共享
+  支持周边搜索的空间缓存，坐标相近且被已缓存结果覆盖的查询直接在本地过滤返回
+  支持离线 IP 库，locate_ip 优先查询本地，未命中时才请求高德接口
+  可选本地 POI 库：保存搜索到的 POI 并持久化，已采集范围内的周边搜索在本地回答，少数单元过期时只刷新这些单元
+  locate_ips / search_nearby_batch 批量方法，按并发上限复用同一个 HTTP 客户端
+  iter_nearby / search_nearby_all 自动翻页，并发预取后续页面并按 POI id 去重
+  search_nearest 最近 k 个 POI：从小半径开始按倍数扩大，直到找到 k 个结果，不需要调用方猜测半径
+  search_area 多边形 / 路线走廊区域搜索：六边形网格拆分为圆形子区域并发查询，去重后按区域裁剪
+  客户端令牌桶限流，按接口配置 QPS，支持多个 API Key 轮换
+  可选请求调度器：交互式调用与批量任务（locate_ips / search_nearby_batch / search_area）分类排队，
+  按权重公平分配限流配额，并为交互式调用保留并发名额
+  可配置的连接池、keep-alive、HTTP/2 和分项超时，支持启动时预热连接
+  慢请求对冲：超过该接口近期 p95 耗时仍未返回时发出重复请求，取先返回的结果
+  自适应超时：单次请求超时按近期耗时分位数调整，并受调用方设置的截止时间（deadline）限制
+  按接口熔断：连续失败达到阈值后快速失败，一段时间后放行探测请求
+  stale-while-revalidate：缓存过期后先返回旧结果并在后台刷新，上游故障时同样返回旧结果
   locate_ip 方法用于根据IP获取地理位置
   search_nearby 周边搜索方法，用于根据经纬度获取附近的POI信息
 
@@ -18,10 +71,80 @@ class GdSDK:
           {
               "base_url": "https://restapi.amap.com",
               "api_key": "your_api_key",
+              "api_keys": ["key1", "key2"],  # 可选，多个 Key 轮换使用
               "proxies": {"http": "...", "https": "..."},  # 可选
               "max_retries": 5,
               "retry_delay": 1,
               "backoff_factor": 2,
+              "batch_concurrency": 8,
+              "page_lookahead": 4,
+              "max_pages": 100,
+              "max_area_tiles": 500,
+              "cache": {  # 可选
+                  "enabled": True,
+                  "max_entries": 2048,
+                  "max_bytes": 33554432,
+                  "ttl": {"ip": 3600, "around": 600},
+                  "backend": "memory",  # memory 或 sqlite
+                  "path": "~/.cache/build_mcp/amap_cache.db",
+                  "disk_max_entries": 100000,
+                  "disk_max_bytes": 268435456,
+                  "stale_while_revalidate": 60,
+                  "stale_if_error": 86400,
+                  "stale_timeout": 2,
+              },
+              "circuit_breaker": {  # 可选
+                  "enabled": True,
+                  "failure_threshold": 5,
+                  "reset_timeout": 30,
+              },
+              "spatial_cache": {  # 可选
+                  "enabled": True,
+                  "precision": 6,
+                  "ttl": 600,
+              },
+              "poi_store": {  # 可选，默认不启用
+                  "enabled": True,
+                  "path": "~/.cache/build_mcp/poi_store.db",  # 为空时只保存在内存中
+                  "precision": 6,
+                  "ttl": 86400,
+                  "max_pois": 100000,
+                  "max_refresh_tiles": 4,
+              },
+              "ip_db": {  # 可选
+                  "path": "ip_ranges.bin",
+                  "delta_path": "ip_delta.jsonl",
+              },
+              "rate_limit": {  # 可选
+                  "enabled": True,
+                  "qps": 30,
+                  "endpoints": {"ip": 30, "around": 30},
+              },
+              "scheduler": {  # 可选
+                  "enabled": True,
+                  "max_concurrency": 16,
+                  "interactive_reserved": 4,
+                  "weights": {"interactive": 8, "bulk": 1},
+              },
+              "http": {  # 可选
+                  "max_connections": 100,
+                  "max_keepalive_connections": 20,
+                  "keepalive_expiry": 30,
+                  "http2": False,
+                  "timeout": {"connect": 5, "read": 10, "write": 10, "pool": 5},
+                  "warmup": 2,
+              },
+              "latency": {  # 可选
+                  "window": 256,
+                  "min_samples": 20,
+                  "hedge": True,
+                  "hedge_quantile": 0.95,
+                  "hedge_min_delay": 0.05,
+                  "adaptive_timeout": True,
+                  "timeout_quantile": 0.99,
+                  "timeout_multiplier": 3,
+                  "timeout_min": 1,
+              },
           }
       logger (logging.Logger, optional): 日志记录器，默认使用模块 logger。
   """
@@ -33,15 +156,222 @@ class GdSDK:
     self.max_retries = config.get("max_retries", 5)
     self.retry_delay = config.get("retry_delay", 1)
     self.backoff_factor = config.get("backoff_factor", 2)
+    self.batch_concurrency = config.get("batch_concurrency", 8)
+    self.page_lookahead = config.get("page_lookahead", 4)
+    self.max_pages = config.get("max_pages", 100)
+    self.max_area_tiles = config.get("max_area_tiles", 500)
+
+    # 客户端限流，多个 API Key 轮换使用
+    keys = [k.strip() for k in str(self.api_key or "").split(",") if k.strip()]
+    keys += [k for k in config.get("api_keys") or [] if k and k not in keys]
+    self.api_keys = keys
+    rate_config = config.get("rate_limit") or {}
+    enabled = rate_config.get("enabled", True)
+    self.rate_limiter = RateLimiter(
+      keys,
+      qps=rate_config.get("qps") if enabled else None,
+      burst=rate_config.get("burst"),
+      endpoints=rate_config.get("endpoints") if enabled else None,
+    )
+    self.throttle_penalty = rate_config.get("penalty", 1)
+
+    # 按优先级调度上游请求，批量任务不会让交互式调用排在其后
+    scheduler_config = config.get("scheduler") or {}
+    self.scheduler = None
+    if scheduler_config.get("enabled", False):
+      self.scheduler = RequestScheduler(
+        self.rate_limiter,
+        max_concurrency=scheduler_config.get("max_concurrency", 16),
+        reserved=scheduler_config.get("interactive_reserved", 4),
+        weights=scheduler_config.get("weights"),
+      )
+
+    # 结果缓存与请求合并
+    cache_config = config.get("cache") or {}
+    self.cache_enabled = cache_config.get("enabled", True)
+    self.cache_ttl = {"ip": 3600, "around": 600, **(cache_config.get("ttl") or {})}
+    self._cache = TTLCache(
+      max_entries=cache_config.get("max_entries", 2048),
+      max_bytes=cache_config.get("max_bytes", 32 * 1024 * 1024),
+    )
+    if self.cache_enabled and cache_config.get("backend", "memory") == "sqlite":
+      # 进程内缓存作为 L1，SQLite 作为 L2；按上游地址隔离，避免测试替身的数据混入
+      self._cache = TieredCache(self._cache, SQLiteCache(
+        path=cache_config.get("path") or "~/.cache/build_mcp/amap_cache.db",
+        max_entries=cache_config.get("disk_max_entries", 100000),
+        max_bytes=cache_config.get("disk_max_bytes", 256 * 1024 * 1024),
+        namespace=self.base_url,
+        logger=self.logger,
+      ))
+    self._inflight = SingleFlight()
+
+    # 过期结果（stale-while-revalidate / stale-if-error），值为 (写入时间, 结果)
+    self.stale_while_revalidate = cache_config.get("stale_while_revalidate", 0)
+    self.stale_if_error = max(cache_config.get("stale_if_error", 0), self.stale_while_revalidate)
+    self.stale_timeout = cache_config.get("stale_timeout", 2)
+    self._stale = None
+    if self.cache_enabled and self.stale_if_error > 0:
+      self._stale = TTLCache(
+        max_entries=cache_config.get("stale_max_entries", cache_config.get("max_entries", 2048)),
+        max_bytes=cache_config.get("stale_max_bytes", cache_config.get("max_bytes", 32 * 1024 * 1024)),
+      )
+    # 后台刷新任务，保存引用避免任务在完成前被回收
+    self._background = set()
+
+    # 按接口熔断
+    breaker_config = config.get("circuit_breaker") or {}
+    self.breaker_enabled = breaker_config.get("enabled", False)
+    self.breaker_threshold = breaker_config.get("failure_threshold", 5)
+    self.breaker_reset_timeout = breaker_config.get("reset_timeout", 30)
+    self._breakers = {}
+
+    # 周边搜索空间缓存
+    spatial_config = config.get("spatial_cache") or {}
+    self.spatial_cache = None
+    if spatial_config.get("enabled", True):
+      self.spatial_cache = SpatialCache(
+        precision=spatial_config.get("precision", 6),
+        ttl=spatial_config.get("ttl", self.cache_ttl["around"]),
+        max_entries=spatial_config.get("max_entries", 1024),
+      )
+
+    # 本地 POI 库
+    poi_config = config.get("poi_store") or {}
+    self.poi_store = None
+    self.poi_store_refresh_tiles = poi_config.get("max_refresh_tiles", 4)
+    if poi_config.get("enabled", False):
+      self.poi_store = PoiStore(
+        path=poi_config.get("path", "~/.cache/build_mcp/poi_store.db"),
+        precision=poi_config.get("precision", 6),
+        ttl=poi_config.get("ttl", 86400),
+        max_pois=poi_config.get("max_pois", 100000),
+        namespace=self.base_url,
+        logger=self.logger,
+      )
+
+    # 离线 IP 库
+    ip_db_config = config.get("ip_db") or {}
+    self.ip_db = None
+    if ip_db_config.get("path") or ip_db_config.get("delta_path"):
+      self.ip_db = IpDatabase(
+        path=ip_db_config.get("path"),
+        delta_path=ip_db_config.get("delta_path"),
+        logger=self.logger,
+      )
 
     # 创建一个异步HTTP客户端，自动带上请求头和代理配置
-    self._client = httpx.AsyncClient(proxy=self.proxy, timeout=10)
+    http_config = config.get("http") or {}
+    self.warmup_connections = http_config.get("warmup", 0)
+    self._warmed_up = False
+    self._client = self._build_client(http_config)
+
+    # 慢请求对冲与自适应超时
+    latency_config = config.get("latency") or {}
+    self.latency = LatencyTracker(
+      window=latency_config.get("window", 256),
+      min_samples=latency_config.get("min_samples", 20),
+    )
+    self.hedge = latency_config.get("hedge", False)
+    self.hedge_quantile = latency_config.get("hedge_quantile", 0.95)
+    self.hedge_min_delay = latency_config.get("hedge_min_delay", 0.05)
+    self.adaptive_timeout = latency_config.get("adaptive_timeout", False)
+    self.timeout_quantile = latency_config.get("timeout_quantile", 0.99)
+    self.timeout_multiplier = latency_config.get("timeout_multiplier", 3)
+    self.timeout_min = latency_config.get("timeout_min", 1)
+    self.timeout_max = latency_config.get("timeout_max") or self._client.timeout.read or 10
+
+  def _build_client(self, http_config: dict) -> httpx.AsyncClient:
+    """
+    根据配置创建异步HTTP客户端（连接池、keep-alive、HTTP/2、分项超时）。
+
+    Args:
+        http_config (dict): 配置中的 http 部分。
+
+    Returns:
+        httpx.AsyncClient: HTTP 客户端。
+    """
+    self.limits = httpx.Limits(
+      max_connections=http_config.get("max_connections", 100),
+      max_keepalive_connections=http_config.get("max_keepalive_connections", 20),
+      keepalive_expiry=http_config.get("keepalive_expiry", 30),
+    )
+    timeout_config = http_config.get("timeout") or {}
+    default_timeout = timeout_config.get("default", 10)
+    timeout = httpx.Timeout(
+      default_timeout,
+      connect=timeout_config.get("connect", default_timeout),
+      read=timeout_config.get("read", default_timeout),
+      write=timeout_config.get("write", default_timeout),
+      pool=timeout_config.get("pool", default_timeout),
+    )
+    self.http2 = bool(http_config.get("http2", False))
+    if self.http2 and importlib.util.find_spec("h2") is None:
+      self.logger.warning("未安装 h2，HTTP/2 不可用，已回退为 HTTP/1.1（可通过 pip install httpx[http2] 安装）")
+      self.http2 = False
+    return httpx.AsyncClient(proxy=self.proxy, timeout=timeout, limits=self.limits, http2=self.http2)
+
+  async def warmup(self, connections: int = None) -> int:
+    """
+    预热连接：提前建立 TCP/TLS 连接并放回连接池，避免首批工具调用承担握手耗时。
+    只在第一次调用时生效，不消耗接口配额。
+
+    Args:
+        connections (int, optional): 预热的连接数，默认使用配置中的 http.warmup。
+            HTTP/2 下一个连接即可多路复用，只建立一个连接。
+
+    Returns:
+        int: 成功建立的连接数。
+    """
+    if self._warmed_up or not self.base_url:
+      return 0
+    self._warmed_up = True
+    connections = connections or self.warmup_connections
+    if connections <= 0:
+      return 0
+    if self.http2:
+      connections = 1
+
+    async def ping():
+      try:
+        await self._client.head(self.base_url)
+        return True
+      except httpx.HTTPError as e:
+        self.logger.warning("连接预热失败：%s", e)
+        return False
+
+    results = await asyncio.gather(*(ping() for _ in range(min(connections, self.limits.max_connections or connections))))
+    self.logger.info("连接预热完成：%d/%d", sum(results), len(results))
+    return sum(results)
+
+  def pool_stats(self) -> dict:
+    """
+    返回连接池使用情况：连接总数、活跃连接、空闲连接、排队等待连接的请求数和利用率。
+    """
+    stats = {"connections": 0, "active": 0, "idle": 0, "queued": 0, "http2": self.http2,
+             "max_connections": self.limits.max_connections,
+             "max_keepalive_connections": self.limits.max_keepalive_connections}
+    transports = [self._client._transport, *self._client._mounts.values()]
+    for transport in transports:
+      # httpx 未公开连接池统计，这里读取 httpcore 连接池的状态
+      pool = getattr(transport, "_pool", None)
+      if pool is None:
+        continue
+      for connection in getattr(pool, "connections", []):
+        stats["connections"] += 1
+        if connection.is_idle():
+          stats["idle"] += 1
+        elif not connection.is_closed():
+          stats["active"] += 1
+      stats["queued"] += len(getattr(pool, "_requests", []))
+    if self.limits.max_connections:
+      stats["utilization"] = round(stats["active"] / self.limits.max_connections, 4)
+    return stats
 
   async def __aenter__(self):
     return self
 
   async def __aexit__(self, exc_type, exc, tb):
-    await self._client.aclose()
+    await self.close()
 
   def _should_retry(self, response: httpx.Response = None, exception: Exception = None) -> bool:
     """
@@ -65,9 +395,157 @@ class GdSDK:
     # 其他情况不重试
     return False
 
+  # 高德在 HTTP 200 中以 infocode 表示的限流错误
+  _THROTTLED_INFOCODES = {"10004", "10019", "10020", "10021"}
+
+  def _is_throttled(self, response: httpx.Response, data: Any = None) -> bool:
+    """
+    判断响应是否为上游限流（HTTP 429 或高德 QPS 超限的 infocode）。
+    """
+    if response.status_code == 429:
+      return True
+    return isinstance(data, dict) and data.get("status") == "0" and data.get("infocode") in self._THROTTLED_INFOCODES
+
+  async def _send(self, method: str, url: str, endpoint: str, attempt: int, params=None, json=None,
+                  hedge: bool = False) -> httpx.Response:
+    """
+    发送一次HTTP请求，记录耗时、状态码、进行中请求数和追踪 span，收到响应的耗时计入近期耗时统计。
+    被取消的请求（对冲中落后的一方或超时）状态记为 cancelled。
+
+    Raises:
+        httpx.RequestError: 网络异常。
+    """
+    with TRACER.span(f"upstream.{endpoint}", endpoint=endpoint, attempt=attempt + 1, hedge=hedge) as span:
+      inflight = UPSTREAM_INFLIGHT.labels(endpoint)
+      inflight.inc()
+      start = time.perf_counter()
+      status = "error"
+      try:
+        response = await self._client.request(method=method, url=url, params=params, json=json)
+        status = str(response.status_code)
+        self.latency.observe(endpoint, time.perf_counter() - start)
+        return response
+      except asyncio.CancelledError:
+        status = "cancelled"
+        raise
+      finally:
+        inflight.dec()
+        UPSTREAM_LATENCY.labels(endpoint).observe(time.perf_counter() - start)
+        UPSTREAM_RESPONSES.labels(endpoint, status).inc()
+        if span is not None:
+          span.set_attribute("status", status)
+
+  def _hedge_delay(self, endpoint: str) -> Optional[float]:
+    """
+    返回发出对冲请求前等待的秒数（该接口近期耗时的 hedge_quantile 分位数），未启用或样本不足时返回 None。
+    """
+    if not self.hedge:
+      return None
+    value = self.latency.quantile(endpoint, self.hedge_quantile)
+    return None if value is None else max(self.hedge_min_delay, value)
+
+  def _attempt_timeout(self, endpoint: str) -> Optional[float]:
+    """
+    返回单次请求（含对冲）的超时秒数：近期耗时分位数乘以 timeout_multiplier，
+    限制在 [timeout_min, timeout_max] 之间，并且不超过截止时间。都未设置时返回 None，只使用客户端超时。
+    """
+    timeout = None
+    if self.adaptive_timeout:
+      value = self.latency.quantile(endpoint, self.timeout_quantile)
+      if value is not None:
+        timeout = min(self.timeout_max, max(self.timeout_min, value * self.timeout_multiplier))
+    remaining = remaining_time()
+    if remaining is not None:
+      timeout = remaining if timeout is None else min(timeout, remaining)
+    return timeout
+
+  @staticmethod
+  def _with_key(params, key: str) -> dict:
+    request_params = dict(params or {})
+    if key:
+      request_params["key"] = key
+    return request_params
+
+  async def _send_hedged(self, method: str, url: str, endpoint: str, attempt: int, key: str, params=None,
+                         json=None) -> Tuple[httpx.Response, str]:
+    """
+    发送请求，GET 请求超过 _hedge_delay 仍未返回时再发出一个重复请求，取先返回的结果并取消另一个。
+    对冲请求只使用限流器中现有的配额（try_acquire），配额不足时不发出，不会挤占正常请求。
+
+    Returns:
+        tuple[httpx.Response, str]: 响应以及该响应使用的 API Key。
+
+    Raises:
+        httpx.RequestError: 所有请求都发生网络异常时抛出最后一个异常。
+    """
+    delay = self._hedge_delay(endpoint) if method == "GET" else None
+    if delay is None:
+      return await self._send(method, url, endpoint, attempt, params=self._with_key(params, key), json=json), key
+
+    primary = asyncio.ensure_future(self._send(method, url, endpoint, attempt, params=self._with_key(params, key), json=json))
+    keys = {primary: key}
+    pending = {primary}
+    try:
+      done, pending = await asyncio.wait(pending, timeout=delay)
+      if not done:
+        hedge_key = self.rate_limiter.try_acquire(endpoint)
+        if hedge_key is None:
+          UPSTREAM_HEDGES.labels(endpoint, "skipped").inc()
+        else:
+          UPSTREAM_HEDGES.labels(endpoint, "sent").inc()
+          self.logger.debug("请求超过 %.3f 秒未返回，发出对冲请求：%s", delay, url)
+          hedge = asyncio.ensure_future(self._send(method, url, endpoint, attempt, params=self._with_key(params, hedge_key),
+                                                   json=json, hedge=True))
+          keys[hedge] = hedge_key
+          pending.add(hedge)
+      error = None
+      while True:
+        for task in done:
+          if task.exception() is None:
+            if task is not primary:
+              UPSTREAM_HEDGES.labels(endpoint, "won").inc()
+            return task.result(), keys[task]
+          error = task.exception()
+        if not pending:
+          raise error
+        done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+    finally:
+      for task in pending:
+        task.cancel()
+
+  def _breaker(self, endpoint: str) -> Optional[CircuitBreaker]:
+    if not self.breaker_enabled:
+      return None
+    breaker = self._breakers.get(endpoint)
+    if breaker is None:
+      breaker = self._breakers[endpoint] = CircuitBreaker(self.breaker_threshold, self.breaker_reset_timeout)
+    return breaker
+
+  def _record_outcome(self, breaker: Optional[CircuitBreaker], endpoint: str, failed: bool) -> None:
+    """
+    向熔断器报告一次请求结果。网络异常、超时和 5xx 视为失败；上游限流和其他响应说明上游可用，视为成功。
+    """
+    if breaker is None:
+      return
+    if not failed:
+      breaker.record_success()
+    elif breaker.record_failure():
+      CIRCUIT_OPENED.labels(endpoint).inc()
+      self.logger.error("接口 %s 连续失败 %d 次，熔断 %s 秒", endpoint, breaker.failures, breaker.reset_timeout)
+
+  @staticmethod
+  def _endpoint_name(url: str) -> str:
+    """
+    从 URL 中取出接口名，如 /v3/ip -> ip，/v5/place/around -> around。
+    """
+    return httpx.URL(url).path.rstrip("/").rsplit("/", 1)[-1]
+
   async def _request_with_retry(self, method: str, url: str, params=None, json=None):
     """
     发送HTTP请求，带自动重试和指数退避。
+    单次请求超过自适应超时视为失败并重试；调用方设置了截止时间时，排队、请求和退避等待都不会超过它。
+    接口熔断期间不发出请求，直接返回 None。
+    启用调度器时每次尝试都按当前调用链的优先级重新排队，退避等待期间不占用并发名额。
 
     Args:
         method (str): HTTP方法，如 'GET', 'POST'。
@@ -78,48 +556,238 @@ class GdSDK:
     Returns:
         dict or None: 成功时返回JSON解析结果，失败返回 None。
     """
+    endpoint = self._endpoint_name(url)
+    breaker = self._breaker(endpoint)
+    priority_class = current_priority()
     for attempt in range(self.max_retries + 1):
+      throttled = False
+      if breaker is not None and not breaker.allow():
+        CIRCUIT_REJECTED.labels(endpoint).inc()
+        self.logger.warning("接口 %s 熔断中，%.1f 秒后探测，快速失败，URL：%s", endpoint, breaker.retry_after(), url)
+        return None
+      if attempt:
+        UPSTREAM_RETRIES.labels(endpoint).inc()
+      # 先在限流器中排队获取配额，并选定本次使用的 API Key；排队时间同样受截止时间限制
+      remaining = remaining_time()
+      queued_at = time.perf_counter()
+      try:
+        if remaining is not None and remaining <= 0:
+          raise asyncio.TimeoutError
+        if self.scheduler is not None:
+          key = await asyncio.wait_for(self.scheduler.acquire(endpoint, priority_class), remaining)
+          SCHEDULER_QUEUE_WAIT.labels(priority_class).observe(time.perf_counter() - queued_at)
+        else:
+          key = await asyncio.wait_for(self.rate_limiter.acquire(endpoint), remaining)
+      except asyncio.TimeoutError:
+        UPSTREAM_DEADLINE.labels(endpoint).inc()
+        self.logger.error("超过调用截止时间，放弃请求，URL：%s", url)
+        return None
+      timeout = self._attempt_timeout(endpoint)
       try:
-        self.logger.info(f"发送请求：{method} {url}，参数：{params}, JSON：{json}, 尝试次数：{attempt + 1}/{self.max_retries + 1}")
-        response = await self._client.request(
-          method=method,
-          url=url,
-          params=params,
-          json=json,
-        )
-        self.logger.info(f"收到响应：{response.status_code} {response.text}")
+        self.logger.debug("发送请求：%s %s，参数：%s, JSON：%s, 尝试次数：%d/%d",
+                          method, url, params, json, attempt + 1, self.max_retries + 1, extra=PAYLOAD)
+        response, key = await asyncio.wait_for(
+          self._send_hedged(method, url, endpoint, attempt, key, params=params, json=json), timeout)
+        self.logger.info("收到响应：%s %s，%d 字节", response.status_code, url, len(response.content))
+        self._record_outcome(breaker, endpoint, failed=response.status_code >= 500)
+        if self.logger.isEnabledFor(logging.DEBUG):
+          self.logger.debug("响应内容：%s", response.text, extra=PAYLOAD)
         if response.status_code in [200, 201]:
           # 成功返回JSON数据
-          return response.json()
-
-        if not self._should_retry(response=response):
-          self.logger.error(f"请求失败且不可重试，状态码：{response.status_code}，URL：{url}")
+          data = response.json()
+          if not self._is_throttled(response, data):
+            return data
+          throttled = True
+        elif self._is_throttled(response):
+          throttled = True
+        elif not self._should_retry(response=response):
+          self.logger.error("请求失败且不可重试，状态码：%s，URL：%s", response.status_code, url)
           return None
 
-        self.logger.warning(
-          f"请求失败（状态码：{response.status_code}），"
-          f"第 {attempt + 1}/{self.max_retries} 次重试，URL：{url}"
-        )
+        if throttled:
+          # 上游限流：暂停该 Key 的配额，由限流器安排下一次请求的时间
+          self.rate_limiter.penalize(key, endpoint, self.throttle_penalty)
+
+        self.logger.warning("请求失败（状态码：%s%s），第 %d/%d 次重试，URL：%s", response.status_code,
+                            "，上游限流" if throttled else "", attempt + 1, self.max_retries, url)
 
       except httpx.RequestError as e:
-        self.logger.warning(
-          f"请求异常：{str(e)}，"
-          f"第 {attempt + 1}/{self.max_retries} 次重试，URL：{url}"
-        )
+        self._record_outcome(breaker, endpoint, failed=True)
+        self.logger.warning("请求异常：%s，第 %d/%d 次重试，URL：%s", e, attempt + 1, self.max_retries, url)
+
+      except asyncio.TimeoutError:
+        # 超时的请求按超时时间计入耗时统计，上游整体变慢时超时阈值随之放宽
+        UPSTREAM_TIMEOUTS.labels(endpoint).inc()
+        self.latency.observe(endpoint, timeout)
+        self._record_outcome(breaker, endpoint, failed=True)
+        self.logger.warning("请求超时（%.3f 秒），第 %d/%d 次重试，URL：%s", timeout, attempt + 1, self.max_retries, url)
 
-      # 如果不是最后一次重试，按指数退避等待
-      if attempt < self.max_retries:
+      finally:
+        if self.scheduler is not None:
+          self.scheduler.release(priority_class)
+
+      # 如果不是最后一次重试，按指数退避等待；限流时已由限流器控制节奏，不再额外退避
+      if attempt < self.max_retries and not (throttled and self.rate_limiter.is_limited(endpoint)):
         delay = self.retry_delay * (self.backoff_factor ** attempt)
+        remaining = remaining_time()
+        if remaining is not None and delay >= remaining:
+          UPSTREAM_DEADLINE.labels(endpoint).inc()
+          self.logger.error("剩余时间不足以再次重试，放弃请求，URL：%s", url)
+          return None
         await asyncio.sleep(delay)
 
-    self.logger.error(f"所有重试失败，URL：{url}")
+    self.logger.error("所有重试失败，URL：%s", url)
     return None
 
+  @staticmethod
+  def _cache_key(endpoint: str, params: dict) -> tuple:
+    """
+    根据接口名和请求参数生成缓存键，忽略 API key。
+    """
+    return (endpoint,) + tuple(sorted((k, str(v)) for k, v in params.items() if k != "key" and v is not None))
+
+  async def _cached_get(self, endpoint: str, url: str, params: dict):
+    """
+    带缓存和请求合并的 GET 请求，只缓存 status 为 "1" 的成功结果。
+
+    启用过期结果时，成功结果额外保留 stale_if_error 秒：
+    - 过期不超过 stale_while_revalidate 秒时直接返回旧结果，同时在后台刷新；
+    - 更旧的结果只在上游失败、熔断或 stale_timeout 秒内未返回时使用（上游请求继续在后台完成）。
+    返回旧结果时通过 mark_stale 记录，工具层据此在 meta 中标记 stale。
+
+    返回的缓存对象会被多个调用方共享，调用方不应修改。
+
+    Args:
+        endpoint (str): 接口名，用于选择 TTL，如 "ip"、"around"。
+        url (str): 请求URL。
+        params (dict): URL查询参数。
+
+    Returns:
+        dict or None: 接口返回的JSON结果，失败返回 None。
+    """
+    if not self.cache_enabled:
+      return await self._request_with_retry(method="GET", url=url, params=params)
+
+    key = self._cache_key(endpoint, params)
+    cached = await self._cache.aget(key) if isinstance(self._cache, TieredCache) else self._cache.get(key)
+    if cached is not None:
+      CACHE_REQUESTS.labels("response", "hit").inc()
+      self.logger.debug("缓存命中：%s", key)
+      return cached
+
+    ttl = self.cache_ttl.get(endpoint)
+
+    async def fetch():
+      result = await self._request_with_retry(method="GET", url=url, params=params)
+      if result and result.get("status") == "1":
+        self._cache.set(key, result, ttl=ttl)
+        if self._stale is not None:
+          self._stale.set(key, (time.time(), result), ttl=(ttl or 0) + self.stale_if_error)
+      return result
+
+    stale = self._stale.get(key) if self._stale is not None else None
+    if stale is not None:
+      stored_at, stale_result = stale
+      age = time.time() - stored_at
+      if age < (ttl or 0):
+        # 结果仍在有效期内，只是被 L1 淘汰
+        CACHE_REQUESTS.labels("response", "hit").inc()
+        return stale_result
+      if age <= (ttl or 0) + self.stale_while_revalidate:
+        CACHE_REQUESTS.labels("response", "stale").inc()
+        self._revalidate(key, fetch)
+        mark_stale(age)
+        return stale_result
+    CACHE_REQUESTS.labels("response", "coalesced" if key in self._inflight else "miss").inc()
+
+    try:
+      # 有旧结果兜底时最多等待 stale_timeout 秒，上游请求在后台继续并刷新缓存
+      result = await asyncio.wait_for(self._inflight.do(key, fetch), self.stale_timeout if stale is not None else None)
+    except asyncio.TimeoutError:
+      result = None
+    if stale is not None and not (result and result.get("status") == "1"):
+      CACHE_REQUESTS.labels("response", "stale_if_error").inc()
+      self.logger.warning("上游请求失败，返回 %.0f 秒前的缓存结果：%s", age, key)
+      mark_stale(age)
+      return stale_result
+    return result
+
+  def _revalidate(self, key: tuple, fetch: Callable[[], Awaitable[Any]]) -> None:
+    """
+    在后台刷新缓存，同一个键同时只刷新一次。
+    """
+    if key in self._inflight:
+      return
+    # 在空的上下文中创建任务，不继承工具调用的截止时间、追踪 span 和过期标记
+    task = contextvars.Context().run(asyncio.ensure_future, self._inflight.do(key, fetch))
+    self._background.add(task)
+    task.add_done_callback(self._revalidated)
+
+  def _revalidated(self, task: asyncio.Future) -> None:
+    self._background.discard(task)
+    if not task.cancelled() and task.exception() is not None:
+      self.logger.warning("后台刷新缓存失败：%s", task.exception())
+
+  def cache_stats(self) -> dict:
+    """
+    返回缓存统计信息，包括命中、未命中、淘汰次数以及被合并的并发请求数。
+    """
+    stats = self._cache.stats()
+    stats["coalesced"] = self._inflight.coalesced
+    stats["inflight"] = len(self._inflight)
+    if self._stale is not None:
+      stats["stale"] = self._stale.stats()
+    if self.spatial_cache is not None:
+      stats["spatial"] = self.spatial_cache.stats()
+    if self.poi_store is not None:
+      stats["poi_store"] = self.poi_store.stats()
+    if self.ip_db is not None:
+      stats["ip_db"] = self.ip_db.stats()
+    return stats
+
+  def latency_stats(self) -> dict:
+    """
+    返回各接口近期耗时分位数，以及当前的对冲触发时间和单次请求超时（秒）。
+    """
+    stats = self.latency.stats()
+    for endpoint, item in stats.items():
+      hedge_delay = self._hedge_delay(endpoint)
+      item["hedge_delay"] = round(hedge_delay, 4) if hedge_delay is not None else None
+      timeout = self._attempt_timeout(endpoint) if self.adaptive_timeout else None
+      item["timeout"] = round(timeout, 4) if timeout is not None else None
+    return stats
+
+  def circuit_stats(self) -> dict:
+    """
+    返回各接口熔断器的状态、连续失败次数、打开次数、快速失败次数和距下次探测的秒数。
+    """
+    return {endpoint: breaker.stats() for endpoint, breaker in self._breakers.items()}
+
+  def rate_limit_stats(self) -> dict:
+    """
+    返回各接口的限流排队深度和等待时间统计。
+    """
+    return {"keys": len(self.api_keys), "endpoints": self.rate_limiter.stats()}
+
+  def scheduler_stats(self) -> dict:
+    """
+    返回调度器各优先级类别的排队数、进行中的请求数和排队等待时间分位数，未启用时返回空字典。
+    """
+    return self.scheduler.stats() if self.scheduler is not None else {}
+
   async def close(self):
     """
     关闭异步HTTP客户端，释放资源。
     """
+    for task in list(self._background):
+      task.cancel()
     await self._client.aclose()
+    if isinstance(self._cache, TieredCache):
+      self._cache.close()
+    if self.poi_store is not None:
+      self.poi_store.close()
+    if self.ip_db is not None:
+      self.ip_db.close()
 
   async def locate_ip(self, ip: str = None) -> Any | None:
     """
@@ -132,25 +800,51 @@ class GdSDK:
     Returns:
         dict: 定位结果，若失败则返回 None。
     """
+    if ip and self.ip_db is not None:
+      await self.ip_db.aload()
+      local = self.ip_db.lookup(ip)
+      CACHE_REQUESTS.labels("ip_db", "miss" if local is None else "hit").inc()
+      if local is not None:
+        self.logger.debug("离线 IP 库命中：%s", ip)
+        return local
+
     url = f"{self.base_url}/v3/ip"
-    params = {
-      "key": self.api_key,
-    }
+    params = {}
     if ip:
       params["ip"] = ip
 
-    result = await self._request_with_retry(
-      method="GET",
-      url=url,
-      params=params
-    )
+    result = await self._cached_get("ip", url, params)
 
     if result and result.get("status") == "1":
+      if ip and self.ip_db is not None:
+        self.ip_db.learn(ip, result)
       return result
     else:
-      self.logger.error(f"IP定位失败: {result}")
+      self.logger.error("IP定位失败: %s", result)
       return None
 
+  def peek_ip(self, ip: str = None) -> Optional[dict]:
+    """
+    返回缓存中已有的 IP 定位结果（包括保留的过期结果），不发起请求，也不计入缓存统计。
+
+    结果可能已经过期，只适合用于推测执行，例如在刷新定位的同时提前开始周边搜索。
+    离线 IP 库命中时 locate_ip 本身不发起请求，这里不再查询。
+
+    Args:
+        ip (str, optional): 要查询的 IP，为空表示请求方公网 IP。
+
+    Returns:
+        dict | None: 高德 IP 定位结果，本地没有时返回 None。
+    """
+    if not self.cache_enabled:
+      return None
+    key = self._cache_key("ip", {"ip": ip} if ip else {})
+    cached = self._cache.peek(key)
+    if cached is None and self._stale is not None:
+      stale = self._stale.peek(key)
+      cached = stale[1] if stale is not None else None
+    return cached
+
   async def search_nearby(self, location: str, keywords: str = "", types: str = "", radius: int = 1000, page_num: int = 1, page_size: int = 20) -> dict | None:
     """
     周边搜索（新版 POI）
@@ -167,9 +861,20 @@ class GdSDK:
     Returns:
         dict | None: 搜索结果，失败时返回 None
     """
+    if self.poi_store is not None and not _POI_STORE_BYPASS.get():
+      local = await self._poi_store_lookup(location, keywords, types, radius, page_num, page_size)
+      if local is not None:
+        return local
+
+    if self.spatial_cache is not None:
+      local = self.spatial_cache.lookup(location, keywords, types, radius, page_num, page_size)
+      CACHE_REQUESTS.labels("spatial", "miss" if local is None else "hit").inc()
+      if local is not None:
+        self.logger.debug("空间缓存命中：%s, %s, %s, %s", location, keywords, types, radius)
+        return local
+
     url = f"{self.base_url}/v5/place/around"
     params = {
-      "key": self.api_key,
       "location": location,
       "keywords": keywords,
       "types": types,
@@ -178,14 +883,433 @@ class GdSDK:
       "page_size": page_size,
     }
 
-    result = await self._request_with_retry(
-      method="GET",
-      url=url,
-      params=params,
-    )
+    with collect_stale() as stale:
+      result = await self._cached_get("around", url, params)
 
     if result and result.get("status") == "1":
+      # 过期结果不写入空间缓存，避免以新的有效期继续返回
+      if self.spatial_cache is not None and not stale:
+        self.spatial_cache.store(location, keywords, types, radius, result, page_num, page_size)
+      if self.poi_store is not None and not stale:
+        complete = page_num == 1 and len(result.get("pois") or []) < page_size
+        await self.poi_store.aload()
+        self.poi_store.ingest(location, keywords, types, radius, result, complete)
       return result
     else:
-      self.logger.error(f"周边搜索失败: {result}")
+      self.logger.error("周边搜索失败: %s", result)
       return None
+
+  async def _poi_store_lookup(self, location: str, keywords: str, types: str, radius: int,
+                              page_num: int, page_size: int) -> Optional[dict]:
+    """
+    在本地 POI 库中回答周边搜索；查询圆内只有少数单元过期时，先只刷新这些单元再在本地回答。
+    """
+    await self.poi_store.aload()
+    local = self.poi_store.lookup(location, keywords, types, radius, page_num, page_size)
+    if local is None:
+      plan = self.poi_store.refresh_plan(location, keywords, types, radius, self.poi_store_refresh_tiles)
+      if plan:
+        token = _POI_STORE_BYPASS.set(True)
+        try:
+          results = await self._run_batch(
+            plan, lambda item: self.search_nearby_all(item[0], keywords, types, item[1]))
+        finally:
+          _POI_STORE_BYPASS.reset(token)
+        refreshed = all(result["success"] and result["data"]["complete"] for result in results)
+        POI_STORE_REFRESHES.labels("ok" if refreshed else "failed").inc()
+        self.logger.debug("本地 POI 库刷新 %d 个过期单元：%s", len(plan), "成功" if refreshed else "失败")
+        if refreshed:
+          local = self.poi_store.lookup(location, keywords, types, radius, page_num, page_size)
+    CACHE_REQUESTS.labels("poi_store", "miss" if local is None else "hit").inc()
+    return local
+
+  async def _run_batch(self, items: Sequence, fn: Callable[[Any], Awaitable[Any]], concurrency: int = None) -> List[dict]:
+    """
+    按并发上限批量执行，结果顺序与输入一致，单个失败不影响其他条目。
+
+    Args:
+        items (Sequence): 输入条目。
+        fn (Callable): 处理单个条目的协程函数，返回 None 视为失败。
+        concurrency (int, optional): 并发上限，默认使用 batch_concurrency。
+
+    Returns:
+        list[dict]: 每个条目的结果，包含 success、data、error。
+    """
+    semaphore = asyncio.Semaphore(max(1, concurrency or self.batch_concurrency))
+
+    async def run(item):
+      async with semaphore:
+        try:
+          data = await fn(item)
+        except Exception as e:
+          self.logger.warning("批量请求条目失败：%s，错误：%s", item, e)
+          return {"success": False, "data": None, "error": str(e)}
+      if data is None:
+        return {"success": False, "data": None, "error": "请求失败，请检查日志"}
+      return {"success": True, "data": data, "error": None}
+
+    return await asyncio.gather(*(run(item) for item in items))
+
+  async def locate_ips(self, ips: Sequence[str], concurrency: int = None) -> List[dict]:
+    """
+    批量 IP 定位。
+
+    Args:
+        ips (Sequence[str]): 要查询的 IP 列表。
+        concurrency (int, optional): 并发上限，默认使用 batch_concurrency。
+
+    Returns:
+        list[dict]: 与输入顺序一致的结果列表，每项包含 ip、success、data、error。
+    """
+    with priority(BULK):
+      results = await self._run_batch(ips, self.locate_ip, concurrency)
+    return [{"ip": ip, **result} for ip, result in zip(ips, results)]
+
+  async def search_nearby_batch(self, queries: Sequence[dict], concurrency: int = None) -> List[dict]:
+    """
+    批量周边搜索。
+
+    Args:
+        queries (Sequence[dict]): 查询参数列表，每项为 search_nearby 的关键字参数，
+            如 {"location": "116.397128,39.916527", "keywords": "学校", "radius": 500}。
+        concurrency (int, optional): 并发上限，默认使用 batch_concurrency。
+
+    Returns:
+        list[dict]: 与输入顺序一致的结果列表，每项包含 query、success、data、error。
+    """
+    with priority(BULK):
+      results = await self._run_batch(queries, lambda query: self.search_nearby(**query), concurrency)
+    return [{"query": query, **result} for query, result in zip(queries, results)]
+
+  async def _iter_pages(self, location: str, keywords: str, types: str, radius: int, page_size: int,
+                        lookahead: int) -> AsyncIterator[Tuple[int, dict]]:
+    """
+    按顺序逐页返回周边搜索结果，同时在后台并发预取后续 lookahead 页。
+
+    第一页返回的 count 大于本页数量时视为结果总数，用于确定最后一页；
+    否则在某页返回数量不足 page_size 时结束。
+
+    Raises:
+        RuntimeError: 某一页请求失败时抛出，已返回的页面不受影响。
+    """
+    first = await self.search_nearby(location, keywords, types, radius, page_num=1, page_size=page_size)
+    if first is None:
+      raise RuntimeError("周边搜索失败，请检查日志")
+    yield 1, first
+
+    pois = first.get("pois") or []
+    if len(pois) < page_size:
+      return
+
+    last_page = self.max_pages
+    try:
+      total = int(first.get("count") or 0)
+    except (TypeError, ValueError):
+      total = 0
+    if total > len(pois):
+      last_page = min(last_page, math.ceil(total / page_size))
+
+    pending = deque()
+    next_page = 2
+    try:
+      while True:
+        while next_page <= last_page and len(pending) < lookahead:
+          task = asyncio.ensure_future(
+            self.search_nearby(location, keywords, types, radius, page_num=next_page, page_size=page_size)
+          )
+          pending.append((next_page, task))
+          next_page += 1
+        if not pending:
+          return
+
+        page_num, task = pending.popleft()
+        result = await task
+        if result is None:
+          raise RuntimeError(f"周边搜索第 {page_num} 页失败，请检查日志")
+        yield page_num, result
+        if len(result.get("pois") or []) < page_size:
+          return
+    finally:
+      for _, task in pending:
+        task.cancel()
+
+  async def iter_nearby(self, location: str, keywords: str = "", types: str = "", radius: int = 1000,
+                        page_size: int = 25, max_results: Optional[int] = None,
+                        lookahead: Optional[int] = None) -> AsyncIterator[dict]:
+    """
+    遍历周边搜索的全部 POI，自动翻页并按 POI id 去重。
+
+    Args:
+        location (str): 中心点经纬度，格式为 "lng,lat"
+        keywords (str, optional): 搜索关键词
+        types (str, optional): POI 分类
+        radius (int, optional): 搜索半径（米），最大 50000，默认 1000
+        page_size (int, optional): 每页数量，默认 25（最大值）
+        max_results (int, optional): 最多返回的 POI 数量，默认不限制
+        lookahead (int, optional): 并发预取的页数，默认使用 page_lookahead
+
+    Yields:
+        dict: POI 信息。
+
+    Raises:
+        RuntimeError: 某一页请求失败时抛出。
+    """
+    seen = set()
+    count = 0
+    pages = self._iter_pages(location, keywords, types, radius, page_size, max(1, lookahead or self.page_lookahead))
+    async with aclosing(pages):
+      async for _, result in pages:
+        for poi in result.get("pois") or []:
+          poi_id = poi.get("id") or (poi.get("name"), poi.get("location"))
+          if poi_id in seen:
+            continue
+          seen.add(poi_id)
+          yield poi
+          count += 1
+          if max_results and count >= max_results:
+            return
+
+  async def search_nearby_all(self, location: str, keywords: str = "", types: str = "", radius: int = 1000,
+                              page_size: int = 25, max_results: Optional[int] = None) -> dict | None:
+    """
+    获取周边搜索的全部 POI（跨页合并、去重）。
+
+    Args:
+        location (str): 中心点经纬度，格式为 "lng,lat"
+        keywords (str, optional): 搜索关键词
+        types (str, optional): POI 分类
+        radius (int, optional): 搜索半径（米），最大 50000，默认 1000
+        page_size (int, optional): 每页数量，默认 25
+        max_results (int, optional): 最多返回的 POI 数量，默认不限制
+
+    Returns:
+        dict | None: 与周边搜索格式一致的结果，额外包含 complete（是否已取完全部结果）；
+            第一页即失败时返回 None。
+    """
+    pois = []
+    complete = True
+    try:
+      async for poi in self.iter_nearby(location, keywords, types, radius, page_size, max_results):
+        pois.append(poi)
+    except RuntimeError as e:
+      if not pois:
+        self.logger.error("周边搜索失败: %s", e)
+        return None
+      self.logger.warning("周边搜索翻页中断，返回已获取的 %d 条结果: %s", len(pois), e)
+      complete = False
+
+    if max_results and len(pois) >= max_results:
+      complete = False
+    if complete and self.spatial_cache is not None:
+      self.spatial_cache.store(location, keywords, types, radius, {"pois": pois}, complete=True)
+    if complete and self.poi_store is not None:
+      await self.poi_store.aload()
+      self.poi_store.ingest(location, keywords, types, radius, {"pois": pois}, complete=True)
+
+    return {
+      "status": "1",
+      "info": "OK",
+      "infocode": "10000",
+      "count": str(len(pois)),
+      "pois": pois,
+      "complete": complete,
+    }
+
+  async def search_nearest(self, location: str, k: int = 5, keywords: str = "", types: str = "",
+                           initial_radius: int = 2000, max_radius: int = 50000, growth: float = 3.0) -> dict | None:
+    """
+    搜索离中心点最近的 k 个 POI。
+
+    从 initial_radius 开始查询，半径内的结果不足 k 个时扩大半径重新查询：
+    至少扩大 growth 倍，按已知的 POI 密度估计需要更大半径时直接扩大到估计值，直到取到 k 个或到达 max_radius。
+    上游结果按距离排序，每一圈只需要取前 k 个（上游距离为整数米，多取几个避免并列时漏掉）；
+    高德 v5 的 count 只是当前页的数量，因此每一圈翻页到取够或某页不满为止。
+    内圈结果不足 k 个时已是内圈的全部 POI，排在外圈结果的最前面，外圈从内圈数量之后的页开始获取，按 id 合并。
+    最终按球面距离排序，distance 为到中心点的距离（米）。
+    启用了本地 POI 库且到第 k 近的 POI 为止的范围都已采集时，直接用本地 KD 树回答，不请求上游。
+
+    Args:
+        location (str): 中心点经纬度，格式为 "lng,lat"
+        k (int, optional): 返回的 POI 数量，默认 5
+        keywords (str, optional): 搜索关键词
+        types (str, optional): POI 分类
+        initial_radius (int, optional): 初始半径（米），默认 2000
+        max_radius (int, optional): 最大半径（米），最大 50000，默认 50000
+        growth (float, optional): 每次扩大半径的最小倍数，默认 3
+
+    Returns:
+        dict | None: 与周边搜索格式一致的结果，额外包含 radius（最后一次查询的半径）、rings（查询次数，
+            本地回答时为 0）和 complete（是否已确定最近的 k 个，或 max_radius 内的全部 POI）；
+            第一次查询即失败时返回 None。
+
+    Raises:
+        ValueError: 参数不正确时抛出。
+    """
+    if k <= 0:
+      raise ValueError("k 必须大于 0")
+    if not 0 < initial_radius <= max_radius <= 50000 or growth <= 1:
+      raise ValueError("半径必须满足 0 < initial_radius <= max_radius <= 50000，growth 必须大于 1")
+    lng, lat = parse_location(location)
+
+    if self.poi_store is not None and not _POI_STORE_BYPASS.get():
+      await self.poi_store.aload()
+      local = self.poi_store.nearest(location, k, keywords, types, max_radius)
+      CACHE_REQUESTS.labels("poi_store", "miss" if local is None else "hit").inc()
+      if local is not None:
+        pois = local["pois"]
+        radius = int(pois[-1]["distance"]) if len(pois) >= k else max_radius
+        self.logger.debug("最近 POI 搜索在本地 POI 库命中：%s, %s, %s, k=%d", location, keywords, types, k)
+        return {**local, "radius": radius, "rings": 0, "complete": True}
+
+    wanted = k + max(2, k // 5)
+    page_size = min(wanted, 25)
+
+    candidates = {}
+    radius = initial_radius
+    rings = 0
+    complete = True
+    # 已知内圈（上一次查询的半径内）的全部 POI 数
+    inner = 0
+    while True:
+      rings += 1
+      page_num = inner // page_size + 1
+      # 半径内已确定的 POI 数：跳过的页加上本圈获取的结果
+      found = (page_num - 1) * page_size
+      exhausted = False
+      result = None
+      while True:
+        result = await self.search_nearby(location, keywords, types, radius, page_num, page_size)
+        if result is None:
+          break
+        pois = result.get("pois") or []
+        found += len(pois)
+        for poi in pois:
+          candidates.setdefault(poi.get("id") or (poi.get("name"), poi.get("location")), poi)
+        if len(pois) < page_size:
+          exhausted = True
+          break
+        if found >= wanted:
+          break
+        page_num += 1
+      if result is None:
+        if rings == 1 and not candidates:
+          self.logger.error("最近 POI 搜索失败：%s", location)
+          return None
+        self.logger.warning("最近 POI 搜索在半径 %d 米处中断，返回已获取的结果", radius)
+        complete = False
+      if not complete or found >= k or radius >= max_radius:
+        break
+      # 本圈已取完，按其 POI 密度估计包含 k 个结果所需的半径，并留出余量
+      inner = found
+      estimate = radius * math.sqrt(k / found) * 1.25 if found else 0
+      radius = min(max_radius, math.ceil(max(radius * growth, estimate)))
+
+    ranked = []
+    located = []
+    for poi in candidates.values():
+      try:
+        located.append((poi, parse_location(poi.get("location"))))
+      except ValueError:
+        continue
+    distances = haversine_many(lng, lat, [x for _, (x, _) in located], [y for _, (_, y) in located])
+    for d, (poi, _) in sorted(zip(distances, located), key=lambda item: item[0])[:k]:
+      ranked.append({**poi, "distance": str(int(round(d)))})
+
+    self.logger.debug("最近 POI 搜索：%d 圈，最终半径 %d 米，候选 %d，返回 %d", rings, radius, len(candidates), len(ranked))
+    return {
+      "status": "1",
+      "info": "OK",
+      "infocode": "10000",
+      "count": str(len(ranked)),
+      "pois": ranked,
+      "radius": radius,
+      "rings": rings,
+      "complete": complete,
+    }
+
+  async def search_area(self, polygon: str = None, path: str = None, buffer: int = 500, keywords: str = "",
+                        types: str = "", tile_radius: int = 2000, page_size: int = 25,
+                        max_results: Optional[int] = None, concurrency: int = None) -> dict | None:
+    """
+    区域搜索：查询多边形内，或路线两侧 buffer 米以内的全部 POI。
+
+    周边搜索只支持半径不超过 50 公里的圆形区域。这里用六边形网格把区域拆分为最少的一组
+    半径为 tile_radius 的圆，按并发上限同时查询各个圆（自动翻页，受客户端限流约束），
+    按 POI id 去重后再用向量化的点在多边形内判断裁掉区域外的结果。
+    按路线搜索时 distance 为 POI 到路线的距离，按多边形搜索时不返回 distance。
+
+    Args:
+        polygon (str, optional): 多边形坐标串 "lng,lat;lng,lat;..."，多个部分用 "|" 分隔。
+        path (str, optional): 路线坐标串，与 polygon 二选一。
+        buffer (int, optional): 路线两侧的搜索宽度（米），默认 500。
+        keywords (str, optional): 搜索关键词
+        types (str, optional): POI 分类
+        tile_radius (int, optional): 子区域半径（米），默认 2000；POI 密集时应减小，避免单个子区域超出翻页上限。
+        page_size (int, optional): 每页数量，默认 25
+        max_results (int, optional): 最多返回的 POI 数量，默认不限制
+        concurrency (int, optional): 同时查询的子区域数，默认使用 batch_concurrency。
+
+    Returns:
+        dict | None: 与周边搜索格式一致的结果，额外包含 complete（所有子区域都已取完）、
+            tiles（子区域数）和 failed_tiles（失败的子区域数）；全部子区域失败时返回 None。
+
+    Raises:
+        ValueError: 区域参数不正确，或子区域数超过 max_area_tiles 时抛出。
+    """
+    if not 0 < tile_radius <= 50000:
+      raise ValueError("tile_radius 必须在 (0, 50000] 米之间")
+    area = Area(polygon=polygon, path=path, buffer=buffer)
+    tiles = area.tiles(tile_radius)
+    if len(tiles) > self.max_area_tiles:
+      raise ValueError(f"区域需要拆分为 {len(tiles)} 个子区域，超过上限 {self.max_area_tiles}，请增大 tile_radius 或缩小区域")
+
+    with priority(BULK):
+      results = await self._run_batch(
+        [format_location(lng, lat) for lng, lat in tiles],
+        lambda location: self.search_nearby_all(location, keywords, types, math.ceil(tile_radius), page_size),
+        concurrency,
+      )
+    failed = sum(1 for result in results if not result["success"])
+    if failed == len(results):
+      self.logger.error("区域搜索失败：%d 个子区域全部失败", failed)
+      return None
+
+    pois = {}
+    complete = failed == 0
+    for result in results:
+      if not result["success"]:
+        continue
+      complete = complete and result["data"].get("complete", True)
+      for poi in result["data"].get("pois") or []:
+        pois.setdefault(poi.get("id") or (poi.get("name"), poi.get("location")), poi)
+
+    candidates = []
+    for poi in pois.values():
+      try:
+        candidates.append((poi, parse_location(poi.get("location"))))
+      except ValueError:
+        continue
+    lngs = [lng for _, (lng, _) in candidates]
+    lats = [lat for _, (_, lat) in candidates]
+    inside = area.contains(lngs, lats)
+    if area.is_polygon:
+      clipped = [{k: v for k, v in poi.items() if k != "distance"} for (poi, _), keep in zip(candidates, inside) if keep]
+    else:
+      distances = area.distances(lngs, lats)
+      clipped = [{**poi, "distance": str(int(round(d)))}
+                 for (poi, _), keep, d in sorted(zip(candidates, inside, distances), key=lambda item: item[2]) if keep]
+    if max_results and len(clipped) > max_results:
+      clipped = clipped[:max_results]
+      complete = False
+
+    self.logger.debug("区域搜索：%d 个子区域，失败 %d，候选 %d，区域内 %d", len(tiles), failed, len(candidates), len(clipped))
+    return {
+      "status": "1",
+      "info": "OK",
+      "infocode": "10000",
+      "count": str(len(clipped)),
+      "pois": clipped,
+      "complete": complete,
+      "tiles": len(tiles),
+      "failed_tiles": failed,
+    }
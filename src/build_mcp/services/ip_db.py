@@ -0,0 +1,333 @@
+import argparse
+import asyncio
+import csv
+import ipaddress
+import json
+import logging
+import mmap
+import os
+import struct
+import sys
+import threading
+from array import array
+from bisect import bisect_right
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import List, Optional, Sequence, Tuple
+
+# 二进制文件格式（本机字节序）：
+#   header:  magic(8) | 段数量 count | 记录数量 record_count   (uint32 x 2)
+#   starts:  count x uint32    每个 IP 段的起始地址（升序）
+#   ends:    count x uint32    每个 IP 段的结束地址
+#   index:   count x uint32    每个 IP 段对应的记录编号
+#   offsets: (record_count + 1) x uint32    记录在 blob 中的偏移
+#   blob:    utf-8 编码的记录，字段以 \t 分隔：province, city, adcode, rectangle
+_MAGIC = b"GDIPDB1" + (b"L" if sys.byteorder == "little" else b"B")
+_HEADER = struct.Struct("=8sII")
+_FIELDS = ("province", "city", "adcode", "rectangle")
+
+
+def ip_to_int(ip: str) -> Optional[int]:
+  """
+  将 IPv4 地址转换为整数，非法地址或 IPv6 返回 None。
+  """
+  try:
+    addr = ipaddress.ip_address(ip.strip())
+  except (AttributeError, ValueError):
+    return None
+  if addr.version != 4:
+    return None
+  return int(addr)
+
+
+def _parse_ip(value: str) -> int:
+  value = value.strip()
+  return int(value) if value.isdigit() else int(ipaddress.IPv4Address(value))
+
+
+class IpDatabase:
+  """
+  离线 IP 段定位库。
+
+  IP 段按起始地址排序后保存在紧凑的 uint32 数组中，查询时使用 bisect 二分查找，
+  无需网络请求。支持两种数据文件：
+
+  - CSV：表头为 start_ip,end_ip,province,city,adcode,rectangle，IP 可以是点分格式或整数；
+  - 二进制：由 `IpDatabase.compile` 从 CSV 生成，通过 mmap 直接映射，启动时无需解析。
+
+  数据文件在第一次查询时才会加载，在事件循环中应先 await aload() 在后台线程中加载。
+  另外可以指定一个增量文件（JSON Lines），用于回写从高德接口学习到的单个 IP 定位结果，
+  下次启动时自动加载；回写在单独的后台线程中按提交顺序执行，不阻塞调用方。
+
+  Args:
+      path (str, optional): CSV 或二进制数据文件路径。
+      delta_path (str, optional): 增量文件路径。
+      logger (logging.Logger, optional): 日志记录器。
+  """
+
+  def __init__(self, path: str = None, delta_path: str = None, logger=None):
+    self.path = path
+    self.delta_path = delta_path
+    self.logger = logger or logging.getLogger(__name__)
+    self._starts: Sequence[int] = ()
+    self._ends: Sequence[int] = ()
+    self._index: Sequence[int] = ()
+    self._records: List[Tuple[str, ...]] = []
+    self._offsets: Sequence[int] = ()
+    self._blob: memoryview = None
+    self._mmap: mmap.mmap = None
+    self._delta: dict = {}
+    self._loaded = False
+    self._loading: Optional[Future] = None
+    self._lock = threading.Lock()
+    # 加载和增量文件写入线程，单线程保证写入按提交顺序执行
+    self._executor: Optional[ThreadPoolExecutor] = None
+    self._closed = False
+    self.hits = 0
+    self.misses = 0
+    self.learned = 0
+
+  def _submit(self, fn, *args) -> Optional[Future]:
+    if self._closed:
+      return None
+    if self._executor is None:
+      self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="ip-db")
+    return self._executor.submit(fn, *args)
+
+  def load(self):
+    """
+    加载数据文件和增量文件，只执行一次；会阻塞调用线程，在事件循环中应使用 aload。
+    """
+    if self._loaded:
+      return
+    with self._lock:
+      if self._loaded:
+        return
+      if self.path and os.path.exists(self.path):
+        with open(self.path, "rb") as f:
+          is_binary = f.read(len(_MAGIC)) == _MAGIC
+        if is_binary:
+          self._load_binary(self.path)
+        else:
+          self._load_csv(self.path)
+        self.logger.info("离线 IP 库加载完成：%s，共 %d 个 IP 段", self.path, len(self._starts))
+      elif self.path:
+        self.logger.warning("离线 IP 库文件不存在：%s", self.path)
+      self._load_delta()
+      self._loaded = True
+
+  async def aload(self):
+    """
+    在后台线程中执行 load，不阻塞事件循环；并发的调用等待同一次加载。
+    """
+    if self._loaded:
+      return
+    if self._loading is None:
+      self._loading = self._submit(self.load)
+    if self._loading is None:
+      self.load()
+      return
+    # 某个调用方被取消时不取消加载本身
+    await asyncio.shield(asyncio.wrap_future(self._loading))
+
+  def _load_binary(self, path: str):
+    with open(path, "rb") as f:
+      self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    magic, count, record_count = _HEADER.unpack_from(self._mmap, 0)
+    view = memoryview(self._mmap)
+    pos = _HEADER.size
+    size = 4 * count
+    self._starts = view[pos:pos + size].cast("I")
+    self._ends = view[pos + size:pos + 2 * size].cast("I")
+    self._index = view[pos + 2 * size:pos + 3 * size].cast("I")
+    pos += 3 * size
+    self._offsets = view[pos:pos + 4 * (record_count + 1)].cast("I")
+    self._blob = view[pos + 4 * (record_count + 1):]
+
+  def _load_csv(self, path: str):
+    self._starts, self._ends, self._index, self._records = self._read_csv(path)
+
+  @staticmethod
+  def _read_csv(path: str):
+    rows = []
+    with open(path, "r", encoding="utf-8", newline="") as f:
+      for row in csv.DictReader(f):
+        rows.append((
+          _parse_ip(row["start_ip"]),
+          _parse_ip(row["end_ip"]),
+          tuple((row.get(field) or "").strip() for field in _FIELDS),
+        ))
+    rows.sort(key=lambda r: r[0])
+
+    starts, ends, index = array("I"), array("I"), array("I")
+    records: List[Tuple[str, ...]] = []
+    record_ids = {}
+    for start, end, record in rows:
+      if record not in record_ids:
+        record_ids[record] = len(records)
+        records.append(record)
+      starts.append(start)
+      ends.append(end)
+      index.append(record_ids[record])
+    return starts, ends, index, records
+
+  def _load_delta(self):
+    if not self.delta_path or not os.path.exists(self.delta_path):
+      return
+    with open(self.delta_path, "r", encoding="utf-8") as f:
+      for line in f:
+        try:
+          item = json.loads(line)
+          self._delta[item["ip"]] = tuple(item.get(field) or "" for field in _FIELDS)
+        except (ValueError, KeyError, TypeError):
+          continue
+
+  def _record(self, i: int) -> Tuple[str, ...]:
+    if self._blob is None:
+      return self._records[i]
+    return tuple(bytes(self._blob[self._offsets[i]:self._offsets[i + 1]]).decode("utf-8").split("\t"))
+
+  @staticmethod
+  def _to_result(record: Tuple[str, ...]) -> dict:
+    result = {"status": "1", "info": "OK", "infocode": "10000"}
+    result.update(zip(_FIELDS, record))
+    return result
+
+  def lookup(self, ip: str) -> Optional[dict]:
+    """
+    查询 IP 所在位置。
+
+    Args:
+        ip (str): IPv4 地址。
+
+    Returns:
+        dict | None: 与高德 IP 定位接口格式一致的结果，未收录时返回 None。
+    """
+    value = ip_to_int(ip) if ip else None
+    if value is None:
+      return None
+    self.load()
+
+    record = self._delta.get(ip.strip())
+    if record is None:
+      i = bisect_right(self._starts, value) - 1
+      if i >= 0 and self._ends[i] >= value:
+        record = self._record(self._index[i])
+
+    if record is None or not record[0]:
+      self.misses += 1
+      return None
+    self.hits += 1
+    return self._to_result(record)
+
+  def learn(self, ip: str, result: dict) -> bool:
+    """
+    记录上游接口返回的定位结果，并在后台追加到增量文件。
+
+    Args:
+        ip (str): IPv4 地址。
+        result (dict): 高德 IP 定位接口结果。
+
+    Returns:
+        bool: 是否记录。
+    """
+    if not self.delta_path or ip_to_int(ip) is None:
+      return False
+    # 高德对无法定位的 IP 返回空列表
+    record = tuple(result.get(field) if isinstance(result.get(field), str) else "" for field in _FIELDS)
+    if not record[0]:
+      return False
+    self.load()
+    ip = ip.strip()
+    if self._delta.get(ip) == record:
+      return False
+
+    self._delta[ip] = record
+    line = json.dumps({"ip": ip, **dict(zip(_FIELDS, record))}, ensure_ascii=False) + "\n"
+    if self._submit(self._append, line) is None:
+      self._append(line)
+    self.learned += 1
+    return True
+
+  def _append(self, line: str):
+    try:
+      with open(self.delta_path, "a", encoding="utf-8") as f:
+        f.write(line)
+    except OSError as e:
+      self.logger.warning("写入 IP 增量文件失败：%s", e)
+
+  def flush(self):
+    """
+    等待已提交的增量文件写入完成。
+    """
+    future = self._submit(lambda: None)
+    if future is not None:
+      future.result()
+
+  def close(self):
+    """
+    等待增量文件写入完成后释放内存映射。
+    """
+    self._closed = True
+    if self._executor is not None:
+      self._executor.shutdown(wait=True)
+      self._executor = None
+    with self._lock:
+      self._starts = self._ends = self._index = self._offsets = ()
+      if self._blob is not None:
+        self._blob.release()
+        self._blob = None
+      if self._mmap is not None:
+        self._mmap.close()
+        self._mmap = None
+      self._loaded = False
+      self._loading = None
+
+  def stats(self) -> dict:
+    return {
+      "ranges": len(self._starts),
+      "delta": len(self._delta),
+      "hits": self.hits,
+      "misses": self.misses,
+      "learned": self.learned,
+    }
+
+  @classmethod
+  def compile(cls, csv_path: str, out_path: str) -> int:
+    """
+    将 CSV 数据文件编译为可 mmap 的二进制文件。
+
+    Args:
+        csv_path (str): CSV 文件路径。
+        out_path (str): 输出文件路径。
+
+    Returns:
+        int: IP 段数量。
+    """
+    starts, ends, index, records = cls._read_csv(csv_path)
+    offsets = array("I", [0])
+    blob = bytearray()
+    for record in records:
+      blob += "\t".join(field.replace("\t", " ") for field in record).encode("utf-8")
+      offsets.append(len(blob))
+
+    tmp_path = out_path + ".tmp"
+    with open(tmp_path, "wb") as f:
+      f.write(_HEADER.pack(_MAGIC, len(starts), len(records)))
+      for arr in (starts, ends, index, offsets):
+        f.write(arr.tobytes())
+      f.write(blob)
+    os.replace(tmp_path, out_path)
+    return len(starts)
+
+
+def main():
+  parser = argparse.ArgumentParser(description="将 CSV 格式的 IP 段数据编译为离线 IP 库二进制文件")
+  parser.add_argument("csv_path", help="CSV 文件路径，表头为 start_ip,end_ip,province,city,adcode,rectangle")
+  parser.add_argument("out_path", help="输出的二进制文件路径")
+  args = parser.parse_args()
+  count = IpDatabase.compile(args.csv_path, args.out_path)
+  print(f"已写入 {count} 个 IP 段到 {args.out_path}")
+
+
+if __name__ == "__main__":
+  main()
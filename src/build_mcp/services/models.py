@@ -0,0 +1,207 @@
+from typing import Annotated, Any, Dict, Generic, Iterable, List, Optional, Sequence, Tuple, TypeVar
+
+from pydantic import BaseModel, Field
+from typing_extensions import TypedDict
+
+T = TypeVar("T")
+
+# 未指定 fields 时返回的字段，POI 只保留智能体常用的字段
+DEFAULT_IP_FIELDS = ("province", "city", "adcode", "rectangle", "location")
+DEFAULT_POI_FIELDS = ("id", "name", "location", "address", "distance", "type")
+
+
+class ApiResponse(BaseModel, Generic[T]):
+  """
+  工具统一的返回结构。
+  """
+  success: bool
+  data: Optional[T] = None
+  error: Optional[str] = None
+  meta: Optional[Dict[str, Any]] = None
+
+  @classmethod
+  def ok(cls, data: T, meta: Dict[str, Any] = None) -> "ApiResponse[T]":
+    return cls(success=True, data=data, meta=meta)
+
+  @classmethod
+  def fail(cls, error: str, meta: Dict[str, Any] = None) -> "ApiResponse[None]":
+    return cls(success=False, error=error, meta=meta)
+
+
+class NearbyQuery(BaseModel):
+  location: Annotated[str, Field(description="中心点经纬度，格式为 'lng,lat'，如 '116.397128,39.916527'")]
+  keywords: Annotated[str, Field(description="搜索关键词，例如: '餐厅'。")] = ""
+  types: Annotated[str, Field(description="POI 分类码，多个分类用逗号分隔")] = ""
+  radius: Annotated[int, Field(description="搜索半径（米），最大50000", ge=0, le=50000)] = 1000
+  page_num: Annotated[int, Field(description="页码，从1开始", ge=1)] = 1
+  page_size: Annotated[int, Field(description="每页数量，最大25", ge=1, le=25)] = 20
+
+
+def _str(value: Any) -> Optional[str]:
+  # 高德对缺失的字符串字段返回空列表
+  return value if isinstance(value, str) and value else None
+
+
+def _int(value: Any) -> Optional[int]:
+  try:
+    return int(value)
+  except (TypeError, ValueError):
+    return None
+
+
+class IpLocation(TypedDict, total=False):
+  """
+  IP 定位结果。location 为 rectangle 的中心点，可直接用于周边搜索。
+  """
+  province: str
+  city: str
+  adcode: str
+  rectangle: str
+  location: str
+
+
+class Poi(TypedDict, total=False):
+  """
+  POI 信息，distance 单位为米。
+  """
+  id: str
+  name: str
+  location: str
+  address: str
+  distance: int
+  type: str
+  typecode: str
+  pname: str
+  cityname: str
+  adname: str
+  pcode: str
+  citycode: str
+  adcode: str
+
+
+IP_FIELDS = tuple(IpLocation.__annotations__)
+POI_FIELDS = tuple(Poi.__annotations__)
+
+
+def resolve_fields(fields: Optional[Sequence[str]], available: Sequence[str], default: Sequence[str]) -> Tuple[str, ...]:
+  """
+  校验并返回要输出的字段。
+
+  Args:
+      fields (Sequence[str], optional): 调用方指定的字段，为空时使用 default，包含 "*" 时返回全部字段。
+      available (Sequence[str]): 全部可选字段。
+      default (Sequence[str]): 默认字段。
+
+  Returns:
+      tuple[str, ...]: 字段名元组。
+
+  Raises:
+      ValueError: 包含不支持的字段时抛出。
+  """
+  if not fields:
+    return tuple(default)
+  if "*" in fields:
+    return tuple(available)
+  unknown = [f for f in fields if f not in available]
+  if unknown:
+    raise ValueError(f"不支持的字段：{', '.join(unknown)}，可选字段：{', '.join(available)}")
+  return tuple(dict.fromkeys(fields))
+
+
+def resolve_ip_fields(fields: Optional[Sequence[str]] = None) -> Tuple[str, ...]:
+  return resolve_fields(fields, IP_FIELDS, DEFAULT_IP_FIELDS)
+
+
+def resolve_poi_fields(fields: Optional[Sequence[str]] = None) -> Tuple[str, ...]:
+  return resolve_fields(fields, POI_FIELDS, DEFAULT_POI_FIELDS)
+
+
+def _rectangle_center(rectangle: Any) -> Optional[str]:
+  try:
+    (lng1, lat1), (lng2, lat2) = (map(float, corner.split(",")) for corner in rectangle.split(";"))
+  except (AttributeError, ValueError):
+    return None
+  return f"{(lng1 + lng2) / 2:.6f},{(lat1 + lat2) / 2:.6f}"
+
+
+def _project(data: dict, names: Sequence[str]) -> dict:
+  # 缺失的字段直接省略，不输出 null
+  result = {}
+  for name in names:
+    if name == "distance":
+      value = _int(data.get(name))
+    elif name == "location" and "rectangle" in data and "location" not in data:
+      value = _rectangle_center(data["rectangle"])
+    else:
+      value = _str(data.get(name))
+    if value is not None:
+      result[name] = value
+  return result
+
+
+def ip_location(data: dict, fields: Optional[Sequence[str]] = None) -> IpLocation:
+  """
+  将高德 IP 定位接口结果精简为 IpLocation。
+
+  Args:
+      data (dict): 高德 IP 定位接口结果。
+      fields (Sequence[str], optional): 要保留的字段，默认全部。
+
+  Returns:
+      IpLocation: 精简后的定位结果。
+  """
+  return _project(data, resolve_ip_fields(fields))
+
+
+class PoiPage(BaseModel):
+  """
+  周边搜索结果。count 为上游返回的总数，complete 仅在自动翻页时出现。
+  """
+  count: int = 0
+  pois: List[Poi] = []
+  complete: Optional[bool] = Field(default=None, exclude_if=lambda v: v is None)
+
+
+def poi_page(data: dict, fields: Optional[Sequence[str]] = None) -> PoiPage:
+  """
+  将高德周边搜索结果精简为 PoiPage，只保留 fields 指定的 POI 字段。
+  上游数据可信，使用 model_construct 跳过 pydantic 校验。
+
+  Args:
+      data (dict): 高德周边搜索接口结果。
+      fields (Sequence[str], optional): 要保留的 POI 字段，默认 DEFAULT_POI_FIELDS。
+
+  Returns:
+      PoiPage: 精简后的搜索结果。
+  """
+  names = resolve_poi_fields(fields)
+  pois = [_project(poi, names) for poi in data.get("pois") or []]
+  return PoiPage.model_construct(count=_int(data.get("count")) or len(pois), pois=pois, complete=data.get("complete"))
+
+
+class LocatedNearby(BaseModel):
+  """
+  IP 定位结果及其周边搜索结果。
+  """
+  location: IpLocation
+  nearby: PoiPage
+
+
+def project_items(items: Iterable[dict], convert, fields: Optional[Sequence[str]]) -> List[dict]:
+  """
+  对批量结果中每一项成功的 data 按字段投影。
+
+  Args:
+      items (Iterable[dict]): 批量接口返回的结果列表，每项包含 success、data。
+      convert: 转换函数，ip_location 或 poi_page。
+      fields (Sequence[str], optional): 要保留的字段。
+
+  Returns:
+      list[dict]: 替换了 data 的结果列表。
+  """
+  result = []
+  for item in items:
+    if item.get("success") and item.get("data"):
+      item = {**item, "data": convert(item["data"], fields)}
+    result.append(item)
+  return result
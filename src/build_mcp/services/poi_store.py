@@ -0,0 +1,646 @@
+import asyncio
+import json
+import logging
+import math
+import os
+import sqlite3
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Callable, Dict, List, Optional, Set, Tuple
+
+import pydantic_core
+
+from build_mcp.common.geo import EARTH_RADIUS, format_location, geohash_bounds, geohash_encode, haversine, parse_location
+from build_mcp.common.kdtree import KDTree
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS pois (
+  namespace TEXT NOT NULL,
+  id TEXT NOT NULL,
+  data BLOB NOT NULL,
+  updated_at REAL NOT NULL,
+  PRIMARY KEY (namespace, id)
+);
+CREATE TABLE IF NOT EXISTS postings (
+  namespace TEXT NOT NULL,
+  query TEXT NOT NULL,
+  id TEXT NOT NULL,
+  PRIMARY KEY (namespace, query, id)
+);
+CREATE INDEX IF NOT EXISTS postings_id ON postings (namespace, id);
+CREATE TABLE IF NOT EXISTS tiles (
+  namespace TEXT NOT NULL,
+  query TEXT NOT NULL,
+  tile TEXT NOT NULL,
+  harvested_at REAL NOT NULL,
+  PRIMARY KEY (namespace, query, tile)
+);
+"""
+
+Query = Tuple[str, str]
+
+
+def _query_key(keywords: str, types: str) -> Query:
+  return (keywords or "").strip(), (types or "").strip()
+
+
+def _type_prefixes(types: str) -> Optional[List[str]]:
+  """
+  把分类编码（如 "050000|150500"）转换为编码前缀（"05"、"1505"），含非编码的分类名称时返回 None。
+  """
+  prefixes = []
+  for code in types.split("|"):
+    code = code.strip()
+    if len(code) != 6 or not code.isdigit():
+      return None
+    while code.endswith("00") and len(code) > 2:
+      code = code[:-2]
+    prefixes.append(code)
+  return prefixes
+
+
+class PoiStore:
+  """
+  本地 POI 库：把周边搜索获取到的 POI 保存在本地，覆盖范围内的查询不再请求高德接口。
+
+  - POI 坐标保存在增量 KD 树（build_mcp.common.kdtree）中，周边搜索（半径查询）和最近 POI 搜索
+    （k 最近邻查询）都在本地完成；
+  - 倒排索引：查询条件 (关键词, 分类) -> 命中的 POI，分类编码前缀 -> POI，用于按条件过滤；
+  - 新鲜度按 geohash 单元和查询条件记录：某个查询条件的完整结果（所有分页都已取回）覆盖的单元
+    记为该条件下已采集，采集时间超过 ttl 后视为过期；
+  - 查询圆覆盖的单元都已采集且未过期时直接在本地返回，只有少数单元过期时由调用方只刷新这些单元；
+  - POI 数超过 max_pois 时淘汰最久没有出现在搜索结果中的 POI，其所在单元改为未采集；过期单元定期清理，
+    内存和数据库中的数据量都有上限；
+  - 指定 path 时用 SQLite（WAL 模式）持久化，进程重启后仍然有效；数据库读写在单独的后台线程中按提交顺序执行，
+    在事件循环中先 await aload() 载入已保存的数据，ingest 只更新内存中的索引，写入在后台完成；
+  - 数据库异常只记录日志，内存中的索引照常使用。
+
+  Args:
+      path (str, optional): 数据库文件路径，为空时只保存在内存中。
+      precision (int): 新鲜度单元的 geohash 精度，默认 6（约 1.2km x 0.6km）。
+      ttl (float): 单元采集结果的有效期（秒），默认 86400。
+      max_tiles (int): 单次查询最多检查的单元数，超过时不在本地回答，默认 4096。
+      max_pois (int): 最多保存的 POI 数，0 表示不限制，默认 100000。
+      namespace (str, optional): 数据隔离前缀，用于区分不同上游地址的数据。
+      logger (logging.Logger, optional): 日志记录器。
+  """
+
+  # 每写入多少次清理一次过期单元
+  PRUNE_INTERVAL = 64
+  # 超过上限时淘汰到上限的该比例，避免每次写入都重建索引
+  EVICT_TO = 0.9
+
+  def __init__(self, path: Optional[str] = None, precision: int = 6, ttl: float = 86400,
+               max_tiles: int = 4096, max_pois: int = 100000, namespace: str = "", logger=None):
+    self.path = os.path.expanduser(path) if path else None
+    self.precision = precision
+    self.ttl = ttl
+    self.max_tiles = max_tiles
+    self.max_pois = max_pois
+    self.namespace = namespace
+    self.logger = logger or logging.getLogger(__name__)
+    self._lock = threading.Lock()
+    self._conn: Optional[sqlite3.Connection] = None
+    # 数据库读写线程，单线程保证写入按提交顺序执行
+    self._executor: Optional[ThreadPoolExecutor] = None
+    self._closed = False
+    self._loaded = self.path is None
+    self._loading: Optional[Future] = None
+    self._reset()
+    self._postings: Dict[Query, Set[int]] = {}
+    self._tiles: Dict[Query, Dict[str, float]] = {}
+    self._writes = 0
+    self.lookups = 0
+    self.hits = 0
+    self.ingested = 0
+    self.evictions = 0
+    self.errors = 0
+
+  def _reset(self) -> None:
+    """
+    清空按编号保存的 POI 及其坐标和分类索引。
+    """
+    self._tree = KDTree()
+    self._ids: Dict[str, int] = {}
+    self._pois: List[dict] = []
+    # 每个 POI 最近一次出现在搜索结果中的时间，用于淘汰
+    self._seen: List[float] = []
+    self._type_index: Dict[str, Set[int]] = {}
+
+  def _connect(self) -> Optional[sqlite3.Connection]:
+    if self.path is None:
+      return None
+    if self._conn is None:
+      directory = os.path.dirname(self.path)
+      if directory:
+        os.makedirs(directory, exist_ok=True)
+      conn = sqlite3.connect(self.path, timeout=5, isolation_level=None, check_same_thread=False)
+      conn.execute("PRAGMA journal_mode=WAL")
+      conn.execute("PRAGMA synchronous=NORMAL")
+      conn.executescript(_SCHEMA)
+      self._conn = conn
+    return self._conn
+
+  def _submit(self, fn, *args) -> Optional[Future]:
+    if self._closed:
+      return None
+    if self._executor is None:
+      self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="poi-store")
+    return self._executor.submit(fn, *args)
+
+  def _error(self, action: str, e: Exception) -> None:
+    self.errors += 1
+    self.logger.warning("本地 POI 库%s失败：%s", action, e)
+
+  def load(self) -> None:
+    """
+    从数据库载入已保存的 POI，只执行一次；会阻塞调用线程，在事件循环中应使用 aload。
+    """
+    if not self._loaded:
+      self._load()
+      self._loaded = True
+
+  async def aload(self) -> None:
+    """
+    在后台线程中执行 load，不阻塞事件循环；并发的调用等待同一次载入，载入完成前不应查询或写入。
+    """
+    if self._loaded:
+      return
+    if self._loading is None:
+      self._loading = self._submit(self.load)
+    if self._loading is not None:
+      # 某个调用方被取消时不取消载入本身
+      await asyncio.shield(asyncio.wrap_future(self._loading))
+
+  def _load(self) -> None:
+    # 只载入最近出现过的 max_pois 个 POI 和未过期的单元，其余的从数据库中删除
+    evicted, cells, dropped = [], set(), []
+    expire_before = time.time() - self.ttl
+    try:
+      with self._lock:
+        conn = self._connect()
+        if conn is None:
+          return
+        for data, seen in conn.execute(
+            "SELECT data, updated_at FROM pois WHERE namespace = ? ORDER BY updated_at DESC", (self.namespace,)):
+          poi = pydantic_core.from_json(data)
+          if self.max_pois and len(self._pois) >= self.max_pois:
+            evicted.append(poi.get("id"))
+            cells.add(self._cell(poi))
+          else:
+            self._put(poi, seen)
+        for query, poi_id in conn.execute("SELECT query, id FROM postings WHERE namespace = ?", (self.namespace,)):
+          index = self._ids.get(poi_id)
+          if index is not None:
+            self._postings.setdefault(tuple(json.loads(query)), set()).add(index)
+        for query, tile, harvested_at in conn.execute(
+            "SELECT query, tile, harvested_at FROM tiles WHERE namespace = ?", (self.namespace,)):
+          if harvested_at <= expire_before or tile in cells:
+            dropped.append((query, tile))
+          else:
+            self._tiles.setdefault(tuple(json.loads(query)), {})[tile] = harvested_at
+    except (sqlite3.Error, ValueError) as e:
+      self._error("载入", e)
+      return
+    if self._pois:
+      self._tree.rebuild()
+      self.logger.info("本地 POI 库已载入：%d 个 POI，%d 个查询条件", len(self._pois), len(self._tiles))
+    self._delete(evicted, dropped)
+
+  def _cell(self, poi: dict) -> Optional[str]:
+    try:
+      return geohash_encode(*parse_location(poi.get("location", "")), self.precision)
+    except ValueError:
+      return None
+
+  def _put(self, poi: dict, seen: float) -> Optional[int]:
+    """
+    在内存索引中添加或更新一个 POI，返回其编号；没有 id 或坐标无效时返回 None。
+    """
+    poi_id = poi.get("id")
+    try:
+      lng, lat = parse_location(poi.get("location", ""))
+    except ValueError:
+      return None
+    if not poi_id:
+      return None
+    index = self._ids.get(poi_id)
+    if index is None:
+      index = self._tree.add(lng, lat)
+      self._ids[poi_id] = index
+      self._pois.append(poi)
+      self._seen.append(seen)
+    else:
+      old = self._pois[index]
+      if old.get("location") != poi.get("location"):
+        self._tree.move(index, lng, lat)
+      for prefix in self._codes(old):
+        self._type_index.get(prefix, set()).discard(index)
+      self._pois[index] = poi
+      self._seen[index] = seen
+    for prefix in self._codes(poi):
+      self._type_index.setdefault(prefix, set()).add(index)
+    return index
+
+  @staticmethod
+  def _codes(poi: dict) -> Set[str]:
+    codes = set()
+    for code in str(poi.get("typecode") or "").split("|"):
+      code = code.strip()
+      codes.update(code[:n] for n in (2, 4, 6) if len(code) >= n)
+    return codes
+
+  def _cells(self, lng: float, lat: float, radius: float) -> Optional[List[Tuple[str, bool]]]:
+    """
+    返回与查询圆相交的 geohash 单元及其是否完全位于圆内；单元数超过 max_tiles 时返回 None。
+    """
+    d_lat = math.degrees(radius / EARTH_RADIUS)
+    d_lng = d_lat / max(math.cos(math.radians(lat)), 1e-6)
+    west, south, east, north = geohash_bounds(geohash_encode(lng, lat, self.precision))
+    height, width = north - south, east - west
+    rows = math.ceil((lat + d_lat - south) / height) + math.ceil((south - (lat - d_lat)) / height)
+    columns = math.ceil((lng + d_lng - west) / width) + math.ceil((west - (lng - d_lng)) / width)
+    if rows * columns > self.max_tiles:
+      return None
+
+    cells = []
+    row_lat = south + height / 2 - math.ceil((south - (lat - d_lat)) / height) * height
+    for _ in range(rows):
+      column_lng = west + width / 2 - math.ceil((west - (lng - d_lng)) / width) * width
+      for _ in range(columns):
+        if -90 < row_lat < 90:
+          cell = geohash_encode((column_lng + 180) % 360 - 180, row_lat, self.precision)
+          w, s, e, n = geohash_bounds(cell)
+          nearest = haversine(lng, lat, min(max(lng, w), e), min(max(lat, s), n))
+          if nearest <= radius:
+            inside = all(haversine(lng, lat, x, y) <= radius for x, y in ((w, s), (w, n), (e, s), (e, n)))
+            cells.append((cell, inside))
+        column_lng += width
+      row_lat += height
+    return cells
+
+  def stale_tiles(self, location: str, keywords: str = "", types: str = "", radius: int = 1000) -> Optional[List[str]]:
+    """
+    返回查询圆内尚未采集或已过期的单元。
+
+    Args:
+        location (str): 中心点经纬度，格式为 "lng,lat"。
+        keywords (str, optional): 搜索关键词。
+        types (str, optional): POI 分类。
+        radius (int, optional): 搜索半径（米）。
+
+    Returns:
+        list[str] | None: 需要刷新的 geohash 单元；坐标无效或单元数超过上限时返回 None。
+    """
+    stale = self._stale(location, keywords, types, radius)
+    return stale[1] if stale is not None else None
+
+  def _stale(self, location: str, keywords: str, types: str, radius: int) -> Optional[Tuple[int, List[str]]]:
+    try:
+      lng, lat = parse_location(location)
+    except ValueError:
+      return None
+    cells = self._cells(lng, lat, radius)
+    if cells is None:
+      return None
+    harvested = self._tiles.get(_query_key(keywords, types), {})
+    expire_before = time.time() - self.ttl
+    return len(cells), [cell for cell, _ in cells if harvested.get(cell, 0) <= expire_before]
+
+  def refresh_plan(self, location: str, keywords: str = "", types: str = "", radius: int = 1000,
+                   max_tiles: int = 4) -> Optional[List[Tuple[str, int]]]:
+    """
+    查询圆内只有少数单元过期时，返回只刷新这些单元所需的周边搜索。
+
+    每个过期单元对应一个以单元中心为圆心、刚好覆盖整个单元的查询圆，取回其完整结果后该单元即重新记为已采集。
+
+    Args:
+        location (str): 中心点经纬度，格式为 "lng,lat"。
+        keywords (str, optional): 搜索关键词。
+        types (str, optional): POI 分类。
+        radius (int, optional): 搜索半径（米）。
+        max_tiles (int, optional): 最多刷新的单元数，默认 4。
+
+    Returns:
+        list[tuple] | None: (中心点, 半径) 列表；没有过期单元、过期单元超过 max_tiles
+            或全部单元都已过期（直接按原查询请求更划算）时返回 None。
+    """
+    stale = self._stale(location, keywords, types, radius)
+    if stale is None:
+      return None
+    total, cells = stale
+    if not cells or len(cells) > max_tiles or len(cells) == total:
+      return None
+    plan = []
+    for cell in cells:
+      w, s, e, n = geohash_bounds(cell)
+      lng, lat = (w + e) / 2, (s + n) / 2
+      reach = max(haversine(lng, lat, x, y) for x, y in ((w, s), (w, n), (e, s), (e, n)))
+      plan.append((format_location(lng, lat), math.ceil(reach) + 1))
+    return plan
+
+  @staticmethod
+  def _sources(keywords: str, types: str) -> List[Tuple[Query, Optional[List[str]]]]:
+    """
+    可以回答该查询条件的采集结果及需要额外按分类编码过滤的前缀：先是本条件的采集结果，
+    其次是同一关键词不限分类的采集结果按分类编码过滤。
+    """
+    query = _query_key(keywords, types)
+    sources = [(query, None)]
+    prefixes = _type_prefixes(query[1]) if query[1] else None
+    if prefixes:
+      sources.append(((query[0], ""), prefixes))
+    return sources
+
+  def _fresh(self, source: Query, lng: float, lat: float, radius: float, expire_before: float) -> bool:
+    cells = self._cells(lng, lat, radius)
+    harvested = self._tiles.get(source, {})
+    return cells is not None and all(harvested.get(cell, 0) > expire_before for cell, _ in cells)
+
+  def _fresh_source(self, lng: float, lat: float, keywords: str, types: str,
+                    radius: float) -> Optional[Callable[[int], bool]]:
+    """
+    查询圆内所有单元都已采集时，返回判断 POI 是否满足查询条件的函数，否则返回 None。
+    """
+    expire_before = time.time() - self.ttl
+    for source, prefixes in self._sources(keywords, types):
+      if self._fresh(source, lng, lat, radius, expire_before):
+        return self._filter(source, prefixes)
+    return None
+
+  def _filter(self, query: Optional[Query], prefixes: Optional[List[str]] = None) -> Callable[[int], bool]:
+    postings = self._postings.get(query, set()) if query is not None else None
+    typed = set().union(*(self._type_index.get(prefix, set()) for prefix in prefixes)) if prefixes else None
+    return lambda index: (postings is None or index in postings) and (typed is None or index in typed)
+
+  def lookup(self, location: str, keywords: str = "", types: str = "", radius: int = 1000,
+             page_num: int = 1, page_size: int = 20) -> Optional[dict]:
+    """
+    查询圆内的单元都已采集且未过期时，在本地生成与高德接口格式一致的分页结果。
+
+    Args:
+        location (str): 中心点经纬度，格式为 "lng,lat"。
+        keywords (str, optional): 搜索关键词。
+        types (str, optional): POI 分类。
+        radius (int, optional): 搜索半径（米）。
+        page_num (int, optional): 页码。
+        page_size (int, optional): 每页数量。
+
+    Returns:
+        dict | None: 命中时返回搜索结果，未命中返回 None。
+    """
+    self.lookups += 1
+    try:
+      lng, lat = parse_location(location)
+    except ValueError:
+      return None
+    accept = self._fresh_source(lng, lat, keywords, types, radius)
+    if accept is None:
+      return None
+
+    self.hits += 1
+    matched = self._tree.within(lng, lat, radius, accept)
+    start = (page_num - 1) * page_size
+    return self._result(matched[start:start + page_size], len(matched))
+
+  def nearest(self, location: str, k: int = 10, keywords: str = "", types: str = "",
+              max_radius: float = 50000) -> Optional[dict]:
+    """
+    本地 k 最近邻查询：以第 k 近的 POI 的距离为半径的圆内单元都已采集且未过期时，在本地返回最近的 k 个 POI。
+
+    max_radius 内不足 k 个时，需要 max_radius 内的单元都已采集，此时返回其中的全部 POI。
+
+    Args:
+        location (str): 中心点经纬度，格式为 "lng,lat"。
+        k (int, optional): 返回数量，默认 10。
+        keywords (str, optional): 搜索关键词。
+        types (str, optional): POI 分类。
+        max_radius (float, optional): 最大距离（米），默认 50000。
+
+    Returns:
+        dict | None: 与周边搜索格式一致的结果，按距离排序；未命中时返回 None。
+    """
+    self.lookups += 1
+    try:
+      lng, lat = parse_location(location)
+    except ValueError:
+      return None
+    expire_before = time.time() - self.ttl
+    for source, prefixes in self._sources(keywords, types):
+      if source not in self._tiles:
+        continue
+      matched = self._tree.nearest(lng, lat, k, max_radius, self._filter(source, prefixes))
+      reach = matched[-1][0] if len(matched) >= k else max_radius
+      if self._fresh(source, lng, lat, reach, expire_before):
+        self.hits += 1
+        return self._result(matched, len(matched))
+    return None
+
+  def _result(self, matched: List[Tuple[float, int]], count: int) -> dict:
+    return {
+      "status": "1",
+      "info": "OK",
+      "infocode": "10000",
+      "count": str(count),
+      "pois": [{**self._pois[index], "distance": str(int(round(d)))} for d, index in matched],
+    }
+
+  def ingest(self, location: str, keywords: str, types: str, radius: int, result: dict,
+             complete: bool = False) -> int:
+    """
+    保存一次周边搜索获取到的 POI。
+
+    complete 为 True 时结果包含查询圆内的全部 POI：完全位于圆内的单元记为已采集，
+    圆内原先属于该查询条件、但本次没有返回的 POI 从倒排索引中移除。
+    写入后 POI 数超过 max_pois 时淘汰最久没有出现的 POI，每 PRUNE_INTERVAL 次写入清理一次过期单元。
+
+    Args:
+        location (str): 中心点经纬度。
+        keywords (str): 搜索关键词。
+        types (str): POI 分类。
+        radius (int): 搜索半径（米）。
+        result (dict): 高德接口返回结果。
+        complete (bool, optional): 结果是否包含半径内全部 POI。
+
+    Returns:
+        int: 结果中有效的 POI 数（有 id 和坐标）。
+    """
+    query = _query_key(keywords, types)
+    now = time.time()
+    postings = self._postings.setdefault(query, set())
+    rows, seen, indices, new_postings = [], [], set(), []
+    for poi in result.get("pois") or []:
+      poi = {k: v for k, v in poi.items() if k != "distance"}
+      known = self._ids.get(poi.get("id"))
+      unchanged = known is not None and self._pois[known] == poi
+      index = known if unchanged else self._put(poi, now)
+      if index is None:
+        continue
+      indices.add(index)
+      if index not in postings:
+        new_postings.append(poi["id"])
+      if unchanged:
+        # 内容未变的 POI 只刷新出现时间
+        self._seen[index] = now
+        seen.append(poi["id"])
+        continue
+      rows.append((self.namespace, poi["id"], pydantic_core.to_json(poi), now))
+    postings.update(indices)
+
+    removed, tiles = [], []
+    if complete:
+      try:
+        lng, lat = parse_location(location)
+      except ValueError:
+        lng = lat = None
+      cells = self._cells(lng, lat, radius) if lng is not None else None
+      if cells is not None:
+        for _, index in self._tree.within(lng, lat, radius):
+          if index in postings and index not in indices:
+            postings.discard(index)
+            removed.append(self._pois[index]["id"])
+        harvested = self._tiles.setdefault(query, {})
+        for cell, inside in cells:
+          if inside:
+            harvested[cell] = now
+            tiles.append(cell)
+    self.ingested += len(rows)
+    if self.path is not None and (rows or seen or new_postings or removed or tiles):
+      self._submit(self._persist, query, rows, seen, new_postings, removed, tiles, now)
+
+    self._writes += 1
+    if self.max_pois and len(self._pois) > self.max_pois:
+      self._evict(now)
+    elif self._writes % self.PRUNE_INTERVAL == 0:
+      dropped = self._prune(now)
+      if dropped and self.path is not None:
+        self._submit(self._delete, [], dropped)
+    return len(indices)
+
+  def _evict(self, now: float) -> None:
+    """
+    淘汰最久没有出现在搜索结果中的 POI，直到剩余 max_pois * EVICT_TO 个，然后重建内存索引。
+
+    被淘汰的 POI 所在单元的结果不再完整，在所有查询条件下都改为未采集。
+    """
+    order = sorted(range(len(self._pois)), key=self._seen.__getitem__, reverse=True)
+    keep = int(self.max_pois * self.EVICT_TO)
+    pois, seen, postings, rebuilds = self._pois, self._seen, self._postings, self._tree.rebuilds
+    evicted = [pois[index]["id"] for index in order[keep:]]
+    cells = {self._cell(pois[index]) for index in order[keep:]}
+
+    self._reset()
+    remap = {index: self._put(pois[index], seen[index]) for index in sorted(order[:keep])}
+    self._tree.rebuilds = rebuilds
+    self._tree.rebuild()
+    self._postings = {query: {remap[index] for index in indices if index in remap}
+                      for query, indices in postings.items()}
+    dropped = self._prune(now, cells)
+    self.evictions += len(evicted)
+    self.logger.info("本地 POI 库淘汰 %d 个 POI，清理 %d 个单元", len(evicted), len(dropped))
+    if self.path is not None:
+      self._submit(self._delete, evicted, dropped)
+
+  def _prune(self, now: float, cells: Set[str] = frozenset()) -> List[Tuple[str, str]]:
+    """
+    删除已过期或位于 cells 中的单元，返回被删除的 (查询条件 JSON, 单元)。
+    """
+    expire_before = now - self.ttl
+    dropped = []
+    for query in list(self._tiles):
+      harvested = self._tiles[query]
+      stale = [tile for tile, harvested_at in harvested.items() if harvested_at <= expire_before or tile in cells]
+      if not stale:
+        continue
+      query_text = json.dumps(query, ensure_ascii=False)
+      for tile in stale:
+        del harvested[tile]
+        dropped.append((query_text, tile))
+      if not harvested:
+        del self._tiles[query]
+    return dropped
+
+  def _delete(self, ids: list, tiles: List[Tuple[str, str]]) -> None:
+    if self.path is None or not (ids or tiles):
+      return
+    try:
+      with self._lock:
+        conn = self._connect()
+        conn.execute("BEGIN")
+        try:
+          conn.executemany("DELETE FROM pois WHERE namespace = ? AND id = ?", [(self.namespace, i) for i in ids])
+          conn.executemany("DELETE FROM postings WHERE namespace = ? AND id = ?", [(self.namespace, i) for i in ids])
+          conn.executemany("DELETE FROM tiles WHERE namespace = ? AND query = ? AND tile = ?",
+                           [(self.namespace, query, tile) for query, tile in tiles])
+          conn.execute("COMMIT")
+        except BaseException:
+          conn.execute("ROLLBACK")
+          raise
+    except sqlite3.Error as e:
+      self._error("清理", e)
+
+  def _persist(self, query: Query, rows: list, seen: list, added: list, removed: list, tiles: list,
+               now: float) -> None:
+    query_text = json.dumps(query, ensure_ascii=False)
+    try:
+      with self._lock:
+        conn = self._connect()
+        conn.execute("BEGIN")
+        try:
+          conn.executemany("INSERT OR REPLACE INTO pois VALUES (?, ?, ?, ?)", rows)
+          conn.executemany("UPDATE pois SET updated_at = ? WHERE namespace = ? AND id = ?",
+                           [(now, self.namespace, poi_id) for poi_id in seen])
+          conn.executemany("INSERT OR IGNORE INTO postings VALUES (?, ?, ?)",
+                           [(self.namespace, query_text, poi_id) for poi_id in added])
+          conn.executemany("DELETE FROM postings WHERE namespace = ? AND query = ? AND id = ?",
+                           [(self.namespace, query_text, poi_id) for poi_id in removed])
+          conn.executemany("INSERT OR REPLACE INTO tiles VALUES (?, ?, ?, ?)",
+                           [(self.namespace, query_text, tile, now) for tile in tiles])
+          conn.execute("COMMIT")
+        except BaseException:
+          conn.execute("ROLLBACK")
+          raise
+    except sqlite3.Error as e:
+      self._error("写入", e)
+
+  def stats(self) -> Dict[str, Any]:
+    """
+    返回本地 POI 库的规模和命中率。
+    """
+    expire_before = time.time() - self.ttl
+    return {
+      "path": self.path,
+      "pois": len(self._pois),
+      "queries": len(self._tiles),
+      "tiles": sum(len(tiles) for tiles in self._tiles.values()),
+      "fresh_tiles": sum(1 for tiles in self._tiles.values() for t in tiles.values() if t > expire_before),
+      "lookups": self.lookups,
+      "hits": self.hits,
+      "hit_rate": round(self.hits / self.lookups, 4) if self.lookups else 0.0,
+      "ingested": self.ingested,
+      "evictions": self.evictions,
+      "index_rebuilds": self._tree.rebuilds,
+      "errors": self.errors,
+    }
+
+  def flush(self) -> None:
+    """
+    等待已提交的后台写入完成。
+    """
+    future = self._submit(lambda: None)
+    if future is not None:
+      future.result()
+
+  def close(self) -> None:
+    """
+    等待后台写入完成后关闭数据库连接。
+    """
+    self._closed = True
+    if self._executor is not None:
+      self._executor.shutdown(wait=True)
+      self._executor = None
+    with self._lock:
+      if self._conn is not None:
+        self._conn.close()
+        self._conn = None
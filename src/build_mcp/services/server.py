@@ -1,44 +1,338 @@
+import asyncio
+import functools
 import os
+import sys
+import threading
+import time
+from contextlib import asynccontextmanager
 from typing import Annotated
-from typing import Any, Dict, Generic, Optional, TypeVar
+from typing import TYPE_CHECKING, Any, Dict, List, Optional
 
 from mcp.server.fastmcp import FastMCP
-from pydantic import BaseModel
 from pydantic import Field
+from starlette.requests import Request
+from starlette.responses import JSONResponse, PlainTextResponse, Response
 
+from build_mcp.common.cache import collect_stale
 from build_mcp.common.config import load_config
-from build_mcp.common.logger import get_logger
-from build_mcp.services.gd_sdk import GdSDK
+from build_mcp.common.latency import deadline
+from build_mcp.common.logger import PAYLOAD, get_logger
+from build_mcp.common.metrics import REGISTRY, TRACER
+from build_mcp.services.models import (
+  ApiResponse, LocatedNearby, NearbyQuery, ip_location, poi_page, project_items, resolve_ip_fields, resolve_poi_fields,
+)
+
+if TYPE_CHECKING:
+  from build_mcp.services.gd_sdk import GdSDK
 
 # 优先从环境变量里读取API_KEY，如果没有则从配置文件读取
+# MCP_CONFIG 环境变量可指定其他配置文件（绝对路径或相对于包目录的路径），与 logger 共用同一份解析结果
 env_api_key = os.getenv("API_KEY")
-config = load_config("config.yaml")
+config = load_config()
 if env_api_key:
   config["api_key"] = env_api_key
+# BASE_URL 环境变量可将请求指向本地替身服务（见 benchmarks/mock_amap.py）
+env_base_url = os.getenv("BASE_URL")
+if env_base_url:
+  config["base_url"] = env_base_url
+
+# 多 worker 模式下每个进程各自限流，按 worker 数均分配额，保证总 QPS 不超过 Key 的上限
+worker_count = int(os.getenv("MCP_WORKERS") or 1)
+if worker_count > 1 and config.get("rate_limit"):
+  rate_config = dict(config["rate_limit"])
+  if rate_config.get("qps"):
+    rate_config["qps"] = rate_config["qps"] / worker_count
+  if rate_config.get("burst"):
+    rate_config["burst"] = max(1.0, rate_config["burst"] / worker_count)
+  if rate_config.get("endpoints"):
+    rate_config["endpoints"] = {k: v / worker_count for k, v in rate_config["endpoints"].items() if v}
+  config["rate_limit"] = rate_config
+
+tracing_config = config.get("tracing") or {}
+TRACER.configure(
+  enabled=tracing_config.get("enabled", True),
+  max_spans=tracing_config.get("max_spans", 512),
+  use_otel=tracing_config.get("otel", False),
+)
+
+logger = get_logger(name="amap-maps")
+
+# 高德 SDK 在第一次使用时才创建，见 get_sdk
+_sdk: Optional["GdSDK"] = None
+_sdk_lock = threading.Lock()
+
+# 服务运行状态：draining 为 True 时 /readyz 返回 503，负载均衡应停止分配新请求
+server_state = {"started": time.time(), "draining": False}
+
+
+def get_sdk() -> "GdSDK":
+  """
+  返回高德 SDK 实例，第一次调用时才导入 SDK 模块并创建 HTTP 客户端、缓存和限流器，
+  不占用进程启动和 MCP 握手的时间。stdio 模式下每个会话启动一个进程，启动耗时对用户可见。
+
+  Returns:
+      GdSDK: 进程内共享的 SDK 实例。
+  """
+  global _sdk
+  if _sdk is None:
+    # 预热任务在线程中创建 SDK，与工具调用并发时只创建一次
+    with _sdk_lock:
+      if _sdk is None:
+        from build_mcp.services.gd_sdk import GdSDK
+        _sdk = GdSDK(config=config, logger=get_logger(name="gd_sdk"))
+  return _sdk
+
+
+async def close_sdk() -> None:
+  """
+  关闭 SDK 的 HTTP 客户端和缓存，SDK 尚未创建时不做任何事。
+  """
+  if _sdk is not None:
+    await _sdk.close()
+
+
+# 保存后台任务的引用，避免任务在完成前被回收
+_background_tasks = set()
+# 每个进程只预热一次
+_warmup_started = False
+
+
+async def _warmup() -> None:
+  # 在线程中创建 SDK，事件循环可以先完成 MCP 握手；warmup 只在第一次调用时生效
+  sdk = await asyncio.to_thread(get_sdk)
+  await sdk.warmup()
+
+
+def start_warmup() -> None:
+  """
+  配置了 http.warmup 时在后台创建 SDK 并预热连接，不阻塞 MCP 握手；每个进程只执行一次。
+
+  FastMCP 的 lifespan 每个会话执行一次，无状态 HTTP 模式下相当于每个请求一次，
+  因此 HTTP 模式在 worker 启动时调用，lifespan 中的调用随后不再生效。
+  """
+  global _warmup_started
+  if _warmup_started or not (config.get("http") or {}).get("warmup", 0):
+    return
+  _warmup_started = True
+  task = asyncio.create_task(_warmup())
+  _background_tasks.add(task)
+  task.add_done_callback(_background_tasks.discard)
+
+
+@asynccontextmanager
+async def lifespan(server: FastMCP):
+  start_warmup()
+  yield
+
 
 # 初始化 FastMCP 服务
 # mcp = FastMCP("amap-maps", description="高德地图 MCP 服务", version="1.0.0")
-mcp = FastMCP("amap-maps")
-sdk = GdSDK(config=config, logger=get_logger(name="gd_sdk"))
-logger = get_logger(name="amap-maps")
+mcp = FastMCP("amap-maps", lifespan=lifespan)
+
+TOOL_LATENCY = REGISTRY.histogram("mcp_tool_seconds", "MCP 工具调用耗时（秒）", ["tool"])
+TOOL_CALLS = REGISTRY.counter("mcp_tool_calls", "MCP 工具调用次数", ["tool", "success"])
+TOOL_INFLIGHT = REGISTRY.gauge("mcp_tool_inflight", "进行中的 MCP 工具调用数", ["tool"])
+TOOL_QUEUED = REGISTRY.gauge("mcp_tool_queued", "等待执行槽位的 MCP 工具调用数", ["tool"])
+SPECULATIVE_SEARCHES = REGISTRY.counter(
+  "mcp_speculative_searches", "locate_and_search 按缓存定位提前发起的周边搜索（hit 为结果被采用）", ["result"])
+
+# 工具并发执行上限，None 表示不限制
+_tool_slots: Optional[asyncio.Semaphore] = None
+
+
+def set_max_concurrency(limit: Optional[int]) -> None:
+  """
+  设置本进程内同时执行的工具调用上限，超出的调用排队等待。
+
+  Args:
+      limit (int, optional): 并发上限，为空或 0 表示不限制。
+  """
+  global _tool_slots
+  _tool_slots = asyncio.Semaphore(limit) if limit else None
+
+
+set_max_concurrency(int(os.getenv("MCP_MAX_CONCURRENCY") or (config.get("server") or {}).get("max_concurrency") or 0))
 
-# 定义通用的 API 响应模型
-T = TypeVar("T")
+# 每次工具调用的总耗时上限（秒），包括排队、上游请求、重试和退避等待，0 表示不限制
+tool_deadline = (config.get("server") or {}).get("deadline", 0)
 
 
-class ApiResponse(BaseModel, Generic[T]):
-  success: bool
-  data: Optional[T] = None
-  error: Optional[str] = None
-  meta: Optional[Dict[str, Any]] = None
+def instrumented(name: str):
+  """
+  工具调用埋点：记录耗时、成功/失败次数、进行中调用数，并开启追踪 span，
+  工具内发起的上游请求会成为该 span 的子 span。设置了并发上限时，超出的调用先排队等待。
+  从进入工具开始计算 tool_deadline，SDK 的重试和超时不会超过该截止时间。
+  结果中包含过期的缓存数据（上游故障或后台刷新中）时，在 meta 中标记 stale 和 stale_age（秒）。
+  """
+  def decorator(fn):
+    async def call(*args, **kwargs):
+      inflight = TOOL_INFLIGHT.labels(name)
+      inflight.inc()
+      start = time.perf_counter()
+      success = False
+      try:
+        with TRACER.span(f"tool.{name}", tool=name) as span, collect_stale() as stale:
+          result = await fn(*args, **kwargs)
+          success = bool(getattr(result, "success", True))
+          if stale and success and isinstance(result, ApiResponse):
+            result.meta = {**(result.meta or {}), "stale": True, "stale_age": round(max(stale), 3)}
+          if span is not None and not success:
+            span.status = "error"
+          return result
+      finally:
+        inflight.dec()
+        TOOL_LATENCY.labels(name).observe(time.perf_counter() - start)
+        TOOL_CALLS.labels(name, str(success).lower()).inc()
+
+    @functools.wraps(fn)
+    async def wrapper(*args, **kwargs):
+      with deadline(tool_deadline):
+        slots = _tool_slots
+        if slots is None:
+          return await call(*args, **kwargs)
+        queued = TOOL_QUEUED.labels(name)
+        queued.inc()
+        try:
+          await slots.acquire()
+        finally:
+          queued.dec()
+        try:
+          return await call(*args, **kwargs)
+        finally:
+          slots.release()
+    return wrapper
+  return decorator
+
+
+def _resident_memory_bytes() -> int:
+  # Linux 下读取当前常驻内存，其他平台退化为峰值常驻内存
+  try:
+    with open("/proc/self/status", "r", encoding="utf-8") as f:
+      for line in f:
+        if line.startswith("VmRSS:"):
+          return int(line.split()[1]) * 1024
+  except OSError:
+    pass
+  try:
+    import resource
+  except ImportError:
+    return 0
+  rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+  return rss if sys.platform == "darwin" else rss * 1024
+
+
+def _collect_sdk_stats():
+  yield "process_resident_memory_bytes", "gauge", "进程常驻内存（字节）", {}, _resident_memory_bytes()
+  sdk = _sdk
+  if sdk is None:
+    return
+  cache = sdk.cache_stats()
+  yield "amap_cache_entries", "gauge", "响应缓存条目数", {}, cache["entries"]
+  yield "amap_cache_bytes", "gauge", "响应缓存占用字节数（估算）", {}, cache["bytes"]
+  yield "amap_cache_evictions_total", "counter", "响应缓存淘汰次数", {}, cache["evictions"]
+  if "disk" in cache:
+    yield "amap_disk_cache_entries", "gauge", "SQLite 持久化缓存条目数（所有进程共享）", {}, cache["disk"]["entries"]
+    yield "amap_disk_cache_bytes", "gauge", "SQLite 持久化缓存占用字节数", {}, cache["disk"]["bytes"]
+    yield "amap_disk_cache_hits_total", "counter", "SQLite 持久化缓存命中次数", {}, cache["disk"]["hits"]
+  for endpoint, item in sdk.rate_limit_stats()["endpoints"].items():
+    yield "amap_rate_limit_waiting", "gauge", "限流器当前排队的请求数", {"endpoint": endpoint}, item["waiting"]
+    yield "amap_rate_limit_wait_seconds_total", "counter", "限流器累计排队等待秒数", {"endpoint": endpoint}, item["wait_seconds"]
+  for name, item in sdk.scheduler_stats().items():
+    yield "amap_scheduler_queued", "gauge", "调度器中排队的请求数", {"priority": name}, item["queued"]
+    yield "amap_scheduler_inflight", "gauge", "调度器放行后进行中的请求数", {"priority": name}, item["inflight"]
+  for endpoint, item in sdk.latency_stats().items():
+    if item["hedge_delay"] is not None:
+      yield "amap_upstream_hedge_delay_seconds", "gauge", "发出对冲请求前的等待时间（秒）", {"endpoint": endpoint}, item["hedge_delay"]
+    if item["timeout"] is not None:
+      yield "amap_upstream_timeout_seconds", "gauge", "自适应的单次请求超时（秒）", {"endpoint": endpoint}, item["timeout"]
+  for endpoint, item in sdk.circuit_stats().items():
+    state = {"closed": 0, "half_open": 1, "open": 2}[item["state"]]
+    yield "amap_circuit_state", "gauge", "熔断器状态（0 closed，1 half_open，2 open）", {"endpoint": endpoint}, state
+  pool = sdk.pool_stats()
+  for state in ("active", "idle", "queued"):
+    yield "amap_http_pool_connections", "gauge", "HTTP 连接池连接数（queued 为等待连接的请求数）", {"state": state}, pool[state]
+
+
+REGISTRY.register_collector(_collect_sdk_stats)
+
+
+IpFields = Annotated[Optional[List[str]], Field(
+  description="返回的定位字段，可选 province,city,adcode,rectangle,location，默认全部；location 为定位区域中心点")]
+PoiFields = Annotated[Optional[List[str]], Field(
+  description="返回的 POI 字段，默认 id,name,location,address,distance,type；"
+              "可选 typecode,pname,cityname,adname,pcode,citycode,adcode，传 ['*'] 返回全部字段")]
+
+
+def _batch_meta(items: List[dict]) -> Dict[str, Any]:
+  succeeded = sum(1 for item in items if item["success"])
+  return {"total": len(items), "succeeded": succeeded, "failed": len(items) - succeeded}
+
+
+# 定义 Resource
+@mcp.resource("stats://cache", name="cache_stats", description="高德接口结果缓存的命中、未命中、淘汰及请求合并统计", mime_type="application/json")
+def cache_stats() -> dict:
+  return get_sdk().cache_stats()
+
+
+@mcp.resource("stats://rate_limit", name="rate_limit_stats", description="高德接口客户端限流的排队深度和等待时间统计", mime_type="application/json")
+def rate_limit_stats() -> dict:
+  return get_sdk().rate_limit_stats()
+
 
-  @classmethod
-  def ok(cls, data: T, meta: Dict[str, Any] = None) -> "ApiResponse[T]":
-    return cls(success=True, data=data, meta=meta)
+@mcp.resource("stats://scheduler", name="scheduler_stats", description="交互式调用与批量任务的排队数、并发数和排队等待时间分位数", mime_type="application/json")
+def scheduler_stats() -> dict:
+  return get_sdk().scheduler_stats()
 
-  @classmethod
-  def fail(cls, error: str, meta: Dict[str, Any] = None) -> "ApiResponse[None]":
-    return cls(success=False, error=error, meta=meta)
+
+@mcp.resource("stats://latency", name="latency_stats", description="高德接口近期耗时分位数、对冲触发时间和自适应超时", mime_type="application/json")
+def latency_stats() -> dict:
+  return get_sdk().latency_stats()
+
+
+@mcp.resource("stats://circuit_breaker", name="circuit_breaker_stats", description="高德接口熔断器的状态和快速失败统计", mime_type="application/json")
+def circuit_breaker_stats() -> dict:
+  return get_sdk().circuit_stats()
+
+
+@mcp.resource("stats://http_pool", name="http_pool_stats", description="高德接口 HTTP 连接池的连接数和利用率统计", mime_type="application/json")
+def http_pool_stats() -> dict:
+  return get_sdk().pool_stats()
+
+
+@mcp.resource("metrics://prometheus", name="metrics", description="工具调用和高德接口请求的指标（Prometheus 文本格式）", mime_type="text/plain")
+def metrics_text() -> str:
+  return REGISTRY.render_prometheus()
+
+
+@mcp.resource("metrics://traces", name="traces", description="最近的工具调用及其上游请求的追踪 span", mime_type="application/json")
+def recent_traces() -> list:
+  return TRACER.recent()
+
+
+# sse / streamable-http 模式下提供 Prometheus 抓取接口
+@mcp.custom_route("/metrics", methods=["GET"])
+async def metrics_endpoint(request: Request) -> Response:
+  return PlainTextResponse(REGISTRY.render_prometheus(), media_type="text/plain; version=0.0.4; charset=utf-8")
+
+
+# 存活探针：进程能处理请求即返回 200
+@mcp.custom_route("/healthz", methods=["GET"])
+async def healthz(request: Request) -> Response:
+  return JSONResponse({
+    "status": "ok",
+    "pid": os.getpid(),
+    "uptime": round(time.time() - server_state["started"], 3),
+    "inflight": TOOL_INFLIGHT.total(),
+    "queued": TOOL_QUEUED.total(),
+  })
+
+
+# 就绪探针：收到 SIGTERM 开始排空后返回 503
+@mcp.custom_route("/readyz", methods=["GET"])
+async def readyz(request: Request) -> Response:
+  if server_state["draining"]:
+    return JSONResponse({"status": "draining", "pid": os.getpid()}, status_code=503)
+  return JSONResponse({"status": "ready", "pid": os.getpid()})
 
 
 # 定义 Prompt
@@ -47,35 +341,42 @@ def amap_assistant(query: str) -> str:
   return (
     "你是高德地图智能导航助手，精通 IP 定位 和 周边POI查询。请你根据用户的需求获取调取工具，获取用户需要的相关信息。\n"
     "## 调用工具的步骤：\n"
-    "1. 调用 `locate_ip` 工具到获取用户的经纬度。\n"
-    "2. 若成功获取经纬度，使用该经纬度调用 `search_nearby` 工具，结合搜索关键词进行周边信息的搜索。\n"
+    "1. 用户想了解自己附近的信息时，直接调用 `locate_and_search` 工具，一次完成 IP 定位和周边搜索。\n"
+    "2. 只需要用户位置时调用 `locate_ip` 工具；已知经纬度时调用 `search_nearby` 工具，结合搜索关键词进行周边信息的搜索。\n"
+    "3. 用户要找离某处最近的几个地点（如「最近的 5 家药店」）时调用 `search_nearest` 工具，不需要猜测搜索半径。\n"
     "## 注意事项：\n"
-    "- 不要主动要求用户提供经纬度信息，直接使用 `locate_ip` 工具获取。\n"
-    "- 如果用户的需求中包含经纬度信息，可以直接使用该信息进行周边搜索。\n"
+    "- 不要主动要求用户提供经纬度信息，直接使用 `locate_and_search` 或 `locate_ip` 工具获取。\n"
+    "- 如果用户的需求中包含经纬度信息，可以直接使用该信息调用 `search_nearby` 进行周边搜索。\n"
     f"用户的需求为：\n\n {query}。\n"
   )
 
 
 @mcp.tool(name="locate_ip", description="获取用户的 IP 地址定位信息，返回省市区经纬度等信息。")
-async def locate_ip(ip: Annotated[Optional[str], Field(description="用户的ip地址")] = None) -> ApiResponse:
+@instrumented("locate_ip")
+async def locate_ip(
+        ip: Annotated[Optional[str], Field(description="用户的ip地址")] = None,
+        fields: IpFields = None,
+) -> ApiResponse:
   """
   根据 IP 地址定位位置。
 
   Args:
       ip (str): 要定位的 IP 地址。
+      fields (list[str], optional): 返回的字段，默认全部。
 
   Returns:
       dict: 包含定位结果的字典。
   """
-  logger.info(f"Locating IP: {ip}")
+  logger.info("Locating IP: %s", ip)
   try:
-    result = await sdk.locate_ip(ip)
+    fields = resolve_ip_fields(fields)
+    result = await get_sdk().locate_ip(ip)
     if not result:
-      ApiResponse.fail("定位结果为空，请检查日志，系统异常请检查相关日志，日志默认路径为/var/log/build_mcp。")
-    logger.info(f"Locate IP result: {result}")
-    return ApiResponse.ok(data=result, meta={"ip": ip})
+      return ApiResponse.fail("定位结果为空，请检查日志，系统异常请检查相关日志，日志默认路径为/var/log/build_mcp。")
+    logger.info("Locate IP result: %s", result, extra=PAYLOAD)
+    return ApiResponse.ok(data=ip_location(result, fields), meta={"ip": ip})
   except Exception as e:
-    logger.error(f"Error locating IP {ip}: {e}")
+    logger.error("Error locating IP %s: %s", ip, e, extra=PAYLOAD)
     return ApiResponse.fail(str(e))
 
 
@@ -85,6 +386,7 @@ async def locate_ip(ip: Annotated[Optional[str], Field(description="用户的ip
 # 其实文章主要核心在以上这部分代码，请认真去理解这部分信息。
 # 至此，我们已经完成了 MCP 服务的核心功能实现。接下来，我们需要编写服务入口，启动 MCP 服务。
 @mcp.tool(name="search_nearby", description="根据经纬度和关键词进行周边搜索，返回指定半径内的 POI 列表。")
+@instrumented("search_nearby")
 async def search_nearby(
         location: Annotated[str, Field(description="中心点经纬度，格式为 'lng,lat'，如 '116.397128,39.916527'")],
         keywords: Annotated[str, Field(description="搜索关键词，例如: '餐厅'。", min_length=0)] = "",
@@ -92,6 +394,9 @@ async def search_nearby(
         radius: Annotated[int, Field(description="搜索半径（米），最大50000", ge=0, le=50000)] = 1000,
         page_num: Annotated[int, Field(description="页码，从1开始", ge=1)] = 1,
         page_size: Annotated[int, Field(description="每页数量，最大25", ge=1, le=25)] = 20,
+        fetch_all: Annotated[bool, Field(description="是否自动翻页获取半径内的全部 POI，为 true 时忽略 page_num")] = False,
+        max_results: Annotated[Optional[int], Field(description="自动翻页时最多返回的 POI 数量", ge=1)] = None,
+        fields: PoiFields = None,
 ) -> ApiResponse:
   """
    周边搜索。
@@ -103,27 +408,260 @@ async def search_nearby(
        radius (int, optional): 搜索半径（米），最大 50000，默认为 1000。
        page_num (int, optional): 页码，默认为 1。
        page_size (int, optional): 每页数量，最大 25，默认为 10。
+       fetch_all (bool, optional): 是否自动翻页获取全部 POI，默认为 False。
+       max_results (int, optional): 自动翻页时最多返回的 POI 数量，默认不限制。
+       fields (list[str], optional): 返回的 POI 字段，默认 id,name,location,address,distance,type。
 
    Returns:
        dict: 包含搜索结果的字典。
   """
-  logger.info(f"Searching nearby: location={location}, keywords={keywords}, types={types}, radius={radius}, page_num={page_num}, page_size={page_size}")
+  logger.info("Searching nearby: location=%s, keywords=%s, types=%s, radius=%s, page_num=%s, page_size=%s, fetch_all=%s",
+              location, keywords, types, radius, page_num, page_size, fetch_all)
   try:
-    result = await sdk.search_nearby(location=location, keywords=keywords, types=types, radius=radius, page_num=page_num, page_size=page_size)
+    fields = resolve_poi_fields(fields)
+    if fetch_all:
+      result = await get_sdk().search_nearby_all(location=location, keywords=keywords, types=types, radius=radius, page_size=page_size, max_results=max_results)
+    else:
+      result = await get_sdk().search_nearby(location=location, keywords=keywords, types=types, radius=radius, page_num=page_num, page_size=page_size)
     if not result:
       return ApiResponse.fail("搜索结果为空，请检查日志，系统异常请检查相关日志，日志默认路径为/var/log/build_mcp。")
-    logger.info(f"Search nearby result: {result}")
-    return ApiResponse.ok(data=result, meta={
+    logger.info("Search nearby result: %s", result, extra=PAYLOAD)
+    return ApiResponse.ok(data=poi_page(result, fields), meta={
       "location": location,
       "keywords": keywords,
       "types": types,
       "radius": radius,
       "page_num": page_num,
-      "page_size": page_size
+      "page_size": page_size,
+      "fetch_all": fetch_all,
+    })
+  except Exception as e:
+    logger.error("Error searching nearby: %s", e, extra=PAYLOAD)
+    return ApiResponse.fail(str(e))
+
+
+@mcp.tool(name="locate_and_search", description="根据 IP 定位用户位置并直接搜索附近的 POI，一次调用完成「我附近有什么」，无需先调用 locate_ip。")
+@instrumented("locate_and_search")
+async def locate_and_search(
+        ip: Annotated[Optional[str], Field(description="用户的ip地址")] = None,
+        keywords: Annotated[str, Field(description="搜索关键词，例如: '餐厅'。", min_length=0)] = "",
+        types: Annotated[str, Field(description="POI 分类码，多个分类用逗号分隔")] = "",
+        radius: Annotated[int, Field(description="搜索半径（米），最大50000", ge=0, le=50000)] = 1000,
+        page_size: Annotated[int, Field(description="返回数量，最大25", ge=1, le=25)] = 20,
+        speculative: Annotated[bool, Field(description="是否在刷新定位的同时按缓存中的定位结果提前搜索")] = True,
+        fields: PoiFields = None,
+) -> ApiResponse:
+  """
+  IP 定位并周边搜索。
+
+  在服务内依次完成 locate_ip 和 search_nearby，省去一轮模型调用和一次 MCP 往返。
+  speculative 为 True 且缓存中已有该 IP 的定位结果（可能已过期）时，在刷新定位的同时按旧位置提前发起搜索；
+  刷新后的位置与旧位置一致时直接使用提前搜索的结果，否则按新位置重新搜索。
+
+  Args:
+      ip (str, optional): 要定位的 IP 地址，为空表示请求方公网 IP。
+      keywords (str, optional): 搜索关键词，默认为空。
+      types (str, optional): POI 分类，默认为空。
+      radius (int, optional): 搜索半径（米），最大 50000，默认为 1000。
+      page_size (int, optional): 返回数量，最大 25，默认为 20。
+      speculative (bool, optional): 是否按缓存定位提前搜索，默认为 True。
+      fields (list[str], optional): 返回的 POI 字段，默认 id,name,location,address,distance,type。
+
+  Returns:
+      ApiResponse: data 包含 location（定位结果）和 nearby（周边搜索结果），meta 中 speculative 为
+      hit（采用了提前搜索的结果）、miss（位置已变化，重新搜索）或 null（未提前搜索）。
+  """
+  logger.info("Locating and searching: ip=%s, keywords=%s, types=%s, radius=%s", ip, keywords, types, radius)
+  sdk = get_sdk()
+  search_args = {"keywords": keywords, "types": types, "radius": radius, "page_num": 1, "page_size": page_size}
+  early = None
+  try:
+    fields = resolve_poi_fields(fields)
+    cached = sdk.peek_ip(ip) if speculative else None
+    guess = ip_location(cached, ("location",)).get("location") if cached else None
+    if guess:
+      early = asyncio.ensure_future(sdk.search_nearby(location=guess, **search_args))
+    result = await sdk.locate_ip(ip)
+    if not result:
+      return ApiResponse.fail("定位结果为空，请检查日志，系统异常请检查相关日志，日志默认路径为/var/log/build_mcp。")
+    located = ip_location(result)
+    location = located.get("location")
+    if not location:
+      return ApiResponse.fail("定位结果中没有经纬度，无法进行周边搜索。", meta={"ip": ip, "location": located})
+
+    outcome = None
+    if early is not None:
+      outcome = "hit" if location == guess else "miss"
+      SPECULATIVE_SEARCHES.labels(outcome).inc()
+    if outcome == "hit":
+      nearby, early = await early, None
+    else:
+      nearby = await sdk.search_nearby(location=location, **search_args)
+    if not nearby:
+      return ApiResponse.fail("搜索结果为空，请检查日志，系统异常请检查相关日志，日志默认路径为/var/log/build_mcp。")
+    logger.info("Locate and search result: %s", nearby, extra=PAYLOAD)
+    return ApiResponse.ok(data=LocatedNearby.model_construct(location=located, nearby=poi_page(nearby, fields)), meta={
+      "ip": ip,
+      "keywords": keywords,
+      "types": types,
+      "radius": radius,
+      "page_size": page_size,
+      "speculative": outcome,
+    })
+  except Exception as e:
+    logger.error("Error locating and searching for IP %s: %s", ip, e, extra=PAYLOAD)
+    return ApiResponse.fail(str(e))
+  finally:
+    # 位置已变化或出错时放弃提前搜索；上游请求在缓存层的独立任务中完成，不会被中断
+    if early is not None:
+      early.cancel()
+      # 提前搜索可能在取消过程中失败，取回其异常，避免事件循环报告未取回的异常
+      early.add_done_callback(lambda task: task.cancelled() or task.exception())
+
+
+@mcp.tool(name="search_nearest", description="搜索离指定经纬度最近的 k 个 POI（如「最近的 5 家药店」），自动扩大搜索半径直到找到足够的结果，无需指定半径。")
+@instrumented("search_nearest")
+async def search_nearest(
+        location: Annotated[str, Field(description="中心点经纬度，格式为 'lng,lat'，如 '116.397128,39.916527'")],
+        keywords: Annotated[str, Field(description="搜索关键词，例如: '药店'。", min_length=0)] = "",
+        types: Annotated[str, Field(description="POI 分类码，多个分类用逗号分隔")] = "",
+        k: Annotated[int, Field(description="返回的 POI 数量", ge=1, le=50)] = 5,
+        max_radius: Annotated[int, Field(description="最大搜索半径（米），最大50000", ge=1, le=50000)] = 50000,
+        fields: PoiFields = None,
+) -> ApiResponse:
+  """
+  最近 k 个 POI 搜索。
+
+  Args:
+      location (str): 中心点经纬度，格式为 "lng,lat"。
+      keywords (str, optional): 搜索关键词，默认为空。
+      types (str, optional): POI 分类，默认为空。
+      k (int, optional): 返回的 POI 数量，最大 50，默认为 5。
+      max_radius (int, optional): 最大搜索半径（米），默认为 50000。
+      fields (list[str], optional): 返回的 POI 字段，默认 id,name,location,address,distance,type。
+
+  Returns:
+      ApiResponse: data 为按距离排序的 POI；meta 中 radius 为最终搜索半径，rings 为查询次数。
+  """
+  logger.info("Searching nearest: location=%s, keywords=%s, types=%s, k=%s, max_radius=%s",
+              location, keywords, types, k, max_radius)
+  try:
+    fields = resolve_poi_fields(fields)
+    result = await get_sdk().search_nearest(location=location, k=k, keywords=keywords, types=types,
+                                            initial_radius=min(2000, max_radius), max_radius=max_radius)
+    if not result:
+      return ApiResponse.fail("搜索结果为空，请检查日志，系统异常请检查相关日志，日志默认路径为/var/log/build_mcp。")
+    logger.info("Search nearest result: %s", result, extra=PAYLOAD)
+    return ApiResponse.ok(data=poi_page(result, fields), meta={
+      "location": location,
+      "keywords": keywords,
+      "types": types,
+      "k": k,
+      "radius": result["radius"],
+      "rings": result["rings"],
+    })
+  except Exception as e:
+    logger.error("Error searching nearest: %s", e, extra=PAYLOAD)
+    return ApiResponse.fail(str(e))
+
+
+@mcp.tool(name="search_area", description="在多边形区域内（如行政区边界）或沿路线两侧搜索 POI，不受周边搜索 50 公里半径的限制。")
+@instrumented("search_area")
+async def search_area(
+        polygon: Annotated[str, Field(description="多边形顶点坐标串，格式为 'lng,lat;lng,lat;...'，多个多边形用 '|' 分隔，与 path 二选一")] = "",
+        path: Annotated[str, Field(description="路线坐标串，格式为 'lng,lat;lng,lat;...'，搜索路线两侧 buffer 米以内的 POI")] = "",
+        buffer: Annotated[int, Field(description="路线两侧的搜索宽度（米）", ge=1, le=50000)] = 500,
+        keywords: Annotated[str, Field(description="搜索关键词，例如: '加油站'。", min_length=0)] = "",
+        types: Annotated[str, Field(description="POI 分类码，多个分类用逗号分隔")] = "",
+        tile_radius: Annotated[int, Field(description="拆分区域时每个子区域的半径（米），POI 密集时应减小", ge=100, le=50000)] = 2000,
+        max_results: Annotated[Optional[int], Field(description="最多返回的 POI 数量", ge=1)] = None,
+        fields: PoiFields = None,
+) -> ApiResponse:
+  """
+  区域搜索。
+
+  Args:
+      polygon (str, optional): 多边形坐标串，与 path 二选一。
+      path (str, optional): 路线坐标串。
+      buffer (int, optional): 路线两侧的搜索宽度（米），默认为 500。
+      keywords (str, optional): 搜索关键词，默认为空。
+      types (str, optional): POI 分类，默认为空。
+      tile_radius (int, optional): 子区域半径（米），默认为 2000。
+      max_results (int, optional): 最多返回的 POI 数量，默认不限制。
+      fields (list[str], optional): 返回的 POI 字段，默认 id,name,location,address,distance,type。
+
+  Returns:
+      ApiResponse: data 为区域内的 POI，按路线搜索时 distance 为到路线的距离；meta 中包含子区域数和失败的子区域数。
+  """
+  logger.info("Searching area: polygon=%s, path=%s, buffer=%s, keywords=%s, types=%s, tile_radius=%s",
+              bool(polygon), bool(path), buffer, keywords, types, tile_radius)
+  try:
+    fields = resolve_poi_fields(fields)
+    result = await get_sdk().search_area(polygon=polygon or None, path=path or None, buffer=buffer, keywords=keywords,
+                                         types=types, tile_radius=tile_radius, max_results=max_results)
+    if not result:
+      return ApiResponse.fail("搜索结果为空，请检查日志，系统异常请检查相关日志，日志默认路径为/var/log/build_mcp。")
+    logger.info("Search area result: %s", result, extra=PAYLOAD)
+    return ApiResponse.ok(data=poi_page(result, fields), meta={
+      "keywords": keywords,
+      "types": types,
+      "buffer": buffer if path else None,
+      "tile_radius": tile_radius,
+      "tiles": result["tiles"],
+      "failed_tiles": result["failed_tiles"],
     })
   except Exception as e:
-    logger.error(f"Error searching nearby: {e}")
+    logger.error("Error searching area: %s", e, extra=PAYLOAD)
+    return ApiResponse.fail(str(e))
+
+
+@mcp.tool(name="locate_ips", description="批量获取多个 IP 地址的定位信息，结果顺序与输入一致，每项单独标记成功或失败。")
+@instrumented("locate_ips")
+async def locate_ips(
+        ips: Annotated[List[str], Field(description="要定位的 IP 地址列表", min_length=1, max_length=5000)],
+        fields: IpFields = None,
+) -> ApiResponse:
+  """
+  批量 IP 定位。
+
+  Args:
+      ips (list[str]): 要定位的 IP 地址列表。
+      fields (list[str], optional): 每项返回的定位字段，默认全部。
+
+  Returns:
+      ApiResponse: data 为与输入顺序一致的结果列表，每项包含 ip、success、data、error。
+  """
+  logger.info("Locating %d IPs", len(ips))
+  try:
+    fields = resolve_ip_fields(fields)
+    items = project_items(await get_sdk().locate_ips(ips), ip_location, fields)
+    return ApiResponse.ok(data=items, meta=_batch_meta(items))
+  except Exception as e:
+    logger.error("Error locating IPs: %s", e, extra=PAYLOAD)
     return ApiResponse.fail(str(e))
 
 
+@mcp.tool(name="search_nearby_batch", description="批量进行周边搜索，每项为一组经纬度和关键词，结果顺序与输入一致，每项单独标记成功或失败。")
+@instrumented("search_nearby_batch")
+async def search_nearby_batch(
+        queries: Annotated[List[NearbyQuery], Field(description="周边搜索参数列表", min_length=1, max_length=500)],
+        fields: PoiFields = None,
+) -> ApiResponse:
+  """
+  批量周边搜索。
+
+  Args:
+      queries (list[NearbyQuery]): 周边搜索参数列表。
+      fields (list[str], optional): 每项返回的 POI 字段，默认 id,name,location,address,distance,type。
 
+  Returns:
+      ApiResponse: data 为与输入顺序一致的结果列表，每项包含 query、success、data、error。
+  """
+  logger.info("Searching nearby in batch: %d queries", len(queries))
+  try:
+    fields = resolve_poi_fields(fields)
+    items = project_items(await get_sdk().search_nearby_batch([query.model_dump() for query in queries]), poi_page, fields)
+    return ApiResponse.ok(data=items, meta=_batch_meta(items))
+  except Exception as e:
+    logger.error("Error searching nearby in batch: %s", e, extra=PAYLOAD)
+    return ApiResponse.fail(str(e))
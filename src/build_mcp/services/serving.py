@@ -0,0 +1,113 @@
+import asyncio
+import os
+import signal
+from contextlib import asynccontextmanager
+
+import uvicorn
+from starlette.applications import Starlette
+
+from build_mcp.services.server import close_sdk, config, logger, mcp, server_state, set_max_concurrency, start_warmup
+
+# 多进程模式下通过环境变量把命令行参数传给各个 worker 进程
+ENV_STATELESS = "MCP_STATELESS"
+ENV_MAX_CONCURRENCY = "MCP_MAX_CONCURRENCY"
+ENV_DRAIN_DELAY = "MCP_DRAIN_DELAY"
+ENV_WORKERS = "MCP_WORKERS"
+
+
+def _install_drain_handler(drain_delay: float) -> None:
+  """
+  接管 SIGTERM：先将 /readyz 置为 503，等待 drain_delay 秒让负载均衡摘除本进程，
+  再交给 uvicorn 停止接收新连接，并在 timeout_graceful_shutdown 内等待进行中的请求完成。
+  """
+  previous = signal.getsignal(signal.SIGTERM)
+  if not callable(previous):
+    return
+  loop = asyncio.get_running_loop()
+
+  def handle(signum, frame):
+    if server_state["draining"]:
+      previous(signum, frame)
+      return
+    server_state["draining"] = True
+    logger.info("收到 SIGTERM，进程 %s 开始排空，%s 秒后停止接收新请求", os.getpid(), drain_delay)
+    loop.call_soon_threadsafe(loop.call_later, drain_delay, previous, signum, frame)
+
+  signal.signal(signal.SIGTERM, handle)
+
+
+def create_app() -> Starlette:
+  """
+  创建 streamable-http 的 ASGI 应用，多进程模式下由每个 worker 进程调用。
+
+  除 MCP 接口外还提供 /healthz、/readyz 和 /metrics，退出时关闭 SDK 的 HTTP 客户端。
+  """
+  if os.getenv(ENV_STATELESS) == "1":
+    # 多个 worker 之间不共享会话，每个请求独立处理，可以落在任意 worker 上
+    mcp.settings.stateless_http = True
+  if os.getenv(ENV_MAX_CONCURRENCY):
+    set_max_concurrency(int(os.environ[ENV_MAX_CONCURRENCY]))
+  drain_delay = float(os.getenv(ENV_DRAIN_DELAY) or (config.get("server") or {}).get("drain_delay") or 0)
+
+  app = mcp.streamable_http_app()
+  session_lifespan = app.router.lifespan_context
+
+  @asynccontextmanager
+  async def lifespan(app: Starlette):
+    async with session_lifespan(app):
+      _install_drain_handler(drain_delay)
+      start_warmup()
+      logger.info("Worker %s 已就绪", os.getpid())
+      try:
+        yield
+      finally:
+        server_state["draining"] = True
+        await close_sdk()
+        logger.info("Worker %s 已退出", os.getpid())
+
+  app.router.lifespan_context = lifespan
+  return app
+
+
+def serve_http(host: str = None, port: int = None, workers: int = 1, max_concurrency: int = None,
+               graceful_timeout: float = None, drain_delay: float = None) -> None:
+  """
+  以 streamable-http 方式启动服务。
+
+  workers 大于 1 时由 uvicorn 启动多个 worker 进程共享同一个监听端口，
+  会话改为无状态模式，SIGTERM 会转发给每个 worker 并各自排空。
+  各 worker 共享 SQLite 缓存（cache.backend 为 sqlite 时），客户端限流配额按 worker 数均分。
+
+  Args:
+      host (str, optional): 监听地址，默认使用 FastMCP 的配置。
+      port (int, optional): 监听端口，默认使用 FastMCP 的配置。
+      workers (int): worker 进程数，默认 1。
+      max_concurrency (int, optional): 每个 worker 同时执行的工具调用上限。
+      graceful_timeout (float, optional): 停止时等待进行中请求的最长秒数。
+      drain_delay (float, optional): 收到 SIGTERM 后继续服务的秒数（期间 /readyz 返回 503）。
+  """
+  server_config = config.get("server") or {}
+  host = host or mcp.settings.host
+  port = port or mcp.settings.port
+  workers = workers or server_config.get("workers") or 1
+  graceful_timeout = graceful_timeout if graceful_timeout is not None else server_config.get("graceful_timeout", 30)
+
+  if max_concurrency is not None:
+    os.environ[ENV_MAX_CONCURRENCY] = str(max_concurrency)
+  if drain_delay is not None:
+    os.environ[ENV_DRAIN_DELAY] = str(drain_delay)
+  if workers > 1:
+    # worker 进程重新导入 server 模块，据此均分限流配额
+    os.environ[ENV_STATELESS] = "1"
+    os.environ[ENV_WORKERS] = str(workers)
+
+  logger.info("启动 streamable-http 服务：%s:%s，worker 数 %s", host, port, workers)
+  uvicorn.run(
+    "build_mcp.services.serving:create_app" if workers > 1 else create_app(),
+    factory=workers > 1,
+    host=host,
+    port=port,
+    workers=workers if workers > 1 else None,
+    timeout_graceful_shutdown=int(graceful_timeout) if graceful_timeout else None,
+    log_level=mcp.settings.log_level.lower(),
+  )
@@ -0,0 +1,189 @@
+import math
+import time
+from typing import Any, Dict, List, NamedTuple, Optional
+
+from build_mcp.common.cache import TTLCache
+from build_mcp.common.geo import (
+  EARTH_RADIUS, geohash_encode, geohash_neighbors, haversine, haversine_many, parse_location,
+)
+
+
+class _Entry(NamedTuple):
+  lng: float
+  lat: float
+  radius: int
+  expire_at: float
+  pois: List[dict]
+  poi_lngs: List[float]
+  poi_lats: List[float]
+
+
+class SpatialCache:
+  """
+  周边搜索的空间结果缓存。
+
+  以 (关键词, 分类, 中心点 geohash 单元) 为键保存完整的周边搜索结果。当新的查询圆
+  被某个已缓存的更大半径结果完全覆盖时，直接在本地按球面距离过滤、排序、分页返回，
+  从而让坐标只差小数点后几位的请求也能复用结果。
+
+  结果按半径分级索引：保存在单元边长不小于其半径的最细一级 geohash 单元中（最细为 precision），
+  能覆盖查询点的结果中心距查询点不超过其半径，因此每一级只需查找查询点所在单元及相邻的 8 个单元，
+  几公里外的大半径结果同样可以复用。
+
+  只有"完整"的结果才会被缓存（第一页且返回数量小于 page_size，或调用方显式声明完整），
+  否则本地过滤可能漏掉未返回的 POI。
+
+  Args:
+      precision (int): geohash 精度，默认 6（约 1.2km x 0.6km）。
+      ttl (float): 结果过期时间（秒），默认 600。
+      max_entries (int): 最多保存的单元数，默认 1024。
+      max_bytes (int): 最大占用字节数（估算值），默认 16MB。
+  """
+
+  def __init__(self, precision: int = 6, ttl: float = 600, max_entries: int = 1024, max_bytes: int = 16 * 1024 * 1024):
+    self.precision = precision
+    self.ttl = ttl
+    self._cells = TTLCache(max_entries=max_entries, max_bytes=max_bytes, default_ttl=ttl)
+    # 保存过结果的 geohash 精度，从细到粗查找
+    self._levels: List[int] = []
+    self.lookups = 0
+    self.hits = 0
+    self.stores = 0
+
+  def lookup(self, location: str, keywords: str = "", types: str = "", radius: int = 1000,
+             page_num: int = 1, page_size: int = 20) -> Optional[dict]:
+    """
+    查找能覆盖本次查询的缓存结果，并在本地生成与高德接口格式一致的分页结果。
+
+    Args:
+        location (str): 中心点经纬度，格式为 "lng,lat"。
+        keywords (str, optional): 搜索关键词。
+        types (str, optional): POI 分类。
+        radius (int, optional): 搜索半径（米）。
+        page_num (int, optional): 页码。
+        page_size (int, optional): 每页数量。
+
+    Returns:
+        dict | None: 命中时返回搜索结果，未命中返回 None。
+    """
+    self.lookups += 1
+    try:
+      lng, lat = parse_location(location)
+    except ValueError:
+      return None
+
+    entry = self._find_covering(lng, lat, keywords, types, radius)
+    if entry is None:
+      return None
+
+    self.hits += 1
+    distances = haversine_many(lng, lat, entry.poi_lngs, entry.poi_lats)
+    matched = sorted(
+      ((d, poi) for d, poi in zip(distances, entry.pois) if d <= radius),
+      key=lambda item: item[0],
+    )
+    start = (page_num - 1) * page_size
+    pois = [{**poi, "distance": str(int(round(d)))} for d, poi in matched[start:start + page_size]]
+    return {
+      "status": "1",
+      "info": "OK",
+      "infocode": "10000",
+      "count": str(len(matched)),
+      "pois": pois,
+    }
+
+  def store(self, location: str, keywords: str, types: str, radius: int, result: dict,
+            page_num: int = 1, page_size: int = 20, complete: bool = None) -> bool:
+    """
+    保存一次周边搜索结果。
+
+    Args:
+        location (str): 中心点经纬度。
+        keywords (str): 搜索关键词。
+        types (str): POI 分类。
+        radius (int): 搜索半径（米）。
+        result (dict): 高德接口返回结果。
+        page_num (int, optional): 页码。
+        page_size (int, optional): 每页数量。
+        complete (bool, optional): 结果是否包含半径内全部 POI，为空时按分页信息推断。
+
+    Returns:
+        bool: 是否被缓存。
+    """
+    pois = result.get("pois") or []
+    if complete is None:
+      complete = page_num == 1 and len(pois) < page_size
+    if not complete:
+      return False
+
+    try:
+      lng, lat = parse_location(location)
+    except ValueError:
+      return False
+
+    if self._find_covering(lng, lat, keywords, types, radius) is not None:
+      return False
+
+    poi_lngs, poi_lats, kept = [], [], []
+    for poi in pois:
+      try:
+        poi_lng, poi_lat = parse_location(poi.get("location", ""))
+      except ValueError:
+        continue
+      poi_lngs.append(poi_lng)
+      poi_lats.append(poi_lat)
+      kept.append(poi)
+
+    entry = _Entry(lng, lat, radius, time.monotonic() + self.ttl, kept, poi_lngs, poi_lats)
+    level = self._level(lat, radius)
+    if level not in self._levels:
+      self._levels = sorted(self._levels + [level], reverse=True)
+    key = (keywords, types, geohash_encode(lng, lat, level))
+    entries = [
+      e for e in (self._cells.peek(key) or [])
+      # 被新结果覆盖的旧条目直接丢弃
+      if haversine(lng, lat, e.lng, e.lat) + e.radius > radius
+    ]
+    entries.append(entry)
+    self._cells.set(key, entries, ttl=self.ttl)
+    self.stores += 1
+    return True
+
+  def _level(self, lat: float, radius: float) -> int:
+    """
+    返回单元宽和高都不小于 radius 的最细 geohash 精度，不细于 precision。
+    单元宽度按圆内纬度最高处计算，圆内任一点与中心的经纬度差都不超过一个单元。
+    """
+    top = math.radians(min(89.0, abs(lat) + math.degrees(radius / EARTH_RADIUS)))
+    for level in range(self.precision, 0, -1):
+      lng_bits = (5 * level + 1) // 2
+      lat_bits = 5 * level // 2
+      height = math.pi * EARTH_RADIUS / 2 ** lat_bits
+      width = 2 * math.pi * EARTH_RADIUS * math.cos(top) / 2 ** lng_bits
+      if min(width, height) >= radius:
+        return level
+    return 1
+
+  def _find_covering(self, lng: float, lat: float, keywords: str, types: str, radius: int) -> Optional[_Entry]:
+    now = time.monotonic()
+    for level in self._levels:
+      for cell in geohash_neighbors(geohash_encode(lng, lat, level)):
+        entries = self._cells.get((keywords, types, cell))
+        for entry in entries or ():
+          if entry.expire_at > now and haversine(lng, lat, entry.lng, entry.lat) + radius <= entry.radius:
+            return entry
+    return None
+
+  def stats(self) -> Dict[str, Any]:
+    """
+    返回空间缓存命中率报告。
+    """
+    return {
+      "precision": self.precision,
+      "lookups": self.lookups,
+      "hits": self.hits,
+      "hit_rate": round(self.hits / self.lookups, 4) if self.lookups else 0.0,
+      "stores": self.stores,
+      "cells": len(self._cells),
+      "evictions": self._cells.evictions,
+    }
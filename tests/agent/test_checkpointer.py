@@ -0,0 +1,107 @@
+import httpx
+from langchain.agents import create_agent
+from langchain.tools import tool
+from langchain_openai import ChatOpenAI
+
+from benchmarks.fake_openai import FakeOpenAI
+from build_agent.checkpointer import BoundedSaver
+from build_agent.runner import AgentRunner
+
+
+def fake_model(fake: FakeOpenAI) -> ChatOpenAI:
+    return ChatOpenAI(
+        api_key="test",
+        base_url="http://fake/v1",
+        model="qwen-max",
+        max_retries=0,
+        http_async_client=httpx.AsyncClient(transport=httpx.ASGITransport(app=fake.app())),
+    )
+
+
+@tool
+async def get_weather(city: str) -> str:
+    """Get weather for a given city."""
+    return f"{city} 晴"
+
+
+def make_runner(saver: BoundedSaver) -> AgentRunner:
+    fake = FakeOpenAI(latency=0, tool_calls=1)
+    return AgentRunner(create_agent(model=fake_model(fake), tools=[get_weather], checkpointer=saver))
+
+
+async def test_compaction_keeps_latest_state():
+    """测试每个会话只保留最近的检查点，对话历史不受影响"""
+    saver = BoundedSaver(max_checkpoints=2)
+    runner = make_runner(saver)
+    for _ in range(3):
+        result = await runner.ainvoke("北京天气怎么样？", thread_id="t1")
+    # 每轮对话：用户消息、工具调用、工具结果、最终答复
+    assert len(result["messages"]) == 12
+
+    checkpoints = list(saver.list({"configurable": {"thread_id": "t1"}}))
+    assert len(checkpoints) == 2
+    assert len(checkpoints[0].checkpoint["channel_values"]["messages"]) == 12
+    assert saver.stats()["compacted"] > 0
+
+
+async def test_lru_eviction_bounds_threads():
+    """测试会话数超过上限时按 LRU 淘汰"""
+    saver = BoundedSaver(max_threads=5)
+    runner = make_runner(saver)
+    await runner.run_many([(str(i), "北京天气怎么样？") for i in range(20)])
+    await runner.ainvoke("北京天气怎么样？", thread_id="hot")
+
+    stats = saver.stats()
+    assert stats["threads"] == 5
+    # 并发运行的会话数超过上限时，运行中的会话也可能被淘汰后重建
+    assert stats["evictions"] >= 16
+    assert saver.get_tuple({"configurable": {"thread_id": "hot"}}) is not None
+    assert saver.get_tuple({"configurable": {"thread_id": "0"}}) is None
+
+    size = stats["bytes"]
+    await runner.run_many([(f"x{i}", "北京天气怎么样？") for i in range(20)])
+    # 会话大小相近，总占用保持平稳
+    assert saver.stats()["bytes"] < size * 1.5
+
+
+async def test_ttl_and_byte_limits():
+    """测试空闲会话过期和总字节上限"""
+    saver = BoundedSaver(ttl=60)
+    runner = make_runner(saver)
+    await runner.ainvoke("北京天气怎么样？", thread_id="idle")
+    saver._threads["idle"].touched -= 120
+    await runner.ainvoke("北京天气怎么样？", thread_id="active")
+    assert saver.stats()["threads"] == 1
+    assert saver.stats()["expirations"] == 1
+
+    saver = BoundedSaver(max_bytes=1)
+    runner = make_runner(saver)
+    await runner.run_many([(str(i), "北京天气怎么样？") for i in range(3)])
+    # 最近使用的会话总是保留
+    assert saver.stats()["threads"] == 1
+
+
+async def test_sqlite_store_restores_threads(tmp_path):
+    """测试配置 SQLite 后，被淘汰或重启后的会话可以从磁盘恢复"""
+    path = str(tmp_path / "checkpoints.db")
+    saver = BoundedSaver(max_threads=1, path=path)
+    runner = make_runner(saver)
+    await runner.ainvoke("北京天气怎么样？", thread_id="a")
+    await runner.ainvoke("北京天气怎么样？", thread_id="b")
+    assert saver.stats()["threads"] == 1
+    assert saver.stats()["stored_threads"] == 2
+
+    result = await runner.ainvoke("北京天气怎么样？", thread_id="a")
+    assert len(result["messages"]) == 8
+    assert saver.stats()["restored"] == 1
+    saver.close()
+
+    # 模拟进程重启
+    saver = BoundedSaver(path=path)
+    result = await make_runner(saver).ainvoke("北京天气怎么样？", thread_id="b")
+    assert len(result["messages"]) == 8
+
+    saver.delete_thread("b")
+    assert saver.get_tuple({"configurable": {"thread_id": "b"}}) is None
+    assert saver.stats()["stored_threads"] == 1
+    saver.close()
@@ -0,0 +1,104 @@
+import asyncio
+import json
+
+import pytest
+import pytest_asyncio
+from langchain_core.messages import ToolCall
+
+from benchmarks.bench_mcp import free_port, http_server
+from benchmarks.mock_amap import MockAmap, MockAmapServer
+from build_agent.mcp_tools import LocalMCPTools, RemoteMCPTools
+from build_mcp.services import server
+
+
+@pytest_asyncio.fixture
+async def mock_sdk(make_sdk):
+    mock = MockAmap(pois=30)
+    sdk = make_sdk(mock)
+    previous, server._sdk = server._sdk, sdk
+    try:
+        yield mock
+    finally:
+        server._sdk = previous
+        await sdk.close()
+
+
+async def test_local_tools(mock_sdk):
+    """测试进程内桥接：工具直接调用服务的工具函数并共用同一个 SDK"""
+    bridge = LocalMCPTools(names=["locate_ip", "search_nearby"])
+    locate_ip, search_nearby = bridge.get_tools()
+    assert locate_ip.name == "locate_ip"
+    assert "ip" in locate_ip.args
+
+    message = await locate_ip.ainvoke(ToolCall(name="locate_ip", args={"ip": "8.8.8.8"}, id="1", type="tool_call"))
+    assert message.artifact["success"] is True
+    assert json.loads(message.content) == message.artifact
+    requests = mock_sdk.requests
+    await locate_ip.ainvoke({"ip": "8.8.8.8"})
+    # 第二次调用命中同一个 SDK 的缓存
+    assert mock_sdk.requests == requests
+
+    result = await bridge.call("search_nearby", {"location": "116.397128,39.916527", "keywords": "餐厅"})
+    assert result.success and result.data.pois
+    assert server.TOOL_CALLS.labels("search_nearby", "true").value >= 1
+
+    # 参数校验失败时返回错误信息而不是抛出异常
+    error = await search_nearby.ainvoke(ToolCall(name="search_nearby", args={}, id="2", type="tool_call"))
+    assert error.status == "error"
+
+
+def test_local_tools_sync(make_sdk):
+    """测试同步调用：在后台事件循环中执行工具"""
+    mock = MockAmap(pois=30)
+    sdk = make_sdk(mock)
+    previous, server._sdk = server._sdk, sdk
+    bridge = LocalMCPTools(names=["locate_ip"])
+    try:
+        (locate_ip,) = bridge.get_tools()
+        assert json.loads(locate_ip.invoke({"ip": "1.2.3.4"}))["success"] is True
+        assert json.loads(locate_ip.invoke({"ip": "1.2.3.5"}))["success"] is True
+        assert mock.requests == 2
+    finally:
+        server._sdk = previous
+        bridge.close()
+
+
+def test_local_tools_stopped_loop(make_sdk):
+    """测试运行循环已停止但未关闭时，同步调用立即报错而不是一直等待"""
+    mock = MockAmap(pois=30)
+    sdk = make_sdk(mock)
+    previous, server._sdk = server._sdk, sdk
+    bridge = LocalMCPTools(names=["locate_ip"], timeout=5)
+    (locate_ip,) = bridge.get_tools()
+    loop = asyncio.new_event_loop()
+    try:
+        loop.run_until_complete(locate_ip.ainvoke({"ip": "1.2.3.4"}))
+        with pytest.raises(RuntimeError, match="已停止"):
+            locate_ip.invoke({"ip": "1.2.3.5"})
+        assert mock.requests == 1
+    finally:
+        server._sdk = previous
+        loop.run_until_complete(sdk.close())
+        loop.close()
+
+
+def test_unknown_tool():
+    """测试指定不存在的工具时报错"""
+    with pytest.raises(ValueError):
+        LocalMCPTools(names=["nope"]).get_tools()
+
+
+async def test_remote_tools_pool():
+    """测试远程会话池：会话长期复用，并发调用时最多新建 pool_size 个会话"""
+    with MockAmapServer(MockAmap(pois=30)) as amap:
+        async with http_server(amap.base_url, free_port()) as url:
+            async with RemoteMCPTools(url, pool_size=2, names=["locate_ip"]) as remote:
+                (locate_ip,) = await remote.aget_tools()
+                message = await locate_ip.ainvoke(
+                    ToolCall(name="locate_ip", args={"ip": "8.8.8.8"}, id="1", type="tool_call"))
+                assert message.artifact["success"] is True
+                await asyncio.gather(*(locate_ip.ainvoke({"ip": f"8.8.8.{i}"}) for i in range(10)))
+                stats = remote.stats()
+                assert stats["opened"] <= 2
+                assert sum(stats["calls"]) == 11
+            assert remote.stats()["sessions"] == 0
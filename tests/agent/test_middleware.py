@@ -0,0 +1,149 @@
+from dataclasses import dataclass
+
+import httpx
+from langchain.agents import create_agent
+from langchain.tools import ToolRuntime, tool
+from langchain_openai import ChatOpenAI
+from langgraph.checkpoint.memory import InMemorySaver
+
+from benchmarks.fake_openai import FakeOpenAI
+from build_agent.middleware import ResponseCacheMiddleware, TokenBudgetMiddleware, normalize_text
+from build_agent.runner import AgentRunner
+
+
+@dataclass
+class Context:
+    user_id: str
+
+
+calls = []
+
+
+@tool
+def get_weather(city: str) -> str:
+    """Get weather for a given city."""
+    calls.append(city)
+    return f"{city} 晴"
+
+
+@tool
+def get_user_location(runtime: ToolRuntime[Context]) -> str:
+    """Retrieve user location based on user ID."""
+    return "Beijing" if runtime.context.user_id == "1" else "Shanghai"
+
+
+def make_runner(fake: FakeOpenAI, middleware) -> AgentRunner:
+    model = ChatOpenAI(
+        api_key="test",
+        base_url="http://fake/v1",
+        model="qwen-max",
+        max_retries=0,
+        http_async_client=httpx.AsyncClient(transport=httpx.ASGITransport(app=fake.app())),
+    )
+    return AgentRunner(create_agent(model=model, tools=[get_weather, get_user_location], middleware=middleware,
+                                    context_schema=Context, checkpointer=InMemorySaver()))
+
+
+def test_normalize_text():
+    """测试用户输入归一化"""
+    assert normalize_text("  北京天气   怎么样？ ") == normalize_text("北京天气 怎么样")
+    assert normalize_text("What is the Weather?") == "what is the weather"
+
+
+async def test_model_cache_skips_round_trip():
+    """测试相同或近似的问题直接返回缓存的模型响应"""
+    fake = FakeOpenAI(latency=0, tool_calls=1)
+    cache = ResponseCacheMiddleware(cache_tools=["get_weather"])
+    runner = make_runner(fake, [cache])
+    context = Context(user_id="1")
+
+    first = await runner.ainvoke("北京天气怎么样？", thread_id="a", context=context)
+    assert fake.requests == 2
+    second = await runner.ainvoke("  北京天气怎么样", thread_id="b", context=context)
+    assert fake.requests == 2
+
+    assert second["messages"][-1].content == first["messages"][-1].content
+    assert second["messages"][1].tool_calls[0]["id"] != first["messages"][1].tool_calls[0]["id"]
+    assert second["messages"][2].tool_call_id == second["messages"][1].tool_calls[0]["id"]
+    stats = cache.stats()
+    assert stats["model"]["hits"] == 2
+    assert stats["model"]["hit_rate"] == 0.5
+    assert stats["tokens_saved"] > 0
+
+    # 同一会话中再次提问时历史不同，不会命中缓存
+    await runner.ainvoke("北京天气怎么样？", thread_id="a", context=context)
+    assert fake.requests == 4
+    third = (await runner.ainvoke("北京天气怎么样？", thread_id="b", context=context))["messages"]
+    assert len({m.id for m in third}) == len(third)
+
+
+async def test_tool_cache():
+    """测试确定性工具的结果被缓存"""
+    calls.clear()
+    fake = FakeOpenAI(latency=0, tool_calls=1)
+    cache = ResponseCacheMiddleware(model_ttl=0, cache_tools=["get_weather"])
+    runner = make_runner(fake, [cache])
+    for thread_id in ("a", "b", "c"):
+        result = await runner.ainvoke("北京天气怎么样？", thread_id=thread_id, context=Context(user_id="1"))
+        assert result["messages"][2].content == "Beijing 晴"
+    assert calls == ["Beijing"]
+    assert fake.requests == 6
+    assert cache.stats()["tool"]["hits"] == 2
+
+    calls.clear()
+    runner = make_runner(fake, [ResponseCacheMiddleware(model_ttl=0)])
+    await runner.run_many([("d", "北京天气怎么样？"), ("e", "北京天气怎么样？")], context=Context(user_id="1"))
+    assert len(calls) == 2
+
+
+async def test_token_budget():
+    """测试按用户统计 token 用量，超出预算后不再请求模型"""
+    fake = FakeOpenAI(latency=0, tool_calls=1)
+    budget = TokenBudgetMiddleware(budget=1, budgets={"vip": 0})
+    runner = make_runner(fake, [budget])
+
+    result = await runner.ainvoke("北京天气怎么样？", context=Context(user_id="1"))
+    # 第一次调用后用量已超出预算，工具执行完后的第二次模型调用被拒绝
+    assert fake.requests == 1
+    assert result["messages"][-1].content == budget.message
+    assert result["messages"][-1].response_metadata["budget_exceeded"] is True
+    assert budget.usage("1")["used"] > 0
+    assert budget.usage("1")["remaining"] == 0
+
+    await runner.ainvoke("北京天气怎么样？", context=Context(user_id="vip"))
+    assert fake.requests == 3
+    assert budget.usage("vip")["remaining"] is None
+    stats = budget.stats()
+    assert stats["rejected"] == 1
+    assert stats["users"]["vip"]["calls"] == 2
+
+
+async def test_budget_ignores_cache_hits():
+    """测试缓存命中的响应不计入 token 用量"""
+    fake = FakeOpenAI(latency=0, tool_calls=1)
+    budget = TokenBudgetMiddleware(budget=100000)
+    runner = make_runner(fake, [budget, ResponseCacheMiddleware()])
+    await runner.ainvoke("北京天气怎么样？", context=Context(user_id="1"))
+    used = budget.usage("1")["used"]
+    await runner.ainvoke("北京天气怎么样？", context=Context(user_id="1"))
+    assert budget.usage("1")["used"] == used
+    assert budget.usage("1")["calls"] == 4
+
+
+def test_bounded_state(monkeypatch):
+    """测试窗口结束的用户用量被移除，工具定义缓存按最近使用淘汰"""
+    now = [0.0]
+    monkeypatch.setattr("build_agent.middleware.time.monotonic", lambda: now[0])
+    budget = TokenBudgetMiddleware(budget=100, window=10)
+    budget.usage("a")
+    now[0] = 5
+    budget.usage("b")
+    now[0] = 12
+    assert list(budget.stats()["users"]) == ["b"]
+    now[0] = 20
+    assert budget.stats()["users"] == {}
+
+    cache = ResponseCacheMiddleware(max_entries=1)
+    assert cache._tool_spec(get_weather)["function"]["name"] == "get_weather"
+    assert cache._tool_spec(get_user_location)["function"]["name"] == "get_user_location"
+    assert [entry[0] for entry in cache._tool_specs.values()] == [get_user_location]
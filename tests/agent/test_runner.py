@@ -0,0 +1,76 @@
+import asyncio
+import time
+
+import httpx
+from langchain.agents import create_agent
+from langchain.tools import tool
+from langchain_openai import ChatOpenAI
+from langgraph.checkpoint.memory import InMemorySaver
+
+from benchmarks.fake_openai import FakeOpenAI
+from build_agent.llm_chat import ModelPool
+from build_agent.runner import AgentRunner
+
+
+def fake_model(fake: FakeOpenAI, model: str = "qwen-max") -> ChatOpenAI:
+    return ChatOpenAI(
+        api_key="test",
+        base_url="http://fake/v1",
+        model=model,
+        max_retries=0,
+        http_async_client=httpx.AsyncClient(transport=httpx.ASGITransport(app=fake.app())),
+    )
+
+
+@tool
+async def slow_weather(city: str) -> str:
+    """Get weather for a given city."""
+    await asyncio.sleep(0.2)
+    return f"{city} 晴"
+
+
+@tool
+async def slow_location(city: str) -> str:
+    """Get location for a given city."""
+    await asyncio.sleep(0.2)
+    return f"{city} 116.39,39.91"
+
+
+def test_model_pool_reuses_clients():
+    """测试模型池按模型名复用客户端"""
+    created = []
+    pool = ModelPool(factory=lambda model: created.append(model) or object())
+    assert pool.get("qwen-max") is pool.get("qwen-max")
+    assert pool.get("qwen-plus") is not pool.get("qwen-max")
+    assert created == ["qwen-max", "qwen-plus"]
+    assert len(pool) == 2
+
+
+async def test_runner_concurrent_tools_and_conversations():
+    """测试同一轮的多个工具调用并发执行，多个会话并发运行"""
+    fake = FakeOpenAI(latency=0.01, tool_calls=2)
+    agent = create_agent(model=fake_model(fake), tools=[slow_weather, slow_location], checkpointer=InMemorySaver())
+    runner = AgentRunner(agent, max_concurrency=8)
+
+    start = time.perf_counter()
+    results = await runner.run_many([(str(i), "北京天气怎么样？") for i in range(8)])
+    elapsed = time.perf_counter() - start
+
+    assert all(not isinstance(r, Exception) for r in results)
+    assert all("Beijing 晴" in r["messages"][-1].content for r in results)
+    # 每个会话两个 0.2 秒的工具调用，串行执行至少需要 8 x 0.4 秒
+    assert elapsed < 1.5
+    assert fake.requests == 16
+    assert runner.stats() == {"active": 0, "completed": 8, "failed": 0}
+
+
+async def test_runner_astream_keeps_history():
+    """测试 astream 流式输出，同一个 thread_id 保留会话历史"""
+    fake = FakeOpenAI(latency=0, tool_calls=1)
+    agent = create_agent(model=fake_model(fake), tools=[slow_weather], checkpointer=InMemorySaver())
+    runner = AgentRunner(agent)
+
+    nodes = [node async for chunk in runner.astream("北京天气？", thread_id="t1") for node in chunk]
+    assert nodes == ["model", "tools", "model"]
+    result = await runner.ainvoke("上海呢？", thread_id="t1")
+    assert len([m for m in result["messages"] if m.type == "human"]) == 2
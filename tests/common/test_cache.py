@@ -0,0 +1,92 @@
+import asyncio
+import time
+
+from build_mcp.common.cache import SingleFlight, TTLCache, collect_stale, mark_stale
+from build_mcp.common.latency import deadline, remaining_time
+from build_mcp.common.scheduler import BULK, INTERACTIVE, current_priority, priority
+
+
+def test_ttl_cache_expire(monkeypatch):
+    """测试条目过期后视为未命中"""
+    now = [1000.0]
+    monkeypatch.setattr(time, "monotonic", lambda: now[0])
+    cache = TTLCache(default_ttl=10)
+    cache.set("a", {"v": 1})
+    assert cache.get("a") == {"v": 1}
+    now[0] += 11
+    assert cache.get("a") is None
+    stats = cache.stats()
+    assert stats["hits"] == 1
+    assert stats["misses"] == 1
+    assert stats["expirations"] == 1
+
+
+def test_ttl_cache_lru_eviction():
+    """测试超过条目上限时淘汰最久未使用的条目"""
+    cache = TTLCache(max_entries=2)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    cache.get("a")
+    cache.set("c", 3)
+    assert cache.get("b") is None
+    assert cache.get("a") == 1
+    assert cache.get("c") == 3
+    assert cache.stats()["evictions"] == 1
+
+
+def test_ttl_cache_memory_cap():
+    """测试超过内存上限时淘汰条目"""
+    cache = TTLCache(max_entries=100, max_bytes=50)
+    cache.set("a", "x" * 20)
+    cache.set("b", "y" * 20)
+    cache.set("c", "z" * 20)
+    assert len(cache) == 2
+    assert cache.get("a") is None
+    assert cache.stats()["bytes"] <= 50
+
+
+async def test_single_flight_coalesce():
+    """测试并发的相同请求只执行一次"""
+    flight = SingleFlight()
+    calls = 0
+
+    async def fetch():
+        nonlocal calls
+        calls += 1
+        await asyncio.sleep(0.01)
+        return calls
+
+    results = await asyncio.gather(*(flight.do("k", fetch) for _ in range(10)))
+    assert calls == 1
+    assert results == [1] * 10
+    assert flight.coalesced == 9
+    assert len(flight) == 0
+
+
+async def test_single_flight_context():
+    """测试共享请求不继承第一个调用方的上下文，截止时间和优先级按所有等待方汇总"""
+    flight = SingleFlight()
+    seen = []
+    joined = asyncio.Event()
+
+    async def fetch():
+        seen.append((current_priority(), remaining_time()))
+        await joined.wait()
+        seen.append((current_priority(), remaining_time()))
+        mark_stale(1.0)
+        return 1
+
+    async def bulk_caller():
+        with priority(BULK), deadline(5), collect_stale() as stale:
+            assert await flight.do("k", fetch) == 1
+        return stale
+
+    bulk = asyncio.ensure_future(bulk_caller())
+    await asyncio.sleep(0.01)
+    interactive = asyncio.ensure_future(flight.do("k", fetch))
+    await asyncio.sleep(0)
+    joined.set()
+    assert await interactive == 1
+    assert await bulk == []
+    assert seen[0][0] == BULK and 0 < seen[0][1] <= 5
+    assert seen[1] == (INTERACTIVE, None)
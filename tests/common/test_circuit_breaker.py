@@ -0,0 +1,37 @@
+from build_mcp.common.circuit_breaker import CircuitBreaker
+
+
+def test_circuit_breaker_states():
+    """测试熔断器：连续失败后打开，超时后半开只放行一个探测请求，探测成功后恢复"""
+    breaker = CircuitBreaker(failure_threshold=3, reset_timeout=10)
+    now = 100.0
+    assert not breaker.record_failure(now)
+    breaker.record_success()
+    assert not breaker.record_failure(now)
+    assert not breaker.record_failure(now)
+    assert breaker.record_failure(now)
+    assert breaker.state == CircuitBreaker.OPEN
+    assert not breaker.allow(now + 5)
+    assert breaker.retry_after(now + 5) == 5
+
+    assert breaker.allow(now + 10)
+    assert breaker.state == CircuitBreaker.HALF_OPEN
+    assert not breaker.allow(now + 11)
+    breaker.record_success()
+    assert breaker.state == CircuitBreaker.CLOSED
+    assert breaker.allow(now + 11)
+    assert breaker.stats()["rejected"] == 2
+
+
+def test_circuit_breaker_probe_failure():
+    """测试探测请求失败后重新熔断，探测请求未报告结果时超时后允许再次探测"""
+    breaker = CircuitBreaker(failure_threshold=1, reset_timeout=10)
+    assert breaker.record_failure(0)
+    assert breaker.allow(10)
+    assert breaker.record_failure(12)
+    assert breaker.state == CircuitBreaker.OPEN
+    assert not breaker.allow(15)
+    assert breaker.allow(22)
+    assert not breaker.allow(25)
+    assert breaker.allow(33)
+    assert breaker.opened == 2
@@ -6,3 +6,12 @@ def test_load_config():
     config = load_config("config.yaml")
     assert config["api_key"] == "test"
     assert config["log_level"] == "INFO"
+
+
+def test_load_config_cached_copy():
+    """测试配置文件只解析一次，返回值互不影响"""
+    first = load_config("config.yaml")
+    first["log_level"] = "DEBUG"
+    second = load_config("config.yaml")
+    assert second["log_level"] == "INFO"
+    assert second is not first
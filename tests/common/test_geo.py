@@ -0,0 +1,107 @@
+import random
+
+import pytest
+
+from build_mcp.common import geo
+from build_mcp.common.geo import (
+    Area, distance_to_segments, geohash_encode, geohash_neighbors, haversine, haversine_many, parse_location,
+    points_in_polygon,
+)
+
+# 天安门附近约 17km x 22km 的矩形，中间挖去一个小矩形
+SQUARE = "116.3,39.8;116.5,39.8;116.5,40.0;116.3,40.0"
+HOLE = "116.38,39.88;116.42,39.88;116.42,39.92;116.38,39.92"
+
+
+def test_parse_location():
+    """测试经纬度解析"""
+    assert parse_location("116.397128,39.916527") == (116.397128, 39.916527)
+    with pytest.raises(ValueError):
+        parse_location("116.397128")
+    with pytest.raises(ValueError):
+        parse_location("200,39")
+
+
+def test_haversine_many_matches_scalar(monkeypatch):
+    """测试向量化距离计算与逐点计算结果一致"""
+    lngs = [116.40, 116.41, 121.47]
+    lats = [39.91, 39.92, 31.23]
+    expected = [haversine(116.397128, 39.916527, x, y) for x, y in zip(lngs, lats)]
+    assert haversine_many(116.397128, 39.916527, lngs, lats) == pytest.approx(expected)
+    monkeypatch.setattr(geo, "np", None)
+    assert haversine_many(116.397128, 39.916527, lngs, lats) == pytest.approx(expected)
+    # 北京到上海约 1068km
+    assert expected[2] == pytest.approx(1_068_000, rel=0.01)
+
+
+def test_geohash():
+    """测试 geohash 编码及相邻单元"""
+    assert geohash_encode(-5.6, 42.6, 5) == "ezs42"
+    assert geohash_encode(116.397128, 39.916527, 6) == "wx4g0d"
+    neighbors = geohash_neighbors("wx4g0d")
+    assert len(neighbors) == 9
+    assert "wx4g0d" in neighbors
+
+
+def test_points_in_polygon_matches_scalar(monkeypatch):
+    """测试向量化的点在多边形内判断、点到线段距离与逐点计算结果一致"""
+    area = Area(polygon=f"{SQUARE}|{HOLE}")
+    rng = random.Random(0)
+    xs = [rng.uniform(-15000, 15000) for _ in range(300)]
+    ys = [rng.uniform(-15000, 15000) for _ in range(300)]
+    inside = points_in_polygon(xs, ys, area.segments)
+    distances = distance_to_segments(xs, ys, area.segments)
+    monkeypatch.setattr(geo, "np", None)
+    assert points_in_polygon(xs, ys, area.segments) == inside
+    assert distance_to_segments(xs, ys, area.segments) == pytest.approx(distances)
+    assert area.contains([116.35, 116.40, 116.60], [39.85, 39.90, 39.90]) == [True, False, False]
+
+
+@pytest.mark.parametrize("spec", [{"polygon": SQUARE}, {"path": "116.3,39.8;116.5,40.0;116.6,40.0", "buffer": 800}])
+def test_area_tiles_cover(spec):
+    """测试六边形网格拆分的子区域完整覆盖区域，且数量接近理论下限"""
+    area = Area(**spec)
+    tiles = area.tiles(2000)
+    rng = random.Random(1)
+    points = [(rng.uniform(116.3, 116.6), rng.uniform(39.8, 40.0)) for _ in range(3000)]
+    inside = area.contains([p[0] for p in points], [p[1] for p in points])
+    covered = [p for p, keep in zip(points, inside) if keep]
+    assert covered
+    for lng, lat in covered:
+        assert min(haversine(lng, lat, x, y) for x, y in tiles) <= 2000
+    if "polygon" in spec:
+        # 区域面积约 377km²，每个六边形约 10.4km²，边界处额外需要一圈
+        assert 36 <= len(tiles) <= 70
+
+
+def test_area_tiles_cover_dense():
+    """测试区域内间隔 100 米的网格点都在某个子区域的球面半径以内，不会因投影变形漏掉子区域之间的缝隙"""
+    np = pytest.importorskip("numpy")
+    # 南北跨度约 220km 的狭长区域，投影变形最大
+    for polygon, radius in ((SQUARE, 2000), ("116.0,39.0;116.2,39.0;116.2,41.0;116.0,41.0", 5000)):
+        area = Area(polygon=polygon)
+        tiles = area.tiles(radius)
+        min_x, min_y, max_x, max_y = area.bounds
+        points = [area.unproject(x, y)
+                  for x in range(int(min_x), int(max_x) + 1, 100) for y in range(int(min_y), int(max_y) + 1, 100)]
+        inside = area.contains([lng for lng, _ in points], [lat for _, lat in points])
+        lngs = np.radians([lng for (lng, _), keep in zip(points, inside) if keep])
+        lats = np.radians([lat for (_, lat), keep in zip(points, inside) if keep])
+        nearest = np.full(len(lngs), np.inf)
+        for x, y in tiles:
+            x, y = np.radians(x), np.radians(y)
+            a = np.sin((lats - y) / 2) ** 2 + np.cos(y) * np.cos(lats) * np.sin((lngs - x) / 2) ** 2
+            nearest = np.minimum(nearest, 2 * geo.EARTH_RADIUS * np.arcsin(np.sqrt(a)))
+        assert nearest.max() <= radius
+
+
+def test_area_invalid():
+    """测试区域参数校验"""
+    with pytest.raises(ValueError):
+        Area()
+    with pytest.raises(ValueError):
+        Area(polygon=SQUARE, path=SQUARE)
+    with pytest.raises(ValueError):
+        Area(path="116.3,39.8;116.5,39.8")
+    with pytest.raises(ValueError):
+        Area(polygon="116.3,39.8;116.5,39.8")
@@ -0,0 +1,52 @@
+import random
+
+import pytest
+
+from build_mcp.common import geo
+from build_mcp.common.geo import haversine
+from build_mcp.common.kdtree import KDTree, arc, chord
+
+
+def brute_force(points, lng, lat):
+    return sorted((haversine(lng, lat, x, y), i) for i, (x, y) in enumerate(points))
+
+
+@pytest.mark.parametrize("use_numpy", [True, False])
+def test_kdtree_matches_brute_force(monkeypatch, use_numpy):
+    """测试增量插入、移动后半径查询和最近邻查询与逐点计算一致"""
+    if not use_numpy:
+        monkeypatch.setattr(geo, "np", None)
+    rng = random.Random(7)
+    tree = KDTree()
+    points = []
+    for i in range(3000):
+        points.append((116.2 + rng.random() * 0.4, 39.7 + rng.random() * 0.4))
+        tree.add(*points[-1])
+        if i % 500 == 0:
+            tree.within(116.4, 39.9, 100)
+    for index in rng.sample(range(len(points)), 20):
+        points[index] = (116.2 + rng.random() * 0.4, 39.7 + rng.random() * 0.4)
+        tree.move(index, *points[index])
+
+    for _ in range(10):
+        lng, lat = 116.2 + rng.random() * 0.4, 39.7 + rng.random() * 0.4
+        expected = brute_force(points, lng, lat)
+        found = tree.within(lng, lat, 2000)
+        assert [i for _, i in found] == [i for d, i in expected if d <= 2000]
+        assert [d for d, _ in found] == pytest.approx([d for d, _ in expected[:len(found)]])
+        assert [i for _, i in tree.nearest(lng, lat, 15)] == [i for _, i in expected[:15]]
+
+    # 索引按对数方法分段，段数远小于点数
+    assert len(tree._runs) < 12
+
+
+def test_kdtree_filters():
+    """测试最大距离、过滤函数以及跨越 180 度经线的查询"""
+    tree = KDTree()
+    for lng, lat in [(179.999, 0.0), (-179.999, 0.0), (179.9, 0.0), (0.0, 0.0)]:
+        tree.add(lng, lat)
+    assert [i for _, i in tree.within(180.0, 0.0, 1000)] in ([0, 1], [1, 0])
+    assert [i for _, i in tree.nearest(180.0, 0.0, 3, max_radius=5000)] in ([0, 1], [1, 0])
+    assert [i for _, i in tree.nearest(180.0, 0.0, 2, accept=lambda i: i != 0)] == [1, 2]
+    assert tree.nearest(180.0, 0.0, 0) == []
+    assert arc(chord(12345.0)) == pytest.approx(12345.0)
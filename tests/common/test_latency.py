@@ -0,0 +1,31 @@
+import time
+
+from build_mcp.common.latency import LatencyTracker, deadline, remaining_time
+
+
+def test_latency_tracker_quantile():
+    """测试近期耗时分位数：样本不足时返回 None，只保留最近 window 个样本"""
+    tracker = LatencyTracker(window=100, min_samples=10)
+    for i in range(9):
+        tracker.observe("ip", 0.01)
+    assert tracker.quantile("ip", 0.95) is None
+    for i in range(100):
+        tracker.observe("ip", (i + 1) / 1000)
+    assert tracker.quantile("ip", 0.5) == 0.051
+    assert tracker.quantile("ip", 0.95) == 0.096
+    assert tracker.stats()["ip"]["samples"] == 100
+    assert tracker.quantile("around", 0.5) is None
+
+
+def test_deadline_nested():
+    """测试截止时间：嵌套时取更早的截止时间，退出后恢复"""
+    assert remaining_time() is None
+    with deadline(10):
+        assert 9 < remaining_time() <= 10
+        with deadline(1):
+            assert remaining_time() <= 1
+        with deadline(100):
+            assert remaining_time() <= 10
+        with deadline(0):
+            assert remaining_time() <= 10
+    assert remaining_time() is None
@@ -0,0 +1,56 @@
+import json
+import logging
+
+from build_mcp.common.logger import PAYLOAD, JsonFormatter, PayloadFilter
+
+
+def _record(msg, *args, **extra):
+    record = logging.LogRecord("test", logging.INFO, __file__, 1, msg, args, None)
+    record.__dict__.update(extra)
+    return record
+
+
+def test_payload_filter_truncate():
+    """测试带 PAYLOAD 标记的日志参数被截断，普通日志不受影响"""
+    log_filter = PayloadFilter(max_payload=10)
+    record = _record("result: %s, count: %d", {"pois": ["x" * 100]}, 3, **PAYLOAD)
+    assert log_filter.filter(record)
+    message = record.getMessage()
+    assert message.startswith("result: {'pois': [")
+    assert "共" in message
+    assert message.endswith("count: 3")
+
+    plain = _record("result: %s", "x" * 100)
+    assert log_filter.filter(plain)
+    assert plain.getMessage() == "result: " + "x" * 100
+
+
+def test_payload_filter_mapping_args():
+    """测试字典参数的日志只截断字典中的值，按键名格式化仍然可用"""
+    log_filter = PayloadFilter(max_payload=10)
+    record = _record("result: %(result)s, count: %(count)d", {"result": "x" * 100, "count": 3}, **PAYLOAD)
+    assert log_filter.filter(record)
+    assert isinstance(record.args, dict)
+    message = record.getMessage()
+    assert message.startswith("result: " + "x" * 10 + "...")
+    assert message.endswith("count: 3")
+
+
+def test_payload_filter_sample():
+    """测试采样率为 0 时丢弃 PAYLOAD 日志，错误日志只截断不丢弃"""
+    log_filter = PayloadFilter(max_payload=10, sample_rate=0)
+    assert not log_filter.filter(_record("result: %s", "x", **PAYLOAD))
+    assert log_filter.filter(_record("result: %s", "x"))
+
+    error = _record("Error searching nearby: %s", "x" * 100, **PAYLOAD)
+    error.levelno = logging.ERROR
+    assert log_filter.filter(error)
+    assert "共 100 字符" in error.getMessage()
+
+
+def test_json_formatter():
+    """测试 JSON Lines 格式输出"""
+    line = JsonFormatter().format(_record("定位 %s", "1.2.3.4"))
+    data = json.loads(line)
+    assert data["message"] == "定位 1.2.3.4"
+    assert data["level"] == "INFO"
@@ -0,0 +1,45 @@
+import pytest
+
+from build_mcp.common.metrics import MetricsRegistry, Tracer
+
+
+def test_render_prometheus():
+    """测试计数器、直方图和 collector 的 Prometheus 文本输出"""
+    registry = MetricsRegistry()
+    calls = registry.counter("tool_calls", "调用次数", ["tool"])
+    latency = registry.histogram("tool_seconds", "耗时", ["tool"], buckets=(0.1, 1))
+    calls.labels("locate_ip").inc()
+    calls.labels(tool="locate_ip").inc()
+    latency.labels("locate_ip").observe(0.05)
+    latency.labels("locate_ip").observe(0.5)
+    registry.register_collector(lambda: [("pool_connections", "gauge", "连接数", {"state": "idle"}, 2)])
+
+    text = registry.render_prometheus()
+    assert "# TYPE tool_calls_total counter" in text
+    assert 'tool_calls_total{tool="locate_ip"} 2' in text
+    assert 'tool_seconds_bucket{tool="locate_ip",le="0.1"} 1' in text
+    assert 'tool_seconds_bucket{tool="locate_ip",le="+Inf"} 2' in text
+    assert 'tool_seconds_count{tool="locate_ip"} 2' in text
+    assert 'pool_connections{state="idle"} 2' in text
+
+    snapshot = registry.snapshot()
+    assert snapshot["tool_seconds"][0]["count"] == 2
+    assert 0.1 <= snapshot["tool_seconds"][0]["p95"] <= 1
+
+
+def test_tracer_links_child_spans():
+    """测试嵌套 span 共享 trace_id 并通过 parent_id 关联"""
+    tracer = Tracer()
+    with tracer.span("tool.locate_ip") as parent:
+        with tracer.span("upstream.ip", attempt=1) as child:
+            pass
+    assert child.trace_id == parent.trace_id
+    assert child.parent_id == parent.span_id
+    assert parent.parent_id is None
+
+    with pytest.raises(ValueError):
+        with tracer.span("tool.fail"):
+            raise ValueError("boom")
+    recent = tracer.recent()
+    assert recent[0]["name"] == "tool.fail"
+    assert recent[0]["status"] == "error: ValueError"
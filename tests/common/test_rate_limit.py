@@ -0,0 +1,59 @@
+import asyncio
+import time
+
+import pytest
+
+from build_mcp.common.rate_limit import RateLimiter, TokenBucket
+
+
+def test_token_bucket_reserve():
+    """测试令牌耗尽后按 QPS 计算等待时间"""
+    bucket = TokenBucket(rate=10, burst=2)
+    now = bucket.updated
+    assert bucket.reserve(now) == 0
+    assert bucket.reserve(now) == 0
+    assert bucket.reserve(now) == pytest.approx(0.1)
+    assert bucket.reserve(now) == pytest.approx(0.2)
+    # 0.25 秒后补充 2.5 个令牌，还差 0.5 个
+    assert bucket.delay(now + 0.25) == pytest.approx(0.05)
+    assert not bucket.try_acquire(now + 0.25)
+    assert bucket.try_acquire(now + 0.3)
+
+
+def test_token_bucket_penalize():
+    """测试上游限流后暂停配额"""
+    bucket = TokenBucket(rate=10)
+    now = bucket.updated
+    bucket.penalize(1.0, now)
+    assert bucket.delay(now) == pytest.approx(1.1)
+
+
+async def test_rate_limiter_fifo_and_keys():
+    """测试多 Key 轮换提高吞吐，且等待按申请顺序进行"""
+    limiter = RateLimiter(["a", "b"], qps=20, burst=1)
+    order = []
+
+    async def call(i):
+        key = await limiter.acquire("around")
+        order.append((i, key))
+
+    start = time.monotonic()
+    await asyncio.gather(*(call(i) for i in range(6)))
+    elapsed = time.monotonic() - start
+    # 两个 Key 各 20 QPS，6 个请求约需 0.1 秒，单 Key 需要 0.25 秒
+    assert elapsed < 0.2
+    assert [i for i, _ in order] == list(range(6))
+    assert {key for _, key in order} == {"a", "b"}
+    stats = limiter.stats()["around"]
+    assert stats["acquired"] == 6
+    assert stats["waiting"] == 0
+    assert stats["max_wait"] > 0
+
+
+async def test_rate_limiter_disabled():
+    """测试未配置 QPS 时不限流"""
+    limiter = RateLimiter(["a"])
+    assert not limiter.is_limited("ip")
+    for _ in range(100):
+        assert await limiter.acquire("ip") == "a"
+    assert limiter.stats()["ip"]["waited"] == 0
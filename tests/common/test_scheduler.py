@@ -0,0 +1,83 @@
+import asyncio
+
+import pytest
+
+from build_mcp.common.rate_limit import RateLimiter
+from build_mcp.common.scheduler import BULK, INTERACTIVE, RequestScheduler, current_priority, priority
+
+
+async def test_interactive_jumps_bulk_queue():
+    """测试限流排队时交互式请求排在已排队的批量请求之前"""
+    scheduler = RequestScheduler(RateLimiter(["k"], qps=20, burst=1), max_concurrency=100, reserved=0)
+    order = []
+
+    async def call(name, tag):
+        await scheduler.acquire("around", name)
+        order.append(tag)
+        scheduler.release(name)
+
+    bulk = [asyncio.ensure_future(call(BULK, f"b{i}")) for i in range(6)]
+    await asyncio.sleep(0.06)
+    await call(INTERACTIVE, "i")
+    await asyncio.gather(*bulk)
+    # 第一个批量请求立即获得令牌，之后每 50ms 一个；交互式请求只等待下一个令牌
+    assert order.index("i") <= 3
+    stats = scheduler.stats()
+    assert stats[INTERACTIVE]["max_wait"] < 0.06
+    assert stats[BULK]["granted"] == 6 and stats[BULK]["queued"] == 0
+
+
+async def test_reserved_concurrency():
+    """测试批量请求占满其余名额时，保留的名额仍可供交互式请求使用"""
+    scheduler = RequestScheduler(RateLimiter(["k"]), max_concurrency=3, reserved=1)
+    for _ in range(2):
+        await scheduler.acquire("ip", BULK)
+    blocked = asyncio.ensure_future(scheduler.acquire("ip", BULK))
+    await asyncio.sleep(0)
+    assert not blocked.done()
+    await asyncio.wait_for(scheduler.acquire("ip", INTERACTIVE), 0.1)
+    assert scheduler.stats()[BULK]["queued"] == 1
+
+    scheduler.release(INTERACTIVE)
+    await asyncio.sleep(0)
+    assert not blocked.done()
+    scheduler.release(BULK)
+    await asyncio.wait_for(blocked, 0.1)
+
+    # 排队中被取消的请求不占用名额
+    cancelled = asyncio.ensure_future(scheduler.acquire("ip", BULK))
+    await asyncio.sleep(0)
+    cancelled.cancel()
+    with pytest.raises(asyncio.CancelledError):
+        await cancelled
+    assert scheduler.queued() == 0
+    assert scheduler.stats()[BULK]["inflight"] == 2
+
+
+async def test_weighted_fair_share():
+    """测试两个类别都排队时按权重分配配额，批量请求不会饿死"""
+    scheduler = RequestScheduler(RateLimiter(["k"]), max_concurrency=1, reserved=0,
+                                 weights={INTERACTIVE: 3, BULK: 1})
+    await scheduler.acquire("ip", BULK)
+    order = []
+
+    async def call(name):
+        await scheduler.acquire("ip", name)
+        order.append(name)
+        await asyncio.sleep(0)
+        scheduler.release(name)
+
+    tasks = [asyncio.ensure_future(call(name)) for name in [BULK] * 8 + [INTERACTIVE] * 8]
+    await asyncio.sleep(0)
+    scheduler.release(BULK)
+    await asyncio.gather(*tasks)
+    assert order[:8].count(INTERACTIVE) == 6
+    assert order[:4].count(BULK) == 1
+
+
+def test_priority_context():
+    """测试优先级上下文"""
+    assert current_priority() == INTERACTIVE
+    with priority(BULK):
+        assert current_priority() == BULK
+    assert current_priority() == INTERACTIVE
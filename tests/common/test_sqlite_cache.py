@@ -0,0 +1,111 @@
+import multiprocessing
+import sqlite3
+import time
+
+from build_mcp.common.cache import TTLCache
+from build_mcp.common.sqlite_cache import SQLiteCache, TieredCache
+
+
+def test_sqlite_cache_persist(tmp_path):
+    """测试写入的结果在新的缓存实例（模拟新进程）中仍然可读"""
+    path = str(tmp_path / "cache.db")
+    first = SQLiteCache(path, default_ttl=60)
+    first.set(("ip", ("ip", "1.2.3.4")), {"status": "1", "city": "北京市"})
+    first.close()
+
+    second = SQLiteCache(path)
+    assert second.get(("ip", ("ip", "1.2.3.4"))) == {"status": "1", "city": "北京市"}
+    assert second.get(("ip", ("ip", "5.6.7.8"))) is None
+    stats = second.stats()
+    assert stats["hits"] == 1
+    assert stats["misses"] == 1
+    assert stats["entries"] == 1
+
+
+def test_sqlite_cache_expire_and_namespace(tmp_path, monkeypatch):
+    """测试过期条目视为未命中，不同命名空间互相隔离"""
+    now = [1000.0]
+    monkeypatch.setattr(time, "time", lambda: now[0])
+    path = str(tmp_path / "cache.db")
+    cache = SQLiteCache(path, namespace="https://restapi.amap.com")
+    other = SQLiteCache(path, namespace="http://127.0.0.1:18080")
+    cache.set("a", 1, ttl=10)
+    assert other.get("a") is None
+    assert cache.get("a") == 1
+    now[0] += 11
+    assert cache.get("a") is None
+    assert cache.stats()["expirations"] == 1
+
+
+def test_sqlite_cache_eviction(tmp_path):
+    """测试超过字节上限时淘汰最久未访问的条目"""
+    cache = SQLiteCache(str(tmp_path / "cache.db"), max_bytes=1000)
+    for i in range(20):
+        cache.set(f"k{i}", "x" * 100)
+    cache.purge()
+    stats = cache.stats()
+    assert stats["bytes"] <= 900
+    assert stats["evictions"] > 0
+    assert cache.get("k19") == "x" * 100
+    assert cache.get("k0") is None
+
+
+def _writer(path, worker):
+    cache = SQLiteCache(path)
+    for i in range(100):
+        cache.set(f"{worker}-{i}", {"worker": worker, "i": i})
+    assert cache.errors == 0
+
+
+def test_sqlite_cache_multi_process(tmp_path):
+    """测试多个进程同时写入同一个数据库"""
+    path = str(tmp_path / "cache.db")
+    ctx = multiprocessing.get_context("spawn")
+    processes = [ctx.Process(target=_writer, args=(path, w)) for w in range(4)]
+    for p in processes:
+        p.start()
+    for p in processes:
+        p.join(30)
+        assert p.exitcode == 0
+    cache = SQLiteCache(path)
+    assert len(cache) == 400
+    assert cache.get("3-99") == {"worker": 3, "i": 99}
+
+
+async def test_tiered_cache_promote(tmp_path):
+    """测试 L1 未命中时从 L2 读取并回填 L1"""
+    path = str(tmp_path / "cache.db")
+    first = TieredCache(TTLCache(), SQLiteCache(path))
+    first.set("a", {"v": 1}, ttl=60)
+    first.close()
+
+    cache = TieredCache(TTLCache(), SQLiteCache(path))
+    assert await cache.aget("a") == {"v": 1}
+    assert cache.l1.peek("a") == {"v": 1}
+    assert await cache.aget("a") == {"v": 1}
+    stats = cache.stats()
+    assert stats["hits"] == 1
+    assert stats["disk"]["hits"] == 1
+    assert stats["disk"]["entries"] == 1
+    cache.close()
+
+
+def test_tiered_cache_write_behind(tmp_path):
+    """测试其他进程持有写锁时写入不阻塞调用方，锁释放后在后台完成"""
+    path = str(tmp_path / "cache.db")
+    cache = TieredCache(TTLCache(), SQLiteCache(path, timeout=5))
+    len(cache.l2)
+    other = sqlite3.connect(path, isolation_level=None)
+    other.execute("BEGIN IMMEDIATE")
+
+    start = time.perf_counter()
+    cache.set("a", {"v": 1}, ttl=60)
+    assert time.perf_counter() - start < 0.5
+    assert cache.get("a") == {"v": 1}
+
+    other.execute("COMMIT")
+    other.close()
+    cache.l2.flush()
+    assert cache.l2.peek("a") == {"v": 1}
+    assert cache.l2.stats()["entries"] == 1
+    cache.close()
@@ -0,0 +1,33 @@
+import logging
+
+import httpx
+import pytest_asyncio
+
+from benchmarks.mock_amap import MockAmap
+from build_mcp.services.gd_sdk import GdSDK
+
+
+@pytest_asyncio.fixture
+async def make_sdk():
+    """
+    创建请求替身上游的 GdSDK 的工厂。
+
+    upstream 为 MockAmap 时经 ASGITransport 调用替身服务，否则作为 httpx.MockTransport 的处理函数；
+    config 覆盖默认配置。被替换掉的原 HTTP 客户端在用例结束时关闭，SDK 本身仍由用例负责关闭。
+    """
+    replaced = []
+
+    def make(upstream, **config) -> GdSDK:
+        sdk = GdSDK({"base_url": "http://amap.test", "api_key": "k", "max_retries": 0, **config},
+                    logger=logging.getLogger("GdSDK"))
+        if isinstance(upstream, MockAmap):
+            transport = httpx.ASGITransport(app=upstream.app())
+        else:
+            transport = httpx.MockTransport(upstream)
+        replaced.append(sdk._client)
+        sdk._client = httpx.AsyncClient(transport=transport)
+        return sdk
+
+    yield make
+    for client in replaced:
+        await client.aclose()
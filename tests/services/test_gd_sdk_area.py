@@ -0,0 +1,53 @@
+import pytest
+
+from benchmarks.mock_amap import MockAmap
+from build_mcp.common.geo import Area, parse_location
+from build_mcp.services.gd_sdk import GdSDK
+
+POLYGON = "116.36,39.88;116.44,39.88;116.44,39.94;116.36,39.94"
+PATH = "116.30,39.90;116.40,39.92;116.50,39.92"
+
+
+@pytest.fixture
+def make_sdk(make_sdk):
+    def make(mock: MockAmap, **config) -> GdSDK:
+        return make_sdk(mock, rate_limit={"enabled": False}, **config)
+
+    return make
+
+
+async def test_search_polygon(make_sdk):
+    """测试多边形区域搜索：子区域并发查询，去重后只保留区域内的 POI"""
+    mock = MockAmap(pois=40)
+    async with make_sdk(mock) as sdk:
+        result = await sdk.search_area(polygon=POLYGON, keywords="餐厅", tile_radius=1500)
+    assert result["complete"] and result["failed_tiles"] == 0
+    assert result["tiles"] == len(Area(polygon=POLYGON).tiles(1500))
+    pois = result["pois"]
+    assert pois and int(result["count"]) == len(pois)
+    assert len({poi["id"] for poi in pois}) == len(pois)
+    area = Area(polygon=POLYGON)
+    assert all(area.contains(*zip(parse_location(poi["location"]))) == [True] for poi in pois)
+    assert all("distance" not in poi for poi in pois)
+
+
+async def test_search_path(make_sdk):
+    """测试路线走廊搜索：distance 为到路线的距离并按距离排序"""
+    async with make_sdk(MockAmap(pois=40)) as sdk:
+        result = await sdk.search_area(path=PATH, buffer=300, keywords="加油站", tile_radius=1000, max_results=10)
+    distances = [int(poi["distance"]) for poi in result["pois"]]
+    assert 0 < len(distances) <= 10
+    assert distances == sorted(distances)
+    assert max(distances) <= 300
+
+
+async def test_search_area_limits(make_sdk):
+    """测试子区域数上限和部分子区域失败"""
+    async with make_sdk(MockAmap(pois=10), max_area_tiles=5) as sdk:
+        with pytest.raises(ValueError):
+            await sdk.search_area(polygon=POLYGON, tile_radius=1000)
+
+    async with make_sdk(MockAmap(pois=10, error_rate=0.3, seed=3)) as sdk:
+        result = await sdk.search_area(polygon=POLYGON, tile_radius=1000)
+    assert 0 < result["failed_tiles"] < result["tiles"]
+    assert result["complete"] is False
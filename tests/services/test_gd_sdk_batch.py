@@ -0,0 +1,47 @@
+import asyncio
+
+import httpx
+import pytest_asyncio
+
+
+@pytest_asyncio.fixture
+async def sdk(make_sdk):
+    state = {"active": 0, "peak": 0}
+
+    async def handler(request: httpx.Request):
+        state["active"] += 1
+        state["peak"] = max(state["peak"], state["active"])
+        await asyncio.sleep(0.01)
+        state["active"] -= 1
+        if request.url.path == "/v3/ip":
+            ip = request.url.params.get("ip")
+            if ip == "0.0.0.0":
+                return httpx.Response(200, json={"status": "0", "info": "INVALID_PARAMS"})
+            return httpx.Response(200, json={"status": "1", "city": ip})
+        location = request.url.params.get("location")
+        return httpx.Response(200, json={"status": "1", "count": "0", "pois": [], "location": location})
+
+    async with make_sdk(handler, cache={"enabled": False}) as client:
+        client.state = state
+        yield client
+
+
+async def test_locate_ips_order_and_failures(sdk):
+    """测试批量定位保持顺序、单个失败不影响其他条目并遵守并发上限"""
+    ips = [f"10.0.0.{i}" for i in range(20)]
+    ips[5] = "0.0.0.0"
+    items = await sdk.locate_ips(ips, concurrency=4)
+    assert [item["ip"] for item in items] == ips
+    assert [item["data"]["city"] for item in items if item["success"]] == ips[:5] + ips[6:]
+    assert not items[5]["success"]
+    assert items[5]["error"]
+    assert sdk.state["peak"] <= 4
+
+
+async def test_search_nearby_batch(sdk):
+    """测试批量周边搜索"""
+    queries = [{"location": f"116.{i},39.9", "keywords": "学校"} for i in range(5)]
+    queries.append({"location": "116.1,39.9", "unknown": 1})
+    items = await sdk.search_nearby_batch(queries)
+    assert [item["success"] for item in items] == [True] * 5 + [False]
+    assert items[2]["data"]["location"] == "116.2,39.9"
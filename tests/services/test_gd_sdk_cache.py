@@ -0,0 +1,73 @@
+import asyncio
+
+import httpx
+import pytest_asyncio
+
+
+@pytest_asyncio.fixture
+async def sdk(make_sdk):
+    calls = []
+
+    async def handler(request: httpx.Request):
+        calls.append(request)
+        await asyncio.sleep(0.01)
+        if request.url.path == "/v3/ip":
+            return httpx.Response(200, json={"status": "1", "province": "北京市", "city": "北京市"})
+        return httpx.Response(200, json={"status": "1", "count": "1", "pois": [{"id": "B0001", "name": "学校"}]})
+
+    async with make_sdk(handler) as client:
+        client.calls = calls
+        yield client
+
+
+async def test_locate_ip_cached(sdk):
+    """测试相同 IP 第二次查询命中缓存"""
+    first = await sdk.locate_ip("1.2.3.4")
+    second = await sdk.locate_ip("1.2.3.4")
+    assert first == second
+    assert len(sdk.calls) == 1
+    stats = sdk.cache_stats()
+    assert stats["hits"] == 1
+    assert stats["misses"] == 1
+
+
+async def test_search_nearby_coalesced(sdk):
+    """测试并发的相同周边搜索只发起一次上游请求"""
+    results = await asyncio.gather(*(
+        sdk.search_nearby(location="116.397128,39.916527", keywords="学校") for _ in range(8)
+    ))
+    assert all(r["pois"][0]["id"] == "B0001" for r in results)
+    assert len(sdk.calls) == 1
+    assert sdk.cache_stats()["coalesced"] == 7
+
+
+async def test_throttled_retry_uses_limiter(make_sdk):
+    """测试上游限流时暂停当前 Key 并换用其他 Key 重试"""
+    keys = []
+
+    async def handler(request: httpx.Request):
+        key = request.url.params["key"]
+        keys.append(key)
+        if key == "k1":
+            return httpx.Response(200, json={"status": "0", "infocode": "10021", "info": "CUQPS_HAS_EXCEEDED_THE_LIMIT"})
+        return httpx.Response(200, json={"status": "1", "province": "北京市"})
+
+    async with make_sdk(handler, api_key="k1", api_keys=["k2"], max_retries=2, retry_delay=10,
+                        rate_limit={"qps": 50}) as client:
+        result = await asyncio.wait_for(client.locate_ip("1.2.3.4"), timeout=2)
+    assert result["province"] == "北京市"
+    assert keys == ["k1", "k2"]
+
+
+async def test_sqlite_backend_shared_across_instances(make_sdk, tmp_path):
+    """测试 sqlite 缓存后端：新的 SDK 实例（模拟新的 stdio 进程）复用之前的结果"""
+    calls = []
+
+    async def handler(request: httpx.Request):
+        calls.append(request)
+        return httpx.Response(200, json={"status": "1", "province": "北京市", "city": "北京市"})
+
+    for _ in range(2):
+        async with make_sdk(handler, cache={"backend": "sqlite", "path": str(tmp_path / "cache.db")}) as client:
+            assert (await client.locate_ip("1.2.3.4"))["city"] == "北京市"
+    assert len(calls) == 1
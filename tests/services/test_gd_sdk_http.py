@@ -0,0 +1,63 @@
+import asyncio
+import logging
+
+import httpx
+
+from build_mcp.services import server
+from build_mcp.services.gd_sdk import GdSDK
+
+
+async def test_http_client_config():
+    """测试连接池和超时配置生效，缺少 h2 时回退为 HTTP/1.1"""
+    config = {
+        "base_url": "http://amap.test",
+        "http": {
+            "max_connections": 7,
+            "max_keepalive_connections": 3,
+            "keepalive_expiry": 12,
+            "http2": True,
+            "timeout": {"connect": 1, "read": 4},
+        },
+    }
+    async with GdSDK(config, logger=logging.getLogger("GdSDK")) as sdk:
+        assert sdk.limits.max_connections == 7
+        assert sdk.limits.keepalive_expiry == 12
+        assert sdk._client.timeout.connect == 1
+        assert sdk._client.timeout.read == 4
+        stats = sdk.pool_stats()
+        assert stats["connections"] == 0
+        assert stats["max_connections"] == 7
+        assert stats["utilization"] == 0
+
+
+async def test_warmup_once(make_sdk):
+    """测试连接预热只执行一次且不消耗接口配额"""
+    requests = []
+
+    async def handler(request: httpx.Request):
+        requests.append(request)
+        return httpx.Response(200)
+
+    async with make_sdk(handler, rate_limit={"qps": 1}, http={"warmup": 3}) as sdk:
+        assert await sdk.warmup() == 3
+        assert await sdk.warmup() == 0
+    assert len(requests) == 3
+    assert all(request.method == "HEAD" for request in requests)
+    assert sdk.rate_limit_stats()["endpoints"] == {}
+
+
+async def test_server_warmup_once(monkeypatch):
+    """测试无状态 HTTP 模式下每个请求进入一次 lifespan 时，服务进程仍只预热一次"""
+    calls = []
+
+    async def warmup():
+        calls.append(1)
+
+    monkeypatch.setattr(server, "_warmup", warmup)
+    monkeypatch.setattr(server, "_warmup_started", False)
+    monkeypatch.setitem(server.config, "http", {"warmup": 2})
+    for _ in range(3):
+        async with server.lifespan(server.mcp):
+            pass
+    await asyncio.sleep(0)
+    assert calls == [1]
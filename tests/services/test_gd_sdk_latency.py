@@ -0,0 +1,102 @@
+import asyncio
+import time
+
+import httpx
+import pytest
+
+from build_mcp.common.latency import deadline
+from build_mcp.services.gd_sdk import UPSTREAM_HEDGES, GdSDK
+
+IP_RESULT = {"status": "1", "province": "北京市", "city": "北京市"}
+
+
+@pytest.fixture
+def make_sdk(make_sdk):
+    def make(handler, rate_limit=None, **latency) -> GdSDK:
+        return make_sdk(handler, cache={"enabled": False}, rate_limit=rate_limit or {"enabled": False},
+                        max_retries=2, retry_delay=0.01,
+                        latency={"min_samples": 5, "hedge_min_delay": 0.01, **latency})
+
+    return make
+
+
+def prime(sdk: GdSDK, seconds: float = 0.01, count: int = 20):
+    for _ in range(count):
+        sdk.latency.observe("ip", seconds)
+
+
+async def test_hedge_wins_over_slow_request(make_sdk):
+    """测试原请求超过近期 p95 未返回时发出对冲请求，取先返回的结果"""
+    calls = 0
+
+    async def handler(request: httpx.Request):
+        nonlocal calls
+        calls += 1
+        if calls == 1:
+            await asyncio.sleep(1)
+        return httpx.Response(200, json=IP_RESULT)
+
+    sdk = make_sdk(handler, hedge=True)
+    prime(sdk)
+    won = UPSTREAM_HEDGES.labels("ip", "won").value
+    start = time.perf_counter()
+    result = await sdk.locate_ip("1.1.1.1")
+    assert result["city"] == "北京市"
+    assert time.perf_counter() - start < 0.5
+    assert calls == 2
+    assert UPSTREAM_HEDGES.labels("ip", "won").value == won + 1
+    await sdk.close()
+
+
+async def test_hedge_respects_rate_limit(make_sdk):
+    """测试限流配额不足时不发出对冲请求"""
+    calls = 0
+
+    async def handler(request: httpx.Request):
+        nonlocal calls
+        calls += 1
+        await asyncio.sleep(0.1)
+        return httpx.Response(200, json=IP_RESULT)
+
+    sdk = make_sdk(handler, rate_limit={"qps": 1, "burst": 1}, hedge=True)
+    prime(sdk)
+    skipped = UPSTREAM_HEDGES.labels("ip", "skipped").value
+    assert await sdk.locate_ip("1.1.1.1")
+    assert calls == 1
+    assert UPSTREAM_HEDGES.labels("ip", "skipped").value == skipped + 1
+    await sdk.close()
+
+
+async def test_adaptive_timeout_retries_stuck_request(make_sdk):
+    """测试单次请求超过自适应超时后立即重试，而不是等待客户端的固定超时"""
+    calls = 0
+
+    async def handler(request: httpx.Request):
+        nonlocal calls
+        calls += 1
+        if calls == 1:
+            await asyncio.sleep(5)
+        return httpx.Response(200, json=IP_RESULT)
+
+    sdk = make_sdk(handler, adaptive_timeout=True, timeout_min=0.05)
+    prime(sdk)
+    start = time.perf_counter()
+    assert await sdk.locate_ip("1.1.1.1")
+    assert time.perf_counter() - start < 1
+    assert calls == 2
+    assert sdk.latency_stats()["ip"]["timeout"] >= 0.05
+    await sdk.close()
+
+
+async def test_deadline_caps_retries(make_sdk):
+    """测试截止时间限制整个调用的耗时，包括重试和退避等待"""
+    async def handler(request: httpx.Request):
+        await asyncio.sleep(5)
+        return httpx.Response(200, json=IP_RESULT)
+
+    sdk = make_sdk(handler)
+    start = time.perf_counter()
+    with deadline(0.2):
+        assert await sdk.locate_ip("1.1.1.1") is None
+    assert time.perf_counter() - start < 0.5
+    await sdk.close()
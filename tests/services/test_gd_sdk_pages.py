@@ -0,0 +1,55 @@
+import asyncio
+
+import httpx
+import pytest_asyncio
+
+# 共 60 个 POI，第 25 个在第二页重复出现
+POIS = [{"id": f"P{i}", "name": f"POI{i}", "location": f"116.{400000 + i},39.916527"} for i in range(60)]
+PAGED = POIS[:25] + [POIS[24]] + POIS[25:]
+
+
+@pytest_asyncio.fixture
+async def sdk(make_sdk):
+    state = {"active": 0, "peak": 0, "pages": []}
+
+    async def handler(request: httpx.Request):
+        state["active"] += 1
+        state["peak"] = max(state["peak"], state["active"])
+        await asyncio.sleep(0.02)
+        state["active"] -= 1
+        page_num = int(request.url.params["page_num"])
+        page_size = int(request.url.params["page_size"])
+        state["pages"].append(page_num)
+        pois = PAGED[(page_num - 1) * page_size:page_num * page_size]
+        return httpx.Response(200, json={"status": "1", "count": str(len(PAGED)), "pois": pois})
+
+    async with make_sdk(handler, page_lookahead=3) as client:
+        client.state = state
+        yield client
+
+
+async def test_iter_nearby_all_pages(sdk):
+    """测试自动翻页取完全部结果、按 id 去重并并发预取"""
+    ids = [poi["id"] async for poi in sdk.iter_nearby("116.4,39.9", keywords="学校", radius=5000, page_size=10)]
+    assert ids == [poi["id"] for poi in POIS]
+    assert sorted(sdk.state["pages"]) == list(range(1, 8))
+    assert sdk.state["peak"] > 1
+
+
+async def test_search_nearby_all_max_results(sdk):
+    """测试 max_results 截断结果"""
+    result = await sdk.search_nearby_all("116.4,39.9", radius=5000, page_size=25, max_results=30)
+    assert len(result["pois"]) == 30
+    assert result["count"] == "30"
+    assert result["complete"] is False
+
+
+async def test_search_nearby_all_complete_is_cached(sdk):
+    """测试取完全部结果后写入空间缓存，较小半径的查询不再请求上游"""
+    result = await sdk.search_nearby_all("116.4,39.916527", radius=5000, page_size=25)
+    assert result["complete"] is True
+    assert len(result["pois"]) == 60
+    requests = len(sdk.state["pages"])
+    local = await sdk.search_nearby("116.4,39.916527", radius=100, page_size=25)
+    assert len(sdk.state["pages"]) == requests
+    assert local["pois"]
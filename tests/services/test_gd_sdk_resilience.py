@@ -0,0 +1,128 @@
+import asyncio
+import time
+
+import httpx
+import pytest
+
+from build_mcp.common.cache import collect_stale, mark_stale
+from build_mcp.services import server
+from build_mcp.services.gd_sdk import GdSDK
+
+IP_RESULT = {"status": "1", "province": "北京市", "city": "北京市"}
+
+
+@pytest.fixture
+def make_sdk(make_sdk):
+    def make(handler, **config) -> GdSDK:
+        return make_sdk(handler, **{"rate_limit": {"enabled": False}, "max_retries": 5, "retry_delay": 0.01,
+                                    "backoff_factor": 1, **config})
+
+    return make
+
+
+async def test_circuit_breaker_fails_fast(make_sdk):
+    """测试上游连续失败后熔断，后续调用不再请求上游"""
+    calls = 0
+
+    async def handler(request: httpx.Request):
+        nonlocal calls
+        calls += 1
+        return httpx.Response(500)
+
+    sdk = make_sdk(handler, cache={"enabled": False}, circuit_breaker={"enabled": True, "failure_threshold": 3})
+    assert await sdk.locate_ip("1.1.1.1") is None
+    assert calls == 3
+    start = time.perf_counter()
+    assert await sdk.locate_ip("2.2.2.2") is None
+    assert time.perf_counter() - start < 0.05
+    assert calls == 3
+    stats = sdk.circuit_stats()["ip"]
+    assert stats["state"] == "open"
+    assert stats["rejected"] == 2
+    await sdk.close()
+
+
+async def test_stale_if_error(make_sdk):
+    """测试缓存过期后上游失败时返回旧结果，并标记为过期"""
+    healthy = True
+
+    async def handler(request: httpx.Request):
+        return httpx.Response(200, json=IP_RESULT) if healthy else httpx.Response(503)
+
+    sdk = make_sdk(handler, max_retries=1, cache={"ttl": {"ip": 0.05}, "stale_if_error": 60})
+    assert await sdk.locate_ip("1.1.1.1")
+    await asyncio.sleep(0.1)
+    healthy = False
+    with collect_stale() as stale:
+        result = await sdk.locate_ip("1.1.1.1")
+    assert result["city"] == "北京市"
+    assert len(stale) == 1 and stale[0] >= 0.05
+    with collect_stale() as stale:
+        assert await sdk.locate_ip("3.3.3.3") is None
+    assert not stale
+    await sdk.close()
+
+
+async def test_stale_while_revalidate(make_sdk):
+    """测试过期不久的结果直接返回，同时在后台刷新缓存"""
+    calls = 0
+    release = asyncio.Event()
+
+    async def handler(request: httpx.Request):
+        nonlocal calls
+        calls += 1
+        if calls > 1:
+            await release.wait()
+        return httpx.Response(200, json={**IP_RESULT, "city": f"第{calls}次"})
+
+    sdk = make_sdk(handler, cache={"ttl": {"ip": 60}, "stale_while_revalidate": 60, "stale_if_error": 60})
+    first = await sdk.locate_ip("1.1.1.1")
+    assert first["city"] == "第1次"
+    # 模拟结果已过期 10 秒：L1 中没有，旧结果写入于 70 秒前
+    key = sdk._cache_key("ip", {"ip": "1.1.1.1"})
+    sdk._cache.delete(key)
+    sdk._stale.set(key, (time.time() - 70, first))
+
+    # 后台刷新被阻塞时仍立即返回旧结果
+    with collect_stale() as stale:
+        assert (await sdk.locate_ip("1.1.1.1"))["city"] == "第1次"
+    assert stale and stale[0] >= 70
+    assert len(sdk._background) == 1
+    release.set()
+    await asyncio.gather(*sdk._background)
+    with collect_stale() as stale:
+        assert (await sdk.locate_ip("1.1.1.1"))["city"] == "第2次"
+    assert not stale
+    await sdk.close()
+
+
+async def test_stale_timeout(make_sdk):
+    """测试有旧结果时上游长时间不返回，超过 stale_timeout 后先返回旧结果"""
+    slow = False
+
+    async def handler(request: httpx.Request):
+        if slow:
+            await asyncio.sleep(5)
+        return httpx.Response(200, json=IP_RESULT)
+
+    sdk = make_sdk(handler, cache={"ttl": {"ip": 0.01}, "stale_if_error": 60, "stale_timeout": 0.1})
+    assert await sdk.locate_ip("1.1.1.1")
+    await asyncio.sleep(0.02)
+    slow = True
+    start = time.perf_counter()
+    with collect_stale() as stale:
+        assert await sdk.locate_ip("1.1.1.1")
+    assert time.perf_counter() - start < 0.5
+    assert stale
+    await sdk.close()
+
+
+async def test_stale_meta():
+    """测试返回过期缓存结果时在 meta 中标记 stale"""
+    @server.instrumented("test_stale_tool")
+    async def stale_tool():
+        mark_stale(12.5)
+        return server.ApiResponse.ok(data=1, meta={"ip": "1.1.1.1"})
+
+    result = await stale_tool()
+    assert result.meta == {"ip": "1.1.1.1", "stale": True, "stale_age": 12.5}
@@ -0,0 +1,61 @@
+import asyncio
+import time
+
+import pytest
+
+from benchmarks.mock_amap import MockAmap
+from build_mcp.common.scheduler import BULK, INTERACTIVE
+from build_mcp.services.gd_sdk import GdSDK
+
+POLYGON = "116.36,39.88;116.44,39.88;116.44,39.94;116.36,39.94"
+
+
+@pytest.fixture
+def make_sdk(make_sdk):
+    def make(mock: MockAmap, **config) -> GdSDK:
+        return make_sdk(mock, rate_limit={"enabled": True, "qps": 50, "burst": 1}, cache={"enabled": False},
+                        spatial_cache={"enabled": False}, **config)
+
+    return make
+
+
+async def interactive_latencies(sdk: GdSDK, calls: int = 8) -> list:
+    latencies = []
+    for i in range(calls):
+        await asyncio.sleep(0.05)
+        start = time.perf_counter()
+        assert await sdk.search_nearby(f"116.3{i},39.90", keywords="餐厅")
+        latencies.append(time.perf_counter() - start)
+    return latencies
+
+
+async def test_interactive_not_blocked_by_area_scan(make_sdk):
+    """测试区域搜索占满限流配额时，交互式调用只等待下一个令牌"""
+    mock = MockAmap(pois=10, latency=0.01)
+    async with make_sdk(mock, scheduler={"enabled": True, "max_concurrency": 8, "interactive_reserved": 2}) as sdk:
+        scan = asyncio.ensure_future(sdk.search_area(polygon=POLYGON, tile_radius=1000, concurrency=16))
+        await asyncio.sleep(0.05)
+        latencies = await interactive_latencies(sdk)
+        result = await scan
+        stats = sdk.scheduler_stats()
+
+    assert result["failed_tiles"] == 0
+    assert max(latencies) < 0.15
+    assert stats[INTERACTIVE]["granted"] == 8
+    assert stats[BULK]["granted"] == result["tiles"]
+    # 批量请求在调度器中排队，交互式请求的排队时间不超过一个令牌间隔
+    assert stats[BULK]["wait_p99"] > 0.2
+    assert stats[INTERACTIVE]["max_wait"] < 0.05
+    assert stats[BULK]["inflight"] == stats[INTERACTIVE]["inflight"] == 0
+
+
+async def test_scheduler_disabled(make_sdk):
+    """测试未启用调度器时交互式调用排在已预约配额的批量请求之后"""
+    mock = MockAmap(pois=10, latency=0.01)
+    async with make_sdk(mock) as sdk:
+        scan = asyncio.ensure_future(sdk.search_area(polygon=POLYGON, tile_radius=1000, concurrency=16))
+        await asyncio.sleep(0.05)
+        latencies = await interactive_latencies(sdk, calls=2)
+        await scan
+        assert sdk.scheduler_stats() == {}
+    assert max(latencies) > 0.15
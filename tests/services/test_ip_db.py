@@ -0,0 +1,80 @@
+import asyncio
+import threading
+
+import pytest
+
+from build_mcp.services.ip_db import IpDatabase
+
+CSV = """start_ip,end_ip,province,city,adcode,rectangle
+1.0.1.0,1.0.3.255,福建省,福州市,350100,"119.0,25.9;119.6,26.3"
+36.96.0.0,36.127.255.255,北京市,北京市,110000,"116.0,39.6;116.8,40.2"
+16777216,16777471,广东省,广州市,440100,"113.1,23.0;113.6,23.4"
+"""
+
+
+@pytest.fixture
+def csv_path(tmp_path):
+    path = tmp_path / "ip_ranges.csv"
+    path.write_text(CSV, encoding="utf-8")
+    return str(path)
+
+
+@pytest.mark.parametrize("binary", [False, True])
+def test_lookup(csv_path, tmp_path, binary):
+    """测试 CSV 和二进制两种数据文件的查询结果一致"""
+    path = csv_path
+    if binary:
+        path = str(tmp_path / "ip_ranges.bin")
+        assert IpDatabase.compile(csv_path, path) == 3
+
+    db = IpDatabase(path)
+    result = db.lookup("36.100.1.1")
+    assert result["status"] == "1"
+    assert result["city"] == "北京市"
+    assert result["adcode"] == "110000"
+    assert db.lookup("1.0.0.8")["city"] == "广州市"
+    assert db.lookup("1.0.4.0") is None
+    assert db.lookup("8.8.8.8") is None
+    assert db.lookup("::1") is None
+    assert db.stats()["hits"] == 2
+    db.close()
+
+
+def test_learn_delta(csv_path, tmp_path):
+    """测试上游结果回写增量文件并在重新加载后命中"""
+    delta_path = str(tmp_path / "ip_delta.jsonl")
+    db = IpDatabase(csv_path, delta_path=delta_path)
+    upstream = {"status": "1", "province": "上海市", "city": "上海市", "adcode": "310000", "rectangle": "121.2,31.0;121.7,31.4"}
+    assert db.learn("114.80.1.1", upstream)
+    assert not db.learn("114.80.1.1", upstream)
+    assert not db.learn("114.80.1.2", {"status": "1", "province": [], "city": []})
+    db.flush()
+
+    reloaded = IpDatabase(csv_path, delta_path=delta_path)
+    assert reloaded.lookup("114.80.1.1")["city"] == "上海市"
+    assert reloaded.lookup("114.80.1.2") is None
+
+
+async def test_file_io_off_loop(csv_path, tmp_path, monkeypatch):
+    """测试数据文件加载和增量文件写入都在后台线程中执行，调用方线程不读写文件"""
+    threads = []
+    load_delta, append = IpDatabase._load_delta, IpDatabase._append
+
+    def record(fn):
+        def wrapper(self, *args):
+            threads.append(threading.current_thread())
+            return fn(self, *args)
+        return wrapper
+
+    monkeypatch.setattr(IpDatabase, "_load_delta", record(load_delta))
+    monkeypatch.setattr(IpDatabase, "_append", record(append))
+    delta_path = str(tmp_path / "ip_delta.jsonl")
+    db = IpDatabase(csv_path, delta_path=delta_path)
+    await asyncio.gather(db.aload(), db.aload())
+    assert db.lookup("36.100.1.1")["city"] == "北京市"
+    assert db.learn("114.80.1.1", {"status": "1", "province": "上海市", "city": "上海市", "adcode": "310000"})
+    db.close()
+    assert len(threads) == 2 and threading.current_thread() not in threads
+
+    reloaded = IpDatabase(csv_path, delta_path=delta_path)
+    assert reloaded.lookup("114.80.1.1")["adcode"] == "310000"
@@ -0,0 +1,109 @@
+import asyncio
+import gc
+import time
+
+import pytest_asyncio
+
+from benchmarks.mock_amap import MockAmap
+from build_mcp.services import server
+from build_mcp.services.gd_sdk import GdSDK
+
+IP = "8.8.8.8"
+
+
+@pytest_asyncio.fixture
+async def use_sdk(make_sdk):
+    previous = server._sdk
+
+    async def use(mock: MockAmap, **config) -> GdSDK:
+        server._sdk = make_sdk(mock, rate_limit={"enabled": False}, **config)
+        return server._sdk
+
+    yield use
+    sdk, server._sdk = server._sdk, previous
+    if sdk is not previous:
+        await sdk.close()
+
+
+async def test_locate_and_search(use_sdk):
+    """测试一次调用完成 IP 定位和周边搜索"""
+    mock = MockAmap(pois=30)
+    await use_sdk(mock)
+    result = await server.locate_and_search(ip=IP, keywords="餐厅", radius=3000, page_size=5)
+    assert result.success
+    assert result.data.location["location"]
+    assert 0 < len(result.data.nearby.pois) <= 5
+    assert result.meta["speculative"] is None
+    assert mock.requests == 2
+
+    # 与分别调用两个工具的结果一致
+    located = await server.locate_ip(ip=IP)
+    nearby = await server.search_nearby(location=located.data["location"], keywords="餐厅", radius=3000, page_size=5)
+    assert result.data.nearby == nearby.data
+    assert mock.requests == 2
+
+
+async def test_speculative_hit(use_sdk):
+    """测试定位缓存过期后，刷新定位的同时按旧位置提前搜索"""
+    mock = MockAmap(pois=30, latency=0.1)
+    sdk = await use_sdk(mock, cache={"ttl": {"ip": 0.05, "around": 0.05}, "stale_if_error": 60})
+    await server.locate_and_search(ip=IP, keywords="餐厅")
+    await asyncio.sleep(0.1)
+
+    start = time.perf_counter()
+    result = await server.locate_and_search(ip=IP, keywords="餐厅")
+    elapsed = time.perf_counter() - start
+    assert result.success and result.meta["speculative"] == "hit"
+    # 定位和搜索并行执行，只等待一次上游延迟
+    assert elapsed < 0.18
+    assert mock.requests == 4
+
+    result = await server.locate_and_search(ip=IP, keywords="餐厅", speculative=False)
+    assert result.meta["speculative"] is None
+    assert sdk.peek_ip("1.2.3.4") is None
+
+
+async def test_speculative_miss(use_sdk):
+    """测试刷新后的位置与缓存不一致时按新位置重新搜索"""
+    mock = MockAmap(pois=30)
+    sdk = await use_sdk(mock, cache={"stale_if_error": 60})
+    moved = {"status": "1", "province": "北京市", "city": "北京市", "rectangle": "116.0,39.0;116.2,39.2"}
+    sdk._stale.set(sdk._cache_key("ip", {"ip": IP}), (time.time() - 7200, moved))
+
+    result = await server.locate_and_search(ip=IP, keywords="餐厅")
+    assert result.success and result.meta["speculative"] == "miss"
+    assert result.data.location["location"] != "116.100000,39.100000"
+    assert server.SPECULATIVE_SEARCHES.labels("miss").value >= 1
+    expected = await sdk.search_nearby(location=result.data.location["location"], keywords="餐厅")
+    assert [poi["id"] for poi in result.data.nearby.pois] == [poi["id"] for poi in expected["pois"]]
+
+
+async def test_speculative_miss_failure(use_sdk, monkeypatch):
+    """测试位置已变化时放弃的提前搜索在取消过程中抛出异常，其异常也被取回，事件循环不报告未取回的异常"""
+    mock = MockAmap(pois=30)
+    sdk = await use_sdk(mock, cache={"stale_if_error": 60})
+    moved = {"status": "1", "province": "北京市", "city": "北京市", "rectangle": "116.0,39.0;116.2,39.2"}
+    sdk._stale.set(sdk._cache_key("ip", {"ip": IP}), (time.time() - 7200, moved))
+    search_nearby = sdk.search_nearby
+
+    async def failing(location, **kwargs):
+        if location == "116.100000,39.100000":
+            try:
+                await asyncio.sleep(10)
+            finally:
+                raise RuntimeError("speculative search failed")
+        return await search_nearby(location=location, **kwargs)
+
+    monkeypatch.setattr(sdk, "search_nearby", failing)
+    loop = asyncio.get_running_loop()
+    errors = []
+    handler = loop.get_exception_handler()
+    loop.set_exception_handler(lambda _, context: errors.append(context))
+    try:
+        result = await server.locate_and_search(ip=IP, keywords="餐厅")
+        assert result.success and result.meta["speculative"] == "miss"
+        await asyncio.sleep(0)
+        gc.collect()
+    finally:
+        loop.set_exception_handler(handler)
+    assert errors == []
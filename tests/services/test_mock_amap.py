@@ -0,0 +1,40 @@
+import pytest_asyncio
+
+from benchmarks.mock_amap import MockAmap
+
+
+@pytest_asyncio.fixture
+async def sdk(make_sdk):
+    async with make_sdk(MockAmap(pois=60)) as client:
+        yield client
+
+
+async def test_locate_ip(sdk):
+    """测试替身服务返回确定性的 IP 定位结果"""
+    first = await sdk.locate_ip("8.8.8.8")
+    sdk._cache.clear()
+    second = await sdk.locate_ip("8.8.8.8")
+    assert first["province"] and first["rectangle"]
+    assert first == second
+
+
+async def test_search_nearby_all_pages(sdk):
+    """测试替身服务分页结果与总数一致"""
+    first = await sdk.search_nearby(location="116.397128,39.916527", keywords="餐厅", radius=3000, page_size=25)
+    total = int(first["count"])
+    assert 0 < total <= 60
+    result = await sdk.search_nearby_all(location="116.397128,39.916527", keywords="餐厅", radius=3000, page_size=10)
+    assert result["complete"]
+    assert len(result["pois"]) == total
+    assert all(int(poi["distance"]) <= 3000 for poi in result["pois"])
+
+
+async def test_server_errors_and_bursts(make_sdk):
+    """测试替身服务的错误率和 429 限流突发"""
+    async with make_sdk(MockAmap(error_rate=1.0)) as sdk:
+        assert await sdk.locate_ip("1.2.3.4") is None
+
+    mock = MockAmap(burst_interval=60, burst_duration=60)
+    async with make_sdk(mock) as sdk:
+        assert await sdk.search_nearby(location="116.397128,39.916527") is None
+    assert mock.status_counts == {429: 1}
@@ -0,0 +1,69 @@
+import pydantic_core
+import pytest
+
+from build_mcp.services.models import DEFAULT_POI_FIELDS, ApiResponse, PoiPage, ip_location, poi_page, project_items, resolve_poi_fields
+
+RAW_POI = {
+    "id": "B000A7BD6C",
+    "name": "北京大学",
+    "location": "116.310003,39.991957",
+    "address": [],
+    "distance": "1024",
+    "type": "科教文化服务;学校;高等院校",
+    "typecode": "141201",
+    "pname": "北京市",
+    "cityname": "北京市",
+    "adname": "海淀区",
+    "pcode": "110000",
+    "citycode": "010",
+    "adcode": "110108",
+    "business": {"tel": "010-62752114", "rating": "4.9"},
+    "photos": [{"url": "http://store.is.autonavi.com/showpic/xxx"}] * 3,
+}
+
+
+def test_poi_page_default_fields():
+    """测试周边搜索结果默认只保留常用字段，并规范字段类型"""
+    page = poi_page({"status": "1", "count": "30", "pois": [RAW_POI] * 2})
+    data = page.model_dump(mode="json")
+    assert data["count"] == 30
+    assert "complete" not in data
+    poi = data["pois"][0]
+    # address 为空列表时视为缺失，不出现在结果中
+    assert set(poi) == set(DEFAULT_POI_FIELDS) - {"address"}
+    assert poi["distance"] == 1024
+
+
+def test_poi_page_projection():
+    """测试 fields 投影和全部字段"""
+    page = poi_page({"count": "1", "pois": [RAW_POI], "complete": True}, ["name", "distance"])
+    assert page.model_dump(mode="json") == {"count": 1, "pois": [{"name": "北京大学", "distance": 1024}], "complete": True}
+
+    full = poi_page({"count": "1", "pois": [RAW_POI]}, ["*"]).model_dump(mode="json")
+    assert full["pois"][0]["adname"] == "海淀区"
+
+    with pytest.raises(ValueError):
+        resolve_poi_fields(["name", "photos"])
+
+
+def test_ip_location_center():
+    """测试 IP 定位结果计算 rectangle 中心点"""
+    data = {"status": "1", "province": "北京市", "city": "北京市", "adcode": "110000",
+            "rectangle": "116.0,39.0;117.0,40.0"}
+    assert ip_location(data)["location"] == "116.500000,39.500000"
+    assert ip_location(data, ["city"]) == {"city": "北京市"}
+    assert ip_location({"province": [], "city": []}) == {}
+
+
+def test_project_items_and_payload_size():
+    """测试批量结果投影，且精简后的响应明显小于原始响应"""
+    raw = {"status": "1", "info": "OK", "infocode": "10000", "count": "25", "pois": [RAW_POI] * 25}
+    items = [{"query": {}, "success": True, "data": raw, "error": None},
+             {"query": {}, "success": False, "data": None, "error": "超时"}]
+    projected = project_items(items, poi_page, None)
+    assert isinstance(projected[0]["data"], PoiPage)
+    assert projected[1] is items[1]
+
+    lean = pydantic_core.to_json(ApiResponse.ok(poi_page(raw)))
+    full = pydantic_core.to_json(ApiResponse.ok(raw))
+    assert len(lean) * 3 < len(full)
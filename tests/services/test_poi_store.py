@@ -0,0 +1,178 @@
+import asyncio
+import sqlite3
+import threading
+
+import pytest
+
+from benchmarks.mock_amap import MockAmap
+from build_mcp.common.geo import haversine, parse_location
+from build_mcp.services.gd_sdk import GdSDK
+from build_mcp.services.poi_store import PoiStore
+
+CENTER = "116.397128,39.916527"
+NEAR = "116.399000,39.915000"
+
+
+@pytest.fixture
+def make_sdk(make_sdk):
+    def make(mock: MockAmap, path, **config) -> GdSDK:
+        return make_sdk(mock, **{"rate_limit": {"enabled": False}, "cache": {"enabled": False},
+                                 "spatial_cache": {"enabled": False},
+                                 "poi_store": {"enabled": True, "path": str(path)}, **config})
+
+    return make
+
+
+def within(pois, location, radius):
+    lng, lat = parse_location(location)
+    ranked = sorted((haversine(lng, lat, *parse_location(poi["location"])), poi["id"]) for poi in pois)
+    return [poi_id for d, poi_id in ranked if d <= radius]
+
+
+async def test_harvest_then_local_lookup(make_sdk, tmp_path):
+    """测试完整采集过的范围内，周边搜索在本地回答且不请求上游"""
+    mock = MockAmap(pois=200)
+    async with make_sdk(mock, tmp_path / "poi.db") as sdk:
+        harvest = await sdk.search_nearby_all(CENTER, keywords="餐厅", radius=3000)
+        requests = mock.requests
+        result = await sdk.search_nearby(NEAR, keywords="餐厅", radius=1000, page_size=10)
+        assert mock.requests == requests
+        expected = within(harvest["pois"], NEAR, 1000)
+        assert int(result["count"]) == len(expected)
+        assert [poi["id"] for poi in result["pois"]] == expected[:10]
+        page = await sdk.search_nearby(NEAR, keywords="餐厅", radius=1000, page_num=2, page_size=10)
+        assert [poi["id"] for poi in page["pois"]] == expected[10:20]
+
+        # 查询条件不同、超出采集范围时仍然请求上游
+        await sdk.search_nearby(NEAR, keywords="学校", radius=1000)
+        await sdk.search_nearby(CENTER, keywords="餐厅", radius=5000)
+        assert mock.requests == requests + 2
+        stats = sdk.cache_stats()["poi_store"]
+        assert stats["hits"] == 2 and stats["pois"] >= len(harvest["pois"])
+
+    # 重启后从数据库载入
+    async with make_sdk(mock, tmp_path / "poi.db") as sdk:
+        result = await sdk.search_nearby(NEAR, keywords="餐厅", radius=1000, page_size=10)
+        assert mock.requests == requests + 2
+        assert [poi["id"] for poi in result["pois"]] == expected[:10]
+        nearest = sdk.poi_store.nearest(NEAR, k=3, keywords="餐厅")
+        assert [poi["id"] for poi in nearest["pois"]] == within(harvest["pois"], NEAR, 3000)[:3]
+
+
+async def test_refresh_stale_tiles(make_sdk, tmp_path):
+    """测试少数单元过期时只刷新这些单元，再在本地回答"""
+    mock = MockAmap(pois=200)
+    async with make_sdk(mock, tmp_path / "poi.db", poi_store={"enabled": True, "path": str(tmp_path / "poi.db"),
+                                                              "max_refresh_tiles": 2}) as sdk:
+        await sdk.search_nearby_all(CENTER, keywords="餐厅", radius=3000)
+        store = sdk.poi_store
+        assert store.stale_tiles(NEAR, "餐厅", "", 1000) == []
+        tiles = store._tiles[("餐厅", "")]
+        cells = [cell for cell, _ in store._cells(*parse_location(NEAR), 1000)]
+        for cell in cells[:2]:
+            tiles[cell] = 0
+        assert sorted(store.stale_tiles(NEAR, "餐厅", "", 1000)) == sorted(cells[:2])
+
+        requests = mock.requests
+        result = await sdk.search_nearby(NEAR, keywords="餐厅", radius=1000)
+        assert result is not None and mock.requests - requests == 2
+        assert store.stale_tiles(NEAR, "餐厅", "", 1000) == []
+
+        # 过期单元超过上限时按原查询请求上游
+        for cell in cells[:3]:
+            tiles[cell] = 0
+        assert store.refresh_plan(NEAR, "餐厅", "", 1000, max_tiles=2) is None
+        requests = mock.requests
+        await sdk.search_nearby(NEAR, keywords="餐厅", radius=1000)
+        assert mock.requests == requests + 1
+
+
+async def test_search_nearest_local(make_sdk, tmp_path):
+    """测试最近 POI 搜索在已采集的范围内用本地 KD 树回答，超出范围时请求上游"""
+    mock = MockAmap(pois=200)
+    async with make_sdk(mock, tmp_path / "poi.db") as sdk:
+        harvest = await sdk.search_nearby_all(CENTER, keywords="餐厅", radius=3000)
+        requests = mock.requests
+        result = await sdk.search_nearest(NEAR, k=5, keywords="餐厅")
+        assert mock.requests == requests
+        assert result["rings"] == 0 and result["complete"]
+        assert [poi["id"] for poi in result["pois"]] == within(harvest["pois"], NEAR, 3000)[:5]
+        assert result["radius"] == int(result["pois"][-1]["distance"])
+
+        result = await sdk.search_nearest(NEAR, k=len(harvest["pois"]) + 1, keywords="餐厅")
+        assert result["rings"] >= 1 and mock.requests > requests
+
+
+def test_type_filter_and_removal():
+    """测试按分类编码过滤，以及完整结果中不再出现的 POI 从倒排索引移除"""
+    store = PoiStore(precision=5)
+    pois = [
+        {"id": "A", "location": "116.397200,39.916600", "typecode": "050101"},
+        {"id": "B", "location": "116.398000,39.916527", "typecode": "060100"},
+        {"id": "C", "location": "116.399000,39.917000", "typecode": "050301|060100"},
+    ]
+    store.ingest(CENTER, "", "", 20000, {"pois": pois}, complete=True)
+    result = store.lookup(CENTER, "", "050000", 500)
+    assert [poi["id"] for poi in result["pois"]] == ["A", "C"]
+    assert store.lookup(CENTER, "", "餐饮服务", 500) is None
+    assert [poi["id"] for poi in store.nearest(CENTER, 5, types="060100", max_radius=10000)["pois"]] == ["B", "C"]
+    assert [poi["id"] for poi in store.nearest(CENTER, 2)["pois"]] == ["A", "B"]
+    # 不足 k 个时需要 max_radius 内都已采集
+    assert store.nearest(CENTER, 5) is None
+
+    store.ingest(CENTER, "", "", 20000, {"pois": pois[:2]}, complete=True)
+    assert [poi["id"] for poi in store.lookup(CENTER, radius=500)["pois"]] == ["A", "B"]
+
+
+async def test_database_off_loop(tmp_path, monkeypatch):
+    """测试载入和写入数据库都在后台线程中执行，调用方线程不访问 SQLite"""
+    threads = []
+    connect = PoiStore._connect
+
+    def record(self):
+        threads.append(threading.current_thread())
+        return connect(self)
+
+    monkeypatch.setattr(PoiStore, "_connect", record)
+    pois = [{"id": "A", "location": "116.397200,39.916600"}, {"id": "B", "location": "116.398000,39.916527"}]
+    store = PoiStore(path=str(tmp_path / "poi.db"), precision=5)
+    await store.aload()
+    store.ingest(CENTER, "", "", 20000, {"pois": pois}, complete=True)
+    store.close()
+
+    reopened = PoiStore(path=str(tmp_path / "poi.db"), precision=5)
+    await asyncio.gather(reopened.aload(), reopened.aload())
+    assert [poi["id"] for poi in reopened.lookup(CENTER, radius=500)["pois"]] == ["A", "B"]
+    reopened.close()
+    assert threads and threading.current_thread() not in threads
+
+
+async def test_max_pois(tmp_path):
+    """测试超过 max_pois 时淘汰最久没有出现的 POI 并把所在单元改为未采集，重启后只载入上限内的 POI"""
+    path = str(tmp_path / "poi.db")
+    old, new = "116.397050,39.916527", "116.397050,39.926527"
+    store = PoiStore(path=path, precision=7, max_pois=10)
+    await store.aload()
+    store.ingest(old, "", "", 300, {"pois": [{"id": f"A{i}", "location": f"116.3970{i}0,39.916527"}
+                                             for i in range(8)]}, complete=True)
+    assert store.lookup(old, radius=20) is not None
+    store._seen = [seen - 100 for seen in store._seen]
+    store.ingest(new, "", "", 300, {"pois": [{"id": f"B{i}", "location": f"116.3970{i}0,39.926527"}
+                                             for i in range(8)]}, complete=True)
+    assert store.stats()["pois"] == 9 and store.stats()["evictions"] == 7
+    assert store.lookup(old, radius=20) is None
+    assert sorted(poi["id"] for poi in store.lookup(new, radius=20)["pois"]) == [f"B{i}" for i in range(8)]
+    store.close()
+    with sqlite3.connect(path) as conn:
+        assert conn.execute("SELECT COUNT(*) FROM pois").fetchone() == (9,)
+        (tiles,) = conn.execute("SELECT COUNT(*) FROM tiles").fetchone()
+
+    reopened = PoiStore(path=path, precision=7, max_pois=5)
+    await reopened.aload()
+    assert reopened.stats()["pois"] == 5
+    assert all(poi_id.startswith("B") for poi_id in reopened._ids)
+    assert reopened.lookup(new, radius=20) is None
+    reopened.close()
+    with sqlite3.connect(path) as conn:
+        assert conn.execute("SELECT COUNT(*) FROM pois").fetchone() == (5,)
+        assert conn.execute("SELECT COUNT(*) FROM tiles").fetchone()[0] < tiles
@@ -0,0 +1,76 @@
+import pytest
+
+from benchmarks.mock_amap import MockAmap
+from build_mcp.services import server
+from build_mcp.services.gd_sdk import GdSDK
+
+CENTER = "116.397128,39.916527"
+
+
+@pytest.fixture
+def make_sdk(make_sdk):
+    def make(mock: MockAmap, **config) -> GdSDK:
+        return make_sdk(mock, rate_limit={"enabled": False}, **config)
+
+    return make
+
+
+async def test_search_nearest_expands_radius(make_sdk):
+    """测试从小半径开始扩大，返回与全量搜索一致的最近 k 个 POI"""
+    mock = MockAmap(pois=40)
+    async with make_sdk(mock, cache={"enabled": False}, spatial_cache={"enabled": False}) as sdk:
+        result = await sdk.search_nearest(CENTER, k=8, keywords="药店", initial_radius=200, growth=2)
+        rings = mock.requests
+        everything = await sdk.search_nearby_all(CENTER, keywords="药店", radius=3000)
+
+    assert result["complete"] and result["rings"] == rings > 1
+    assert result["radius"] < 3000
+    expected = sorted(everything["pois"], key=lambda poi: int(poi["distance"]))[:8]
+    assert [poi["id"] for poi in result["pois"]] == [poi["id"] for poi in expected]
+    distances = [int(poi["distance"]) for poi in result["pois"]]
+    assert distances == sorted(distances)
+
+
+async def test_search_nearest_page_count(make_sdk):
+    """测试 count 只是当前页数量时，k 大于单页上限仍翻页取够，外圈跳过内圈已取得的页"""
+    mock = MockAmap(pois=80, page_count=True)
+    async with make_sdk(mock, cache={"enabled": False}, spatial_cache={"enabled": False}) as sdk:
+        result = await sdk.search_nearest(CENTER, k=40, initial_radius=800, growth=1.5)
+        requests = mock.requests
+        everything = await sdk.search_nearby_all(CENTER, radius=3000)
+
+    assert result["complete"] and int(result["count"]) == 40
+    expected = sorted(everything["pois"], key=lambda poi: int(poi["distance"]))[:40]
+    assert {poi["id"] for poi in result["pois"]} == {poi["id"] for poi in expected}
+    # 每圈最多 2 页（wanted = 48），内圈取完的整页不再重复获取
+    assert result["rings"] > 1 and requests <= 2 * result["rings"]
+
+
+async def test_search_nearest_limits(make_sdk):
+    """测试达到最大半径时返回全部结果，第一次查询就足够时不扩大半径"""
+    mock = MockAmap(pois=10)
+    async with make_sdk(mock) as sdk:
+        result = await sdk.search_nearest(CENTER, k=50, max_radius=3000)
+        assert result["complete"] and result["radius"] == 3000
+        everything = await sdk.search_nearby_all(CENTER, radius=3000)
+        assert int(result["count"]) == len(everything["pois"]) < 50
+
+        requests = mock.requests
+        result = await sdk.search_nearest(CENTER, k=1, keywords="学校", initial_radius=3000)
+        assert result["rings"] == 1 and mock.requests == requests + 1
+
+        with pytest.raises(ValueError):
+            await sdk.search_nearest(CENTER, k=0)
+
+
+async def test_search_nearest_tool(make_sdk):
+    """测试 search_nearest 工具"""
+    previous = server._sdk
+    server._sdk = make_sdk(MockAmap(pois=40))
+    try:
+        result = await server.search_nearest(location=CENTER, keywords="药店", k=3)
+        assert result.success and len(result.data.pois) == 3
+        assert result.meta["rings"] >= 1 and result.meta["radius"] >= 2000
+    finally:
+        await server._sdk.close()
+        server._sdk = previous
@@ -0,0 +1,17 @@
+import os
+import subprocess
+import sys
+
+
+def test_lazy_startup():
+    """测试导入服务模块时不创建 SDK，也不导入 SDK 模块和 numpy"""
+    code = (
+        "import sys\n"
+        "from build_mcp.services import server\n"
+        "assert server._sdk is None\n"
+        "assert 'build_mcp.services.gd_sdk' not in sys.modules\n"
+        "assert 'numpy' not in sys.modules\n"
+        "assert server.get_sdk() is server.get_sdk()\n"
+    )
+    env = {**os.environ, "PYTHONPATH": os.pathsep.join(sys.path)}
+    subprocess.run([sys.executable, "-c", code], env=env, check=True, capture_output=True, timeout=60)
@@ -0,0 +1,46 @@
+import asyncio
+
+import httpx
+
+from build_mcp.services import server
+from build_mcp.services.serving import create_app
+
+
+async def test_health_and_ready():
+    """测试存活/就绪探针，排空时就绪探针返回 503"""
+    app = create_app()
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://test") as client:
+        health = (await client.get("/healthz")).json()
+        assert health["status"] == "ok"
+        assert health["inflight"] == 0
+        assert (await client.get("/readyz")).status_code == 200
+
+        server.server_state["draining"] = True
+        try:
+            assert (await client.get("/readyz")).status_code == 503
+        finally:
+            server.server_state["draining"] = False
+
+
+async def test_max_concurrency():
+    """测试工具并发上限：超出的调用排队等待"""
+    running = 0
+    peak = 0
+
+    @server.instrumented("test_slow_tool")
+    async def slow_tool():
+        nonlocal running, peak
+        running += 1
+        peak = max(peak, running)
+        await asyncio.sleep(0.02)
+        running -= 1
+        return server.ApiResponse.ok(data=None)
+
+    server.set_max_concurrency(2)
+    try:
+        results = await asyncio.gather(*(slow_tool() for _ in range(6)))
+    finally:
+        server.set_max_concurrency(None)
+    assert all(r.success for r in results)
+    assert peak == 2
+    assert server.TOOL_QUEUED.labels("test_slow_tool").value == 0
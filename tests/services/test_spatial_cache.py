@@ -0,0 +1,53 @@
+from build_mcp.services.spatial_cache import SpatialCache
+
+RESULT = {
+    "status": "1",
+    "count": "3",
+    "pois": [
+        {"id": "A", "name": "近", "location": "116.397200,39.916600"},
+        {"id": "B", "name": "中", "location": "116.401000,39.916527"},
+        {"id": "C", "name": "远", "location": "116.420000,39.916527"},
+    ],
+}
+
+
+def test_spatial_cache_serves_covered_query():
+    """测试被大半径结果覆盖的相近坐标查询在本地过滤返回"""
+    cache = SpatialCache(precision=6)
+    assert cache.store("116.397128,39.916527", "学校", "", 3000, RESULT)
+
+    result = cache.lookup("116.397131,39.916530", "学校", "", 500)
+    assert result is not None
+    assert [poi["id"] for poi in result["pois"]] == ["A", "B"]
+    assert result["count"] == "2"
+    assert int(result["pois"][0]["distance"]) < int(result["pois"][1]["distance"])
+    # 原始结果不会被修改
+    assert "distance" not in RESULT["pois"][0]
+
+
+def test_spatial_cache_miss():
+    """测试关键词不同、半径超出覆盖范围或结果不完整时不命中"""
+    cache = SpatialCache(precision=6)
+    cache.store("116.397128,39.916527", "学校", "", 3000, RESULT)
+    assert cache.lookup("116.397128,39.916527", "餐厅", "", 500) is None
+    assert cache.lookup("116.397128,39.916527", "学校", "", 5000) is None
+    assert not cache.store("116.5,39.9", "学校", "", 1000, RESULT, page_size=3)
+    stats = cache.stats()
+    assert stats["lookups"] == 2
+    assert stats["hits"] == 0
+
+
+def test_spatial_cache_distant_center():
+    """测试中心点在几个单元以外、但完整覆盖查询圆的大半径结果同样命中"""
+    cache = SpatialCache(precision=6)
+    assert cache.store("116.397128,39.916527", "学校", "", 20000, RESULT)
+    assert cache.store("116.397128,39.916527", "医院", "", 600, RESULT)
+
+    # 向东约 8.5km，距离加半径仍在 20km 以内
+    result = cache.lookup("116.497128,39.916527", "学校", "", 1000)
+    assert result is not None and result["count"] == "0"
+    result = cache.lookup("116.424000,39.916527", "学校", "", 600)
+    assert [poi["id"] for poi in result["pois"]] == ["C"]
+    assert cache.lookup("116.497128,39.916527", "学校", "", 12000) is None
+    assert cache.lookup("116.397131,39.916530", "医院", "", 100) is not None
+    assert cache.stats()["hits"] == 3